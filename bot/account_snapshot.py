@@ -0,0 +1,64 @@
+"""
+📸 Snapshot compte - 1 appel positions + 1 appel ordres par clé API et par tick
+
+Au lieu de fetch_positions([symbol]) + fetch_open_orders(symbol) pour chaque
+paire (2×N appels REST par tick), on récupère tout le compte en 2 appels
+(endpoints all-position et orders-pending sans symbole) puis on distribue
+les résultats par symbole.
+
+Usage:
+    snapshot = AccountSnapshot(exchange)
+    snapshot.refresh()
+    snapshot.positions('DOGE/USDT:USDT')   # liste de positions ccxt
+    snapshot.orders('DOGE/USDT:USDT')      # liste d'ordres ouverts ccxt
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AccountSnapshot:
+    """État d'un compte (une clé API) à un instant donné"""
+
+    def __init__(self, exchange):
+        """
+        Args:
+            exchange: Instance ccxt.bitget de la clé API
+        """
+        self.exchange = exchange
+        self.positions_by_symbol = {}
+        self.orders_by_symbol = {}
+        self.timestamp = 0
+
+    def refresh(self):
+        """Récupère TOUTES les positions et TOUS les ordres ouverts du compte (2 appels REST)"""
+        positions = self.exchange.fetch_positions()
+        open_orders = self.exchange.fetch_open_orders()
+
+        positions_by_symbol = {}
+        for pos in positions:
+            positions_by_symbol.setdefault(pos['symbol'], []).append(pos)
+
+        orders_by_symbol = {}
+        for order in open_orders:
+            orders_by_symbol.setdefault(order['symbol'], []).append(order)
+
+        self.positions_by_symbol = positions_by_symbol
+        self.orders_by_symbol = orders_by_symbol
+        self.timestamp = time.time()
+
+        logger.debug(f"Snapshot: {len(positions)} positions, {len(open_orders)} ordres ({len(positions_by_symbol)} paires)")
+
+    def positions(self, symbol):
+        """Positions ccxt du symbole (même format que fetch_positions([symbol]))"""
+        return self.positions_by_symbol.get(symbol, [])
+
+    def orders(self, symbol):
+        """Ordres ouverts ccxt du symbole (même format que fetch_open_orders(symbol))"""
+        return self.orders_by_symbol.get(symbol, [])
+
+    def age(self):
+        """Âge du snapshot en secondes"""
+        return time.time() - self.timestamp
@@ -0,0 +1,278 @@
+"""
+📈 Métriques API - latence et erreurs de chaque appel ccxt
+
+instrument_exchange() enveloppe l'instance ccxt.bitget (sync ou async):
+- méthodes unifiées (fetch_positions, fetch_ticker, create_order...): durée
+  complète, parsing ccxt compris
+- chaque requête HTTP, nommée comme la méthode implicite ccxt
+  (private_mix_post_v2_mix_order_place_tpsl_order...): durée, attente du
+  rate limiter comprise, et erreurs comptées par code Bitget (40915, 43023...)
+
+Les durées vont dans des fenêtres glissantes en mémoire (p50/p95/p99 récents)
+et dans des histogrammes cumulés exposés au format texte Prometheus:
+    start_metrics_server(metrics, port=9108)   # GET /metrics, GET /latency
+
+Usage:
+    metrics = instrument_exchange(exchange)
+    print(metrics.format_report())             # commande Telegram /latency
+"""
+
+import asyncio
+import functools
+import logging
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes Prometheus (secondes)
+BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+WINDOW = 1000  # derniers appels gardés par méthode pour les percentiles
+
+UNIFIED_METHODS = (
+    'fetch_positions', 'fetch_ticker', 'fetch_balance', 'fetch_open_orders', 'fetch_order',
+    'create_order', 'cancel_order', 'cancel_all_orders', 'set_leverage', 'load_markets'
+)
+
+BITGET_CODE = re.compile(r'"code"\s*:\s*"?(\d+)')
+
+
+def error_code(error):
+    """Code Bitget d'une exception ccxt ("code":"40915" dans le message), sinon nom de classe"""
+    match = BITGET_CODE.search(str(error))
+    return match.group(1) if match else type(error).__name__
+
+
+def implicit_name(path, api, method):
+    """Nom de la méthode implicite ccxt: ['private','mix'] POST v2/mix/order/place-order → private_mix_post_..."""
+    parts = list(api) if isinstance(api, (list, tuple)) else [api]
+    return '_'.join(parts + [method.lower()] + re.split(r'[/\-]', path))
+
+
+def percentile(ordered, p):
+    """Percentile d'une liste triée, interpolation linéaire (même résultat que numpy.percentile)"""
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class ApiMetrics:
+    """Latences et erreurs par méthode (thread-safe)"""
+
+    def __init__(self, window=WINDOW, buckets=BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.started = time.time()
+
+        self.recent = defaultdict(lambda: deque(maxlen=window))    # {méthode: durées récentes (s)}
+        self.histograms = defaultdict(lambda: [0] * (len(buckets) + 1))  # {méthode: compteurs par bucket}
+        self.sums = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)                             # {(méthode, code): n}
+
+    def observe(self, method, seconds, error=None):
+        with self.lock:
+            self.recent[method].append(seconds)
+            histogram = self.histograms[method]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[-1] += 1
+            self.sums[method] += seconds
+            self.counts[method] += 1
+            if error is not None:
+                self.errors[(method, error_code(error))] += 1
+
+    def snapshot(self):
+        """{méthode: {'n', 'p50', 'p95', 'p99', 'max', 'errors'}} sur la fenêtre récente (ms)"""
+        with self.lock:
+            recent = {method: sorted(value * 1000 for value in values) for method, values in self.recent.items() if values}
+            errors = dict(self.errors)
+
+        table = {}
+        for method, values in recent.items():
+            table[method] = {
+                'n': len(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': values[-1],
+                'errors': {code: n for (m, code), n in errors.items() if m == method}
+            }
+        return table
+
+    # ========== EXPORTS ==========
+
+    def prometheus(self):
+        """Exposition texte Prometheus (histogramme cumulé + compteur d'erreurs)"""
+        lines = [
+            '# HELP bitget_api_latency_seconds Durée des appels API Bitget',
+            '# TYPE bitget_api_latency_seconds histogram'
+        ]
+        with self.lock:
+            for method in sorted(self.histograms):
+                cumulative = 0
+                for bound, count in zip(self.buckets, self.histograms[method]):
+                    cumulative += count
+                    lines.append(f'bitget_api_latency_seconds_bucket{{method="{method}",le="{bound}"}} {cumulative}')
+                lines.append(f'bitget_api_latency_seconds_bucket{{method="{method}",le="+Inf"}} {self.counts[method]}')
+                lines.append(f'bitget_api_latency_seconds_sum{{method="{method}"}} {self.sums[method]:.6f}')
+                lines.append(f'bitget_api_latency_seconds_count{{method="{method}"}} {self.counts[method]}')
+
+            lines.append('# HELP bitget_api_errors_total Erreurs API par code Bitget')
+            lines.append('# TYPE bitget_api_errors_total counter')
+            for (method, code), count in sorted(self.errors.items()):
+                lines.append(f'bitget_api_errors_total{{method="{method}",code="{code}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def format_report(self, limit=12, html=True):
+        """Résumé lisible (Telegram /latency): méthodes les plus lentes en p95"""
+        table = self.snapshot()
+        if not table:
+            return "📈 Aucun appel API mesuré pour l'instant"
+
+        rows = sorted(table.items(), key=lambda item: item[1]['p95'], reverse=True)[:limit]
+        width = max(len(short_method(method)) for method, _ in rows)
+        lines = [f"{'méthode':<{width}}     n   p50   p95   p99"]
+        for method, row in rows:
+            errors = sum(row['errors'].values())
+            lines.append(f"{short_method(method):<{width}} {row['n']:>5} {row['p50']:>5.0f} {row['p95']:>5.0f} "
+                         f"{row['p99']:>5.0f}" + (f" ❌{errors}" if errors else ""))
+
+        codes = defaultdict(int)
+        for row in table.values():
+            for code, n in row['errors'].items():
+                codes[code] += n
+        uptime = (time.time() - self.started) / 60
+
+        body = '\n'.join(lines)
+        if html:
+            body = body.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        header = (f"📈 <b>LATENCE API</b> ({uptime:.0f} min, ms)" if html
+                  else f"📈 LATENCE API ({uptime:.0f} min, ms)")
+        message = f"{header}\n<pre>{body}</pre>" if html else f"{header}\n{body}"
+        if codes:
+            message += "\n❌ Erreurs: " + ', '.join(f"{code}×{n}" for code, n in
+                                                  sorted(codes.items(), key=lambda item: -item[1]))
+        return message
+
+
+def short_method(method):
+    """private_mix_post_v2_mix_order_place_tpsl_order → POST order_place_tpsl_order"""
+    match = re.match(r'(?:private|public)_[a-z]+_(get|post)_v\d_[a-z]+_(.+)', method)
+    if match:
+        return f"{match.group(1).upper()} {match.group(2)}"
+    return method
+
+
+def instrument_exchange(exchange, metrics=None):
+    """
+    Mesure toutes les requêtes d'une instance ccxt (sync ou async)
+
+    À appeler après install_rate_limiter(): l'attente du limiter est comptée
+    dans la latence de la requête (c'est du temps perdu pour le bot).
+
+    Returns:
+        ApiMetrics (aussi disponible dans exchange.api_metrics)
+    """
+    metrics = metrics or ApiMetrics()
+    fetch2 = exchange.fetch2
+
+    if asyncio.iscoroutinefunction(fetch2):
+        async def timed_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            started = time.perf_counter()
+            try:
+                response = await fetch2(path, api, method, params, headers, body, config)
+            except Exception as e:
+                metrics.observe(implicit_name(path, api, method), time.perf_counter() - started, e)
+                raise
+            metrics.observe(implicit_name(path, api, method), time.perf_counter() - started)
+            return response
+    else:
+        def timed_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            started = time.perf_counter()
+            try:
+                response = fetch2(path, api, method, params, headers, body, config)
+            except Exception as e:
+                metrics.observe(implicit_name(path, api, method), time.perf_counter() - started, e)
+                raise
+            metrics.observe(implicit_name(path, api, method), time.perf_counter() - started)
+            return response
+
+    exchange.fetch2 = timed_fetch2
+
+    # Méthodes unifiées: durée seule (les erreurs sont déjà comptées sur la requête HTTP)
+    for name in UNIFIED_METHODS:
+        method = getattr(exchange, name, None)
+        if method is not None:
+            setattr(exchange, name, _timed_method(method, name, metrics))
+
+    exchange.api_metrics = metrics
+    return metrics
+
+
+def _timed_method(method, name, metrics):
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - started)
+    else:
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - started)
+    return timed
+
+
+# ================================================================================
+# ENDPOINT HTTP
+# ================================================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None  # ApiMetrics (injecté par start_metrics_server)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        if self.path.startswith('/metrics'):
+            body = self.metrics.prometheus()
+            content_type = 'text/plain; version=0.0.4'
+        elif self.path.startswith('/latency'):
+            body = self.metrics.format_report(limit=50, html=False) + '\n'
+            content_type = 'text/plain; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_metrics_server(metrics, port, host='127.0.0.1'):
+    """Sert /metrics (Prometheus) et /latency (texte) dans un thread daemon"""
+    handler = type('BoundMetricsHandler', (_MetricsHandler,), {'metrics': metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"📈 Métriques API sur http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,398 @@
+"""
+⚡ Backtest Hedge Fibonacci V4.1 - Moteur vectorisé NumPy
+
+Même logique que BacktestEngine.run_backtest() (backtest_strategy_v4.py) mais
+sur des colonnes NumPy, sans iterrows() ni dict par bougie:
+- Entre deux changements d'état, la position est figée: l'equity est une
+  fonction du prix, calculée d'un bloc sur un tableau préalloué
+- Le prochain événement (TP, Fibo, liquidation) = premier franchissement des
+  seuils haut/bas, trouvé par scan vectorisé par blocs de taille croissante
+- Seuls les événements (rares) passent par du Python scalaire
+
+Les paramètres de stratégie sont des arguments (et non des globales) pour
+pouvoir balayer des grilles sans modifier le module.
+
+Modes de replay:
+- close: 1 tick par bougie (comportement historique, fill au close)
+- OHLC/OLHC/auto: 4 ticks par bougie (chemin open→high→low→close ou
+  open→low→high→close), fill au niveau franchi dans la bougie
+- trades: ticks bruts lus par blocs depuis un fichier local
+"""
+
+import numpy as np
+
+# Taille du premier bloc scanné après un événement (doublée à chaque bloc vide)
+SCAN_CHUNK_MIN = 256
+SCAN_CHUNK_MAX = 1 << 16
+
+PATH_ORDERS = ('OHLC', 'OLHC', 'auto')
+
+
+def _first_event(close, start, hi, lo, capital, tm_long, avg_long, tm_short, avg_short,
+                 leverage, equity_out):
+    """
+    Cherche le premier index >= start où un événement se produit et remplit
+    equity_out[start:index+1] avec l'état courant.
+
+    Événement = close >= hi, close <= lo ou equity <= 0.
+
+    Returns:
+        int: index de l'événement, ou -1 si aucun jusqu'à la fin
+    """
+    n = close.shape[0]
+    chunk = SCAN_CHUNK_MIN
+    i = start
+
+    while i < n:
+        j = min(i + chunk, n)
+        c = close[i:j]
+
+        # Même ordre d'opérations que update_pnl() → résultats identiques
+        pnl = tm_long * leverage * ((c - avg_long) / avg_long) + tm_short * leverage * ((avg_short - c) / avg_short)
+        eq = capital + pnl
+
+        hit = (c >= hi) | (c <= lo) | (eq <= 0)
+        k = int(hit.argmax())
+
+        if hit[k]:
+            equity_out[i:i + k + 1] = eq[:k + 1]
+            return i + k
+
+        equity_out[i:j] = eq
+        i = j
+        chunk = min(chunk * 2, SCAN_CHUNK_MAX)
+
+    return -1
+
+
+class HedgeSimulator:
+    """
+    État de la stratégie hedge Fibonacci, alimentable par blocs de ticks
+
+    Chaque appel à feed() reprend là où le précédent s'est arrêté, ce qui
+    permet de streamer un fichier de trades sans tout charger en mémoire.
+    """
+
+    def __init__(self, tp_percent, fibo_levels, margin_initial, leverage,
+                 capital_initial, commission_rate):
+        self.tp_percent = tp_percent
+        self.fibo_levels = list(fibo_levels)
+        self.margin_initial = margin_initial
+        self.leverage = leverage
+        self.commission_rate = commission_rate
+        self.notional = margin_initial * leverage
+
+        self.capital = capital_initial
+        self.entry_long = self.avg_long = self.size_long = self.margin_long = self.tm_long = 0.0
+        self.entry_short = self.avg_short = self.size_short = self.margin_short = self.tm_short = 0.0
+        self.tp_long = self.tp_short = 0.0
+        self.fibo_long = []
+        self.fibo_short = []
+
+        self.trades = []
+        self.started = False
+        self.liquidated = False
+        self.ticks_seen = 0
+
+    def open_hedge(self, price, index):
+        """Ouvre LONG + SHORT au prix donné, TP et premier Fibo de chaque côté"""
+        size = self.notional / price
+        self.entry_long = self.avg_long = price
+        self.entry_short = self.avg_short = price
+        self.size_long = self.size_short = size
+        self.margin_long = self.margin_short = self.margin_initial
+        self.tm_long = self.tm_short = self.margin_initial
+
+        self.tp_long = price * (1 + self.tp_percent / 100)
+        self.tp_short = price * (1 - self.tp_percent / 100)
+        self.fibo_long = [price * (1 - self.fibo_levels[0] / 100)]
+        self.fibo_short = [price * (1 + self.fibo_levels[0] / 100)]
+
+        commission = self.notional * 2 * self.commission_rate
+        self.capital -= commission
+        self.trades.append({'index': index, 'type': 'OPEN_HEDGE', 'price': price,
+                            'size': size * 2, 'commission': commission})
+
+    def close_tp(self, side, price, index):
+        """TP touché: profit fixe sur la marge totale, puis réouverture du hedge"""
+        total_margin = self.tm_long if side == 'long' else self.tm_short
+        size = self.size_long if side == 'long' else self.size_short
+        profit = total_margin * self.leverage * (self.tp_percent / 100)
+        self.capital += profit
+        commission = total_margin * self.leverage * self.commission_rate
+        self.capital -= commission
+        self.trades.append({'index': index, 'type': f'TP_{side.upper()}', 'price': price,
+                            'size': size, 'profit': profit, 'commission': commission})
+        self.open_hedge(price, index)
+
+    def double(self, side, fibo_price, price, index):
+        """Fibo touché: double la marge du côté, nouveau TP au prix moyen, niveau suivant"""
+        lev = self.leverage
+        if side == 'long':
+            fibo_index = len(self.fibo_long) - 1
+            new_margin = self.margin_long
+            new_size = (new_margin * lev) / price
+            old_total = self.avg_long * self.size_long
+            self.size_long += new_size
+            self.avg_long = (old_total + fibo_price * new_size) / self.size_long
+            self.tm_long += new_margin
+            self.margin_long = new_margin * 2
+            self.tp_long = self.avg_long * (1 + self.tp_percent / 100)
+            if fibo_index < len(self.fibo_levels) - 1:
+                self.fibo_long.append(self.entry_long * (1 - self.fibo_levels[fibo_index + 1] / 100))
+            new_avg = self.avg_long
+        else:
+            fibo_index = len(self.fibo_short) - 1
+            new_margin = self.margin_short
+            new_size = (new_margin * lev) / price
+            old_total = self.avg_short * self.size_short
+            self.size_short += new_size
+            self.avg_short = (old_total + fibo_price * new_size) / self.size_short
+            self.tm_short += new_margin
+            self.margin_short = new_margin * 2
+            self.tp_short = self.avg_short * (1 - self.tp_percent / 100)
+            if fibo_index < len(self.fibo_levels) - 1:
+                self.fibo_short.append(self.entry_short * (1 + self.fibo_levels[fibo_index + 1] / 100))
+            new_avg = self.avg_short
+
+        commission = new_margin * lev * self.commission_rate
+        self.capital -= commission
+        self.trades.append({'index': index, 'type': f'FIBO_{side.upper()}_{fibo_index + 1}',
+                            'price': fibo_price, 'size': new_size, 'new_avg': new_avg,
+                            'commission': commission})
+
+    def feed(self, prices, fill_at_level=False, gaps=None):
+        """
+        Traite un bloc de ticks
+
+        Args:
+            prices: np.ndarray float64 de prix
+            fill_at_level: False → fill au prix du tick (mode close historique)
+                           True → fill au niveau TP/Fibo franchi (chemin continu)
+            gaps: masque bool optionnel, True = tick en gap (open de bougie):
+                  le fill se fait alors au prix du tick, pas au niveau
+
+        Returns:
+            np.ndarray: equity à chaque tick traité (tronquée si liquidation)
+        """
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        n = prices.shape[0]
+        equity = np.empty(n, dtype=np.float64)
+        offset = self.ticks_seen
+
+        if self.liquidated or n == 0:
+            return equity[:0]
+
+        if not self.started:
+            self.open_hedge(prices[0], offset)
+            self.started = True
+
+        i = 0
+        while i < n:
+            hi = min(self.tp_long, self.fibo_short[0])
+            lo = max(self.tp_short, self.fibo_long[0])
+
+            j = _first_event(prices, i, hi, lo, self.capital, self.tm_long, self.avg_long,
+                             self.tm_short, self.avg_short, self.leverage, equity)
+            if j < 0:
+                break
+
+            price = prices[j]
+            index = offset + j
+            at_level = fill_at_level and (gaps is None or not gaps[j])
+
+            # Liquidation (equity enregistrée avant les événements du tick)
+            if equity[j] <= 0:
+                self.liquidated = True
+                self.ticks_seen += j + 1
+                return equity[:j + 1]
+
+            # TP (le SHORT l'emporte si les deux sont touchés, comme check_tp_hit)
+            tp_hit = None
+            if price >= self.tp_long:
+                tp_hit = 'long'
+            if price <= self.tp_short:
+                tp_hit = 'short'
+
+            if tp_hit:
+                level = self.tp_long if tp_hit == 'long' else self.tp_short
+                self.close_tp(tp_hit, level if at_level else price, index)
+                # Le prix a continué jusqu'au tick: mouvement continu depuis le niveau
+                at_level = fill_at_level
+
+            # Fibo (après un éventuel TP, avec le nouvel état)
+            fibo_hit = None
+            for fibo_price in self.fibo_long:
+                if price <= fibo_price:
+                    fibo_hit = ('long', fibo_price)
+                    break
+            for fibo_price in self.fibo_short:
+                if price >= fibo_price:
+                    fibo_hit = ('short', fibo_price)
+                    break
+
+            if fibo_hit:
+                side, fibo_price = fibo_hit
+                self.double(side, fibo_price, fibo_price if at_level else price, index)
+
+            i = j + 1
+
+        self.ticks_seen += n
+        return equity
+
+
+def simulate(close, tp_percent, fibo_levels, margin_initial, leverage,
+             capital_initial, commission_rate, fill_at_level=False, gaps=None):
+    """
+    Simule la stratégie hedge Fibonacci sur une série de prix
+
+    Args:
+        close: np.ndarray float64 des prix (clôtures ou chemin intrabar)
+        tp_percent: Take Profit en %
+        fibo_levels: Niveaux Fibo en % (liste croissante)
+        margin_initial: Marge par position
+        leverage: Levier
+        capital_initial: Capital de départ
+        commission_rate: Taux de commission (ex: 0.00055)
+        fill_at_level, gaps: voir HedgeSimulator.feed()
+
+    Returns:
+        dict: equity (np.ndarray, taille n_used), n_used, liquidated,
+              capital, trades (liste d'événements avec 'index')
+    """
+    sim = HedgeSimulator(tp_percent, fibo_levels, margin_initial, leverage,
+                         capital_initial, commission_rate)
+    equity = sim.feed(close, fill_at_level=fill_at_level, gaps=gaps)
+
+    return {
+        'equity': equity,
+        'n_used': equity.shape[0],
+        'liquidated': sim.liquidated,
+        'capital': sim.capital,
+        'trades': sim.trades
+    }
+
+
+def ohlc_path(open_, high, low, close, order='auto'):
+    """
+    Construit le chemin intrabar: 4 ticks par bougie
+
+    Args:
+        order: 'OHLC' (open→high→low→close), 'OLHC' (open→low→high→close)
+               ou 'auto' (bougie haussière: low d'abord, baissière: high d'abord)
+
+    Returns:
+        (path, gaps): prix (4×n) et masque des ticks open (fill au prix du tick)
+    """
+    if order not in PATH_ORDERS:
+        raise ValueError(f"Ordre intrabar inconnu: {order} (attendu: {', '.join(PATH_ORDERS)})")
+
+    open_ = np.asarray(open_, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    if order == 'OHLC':
+        high_first = np.ones(open_.shape[0], dtype=bool)
+    elif order == 'OLHC':
+        high_first = np.zeros(open_.shape[0], dtype=bool)
+    else:
+        high_first = close < open_
+
+    first = np.where(high_first, high, low)
+    second = np.where(high_first, low, high)
+    path = np.stack([open_, first, second, close], axis=1).ravel()
+
+    gaps = np.zeros(path.shape[0], dtype=bool)
+    gaps[4::4] = True  # open d'une bougie vs close de la précédente
+
+    return path, gaps
+
+
+def simulate_ohlc(open_, high, low, close, tp_percent, fibo_levels, margin_initial, leverage,
+                  capital_initial, commission_rate, order='auto'):
+    """
+    Replay intrabar: fills au premier franchissement dans la bougie
+
+    Returns:
+        dict: comme simulate(), mais equity et 'index' des trades par bougie
+    """
+    path, gaps = ohlc_path(open_, high, low, close, order)
+    result = simulate(path, tp_percent, fibo_levels, margin_initial, leverage,
+                      capital_initial, commission_rate, fill_at_level=True, gaps=gaps)
+
+    # Equity par bougie = equity au tick close (ou au tick de liquidation)
+    equity_ticks = result['equity']
+    equity = equity_ticks[3::4]
+    if result['liquidated'] and equity_ticks.shape[0] % 4:
+        equity = np.append(equity, equity_ticks[-1])
+
+    for trade in result['trades']:
+        trade['index'] //= 4
+
+    result['equity'] = equity
+    result['n_used'] = equity.shape[0]
+    return result
+
+
+def iter_trade_prices(path, chunksize=1_000_000):
+    """
+    Lit un fichier de trades bruts par blocs (colonne 'price')
+
+    Formats: .npy (tableau de prix, lu en memmap) ou CSV avec colonne 'price'
+    """
+    if path.endswith('.npy'):
+        prices = np.load(path, mmap_mode='r')
+        for start in range(0, prices.shape[0], chunksize):
+            yield np.asarray(prices[start:start + chunksize], dtype=np.float64)
+        return
+
+    import pandas as pd
+    for chunk in pd.read_csv(path, usecols=['price'], chunksize=chunksize):
+        yield chunk['price'].to_numpy(dtype=np.float64)
+
+
+def simulate_trades(path, tp_percent, fibo_levels, margin_initial, leverage,
+                    capital_initial, commission_rate, chunksize=1_000_000):
+    """
+    Replay tick par tick depuis un fichier de trades (streaming par blocs)
+
+    L'equity n'est conservée qu'en fin de bloc (courbe sous-échantillonnée),
+    le max drawdown est calculé sur tous les ticks.
+
+    Returns:
+        dict: equity (1 point par bloc), max_drawdown, liquidated, capital,
+              trades ('index' = numéro de tick), n_ticks
+    """
+    sim = HedgeSimulator(tp_percent, fibo_levels, margin_initial, leverage,
+                         capital_initial, commission_rate)
+    equity_points = []
+    peak = -np.inf
+    worst = 0.0
+
+    for prices in iter_trade_prices(path, chunksize):
+        equity = sim.feed(prices, fill_at_level=True)
+        if equity.shape[0]:
+            running_peak = np.maximum.accumulate(np.maximum(equity, peak))
+            worst = min(worst, float(((equity - running_peak) / running_peak * 100).min()))
+            peak = running_peak[-1]
+            equity_points.append(equity[-1])
+        if sim.liquidated:
+            break
+
+    return {
+        'equity': np.array(equity_points),
+        'max_drawdown': worst,
+        'liquidated': sim.liquidated,
+        'capital': sim.capital,
+        'trades': sim.trades,
+        'n_ticks': sim.ticks_seen
+    }
+
+
+def max_drawdown(equity):
+    """Max drawdown en % (négatif), comme cummax() pandas dans print_results"""
+    if equity.shape[0] == 0:
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    return float(((equity - peak) / peak * 100).min())
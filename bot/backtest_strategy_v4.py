@@ -12,6 +12,9 @@ import os
 from dotenv import load_dotenv
 import json
 
+from backtest_fast import simulate, simulate_ohlc, simulate_trades, max_drawdown, PATH_ORDERS
+from ohlcv_cache import OHLCVCache
+
 # Configuration de la stratégie
 CAPITAL_INITIAL = 100  # 100€
 MARGIN_INITIAL = 0.05  # 0.05€ par position
@@ -21,11 +24,20 @@ FIBO_LEVELS = [0.8, 1.6, 3.2, 6.4, 12.8]  # Progression x2
 COMMISSION_RATE = 0.055 / 100  # 0.055% Bitget Futures
 
 class BacktestEngine:
-    def __init__(self, symbol='DOGE/USDT:USDT', timeframe='15m', lookback_days=30):
-        """Initialize backtest engine"""
+    def __init__(self, symbol='DOGE/USDT:USDT', timeframe='15m', lookback_days=30,
+                 use_cache=True, offline=False):
+        """
+        Initialize backtest engine
+
+        Args:
+            use_cache: Bougies via le cache disque (ohlcv_cache), seule la queue manquante est téléchargée
+            offline: Aucune requête réseau, uniquement les bougies du cache
+        """
         self.symbol = symbol
         self.timeframe = timeframe
         self.lookback_days = lookback_days
+        self.use_cache = use_cache or offline
+        self.offline = offline
 
         # Load API credentials for data fetching
         load_dotenv()
@@ -48,6 +60,9 @@ class BacktestEngine:
         # Performance tracking
         self.trades = []
         self.equity_curve = []
+        self.equity = np.empty(0)
+        self.max_dd = None  # drawdown calculé hors courbe (replay trades)
+        self.replay = 'close'
 
     def reset_state(self):
         """Reset trading state"""
@@ -68,6 +83,15 @@ class BacktestEngine:
         print(f"📊 Fetching {self.lookback_days} days of {self.timeframe} data for {self.symbol}...")
 
         since = self.exchange.milliseconds() - (self.lookback_days * 24 * 60 * 60 * 1000)
+
+        if self.use_cache:
+            cache = OHLCVCache(None if self.offline else self.exchange)
+            df = cache.get(self.symbol, self.timeframe, since, offline=self.offline)
+            if df.empty:
+                raise RuntimeError(f"Aucune bougie en cache pour {self.symbol} {self.timeframe}")
+            print(f"✅ {len(df)} candles from {df.index[0]} to {df.index[-1]} (cache: {cache.path(self.symbol, self.timeframe)})")
+            return df
+
         ohlcv = []
 
         while since < self.exchange.milliseconds():
@@ -290,10 +314,22 @@ class BacktestEngine:
 
         return total_pnl
 
-    def run_backtest(self):
-        """Run the backtest simulation"""
-        # Fetch historical data
-        df = self.fetch_historical_data()
+    def run_backtest(self, vectorized=True, replay='close', trades_file=None):
+        """
+        Run the backtest simulation
+
+        Args:
+            vectorized: True → moteur NumPy (backtest_fast), False → boucle iterrows() de référence
+            replay: 'close' (fill au close) ou chemin intrabar 'OHLC' / 'OLHC' / 'auto'
+                    (fill au premier franchissement dans la bougie, moteur NumPy uniquement)
+            trades_file: Fichier de trades bruts (.csv colonne 'price' ou .npy) → replay tick par tick
+        """
+        if replay != 'close' and replay not in PATH_ORDERS:
+            raise ValueError(f"Replay inconnu: {replay}")
+        self.replay = 'trades' if trades_file else replay
+
+        # Fetch historical data (inutile en replay trades)
+        df = None if trades_file else self.fetch_historical_data()
 
         print("\n" + "="*80)
         print("🚀 STARTING BACKTEST")
@@ -303,8 +339,19 @@ class BacktestEngine:
         print(f"Leverage: {LEVERAGE}x")
         print(f"TP: {TP_PERCENT}%")
         print(f"Fibo levels: {FIBO_LEVELS}")
+        print(f"Replay: {self.replay}")
         print("="*80 + "\n")
 
+        if trades_file:
+            self.run_trades_replay(trades_file)
+            self.print_results()
+            return
+
+        if vectorized or replay != 'close':
+            self.run_vectorized(df, replay)
+            self.print_results()
+            return
+
         # Initialize with first price
         initial_price = df.iloc[0]['close']
         self.open_hedge(initial_price, df.index[0])
@@ -346,9 +393,65 @@ class BacktestEngine:
                     fibo_index = len(self.orders['fibo_short']) - 1
                 self.double_position(side, fibo_price, current_price, idx, fibo_index)
 
+        self.equity = np.array([e['equity'] for e in self.equity_curve])
+
         # Final statistics
         self.print_results()
 
+    def strategy_params(self):
+        """Paramètres de stratégie passés au moteur NumPy"""
+        return {
+            'tp_percent': TP_PERCENT,
+            'fibo_levels': FIBO_LEVELS,
+            'margin_initial': MARGIN_INITIAL,
+            'leverage': LEVERAGE,
+            'capital_initial': CAPITAL_INITIAL,
+            'commission_rate': COMMISSION_RATE
+        }
+
+    def run_vectorized(self, df, replay='close'):
+        """Simulation vectorisée (mêmes règles que la boucle iterrows, ou replay intrabar)"""
+        if replay == 'close':
+            result = simulate(df['close'].to_numpy(dtype=np.float64), **self.strategy_params())
+        else:
+            result = simulate_ohlc(
+                df['open'].to_numpy(dtype=np.float64),
+                df['high'].to_numpy(dtype=np.float64),
+                df['low'].to_numpy(dtype=np.float64),
+                df['close'].to_numpy(dtype=np.float64),
+                order=replay,
+                **self.strategy_params()
+            )
+
+        self.equity = result['equity']
+        self.capital = result['capital']
+
+        # Index → timestamp (uniquement pour les événements)
+        for trade in result['trades']:
+            trade['timestamp'] = df.index[trade.pop('index')]
+            self.trades.append(trade)
+
+        if result['liquidated']:
+            idx = df.index[result['n_used'] - 1]
+            print(f"💥 LIQUIDATION at {idx}! Price: ${df['close'].iloc[result['n_used'] - 1]:.5f}")
+
+    def run_trades_replay(self, trades_file):
+        """Replay tick par tick depuis un fichier de trades local (streaming)"""
+        print(f"📂 Replay trades: {trades_file}")
+        result = simulate_trades(trades_file, **self.strategy_params())
+
+        self.equity = result['equity']
+        self.capital = result['capital']
+        self.max_dd = result['max_drawdown']
+
+        for trade in result['trades']:
+            trade['timestamp'] = f"tick {trade.pop('index')}"
+            self.trades.append(trade)
+
+        print(f"  • {result['n_ticks']} ticks rejoués")
+        if result['liquidated']:
+            print(f"💥 LIQUIDATION au tick {result['n_ticks'] - 1}!")
+
     def print_results(self):
         """Print backtest results"""
         print("\n" + "="*80)
@@ -356,8 +459,7 @@ class BacktestEngine:
         print("="*80)
 
         # Calculate metrics
-        equity_df = pd.DataFrame(self.equity_curve)
-        final_equity = equity_df['equity'].iloc[-1]
+        final_equity = float(self.equity[-1])
         total_return = ((final_equity - CAPITAL_INITIAL) / CAPITAL_INITIAL) * 100
 
         # Count trade types
@@ -369,14 +471,12 @@ class BacktestEngine:
         total_commission = sum([t.get('commission', 0) for t in self.trades])
 
         # Max drawdown
-        equity_df['peak'] = equity_df['equity'].cummax()
-        equity_df['drawdown'] = (equity_df['equity'] - equity_df['peak']) / equity_df['peak'] * 100
-        max_drawdown = equity_df['drawdown'].min()
+        max_dd = self.max_dd if self.max_dd is not None else max_drawdown(self.equity)
 
         print(f"Initial Capital: {CAPITAL_INITIAL:.2f}€")
         print(f"Final Equity: {final_equity:.2f}€")
         print(f"Total Return: {total_return:.2f}%")
-        print(f"Max Drawdown: {max_drawdown:.2f}%")
+        print(f"Max Drawdown: {max_dd:.2f}%")
         print()
         print(f"Total Trades: {len(self.trades)}")
         print(f"TP Hits: {len(tp_trades)}")
@@ -404,12 +504,13 @@ class BacktestEngine:
                 'margin': MARGIN_INITIAL,
                 'leverage': LEVERAGE,
                 'tp_percent': TP_PERCENT,
-                'fibo_levels': FIBO_LEVELS
+                'fibo_levels': FIBO_LEVELS,
+                'replay': self.replay
             },
             'results': {
                 'final_equity': final_equity,
                 'total_return': total_return,
-                'max_drawdown': max_drawdown,
+                'max_drawdown': max_dd,
                 'total_trades': len(self.trades),
                 'tp_hits': len(tp_trades),
                 'fibo_hits': len(fibo_trades)
@@ -424,15 +525,32 @@ class BacktestEngine:
         print("="*80)
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Backtest Hedge Fibonacci V4.1')
+    parser.add_argument('--replay', default='close', choices=['close', *PATH_ORDERS],
+                        help='close = fill au close, OHLC/OLHC/auto = chemin intrabar')
+    parser.add_argument('--trades-file', default=None,
+                        help='Fichier de trades bruts (.csv colonne price ou .npy)')
+    parser.add_argument('--loop', action='store_true',
+                        help='Boucle iterrows() de référence (lente)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Retélécharger toutes les bougies (sans cache disque)')
+    parser.add_argument('--offline', action='store_true',
+                        help='Bougies du cache uniquement, aucune requête réseau')
+    args = parser.parse_args()
+
     # Run backtest
     backtest = BacktestEngine(
         symbol='DOGE/USDT:USDT',
         timeframe='15m',
-        lookback_days=30
+        lookback_days=30,
+        use_cache=not args.no_cache,
+        offline=args.offline
     )
 
     try:
-        backtest.run_backtest()
+        backtest.run_backtest(vectorized=not args.loop, replay=args.replay, trades_file=args.trades_file)
     except Exception as e:
         print(f"❌ Backtest error: {e}")
         import traceback
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+🧪 Sweep de paramètres - Backtest Hedge Fibonacci V4.1 en parallèle
+
+Balaye TP_PERCENT / FIBO_LEVELS / MARGIN_INITIAL / LEVERAGE sans modifier
+backtest_strategy_v4.py:
+- Espace de recherche: grille complète (produit cartésien) ou tirage aléatoire
+- Les configs sont découpées en lots répartis sur un ProcessPoolExecutor
+- Les bougies OHLC sont placées UNE fois en mémoire partagée
+  (multiprocessing.shared_memory): chaque worker s'y attache, aucun
+  DataFrame n'est picklé par tâche
+- Résultats = table colonnaire (1 colonne NumPy par métrique) → CSV/Parquet
+- Bougies lues via le cache disque (ohlcv_cache), --offline = aucun accès réseau
+
+Usage:
+    python backtest_sweep.py --tp 0.3 0.5 0.8 --leverage 20 50 \\
+        --fibo 0.8,1.6,3.2,6.4,12.8 --fibo 1,2,4,8
+    python backtest_sweep.py --random 2000 --tp-range 0.2 1.5 --fibo-first-range 0.3 2
+"""
+
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest_fast import simulate, simulate_ohlc, max_drawdown, PATH_ORDERS
+
+logger = logging.getLogger(__name__)
+
+# Paramètres balayables (mêmes noms que BacktestEngine.strategy_params())
+SWEEP_KEYS = ('tp_percent', 'fibo_levels', 'margin_initial', 'leverage')
+
+# Colonnes de la table de résultats
+RESULT_COLUMNS = ('config_id', 'tp_percent', 'fibo_levels', 'margin_initial', 'leverage',
+                  'final_equity', 'total_return', 'max_drawdown', 'total_trades',
+                  'tp_hits', 'fibo_hits', 'liquidated', 'n_used')
+
+# État du worker (attaché une fois par process via initializer)
+_worker = {}
+
+
+# ========== ESPACE DE RECHERCHE ==========
+
+def grid_configs(space):
+    """
+    Produit cartésien d'un espace {param: [valeurs]}
+
+    Args:
+        space: ex {'tp_percent': [0.3, 0.5], 'fibo_levels': [[0.8, 1.6], [1, 2, 4]]}
+
+    Returns:
+        list[dict]: une config par combinaison
+    """
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_configs(n, tp_range, fibo_first_range, fibo_count=5, fibo_factor=2.0,
+                   margins=(0.05,), leverages=(50,), seed=None):
+    """
+    Tirage aléatoire de n configs
+
+    Les niveaux Fibo gardent la progression géométrique de la stratégie:
+    premier niveau tiré dans fibo_first_range, puis ×fibo_factor.
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n):
+        first = round(rng.uniform(*fibo_first_range), 3)
+        configs.append({
+            'tp_percent': round(rng.uniform(*tp_range), 3),
+            'fibo_levels': [round(first * fibo_factor ** i, 3) for i in range(fibo_count)],
+            'margin_initial': rng.choice(list(margins)),
+            'leverage': rng.choice(list(leverages))
+        })
+    return configs
+
+
+# ========== MÉMOIRE PARTAGÉE ==========
+
+def share_ohlc(df):
+    """
+    Copie open/high/low/close dans un segment de mémoire partagée
+
+    Returns:
+        (shm, spec): segment (à libérer par l'appelant) et description
+                     picklable {'name', 'shape'} transmise aux workers
+    """
+    ohlc = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64).T
+    shm = shared_memory.SharedMemory(create=True, size=ohlc.nbytes)
+    shared = np.ndarray(ohlc.shape, dtype=np.float64, buffer=shm.buf)
+    shared[:] = ohlc
+    return shm, {'name': shm.name, 'shape': ohlc.shape}
+
+
+def _init_worker(spec, replay, base_params):
+    """Initializer du pool: s'attache au segment partagé (lecture seule)"""
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    ohlc = np.ndarray(spec['shape'], dtype=np.float64, buffer=shm.buf)
+    ohlc.flags.writeable = False
+
+    _worker['shm'] = shm  # garder une référence sinon le buffer est libéré
+    _worker['ohlc'] = ohlc
+    _worker['replay'] = replay
+    _worker['base_params'] = base_params
+
+
+def _run_config(config):
+    """Simule une config sur les bougies partagées → ligne de résultats"""
+    ohlc = _worker['ohlc']
+    params = dict(_worker['base_params'], **config)
+
+    if _worker['replay'] == 'close':
+        result = simulate(ohlc[3], **params)
+    else:
+        result = simulate_ohlc(ohlc[0], ohlc[1], ohlc[2], ohlc[3], order=_worker['replay'], **params)
+
+    capital_initial = params['capital_initial']
+    equity = result['equity']
+    final_equity = float(equity[-1]) if equity.shape[0] else capital_initial
+    trades = result['trades']
+
+    return {
+        'tp_percent': params['tp_percent'],
+        'fibo_levels': ','.join(str(level) for level in params['fibo_levels']),
+        'margin_initial': params['margin_initial'],
+        'leverage': params['leverage'],
+        'final_equity': final_equity,
+        'total_return': (final_equity - capital_initial) / capital_initial * 100,
+        'max_drawdown': max_drawdown(equity),
+        'total_trades': len(trades),
+        'tp_hits': sum(1 for t in trades if 'TP' in t['type']),
+        'fibo_hits': sum(1 for t in trades if 'FIBO' in t['type']),
+        'liquidated': result['liquidated'],
+        'n_used': result['n_used']
+    }
+
+
+def _run_shard(shard):
+    """Tâche du pool: un lot de (config_id, config)"""
+    rows = []
+    for config_id, config in shard:
+        row = _run_config(config)
+        row['config_id'] = config_id
+        rows.append(row)
+    return rows
+
+
+# ========== SWEEP ==========
+
+def run_sweep(df, configs, base_params, replay='close', workers=None, shard_size=None):
+    """
+    Lance toutes les configs en parallèle
+
+    Args:
+        df: DataFrame OHLCV (colonnes open/high/low/close)
+        configs: liste de dicts (clés parmi SWEEP_KEYS)
+        base_params: paramètres fixes (capital_initial, commission_rate, ...)
+        replay: 'close' ou ordre intrabar ('OHLC' / 'OLHC' / 'auto')
+        workers: nombre de process (défaut: os.cpu_count())
+        shard_size: configs par tâche (défaut: ~4 tâches par worker)
+
+    Returns:
+        dict: table colonnaire {colonne: np.ndarray}, triée par config_id
+    """
+    if replay != 'close' and replay not in PATH_ORDERS:
+        raise ValueError(f"Replay inconnu: {replay}")
+    for config in configs:
+        unknown = set(config) - set(SWEEP_KEYS)
+        if unknown:
+            raise ValueError(f"Paramètre non balayable: {', '.join(sorted(unknown))}")
+
+    workers = workers or os.cpu_count() or 1
+    shard_size = shard_size or max(1, len(configs) // (workers * 4))
+    indexed = list(enumerate(configs))
+    shards = [indexed[i:i + shard_size] for i in range(0, len(indexed), shard_size)]
+
+    logger.info(f"🧪 Sweep: {len(configs)} configs, {len(shards)} lots, {workers} workers, replay={replay}")
+
+    shm, spec = share_ohlc(df)
+    rows = []
+    started = time.time()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(spec, replay, base_params)) as pool:
+            futures = [pool.submit(_run_shard, shard) for shard in shards]
+            for done, future in enumerate(as_completed(futures), 1):
+                rows.extend(future.result())
+                if done % max(1, len(futures) // 10) == 0:
+                    logger.info(f"  • {len(rows)}/{len(configs)} configs ({time.time() - started:.1f}s)")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    rows.sort(key=lambda row: row['config_id'])
+    return {column: np.array([row[column] for row in rows]) for column in RESULT_COLUMNS}
+
+
+def save_results(table, path):
+    """Écrit la table colonnaire (.parquet si pyarrow dispo, sinon CSV)"""
+    import pandas as pd
+
+    frame = pd.DataFrame(table)
+    if path.endswith('.parquet'):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return frame
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from backtest_strategy_v4 import BacktestEngine, CAPITAL_INITIAL, COMMISSION_RATE, \
+        TP_PERCENT, FIBO_LEVELS, MARGIN_INITIAL, LEVERAGE
+
+    def parse_levels(value):
+        return [float(level) for level in value.split(',')]
+
+    parser = argparse.ArgumentParser(description='Sweep parallèle Backtest Hedge Fibonacci V4.1')
+    parser.add_argument('--symbol', default='DOGE/USDT:USDT')
+    parser.add_argument('--timeframe', default='15m')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--replay', default='close', choices=['close', *PATH_ORDERS])
+    parser.add_argument('--offline', action='store_true', help='Bougies du cache disque uniquement')
+
+    # Grille
+    parser.add_argument('--tp', type=float, nargs='+', default=[TP_PERCENT], help='TP en %%')
+    parser.add_argument('--fibo', type=parse_levels, action='append',
+                        help='Niveaux Fibo séparés par virgule (répétable)')
+    parser.add_argument('--margin', type=float, nargs='+', default=[MARGIN_INITIAL])
+    parser.add_argument('--leverage', type=int, nargs='+', default=[LEVERAGE])
+
+    # Recherche aléatoire
+    parser.add_argument('--random', type=int, default=0, help='N configs tirées au hasard (au lieu de la grille)')
+    parser.add_argument('--tp-range', type=float, nargs=2, default=[0.2, 1.5])
+    parser.add_argument('--fibo-first-range', type=float, nargs=2, default=[0.3, 2.0])
+    parser.add_argument('--seed', type=int, default=None)
+
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='sweep_results.csv', help='.csv ou .parquet')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.random:
+        configs = random_configs(args.random, args.tp_range, args.fibo_first_range,
+                                 margins=args.margin, leverages=args.leverage, seed=args.seed)
+    else:
+        configs = grid_configs({
+            'tp_percent': args.tp,
+            'fibo_levels': args.fibo or [FIBO_LEVELS],
+            'margin_initial': args.margin,
+            'leverage': args.leverage
+        })
+
+    engine = BacktestEngine(symbol=args.symbol, timeframe=args.timeframe, lookback_days=args.days,
+                            offline=args.offline)
+    df = engine.fetch_historical_data()
+
+    started = time.time()
+    table = run_sweep(df, configs, {'capital_initial': CAPITAL_INITIAL, 'commission_rate': COMMISSION_RATE},
+                      replay=args.replay, workers=args.workers)
+    frame = save_results(table, args.output)
+
+    print(f"\n✅ {len(frame)} configs en {time.time() - started:.1f}s → {args.output}")
+    print("\n🏆 Top 10 (total_return):")
+    print(frame.sort_values('total_return', ascending=False).head(10).to_string(index=False))
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark latence - cycle complet des handlers du bot hedge
+
+Pilote BitgetHedgeBotV2Fixed (bitget_hedge_multi_instance.py) contre le mock
+local (mock_bitget.py) et mesure chaque étape du cycle:
+- detection: mouvement de prix → début du handler (push WS ou polling REST)
+- handler:<type>: durée totale de handle_tp_*/handle_fibo_*
+- rest:<METHOD endpoint>: chaque appel REST (attente rate limiter comprise)
+- confirm: chaque wait_for_positions()
+- sleep: chaque time.sleep() restant dans le bot
+- cycle: mouvement de prix → fin du dernier handler (hedge re-protégé)
+- initial_hedge: open_initial_hedge() au démarrage (connexions froides ou non)
+
+Chaque cycle pousse le prix juste au-delà du TP suivant (LONG puis SHORT en
+alternance), les Fibo se remplissent au passage. La boucle de détection est
+celle de run() (push WS + resync REST), avec un resync raccourci (--resync,
+30s en prod): un événement perdu dans le drain apparaît dans la queue de
+`detection` au lieu de bloquer le benchmark.
+
+Affiche p50/p95/p99 par étape et ajoute le run à un historique JSON
+(data/latency_history.json). Comparé au run précédent de même config → chaque
+modification de la boucle apparaît plus rapide ou plus lente.
+
+Usage:
+    python benchmark_latency.py --cycles 20
+    python benchmark_latency.py --cycles 20 --latency-ms 40 --jitter-ms 10 --no-ws
+    python benchmark_latency.py --label "batch TP" --history data/latency_history.json
+    python benchmark_latency.py --cycles 20 --handshake-ms 30 --no-pool    # session ccxt par défaut
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from mock_bitget import MockExchange, start_mock
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = os.getenv('LATENCY_HISTORY_PATH', 'data/latency_history.json')
+
+HANDLERS = {
+    'handle_tp_long_executed': 'tp_long',
+    'handle_tp_short_executed': 'tp_short',
+    'handle_fibo_long_executed': 'fibo_long',
+    'handle_fibo_short_executed': 'fibo_short'
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class StageRecorder:
+    """Durées (ms) par étape, alimentées depuis plusieurs threads (run_parallel)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.handlers_done = 0
+        self.last_handler_end = 0.0
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds * 1000)
+
+    def summary(self):
+        """{étape: {'n', 'p50', 'p95', 'p99', 'max'}} (ms)"""
+        table = {}
+        for stage, values in sorted(self.samples.items()):
+            values = np.asarray(values)
+            row = {'n': int(values.size), 'max': round(float(values.max()), 2)}
+            for p in PERCENTILES:
+                row[f'p{p}'] = round(float(np.percentile(values, p)), 2)
+            table[stage] = row
+        return table
+
+
+class _RecordingTime:
+    """Remplace le module time du bot: time.sleep() est chronométré, le reste délégué"""
+
+    def __init__(self, recorder):
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    def sleep(self, seconds):
+        started = time.perf_counter()
+        time.sleep(seconds)
+        self._recorder.record('sleep', time.perf_counter() - started)
+
+
+def instrument(bot, bot_module, recorder, cycle_state):
+    """Branche les chronos sur une instance du bot (REST, confirmations, sleeps, handlers)"""
+    fetch2 = bot.exchange.fetch2
+
+    def timed_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        started = time.perf_counter()
+        try:
+            return fetch2(path, api, method, params, headers, body, config)
+        finally:
+            recorder.record(f"rest:{method} {path.rsplit('/', 1)[-1]}", time.perf_counter() - started)
+
+    bot.exchange.fetch2 = timed_fetch2
+
+    wait_for_positions = bot.wait_for_positions
+
+    def timed_wait_for_positions(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return wait_for_positions(*args, **kwargs)
+        finally:
+            recorder.record('confirm', time.perf_counter() - started)
+
+    bot.wait_for_positions = timed_wait_for_positions
+
+    for name, kind in HANDLERS.items():
+        setattr(bot, name, _timed_handler(getattr(bot, name), kind, recorder, cycle_state))
+
+    bot_module.time = _RecordingTime(recorder)
+
+
+def _timed_handler(handler, kind, recorder, cycle_state):
+    def timed():
+        started = time.perf_counter()
+        # Détection: depuis le tick, ou depuis la fin du handler précédent du même cycle
+        recorder.record('detection', started - max(cycle_state['tick_at'], recorder.last_handler_end))
+        try:
+            return handler()
+        finally:
+            ended = time.perf_counter()
+            recorder.record(f'handler:{kind}', ended - started)
+            recorder.handlers_done += 1
+            recorder.last_handler_end = ended
+    return timed
+
+
+def drive_until_quiet(bot, recorder, poll=0.25, settle=None, timeout=10):
+    """Boucle de détection de run() jusqu'à ce que le cycle soit calme (sans la pause de 3s)"""
+    started = time.perf_counter()
+    handlers_before = recorder.handlers_done
+    settle = settle or bot.REST_RESYNC_INTERVAL + poll
+
+    while time.perf_counter() - started < timeout:
+        if bot.stream is not None and bot.stream.is_live():
+            event_detected = bot.process_stream_events(timeout=poll)
+            if not event_detected and time.time() - bot.last_rest_sync >= bot.REST_RESYNC_INTERVAL:
+                bot.check_events()
+        else:
+            bot.check_events()
+            time.sleep(poll)
+
+        # Calme = aucun handler depuis un resync complet
+        idle = time.perf_counter() - max(recorder.last_handler_end, started)
+        if recorder.handlers_done > handlers_before and idle >= settle:
+            break
+
+    return recorder.handlers_done - handlers_before
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def print_table(summary, previous=None):
+    """Tableau p50/p95/p99 (+ variation du p50/p95 vs run précédent de même config)"""
+    header = f"{'Étape':<38} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    if previous:
+        header += f" {'Δp50':>9} {'Δp95':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for stage, row in summary.items():
+        line = (f"{stage:<38} {row['n']:>5} {row['p50']:>9.1f} {row['p95']:>9.1f} "
+                f"{row['p99']:>9.1f} {row['max']:>9.1f}")
+        old = (previous or {}).get(stage)
+        if old:
+            line += f" {row['p50'] - old['p50']:>+9.1f} {row['p95'] - old['p95']:>+9.1f}"
+        print(line)
+    print("(ms)")
+
+
+def run_benchmark(pair='DOGE/USDT:USDT', price=0.2, cycles=20, overshoot=0.05, use_ws=True,
+                  latency_ms=0.0, jitter_ms=0.0, errors=None, resync=1.0, handshake_ms=0.0, pool=True):
+    """
+    Lance mock + bot, enchaîne `cycles` franchissements de TP (+overshoot%) et mesure
+
+    Returns:
+        (summary, info): tableau par étape et compteurs du run
+    """
+    symbol = pair.replace('/USDT:USDT', 'USDT')
+    mock, server, base_url = start_mock(MockExchange({symbol: price}))
+    mock.configure(latency_ms, jitter_ms, errors or {}, handshake_ms)
+
+    # Environnement isolé: pas de vraies clés, caches et buckets dans un dossier temporaire
+    workdir = tempfile.mkdtemp(prefix='bench_latency_')
+    os.environ.update({
+        'BITGET_REST_URL': base_url,
+        'BITGET_WS_PRIVATE_URL': base_url.replace('http', 'ws', 1) + '/v2/ws/private',
+        'BITGET_WS_PUBLIC_URL': base_url.replace('http', 'ws', 1) + '/v2/ws/public',
+        'BITGET_API_KEY': 'bench', 'BITGET_SECRET': 'bench', 'BITGET_PASSPHRASE': 'bench',
+        'MARKET_CACHE_PATH': os.path.join(workdir, 'markets.json'),
+        'RATE_LIMIT_DIR': workdir,
+        'STATE_DIR': workdir,
+        'HTTP_POOL': '1' if pool else '0'
+    })
+    os.makedirs('logs', exist_ok=True)
+
+    import bitget_hedge_multi_instance as bot_module
+
+    bot = bot_module.BitgetHedgeBotV2Fixed(pair=pair, use_ws=use_ws)
+    bot.telegram_token = None  # pas de notification pendant le benchmark
+    bot.outbox.token = None
+    bot.REST_RESYNC_INTERVAL = resync
+
+    recorder = StageRecorder()
+    cycle_state = {'tick_at': time.perf_counter()}
+
+    bot.start_private_stream()
+    bot.start_price_stream()
+    started = time.perf_counter()
+    if not bot.open_initial_hedge():
+        raise RuntimeError("Hedge initial impossible sur le mock")
+    recorder.record('initial_hedge', time.perf_counter() - started)
+
+    instrument(bot, bot_module, recorder, cycle_state)
+
+    idle_cycles = 0
+    for i in range(cycles):
+        # Juste au-delà du TP LONG (cycles pairs) ou du TP SHORT (cycles impairs)
+        if i % 2 == 0:
+            target = bot.position.entry_price_long * (1 + (bot.TP_PERCENT + overshoot) / 100)
+        else:
+            target = bot.position.entry_price_short * (1 - (bot.TP_PERCENT + overshoot) / 100)
+
+        cycle_state['tick_at'] = time.perf_counter()
+        mock.set_price(symbol, target)
+
+        if drive_until_quiet(bot, recorder):
+            recorder.record('cycle', recorder.last_handler_end - cycle_state['tick_at'])
+        else:
+            idle_cycles += 1
+
+    if bot.stream is not None:
+        bot.stream.stop()
+    if bot.price_stream is not None:
+        bot.price_stream.stop()
+    server.shutdown()
+
+    info = {
+        'cycles': cycles,
+        'idle_cycles': idle_cycles,
+        'handlers': recorder.handlers_done,
+        'mock': dict(mock.stats)
+    }
+    return recorder.summary(), info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark latence du cycle handlers (mock Bitget local)')
+    parser.add_argument('--pair', default='DOGE/USDT:USDT')
+    parser.add_argument('--price', type=float, default=0.2, help='Prix initial du mock')
+    parser.add_argument('--cycles', type=int, default=20, help='Nombre de TP franchis (LONG/SHORT en alternance)')
+    parser.add_argument('--overshoot', type=float, default=0.05, help='Dépassement du prix TP (%%)')
+    parser.add_argument('--resync', type=float, default=1.0, help='Intervalle resync REST (s, 30 en prod)')
+    parser.add_argument('--no-ws', action='store_true', help='Détection par polling REST')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Latence REST simulée')
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error', action='append', default=[], help='CODE:PROBA (ex: 40915:0.05)')
+    parser.add_argument('--handshake-ms', type=float, default=0, help='Coût simulé d\'une nouvelle connexion (TCP + TLS)')
+    parser.add_argument('--no-pool', action='store_true', help='Session ccxt par défaut (sans http_pool)')
+    parser.add_argument('--label', default='', help='Libellé du run dans l\'historique')
+    parser.add_argument('--history', default=HISTORY_PATH)
+    parser.add_argument('--no-save', action='store_true', help='Ne pas écrire dans l\'historique')
+    args = parser.parse_args()
+
+    errors = {code: float(rate) for code, rate in (item.split(':') for item in args.error)}
+    config = {
+        'pair': args.pair, 'cycles': args.cycles, 'overshoot': args.overshoot, 'resync': args.resync,
+        'ws': not args.no_ws,
+        'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'errors': errors
+    }
+    # Clés ajoutées seulement hors défaut: les runs déjà en historique restent comparables
+    if args.handshake_ms:
+        config['handshake_ms'] = args.handshake_ms
+    if args.no_pool:
+        config['pool'] = False
+
+    summary, info = run_benchmark(args.pair, args.price, args.cycles, args.overshoot, not args.no_ws,
+                                  args.latency_ms, args.jitter_ms, errors, args.resync, args.handshake_ms,
+                                  not args.no_pool)
+
+    history = load_history(args.history)
+    previous = next((run for run in reversed(history) if run['config'] == config), None)
+
+    print("\n" + "=" * 80)
+    print(f"⏱️ LATENCE CYCLE HANDLERS - {args.pair} ({'WebSocket' if config['ws'] else 'polling REST'}, "
+          f"latence mock {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms)")
+    if previous:
+        print(f"   Comparé à {previous['timestamp']} ({previous.get('commit') or '?'}) {previous.get('label', '')}")
+    print("=" * 80)
+    print_table(summary, previous and previous['stages'])
+    print(f"\n{info['handlers']} handlers sur {info['cycles']} cycles ({info['idle_cycles']} sans événement), "
+          f"{info['mock']['connections']} connexions HTTP ouvertes")
+
+    if not args.no_save:
+        history.append({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_revision(),
+            'label': args.label,
+            'config': config,
+            'info': info,
+            'stages': summary
+        })
+        save_history(args.history, history)
+        print(f"💾 Historique: {args.history} ({len(history)} runs)")
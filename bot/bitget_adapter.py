@@ -0,0 +1,331 @@
+"""
+🔌 Adaptateur Bitget - un seul exemplaire des appels REST communs aux bots
+
+place_tpsl_order, get_real_positions, flash_close_position et
+cancel_all_tpsl_orders étaient copiés (avec de petites dérives) dans chaque
+variante du bot. Ils vivent ici, en version synchrone (BitgetAdapter) et
+asyncio (AsyncBitgetAdapter), avec:
+- des résultats typés à __slots__ (PositionRecord, OrderRecord), lisibles
+  aussi comme les anciens dicts (pos['size'], order.get('id'))
+- retry avec backoff exponentiel sur les erreurs réseau ccxt (timeout,
+  429, exchange indisponible); les erreurs métier remontent telles quelles
+- TP/SL: trigger arrondi au tick du contrat, ajusté et renvoyé sur 40915
+- annulation des TP/SL en UN appel cancel-plan-order (orderIdList)
+
+Toute optimisation des appels (pooling, batching, cache) se fait ici une
+seule fois pour toutes les variantes.
+
+Usage:
+    adapter = BitgetAdapter(exchange, 'DOGE/USDT:USDT')
+    positions = adapter.get_positions()          # {'long': PositionRecord | None, 'short': ...}
+    tp = adapter.place_tpsl(0.1234, 'long', 1250)   # OrderRecord | None
+    adapter.flash_close('short')
+    adapter.cancel_all_tpsl()
+
+    adapter = AsyncBitgetAdapter(exchange, pair)   # mêmes méthodes, en await
+"""
+
+import asyncio
+import logging
+import time
+
+import ccxt
+
+from cleanup_engine import BATCH_CANCEL_MAX, PRODUCT, error_code, to_bitget
+from quantizer import get_quantizer, quantizer_from_markets
+
+logger = logging.getLogger(__name__)
+
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.2          # 0.2s, 0.4s, 0.8s...
+TPSL_ATTEMPTS = 5
+TPSL_ADJUST = 0.0005         # +0.05% du trigger par tentative après un 40915
+ALREADY_CLOSED = '22002'
+ALREADY_GONE = ('40768', '40721')
+
+
+class _Record:
+    """Accès attribut (pos.size) et dict (pos['size'], pos.get('size')) pour les appelants existants"""
+
+    __slots__ = ()
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class PositionRecord(_Record):
+    __slots__ = ('symbol', 'side', 'size', 'entry_price', 'margin', 'pnl', 'leverage')
+
+    def __init__(self, symbol, side, size, entry_price, margin=0.0, pnl=0.0, leverage=0.0):
+        self.symbol = symbol
+        self.side = side
+        self.size = size
+        self.entry_price = entry_price
+        self.margin = margin
+        self.pnl = pnl
+        self.leverage = leverage
+
+
+class OrderRecord(_Record):
+    __slots__ = ('id', 'symbol', 'kind', 'side', 'price', 'size')
+
+    def __init__(self, id, symbol, kind, side, price=None, size=None):
+        self.id = id
+        self.symbol = symbol
+        self.kind = kind      # 'tpsl', 'limit', 'market'
+        self.side = side
+        self.price = price
+        self.size = size
+
+
+# ================================================================================
+# LOGIQUE COMMUNE (sans I/O)
+# ================================================================================
+
+def parse_positions(positions):
+    """Positions ccxt → {'long': PositionRecord | None, 'short': PositionRecord | None}"""
+    result = {'long': None, 'short': None}
+    for pos in positions:
+        size = float(pos.get('contracts') or 0)
+        if size > 0:
+            side = (pos.get('side') or '').lower()
+            result[side] = PositionRecord(
+                symbol=pos.get('symbol'), side=side, size=size,
+                entry_price=float(pos.get('entryPrice') or 0),
+                margin=float(pos.get('initialMargin') or 0),
+                pnl=float(pos.get('unrealizedPnl') or 0),
+                leverage=float(pos.get('leverage') or 0))
+    return result
+
+
+def tpsl_trigger(trigger_price, hold_side, attempt, adjust=TPSL_ADJUST):
+    """Trigger de la tentative `attempt`: éloigné du mark de adjust×attempt (LONG ↑, SHORT ↓)"""
+    if attempt == 0:
+        return trigger_price
+    factor = 1 + adjust * attempt if hold_side == 'long' else 1 - adjust * attempt
+    return trigger_price * factor
+
+
+def tpsl_body(symbol_id, quantizer, trigger_price, hold_side, size, plan_type):
+    return dict(PRODUCT, **{
+        'symbol': symbol_id,
+        'planType': 'pos_profit' if plan_type == 'profit_plan' else 'pos_loss',
+        'triggerPrice': quantizer.format_price(quantizer.tp_price(trigger_price, hold_side)),
+        'triggerType': 'mark_price',
+        'executePrice': '0',
+        'holdSide': hold_side,
+        'size': quantizer.format_size(size)
+    })
+
+
+def is_transient(error):
+    """Erreurs réseau/limite de débit: on peut renvoyer la même requête"""
+    return isinstance(error, ccxt.NetworkError)
+
+
+def is_price_error(error):
+    return error_code(error) == '40915' or 'price please' in str(error).lower()
+
+
+def plan_ids(response):
+    data = response.get('data') or {}
+    return [order['orderId'] for order in data.get('entrustedList') or []]
+
+
+def _check(response):
+    if isinstance(response, dict) and response.get('code') not in (None, '00000'):
+        raise ccxt.ExchangeError(f"{response.get('code')} {response.get('msg')}")
+    return response
+
+
+# ================================================================================
+# SYNCHRONE
+# ================================================================================
+
+class BitgetAdapter:
+    """Appels REST Bitget d'une paire (instance ccxt.bitget synchrone)"""
+
+    def __init__(self, exchange, pair, quantizer=None, retries=RETRY_ATTEMPTS, backoff=RETRY_BACKOFF):
+        self.exchange = exchange
+        self.pair = pair
+        self.symbol_id = to_bitget(pair)
+        self._quantizer = quantizer
+        self.retries = retries
+        self.backoff = backoff
+
+    @property
+    def quantizer(self):
+        if self._quantizer is None:
+            self._quantizer = get_quantizer(self.exchange, self.pair)
+        return self._quantizer
+
+    def call(self, method, *args, **kwargs):
+        """Appel ccxt avec retry + backoff exponentiel sur les erreurs réseau"""
+        for attempt in range(self.retries):
+            try:
+                return _check(method(*args, **kwargs))
+            except Exception as e:
+                if not is_transient(e) or attempt == self.retries - 1:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"🔁 {getattr(method, '__name__', 'appel')}: {type(e).__name__}, nouvel essai dans {delay:.1f}s")
+                time.sleep(delay)
+
+    def get_positions(self):
+        """{'long': PositionRecord | None, 'short': PositionRecord | None}"""
+        return parse_positions(self.call(self.exchange.fetch_positions, symbols=[self.pair]))
+
+    def place_tpsl(self, trigger_price, hold_side, size, plan_type='profit_plan',
+                   attempts=TPSL_ATTEMPTS, adjust=TPSL_ADJUST, retry_delay=0.5):
+        """
+        Place un TP/SL de position (trigger ajusté et renvoyé sur 40915)
+
+        Returns:
+            OrderRecord ou None après `attempts` échecs (position SANS TP)
+        """
+        for attempt in range(attempts):
+            body = tpsl_body(self.symbol_id, self.quantizer, tpsl_trigger(trigger_price, hold_side, attempt, adjust),
+                             hold_side, size, plan_type)
+            try:
+                result = self.call(self.exchange.private_mix_post_v2_mix_order_place_tpsl_order, body)
+                order_id = result['data']['orderId']
+                logger.info(f"   ✅ TP/SL {hold_side.upper()} placé @ {body['triggerPrice']} "
+                            f"(tentative {attempt + 1}): {order_id}")
+                return OrderRecord(order_id, self.pair, 'tpsl', hold_side, float(body['triggerPrice']), body['size'])
+            except Exception as e:
+                if is_price_error(e):
+                    logger.warning(f"      ⚠️ Tentative {attempt + 1}: trigger {body['triggerPrice']} refusé, ajustement...")
+                    continue
+                logger.warning(f"      ⚠️ Tentative {attempt + 1} erreur: {e}")
+                time.sleep(retry_delay)
+
+        logger.error(f"   ❌ ÉCHEC PLACEMENT TP {hold_side.upper()} après {attempts} tentatives - position SANS TP!")
+        return None
+
+    def flash_close(self, side=None):
+        """Flash close d'un côté (ou des deux si side=None). True si la position est fermée"""
+        body = dict(PRODUCT, symbol=self.symbol_id)
+        if side:
+            body['holdSide'] = side
+        try:
+            self.call(self.exchange.private_mix_post_v2_mix_order_close_positions, body)
+            logger.info(f"   ✅ Flash Close {side or 'long+short'} réussi")
+            return True
+        except Exception as e:
+            if error_code(e) == ALREADY_CLOSED:
+                logger.info(f"   ✅ {side or 'Positions'} déjà fermée(s) (22002)")
+                return True
+            logger.error(f"   ❌ Flash Close {side or 'long+short'} échec: {e}")
+            return False
+
+    def cancel_order(self, order_id):
+        """Annule un ordre LIMIT (False s'il n'existe plus)"""
+        try:
+            self.call(self.exchange.cancel_order, order_id, self.pair)
+            return True
+        except Exception as e:
+            if error_code(e) in ALREADY_GONE:
+                return False
+            raise
+
+    def cancel_all_tpsl(self):
+        """Annule tous les TP/SL de la paire (1 lecture + 1 annulation par 50 ordres). Returns: nombre annulé"""
+        ids = plan_ids(self.call(self.exchange.private_mix_get_v2_mix_order_orders_plan_pending,
+                                 {'symbol': self.symbol_id, 'productType': 'USDT-FUTURES', 'planType': 'profit_loss'}))
+        for i in range(0, len(ids), BATCH_CANCEL_MAX):
+            chunk = ids[i:i + BATCH_CANCEL_MAX]
+            self.call(self.exchange.private_mix_post_v2_mix_order_cancel_plan_order,
+                      dict(PRODUCT, symbol=self.symbol_id, orderIdList=[{'orderId': oid} for oid in chunk]))
+        if ids:
+            logger.info(f"  🗑️  {len(ids)} ordres TP/SL annulés")
+        return len(ids)
+
+
+# ================================================================================
+# ASYNCIO
+# ================================================================================
+
+class AsyncBitgetAdapter(BitgetAdapter):
+    """Mêmes appels pour ccxt.async_support (quantizer depuis les marchés déjà chargés de l'exchange)"""
+
+    @property
+    def quantizer(self):
+        if self._quantizer is None:
+            self._quantizer = quantizer_from_markets(self.exchange.markets or {}, self.pair)
+        return self._quantizer
+
+    async def call(self, method, *args, **kwargs):
+        for attempt in range(self.retries):
+            try:
+                return _check(await method(*args, **kwargs))
+            except Exception as e:
+                if not is_transient(e) or attempt == self.retries - 1:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"🔁 {getattr(method, '__name__', 'appel')}: {type(e).__name__}, nouvel essai dans {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def get_positions(self):
+        return parse_positions(await self.call(self.exchange.fetch_positions, symbols=[self.pair]))
+
+    async def place_tpsl(self, trigger_price, hold_side, size, plan_type='profit_plan',
+                         attempts=TPSL_ATTEMPTS, adjust=TPSL_ADJUST, retry_delay=0.5):
+        for attempt in range(attempts):
+            body = tpsl_body(self.symbol_id, self.quantizer, tpsl_trigger(trigger_price, hold_side, attempt, adjust),
+                             hold_side, size, plan_type)
+            try:
+                result = await self.call(self.exchange.private_mix_post_v2_mix_order_place_tpsl_order, body)
+                order_id = result['data']['orderId']
+                logger.info(f"   ✅ TP/SL {hold_side.upper()} {self.pair} placé @ {body['triggerPrice']}: {order_id}")
+                return OrderRecord(order_id, self.pair, 'tpsl', hold_side, float(body['triggerPrice']), body['size'])
+            except Exception as e:
+                if is_price_error(e):
+                    continue
+                logger.warning(f"      ⚠️ {self.pair} TP tentative {attempt + 1} erreur: {e}")
+                await asyncio.sleep(retry_delay)
+
+        logger.error(f"   ❌ ÉCHEC PLACEMENT TP {hold_side.upper()} {self.pair} après {attempts} tentatives!")
+        return None
+
+    async def flash_close(self, side=None):
+        body = dict(PRODUCT, symbol=self.symbol_id)
+        if side:
+            body['holdSide'] = side
+        try:
+            await self.call(self.exchange.private_mix_post_v2_mix_order_close_positions, body)
+            return True
+        except Exception as e:
+            if error_code(e) == ALREADY_CLOSED:
+                return True
+            logger.error(f"   ❌ Flash Close {self.pair} {side or 'long+short'} échec: {e}")
+            return False
+
+    async def cancel_order(self, order_id):
+        try:
+            await self.call(self.exchange.cancel_order, order_id, self.pair)
+            return True
+        except Exception as e:
+            if error_code(e) in ALREADY_GONE:
+                return False
+            raise
+
+    async def cancel_all_tpsl(self):
+        ids = plan_ids(await self.call(self.exchange.private_mix_get_v2_mix_order_orders_plan_pending,
+                                       {'symbol': self.symbol_id, 'productType': 'USDT-FUTURES', 'planType': 'profit_loss'}))
+        for i in range(0, len(ids), BATCH_CANCEL_MAX):
+            chunk = ids[i:i + BATCH_CANCEL_MAX]
+            await self.call(self.exchange.private_mix_post_v2_mix_order_cancel_plan_order,
+                            dict(PRODUCT, symbol=self.symbol_id, orderIdList=[{'orderId': oid} for oid in chunk]))
+        return len(ids)
@@ -9,7 +9,8 @@ import os
 from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
-import requests
+
+from telegram_outbox import TelegramOutbox
 
 # Charger .env
 env_path = Path(__file__).parent.parent / '.env'
@@ -76,6 +77,7 @@ class BitgetHedgeBot:
         # Telegram
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id)
 
         # Exchange
         self.exchange = ccxt.bitget({
@@ -120,23 +122,9 @@ class BitgetHedgeBot:
         self.total_positions_opened = 0
         self.capital_used = 0
 
-    def send_telegram(self, message):
-        """Envoie message Telegram"""
-        if not self.telegram_token or not self.telegram_chat_id:
-            return False
-
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        data = {
-            "chat_id": self.telegram_chat_id,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+    def send_telegram(self, message, urgent=False):
+        """Envoie message Telegram (mis en file, ne bloque jamais le trading)"""
+        return self.outbox.send(message, urgent=urgent)
 
     def get_price(self, symbol):
         """Récupère prix actuel"""
@@ -920,7 +908,7 @@ Paires: {len(self.volatile_pairs)}
             self.send_telegram("🛑 Bot arrêté")
         except Exception as e:
             print(f"\n❌ Erreur: {e}")
-            self.send_telegram(f"❌ Erreur: {e}")
+            self.send_telegram(f"❌ Erreur: {e}", urgent=True)
 
 
 def main():
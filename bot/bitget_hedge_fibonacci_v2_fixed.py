@@ -15,10 +15,14 @@ import ccxt
 import time
 import os
 import logging
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+from bitget_adapter import BitgetAdapter
+from http_pool import install_http_pool
+from telegram_listener import TelegramListener
+from telegram_outbox import TelegramOutbox
+
 # Configuration logging
 logging.basicConfig(
     level=logging.INFO,
@@ -76,6 +80,7 @@ class BitgetHedgeBotV2Fixed:
         # Telegram credentials
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id)
 
         if not all([self.api_key, self.api_secret, self.api_password]):
             raise ValueError("Missing API credentials in .env")
@@ -87,7 +92,7 @@ class BitgetHedgeBotV2Fixed:
             logger.warning(f"⚠️ Telegram not configured (will run without notifications)")
 
         # Exchange setup
-        self.exchange = ccxt.bitget({
+        self.exchange = install_http_pool(ccxt.bitget({
             'apiKey': self.api_key,
             'secret': self.api_secret,
             'password': self.api_password,
@@ -97,10 +102,11 @@ class BitgetHedgeBotV2Fixed:
             },
             'headers': {'PAPTRADING': '1'},
             'enableRateLimit': True
-        })
+        }))
 
         # Parameters
         self.PAIR = 'DOGE/USDT:USDT'
+        self.adapter = BitgetAdapter(self.exchange, self.PAIR)
         self.INITIAL_MARGIN = 5  # $5 par position
         self.LEVERAGE = 50
 
@@ -111,10 +117,9 @@ class BitgetHedgeBotV2Fixed:
         # Position tracking
         self.position = Position(self.PAIR)
 
-        # Telegram updates tracking
-        self.last_telegram_update_id = 0
-        self.telegram_check_interval = 5  # Check toutes les 5 secondes
-        self.last_telegram_check = 0
+        # Commandes Telegram: long polling dans un thread, exécutées par la boucle
+        self.telegram_listener = TelegramListener(self.telegram_token, self.telegram_chat_id,
+                                                  pair=self.PAIR.split('/')[0])
 
         logger.info(f"Paire: {self.PAIR}")
         logger.info(f"TP: {self.TP_PERCENT}%")
@@ -122,23 +127,9 @@ class BitgetHedgeBotV2Fixed:
         logger.info(f"Initial margin: ${self.INITIAL_MARGIN}")
         logger.info(f"Leverage: {self.LEVERAGE}x")
 
-    def send_telegram(self, message):
-        """Envoie message Telegram"""
-        if not self.telegram_token or not self.telegram_chat_id:
-            return False
-
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        data = {
-            "chat_id": self.telegram_chat_id,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+    def send_telegram(self, message, urgent=False):
+        """Envoie message Telegram (mis en file, ne bloque jamais le trading)"""
+        return self.outbox.send(message, urgent=urgent)
 
     def send_detailed_position_update(self, pair):
         """
@@ -266,24 +257,8 @@ class BitgetHedgeBotV2Fixed:
         return False
 
     def flash_close_position(self, side):
-        """Close position using flash close API"""
-        try:
-            result = self.exchange.private_mix_post_v2_mix_order_close_positions({
-                'symbol': self.PAIR.replace('/USDT:USDT', 'USDT'),
-                'productType': 'USDT-FUTURES',
-                'holdSide': side
-            })
-
-            if result.get('code') == '00000':
-                logger.info(f"   ✅ Flash Close {side} réussi")
-                return True
-            else:
-                logger.error(f"   ❌ Flash Close {side} échec: {result}")
-                return False
-
-        except Exception as e:
-            logger.error(f"   ❌ Erreur Flash Close: {e}")
-            return False
+        """Close position using flash close API (22002 = déjà fermée → True)"""
+        return self.adapter.flash_close(side)
 
     def get_price(self):
         """Get current market price"""
@@ -291,98 +266,17 @@ class BitgetHedgeBotV2Fixed:
         return float(ticker['last'])
 
     def get_real_positions(self):
-        """Get actual positions from API"""
-        positions = self.exchange.fetch_positions(symbols=[self.PAIR])
-
-        result = {'long': None, 'short': None}
-
-        for pos in positions:
-            size = float(pos.get('contracts', 0))
-            if size > 0:
-                side = pos.get('side', '').lower()
-                result[side] = {
-                    'size': size,
-                    'entry_price': float(pos.get('entryPrice', 0)),
-                    'margin': float(pos.get('initialMargin', 0)),
-                    'pnl': float(pos.get('unrealizedPnl', 0))
-                }
-
-        return result
+        """Get actual positions from API: {'long': PositionRecord | None, 'short': ...}"""
+        return self.adapter.get_positions()
 
     def place_tpsl_order(self, trigger_price, hold_side, size, plan_type='profit_plan'):
         """
-        Place TP/SL order with retry and price adjustment
+        Place TP/SL order with retry and price adjustment (cf. BitgetAdapter.place_tpsl)
 
         Retries up to 5 times if price is invalid
         Adjusts price by 0.05% each retry to ensure it's valid
         """
-
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-        bitget_plan_type = 'pos_profit' if plan_type == 'profit_plan' else 'pos_loss'
-
-        max_retries = 5
-        current_price = trigger_price
-
-        for attempt in range(max_retries):
-            # Adjust price based on retry attempt
-            if attempt > 0:
-                # For LONG TP: increase price (must be > mark price)
-                # For SHORT TP: decrease price (must be < mark price)
-                adjustment = 0.0005 * attempt  # 0.05% per retry
-                if hold_side == 'long':
-                    current_price = trigger_price * (1 + adjustment)
-                else:  # short
-                    current_price = trigger_price * (1 - adjustment)
-
-                logger.info(f"      Retry {attempt + 1}: Ajustement prix → ${current_price:.5f}")
-
-            trigger_price_rounded = round(current_price, 5)
-
-            body = {
-                'marginCoin': 'USDT',
-                'productType': 'USDT-FUTURES',
-                'symbol': symbol_bitget,
-                'planType': bitget_plan_type,
-                'triggerPrice': str(trigger_price_rounded),
-                'triggerType': 'mark_price',
-                'executePrice': '0',
-                'holdSide': hold_side,
-                'size': str(int(size))
-            }
-
-            if attempt == 0:
-                logger.info(f"   📤 Place TP/SL {plan_type}: prix ${trigger_price_rounded:.5f}")
-
-            try:
-                result = self.exchange.private_mix_post_v2_mix_order_place_tpsl_order(body)
-
-                if result.get('code') == '00000':
-                    order_id = result['data']['orderId']
-                    logger.info(f"   ✅ TP/SL placé (tentative {attempt + 1}): {order_id}")
-                    return {'id': order_id}
-                else:
-                    logger.warning(f"      ⚠️ Tentative {attempt + 1} échec: {result.get('msg')}")
-                    time.sleep(0.5)
-                    continue
-
-            except Exception as e:
-                error_msg = str(e)
-
-                # Check if error is about price validation
-                if '40915' in error_msg or 'price please' in error_msg.lower():
-                    logger.warning(f"      ⚠️ Tentative {attempt + 1}: Prix invalide, ajustement...")
-                    time.sleep(0.5)
-                    continue
-                else:
-                    # Other error, retry anyway
-                    logger.error(f"      ❌ Tentative {attempt + 1} erreur: {e}")
-                    time.sleep(0.5)
-                    continue
-
-        # Failed after all retries
-        logger.error(f"   ❌ ÉCHEC PLACEMENT TP après {max_retries} tentatives!")
-        logger.error(f"   ⚠️ Position {hold_side.upper()} SANS TP - ATTENTION!")
-        return None
+        return self.adapter.place_tpsl(trigger_price, hold_side, size, plan_type)
 
     def open_initial_hedge(self):
         """
@@ -928,39 +822,6 @@ class BitgetHedgeBotV2Fixed:
             import traceback
             logger.error(traceback.format_exc())
 
-    def get_telegram_updates(self):
-        """Récupère les nouveaux messages Telegram (commandes)"""
-        if not self.telegram_token:
-            return []
-
-        url = f"https://api.telegram.org/bot{self.telegram_token}/getUpdates"
-        params = {'offset': self.last_telegram_update_id + 1, 'timeout': 0}
-
-        try:
-            response = requests.get(url, params=params, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('ok') and data.get('result'):
-                    return data['result']
-        except:
-            pass
-
-        return []
-
-    def check_telegram_updates(self):
-        """Check for new Telegram commands"""
-        updates = self.get_telegram_updates()
-
-        for update in updates:
-            self.last_telegram_update_id = update['update_id']
-
-            if 'message' in update and 'text' in update['message']:
-                text = update['message']['text'].strip()
-
-                if text.startswith('/'):
-                    logger.info(f"📱 Commande Telegram reçue: {text}")
-                    self.handle_telegram_command(text)
-
     def handle_telegram_command(self, command):
         """Traite les commandes Telegram"""
         try:
@@ -1328,11 +1189,13 @@ Pour confirmer, tapez:
         if not cleanup_ok:
             logger.error("❌ CLEANUP ÉCHOUÉ - BOT ARRÊTÉ POUR SÉCURITÉ")
             logger.error("   Vérifiez manuellement sur Bitget et fermez les positions restantes")
-            self.send_telegram("❌ <b>CLEANUP ÉCHOUÉ</b>\n\nBot arrêté. Vérifiez Bitget manuellement.")
+            self.send_telegram("❌ <b>CLEANUP ÉCHOUÉ</b>\n\nBot arrêté. Vérifiez Bitget manuellement.", urgent=True)
             return
 
         time.sleep(3)
 
+        self.telegram_listener.start()
+
         # Open initial hedge
         if not self.open_initial_hedge():
             logger.error("❌ Échec ouverture hedge initial!")
@@ -1357,11 +1220,8 @@ Pour confirmer, tapez:
                     logger.info("⏸️  Événement traité, pause 3s...")
                     time.sleep(3)
 
-                # Check Telegram commands every 5 seconds
-                current_time = time.time()
-                if current_time - self.last_telegram_check >= self.telegram_check_interval:
-                    self.check_telegram_updates()
-                    self.last_telegram_check = current_time
+                # Commandes Telegram déjà reçues par le listener (aucun appel réseau ici)
+                self.telegram_listener.dispatch(self.handle_telegram_command)
 
                 # Log every 40 iterations (= every 10 seconds)
                 if iteration % 40 == 0:
@@ -1376,6 +1236,7 @@ Pour confirmer, tapez:
 
         except KeyboardInterrupt:
             logger.info("\n\n⏹️  Arrêt demandé par utilisateur")
+            self.telegram_listener.stop()
             logger.info("🧹 CLEANUP AUTOMATIQUE AVANT ARRÊT...")
             self.send_telegram("⏹️ <b>Bot arrêté par utilisateur</b>\n\n🧹 Cleanup en cours...")
             cleanup_ok = self.cleanup_all()
@@ -1384,7 +1245,7 @@ Pour confirmer, tapez:
                 self.send_telegram("✅ <b>Bot arrêté proprement</b>\n\nCompte nettoyé (positions fermées + ordres annulés)")
             else:
                 logger.warning("⚠️ Bot arrêté mais cleanup incomplet - Vérifiez Bitget!")
-                self.send_telegram("⚠️ <b>Bot arrêté mais cleanup incomplet</b>\n\nVérifiez Bitget manuellement!")
+                self.send_telegram("⚠️ <b>Bot arrêté mais cleanup incomplet</b>\n\nVérifiez Bitget manuellement!", urgent=True)
 
 
 if __name__ == "__main__":
@@ -17,6 +17,9 @@ import logging
 from datetime import datetime
 from dotenv import load_dotenv
 
+from bitget_adapter import BitgetAdapter
+from http_pool import install_http_pool
+
 # Configuration logging
 logging.basicConfig(
     level=logging.INFO,
@@ -77,7 +80,7 @@ class BitgetHedgeBotV3:
         logger.info(f"✅ API credentials loaded")
 
         # Exchange setup
-        self.exchange = ccxt.bitget({
+        self.exchange = install_http_pool(ccxt.bitget({
             'apiKey': self.api_key,
             'secret': self.api_secret,
             'password': self.api_password,
@@ -87,10 +90,11 @@ class BitgetHedgeBotV3:
             },
             'headers': {'PAPTRADING': '1'},
             'enableRateLimit': True
-        })
+        }))
 
         # Parameters
         self.PAIR = 'DOGE/USDT:USDT'
+        self.adapter = BitgetAdapter(self.exchange, self.PAIR)
         self.INITIAL_MARGIN = 1  # $1 par position
         self.LEVERAGE = 50
 
@@ -186,24 +190,8 @@ class BitgetHedgeBotV3:
         return False
 
     def flash_close_position(self, side):
-        """Close position using flash close API"""
-        try:
-            result = self.exchange.private_mix_post_v2_mix_order_close_positions({
-                'symbol': self.PAIR.replace('/USDT:USDT', 'USDT'),
-                'productType': 'USDT-FUTURES',
-                'holdSide': side
-            })
-
-            if result.get('code') == '00000':
-                logger.info(f"   ✅ Flash Close {side} réussi")
-                return True
-            else:
-                logger.error(f"   ❌ Flash Close {side} échec: {result}")
-                return False
-
-        except Exception as e:
-            logger.error(f"   ❌ Erreur Flash Close: {e}")
-            return False
+        """Close position using flash close API (22002 = déjà fermée → True)"""
+        return self.adapter.flash_close(side)
 
     def get_price(self):
         """Get current market price"""
@@ -211,98 +199,17 @@ class BitgetHedgeBotV3:
         return float(ticker['last'])
 
     def get_real_positions(self):
-        """Get actual positions from API"""
-        positions = self.exchange.fetch_positions(symbols=[self.PAIR])
-
-        result = {'long': None, 'short': None}
-
-        for pos in positions:
-            size = float(pos.get('contracts', 0))
-            if size > 0:
-                side = pos.get('side', '').lower()
-                result[side] = {
-                    'size': size,
-                    'entry_price': float(pos.get('entryPrice', 0)),
-                    'margin': float(pos.get('initialMargin', 0)),
-                    'pnl': float(pos.get('unrealizedPnl', 0))
-                }
-
-        return result
+        """Get actual positions from API: {'long': PositionRecord | None, 'short': ...}"""
+        return self.adapter.get_positions()
 
     def place_tpsl_order(self, trigger_price, hold_side, size, plan_type='profit_plan'):
         """
-        Place TP/SL order with retry and price adjustment
+        Place TP/SL order with retry and price adjustment (cf. BitgetAdapter.place_tpsl)
 
         Retries up to 5 times if price is invalid
         Adjusts price by 0.05% each retry to ensure it's valid
         """
-
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-        bitget_plan_type = 'pos_profit' if plan_type == 'profit_plan' else 'pos_loss'
-
-        max_retries = 5
-        current_price = trigger_price
-
-        for attempt in range(max_retries):
-            # Adjust price based on retry attempt
-            if attempt > 0:
-                # For LONG TP: increase price (must be > mark price)
-                # For SHORT TP: decrease price (must be < mark price)
-                adjustment = 0.0005 * attempt  # 0.05% per retry
-                if hold_side == 'long':
-                    current_price = trigger_price * (1 + adjustment)
-                else:  # short
-                    current_price = trigger_price * (1 - adjustment)
-
-                logger.info(f"      Retry {attempt + 1}: Ajustement prix → ${current_price:.5f}")
-
-            trigger_price_rounded = round(current_price, 5)
-
-            body = {
-                'marginCoin': 'USDT',
-                'productType': 'USDT-FUTURES',
-                'symbol': symbol_bitget,
-                'planType': bitget_plan_type,
-                'triggerPrice': str(trigger_price_rounded),
-                'triggerType': 'mark_price',
-                'executePrice': '0',
-                'holdSide': hold_side,
-                'size': str(int(size))
-            }
-
-            if attempt == 0:
-                logger.info(f"   📤 Place TP/SL {plan_type}: prix ${trigger_price_rounded:.5f}")
-
-            try:
-                result = self.exchange.private_mix_post_v2_mix_order_place_tpsl_order(body)
-
-                if result.get('code') == '00000':
-                    order_id = result['data']['orderId']
-                    logger.info(f"   ✅ TP/SL placé (tentative {attempt + 1}): {order_id}")
-                    return {'id': order_id}
-                else:
-                    logger.warning(f"      ⚠️ Tentative {attempt + 1} échec: {result.get('msg')}")
-                    time.sleep(0.5)
-                    continue
-
-            except Exception as e:
-                error_msg = str(e)
-
-                # Check if error is about price validation
-                if '40915' in error_msg or 'price please' in error_msg.lower():
-                    logger.warning(f"      ⚠️ Tentative {attempt + 1}: Prix invalide, ajustement...")
-                    time.sleep(0.5)
-                    continue
-                else:
-                    # Other error, retry anyway
-                    logger.error(f"      ❌ Tentative {attempt + 1} erreur: {e}")
-                    time.sleep(0.5)
-                    continue
-
-        # Failed after all retries
-        logger.error(f"   ❌ ÉCHEC PLACEMENT TP après {max_retries} tentatives!")
-        logger.error(f"   ⚠️ Position {hold_side.upper()} SANS TP - ATTENTION!")
-        return None
+        return self.adapter.place_tpsl(trigger_price, hold_side, size, plan_type)
 
     def open_initial_hedge(self):
         """
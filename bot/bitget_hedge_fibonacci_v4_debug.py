@@ -31,6 +31,9 @@ import sys
 from datetime import datetime
 from dotenv import load_dotenv
 
+from bitget_adapter import BitgetAdapter
+from http_pool import install_http_pool
+
 load_dotenv()
 
 
@@ -143,7 +146,7 @@ class BitgetHedgeBotV4Debug:
         self.logger.info(f"✅ API Key {api_key_id} loaded")
 
         # Exchange setup
-        self.exchange = ccxt.bitget({
+        self.exchange = install_http_pool(ccxt.bitget({
             'apiKey': self.api_key,
             'secret': self.api_secret,
             'password': self.api_password,
@@ -153,10 +156,11 @@ class BitgetHedgeBotV4Debug:
             },
             'headers': {'PAPTRADING': '1'},
             'enableRateLimit': True
-        })
+        }))
 
         # Parameters
         self.PAIR = pair
+        self.adapter = BitgetAdapter(self.exchange, self.PAIR)
         self.INITIAL_MARGIN = 0.11  # $0.11 per position (assure > 5 USDT minimum Bitget)
         self.LEVERAGE = 50
 
@@ -185,71 +189,24 @@ class BitgetHedgeBotV4Debug:
             self.logger.debug(f"  Error: {error}")
 
     def cancel_all_tpsl_orders(self):
-        """Cancel ALL TP/SL plan orders"""
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-        cancelled_count = 0
-
-        for plan_type in ['pos_profit', 'pos_loss']:
-            try:
-                result = self.exchange.private_mix_get_v2_mix_order_orders_plan_pending({
-                    'symbol': symbol_bitget,
-                    'productType': 'USDT-FUTURES',
-                    'planType': plan_type
-                })
-
-                if result.get('code') == '00000':
-                    orders = result.get('data', {}).get('entrustedList', [])
-                    for order in orders:
-                        try:
-                            self.exchange.private_mix_post_v2_mix_order_cancel_plan_order({
-                                'orderId': order['orderId'],
-                                'symbol': symbol_bitget,
-                                'productType': 'USDT-FUTURES',
-                                'marginCoin': 'USDT'
-                            })
-                            cancelled_count += 1
-                            time.sleep(0.3)
-                        except:
-                            pass
-            except:
-                pass
+        """Cancel ALL TP/SL plan orders (1 lecture + 1 annulation groupée)"""
+        try:
+            cancelled_count = self.adapter.cancel_all_tpsl()
+        except Exception as e:
+            self.logger.warning(f"  ⚠️  Annulation TP/SL échouée: {e}")
+            return 0
 
         if cancelled_count > 0:
             self.logger.info(f"  🗑️  {cancelled_count} ordres TP/SL annulés")
-
         return cancelled_count
 
     def flash_close_position(self, side):
-        """FLASH CLOSE: Force close position using Bitget special endpoint"""
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-
-        try:
-            result = self.exchange.private_mix_post_v2_mix_order_close_positions({
-                'symbol': symbol_bitget,
-                'productType': 'USDT-FUTURES',
-                'holdSide': side
-            })
-
-            if result.get('code') == '00000':
-                self.logger.debug(f"     ⚡ Flash close {side.upper()} SUCCESS")
-                return True
-            else:
-                error_msg = result.get('msg', 'Unknown error')
-                if '22002' in str(result):
-                    self.logger.debug(f"     ⚠️  Position {side} déjà fermée (22002)")
-                    return True  # Already closed = success
-                else:
-                    self.logger.warning(f"     ❌ Flash close {side} failed: {error_msg}")
-                    return False
-
-        except Exception as e:
-            error_str = str(e)
-            if '22002' in error_str:
-                self.logger.debug(f"     ⚠️  Position {side} déjà fermée (22002)")
-                return True
-            else:
-                self.logger.warning(f"     ❌ Exception flash close {side}: {e}")
-                return False
+        """FLASH CLOSE: Force close position using Bitget special endpoint (22002 = déjà fermée → True)"""
+        if self.adapter.flash_close(side):
+            self.logger.debug(f"     ⚡ Flash close {side.upper()} SUCCESS")
+            return True
+        self.logger.warning(f"     ❌ Flash close {side} failed")
+        return False
 
     def cancel_all_limit_orders(self):
         """Cancel ALL LIMIT orders for this pair"""
@@ -464,89 +421,21 @@ class BitgetHedgeBotV4Debug:
             raise
 
     def get_real_positions(self):
-        """Get actual positions from API"""
+        """Get actual positions from API: {'long': PositionRecord | None, 'short': ...}"""
         try:
-            positions = self.exchange.fetch_positions(symbols=[self.PAIR])
-
-            result = {'long': None, 'short': None}
-
-            for pos in positions:
-                size = float(pos.get('contracts', 0))
-                if size > 0:
-                    side = pos.get('side', '').lower()
-                    result[side] = {
-                        'size': size,
-                        'entry_price': float(pos.get('entryPrice', 0)),
-                        'pnl': float(pos.get('unrealizedPnl', 0)),
-                        'leverage': float(pos.get('leverage', 0))
-                    }
-                    self.logger.debug(f"API [fetch_positions] {side}: size={size}, entry=${result[side]['entry_price']:.8f}, pnl=${result[side]['pnl']:.2f}")
-
-            return result
+            return self.adapter.get_positions()
         except Exception as e:
             self.logger.error(f"Erreur fetch_positions: {e}")
             raise
 
     def place_tpsl_order(self, trigger_price, hold_side, size, plan_type='profit_plan'):
-        """Place TP/SL order using Bitget API (EXACTLY like V2_fixed)"""
-
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-        bitget_plan_type = 'pos_profit' if plan_type == 'profit_plan' else 'pos_loss'
-
-        max_retries = 5
-        current_price = trigger_price
-
-        for attempt in range(max_retries):
-            # Adjust price based on retry attempt
-            if attempt > 0:
-                adjustment = 0.0005 * attempt  # 0.05% per retry
-                if hold_side == 'long':
-                    current_price = trigger_price * (1 + adjustment)
-                else:  # short
-                    current_price = trigger_price * (1 - adjustment)
-                self.logger.info(f"      Retry {attempt + 1}: Ajustement prix → ${current_price:.8f}")
-
-            trigger_price_rounded = self.round_price(current_price)
-
-            body = {
-                'marginCoin': 'USDT',
-                'productType': 'USDT-FUTURES',
-                'symbol': symbol_bitget,
-                'planType': bitget_plan_type,
-                'triggerPrice': str(trigger_price_rounded),
-                'triggerType': 'mark_price',
-                'executePrice': '0',
-                'holdSide': hold_side,
-                'size': str(int(size))
-            }
-
-            try:
-                self.logger.debug(f"API [place_tpsl_order] Body: {body}")
-                result = self.exchange.private_mix_post_v2_mix_order_place_tpsl_order(body)
-                self.logger.debug(f"API Response: {result}")
-
-                if result.get('code') == '00000':
-                    order_id = result['data']['orderId']
-                    self.logger.info(f"   ✅ TP/SL PLACÉ!")
-                    self.logger.info(f"      - Order ID: {order_id}")
-                    self.logger.info(f"      - Side: {hold_side.upper()}")
-                    self.logger.info(f"      - Trigger Price: ${trigger_price_rounded:.8f}")
-                    self.logger.info(f"      - Size: {int(size)} contrats")
-                    return {'id': order_id}
-                else:
-                    self.logger.warning(f"      ⚠️ Tentative {attempt + 1} échec: {result.get('msg')}")
-                    time.sleep(0.5)
-                    continue
-
-            except Exception as e:
-                error_msg = str(e)
-                self.logger.warning(f"      ⚠️ Tentative {attempt + 1} erreur: {e}")
-                time.sleep(0.5)
-                continue
-
-        # Failed after all retries
-        self.logger.error(f"   ❌ ÉCHEC PLACEMENT TP après {max_retries} tentatives!")
-        return None
+        """Place TP/SL order with retry and price adjustment (cf. BitgetAdapter.place_tpsl)"""
+        tp = self.adapter.place_tpsl(trigger_price, hold_side, size, plan_type)
+        if tp:
+            self.logger.info(f"   ✅ TP/SL {hold_side.upper()} placé @ ${tp.price}: {tp.id}")
+        else:
+            self.logger.warning(f"   ❌ ÉCHEC PLACEMENT TP {hold_side.upper()} - position SANS TP!")
+        return tp
 
     def open_initial_hedge(self):
         """Open initial hedge: 2 positions + 2 TP + 2 LIMIT Fibo"""
@@ -23,10 +23,13 @@ import ccxt
 import time
 import os
 import argparse
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 
+from bitget_adapter import BitgetAdapter
+from http_pool import install_http_pool
+from telegram_outbox import TelegramOutbox
+
 load_dotenv()
 
 
@@ -82,6 +85,7 @@ class BitgetHedgeBotV4:
         # Telegram credentials
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id, prefix=f"[{self.pair_name}] ")
 
         if self.telegram_token and self.telegram_chat_id:
             print(f"✅ Telegram configuré")
@@ -89,7 +93,7 @@ class BitgetHedgeBotV4:
             print(f"⚠️  Telegram non configuré (fonctionne sans notifications)")
 
         # Exchange setup
-        self.exchange = ccxt.bitget({
+        self.exchange = install_http_pool(ccxt.bitget({
             'apiKey': self.api_key,
             'secret': self.api_secret,
             'password': self.api_password,
@@ -99,10 +103,11 @@ class BitgetHedgeBotV4:
             },
             'headers': {'PAPTRADING': '1'},
             'enableRateLimit': True
-        })
+        }))
 
         # Parameters
         self.PAIR = pair
+        self.adapter = BitgetAdapter(self.exchange, self.PAIR)
         self.INITIAL_MARGIN = 5  # $5 per position
         self.LEVERAGE = 50
 
@@ -128,26 +133,9 @@ class BitgetHedgeBotV4:
         timestamp = datetime.now().strftime('%H:%M:%S')
         print(f"[{timestamp}] [{self.pair_name}] {message}")
 
-    def send_telegram(self, message):
-        """Envoie message Telegram avec préfixe paire"""
-        if not self.telegram_token or not self.telegram_chat_id:
-            return False
-
-        # Préfixe avec nom de la paire
-        full_message = f"[{self.pair_name}] {message}"
-
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        data = {
-            "chat_id": self.telegram_chat_id,
-            "text": full_message,
-            "parse_mode": "HTML"
-        }
-
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+    def send_telegram(self, message, urgent=False):
+        """Envoie message Telegram (mis en file, ne bloque jamais le trading)"""
+        return self.outbox.send(message, urgent=urgent)
 
     def cleanup_all(self):
         """Clean all positions and orders - WITH VERIFICATION"""
@@ -218,119 +206,29 @@ class BitgetHedgeBotV4:
         return float(ticker['last'])
 
     def get_real_positions(self):
-        """Get actual positions from API"""
-        positions = self.exchange.fetch_positions(symbols=[self.PAIR])
-
-        result = {'long': None, 'short': None}
-
-        for pos in positions:
-            size = float(pos.get('contracts', 0))
-            if size > 0:
-                side = pos.get('side', '').lower()
-                result[side] = {
-                    'size': size,
-                    'entry_price': float(pos.get('entryPrice', 0)),
-                    'pnl': float(pos.get('unrealizedPnl', 0)),
-                    'leverage': float(pos.get('leverage', 0))
-                }
-
-        return result
+        """Get actual positions from API: {'long': PositionRecord | None, 'short': ...}"""
+        return self.adapter.get_positions()
 
     def cancel_all_tpsl_orders(self):
-        """Annule TOUS les ordres TP/SL (plan orders) pour cette paire"""
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-
-        cancelled_count = 0
-
-        for plan_type in ['pos_profit', 'pos_loss']:
-            try:
-                tpsl_orders = self.exchange.private_mix_get_v2_mix_order_orders_plan_pending({
-                    'symbol': symbol_bitget,
-                    'productType': 'USDT-FUTURES',
-                    'planType': plan_type
-                })
-
-                if tpsl_orders.get('code') == '00000':
-                    orders_list = tpsl_orders.get('data', {}).get('entrustedList', [])
-                    for order in orders_list:
-                        try:
-                            self.exchange.private_mix_post_v2_mix_order_cancel_plan_order({
-                                'orderId': order['orderId'],
-                                'symbol': symbol_bitget,
-                                'productType': 'USDT-FUTURES',
-                                'marginCoin': 'USDT'
-                            })
-                            cancelled_count += 1
-                            time.sleep(0.3)
-                        except:
-                            pass
-            except:
-                pass
+        """Cancel ALL TP/SL plan orders (1 lecture + 1 annulation groupée)"""
+        try:
+            cancelled_count = self.adapter.cancel_all_tpsl()
+        except Exception as e:
+            self.log(f"  ⚠️  Annulation TP/SL échouée: {e}")
+            return 0
 
         if cancelled_count > 0:
             self.log(f"  🗑️  {cancelled_count} ordres TP/SL annulés")
-
         return cancelled_count
 
     def place_tpsl_order(self, trigger_price, hold_side, size, plan_type='profit_plan'):
-        """Place TP/SL order using Bitget API (EXACTLY like V2_fixed)"""
-
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-        bitget_plan_type = 'pos_profit' if plan_type == 'profit_plan' else 'pos_loss'
-
-        max_retries = 5
-        current_price = trigger_price
-
-        for attempt in range(max_retries):
-            # Adjust price based on retry attempt
-            if attempt > 0:
-                adjustment = 0.0005 * attempt  # 0.05% per retry
-                if hold_side == 'long':
-                    current_price = trigger_price * (1 + adjustment)
-                else:  # short
-                    current_price = trigger_price * (1 - adjustment)
-                self.log(f"      Retry {attempt + 1}: Ajustement prix → ${current_price:.5f}")
-
-            trigger_price_rounded = self.round_price(current_price)
-
-            body = {
-                'marginCoin': 'USDT',
-                'productType': 'USDT-FUTURES',
-                'symbol': symbol_bitget,
-                'planType': bitget_plan_type,
-                'triggerPrice': str(trigger_price_rounded),
-                'triggerType': 'mark_price',
-                'executePrice': '0',
-                'holdSide': hold_side,
-                'size': str(int(size))
-            }
-
-            try:
-                result = self.exchange.private_mix_post_v2_mix_order_place_tpsl_order(body)
-
-                if result.get('code') == '00000':
-                    order_id = result['data']['orderId']
-                    self.log(f"   ✅ TP/SL placé: {order_id}")
-                    return {'id': order_id}
-                else:
-                    self.log(f"      ⚠️ Tentative {attempt + 1} échec: {result.get('msg')}")
-                    time.sleep(0.5)
-                    continue
-
-            except Exception as e:
-                error_msg = str(e)
-                if '40915' in error_msg or 'price please' in error_msg.lower():
-                    self.log(f"      ⚠️ Tentative {attempt + 1}: Prix invalide, ajustement...")
-                    time.sleep(0.5)
-                    continue
-                else:
-                    self.log(f"      ❌ Tentative {attempt + 1} erreur: {e}")
-                    time.sleep(0.5)
-                    continue
-
-        # Failed after all retries
-        self.log(f"   ❌ ÉCHEC PLACEMENT TP après {max_retries} tentatives!")
-        return None
+        """Place TP/SL order with retry and price adjustment (cf. BitgetAdapter.place_tpsl)"""
+        tp = self.adapter.place_tpsl(trigger_price, hold_side, size, plan_type)
+        if tp:
+            self.log(f"   ✅ TP/SL {hold_side.upper()} placé @ ${tp.price}: {tp.id}")
+        else:
+            self.log(f"   ❌ ÉCHEC PLACEMENT TP {hold_side.upper()} - position SANS TP!")
+        return tp
 
     def open_initial_hedge(self):
         """Open initial hedge: 2 positions + 2 TP + 2 LIMIT Fibo"""
@@ -853,7 +751,7 @@ class BitgetHedgeBotV4:
             # Open initial hedge
             if not self.open_initial_hedge():
                 self.log("❌ Échec ouverture hedge initial")
-                self.send_telegram("❌ <b>ERREUR DÉMARRAGE</b>\nÉchec ouverture hedge")
+                self.send_telegram("❌ <b>ERREUR DÉMARRAGE</b>\nÉchec ouverture hedge", urgent=True)
                 return
 
             # Initial state verification
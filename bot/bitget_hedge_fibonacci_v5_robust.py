@@ -27,11 +27,17 @@ import ccxt
 import time
 import os
 import argparse
-import requests
 from datetime import datetime
 from enum import Enum
 from dotenv import load_dotenv
 
+from quantizer import get_quantizer
+from bitget_adapter import BitgetAdapter
+from bitget_ws import BitgetPriceStream, to_bitget_symbol
+from telegram_outbox import TelegramOutbox
+from cleanup_engine import flatten_account
+from http_pool import install_http_pool
+
 load_dotenv()
 
 
@@ -72,7 +78,7 @@ class Position:
 class BitgetHedgeBotV5:
     """Ultra-robust single-pair bot with verification at every step"""
 
-    def __init__(self, pair, api_key_id=1):
+    def __init__(self, pair, api_key_id=1, use_ws=True):
         self.pair_name = pair.split('/')[0]
         self.state = BotState.IDLE
 
@@ -98,6 +104,7 @@ class BitgetHedgeBotV5:
         # Telegram credentials
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id, prefix=f"[{self.pair_name}] ")
 
         if self.telegram_token and self.telegram_chat_id:
             print(f"✅ Telegram configuré")
@@ -105,7 +112,7 @@ class BitgetHedgeBotV5:
             print(f"⚠️  Telegram non configuré")
 
         # Exchange setup
-        self.exchange = ccxt.bitget({
+        self.exchange = install_http_pool(ccxt.bitget({
             'apiKey': self.api_key,
             'secret': self.api_secret,
             'password': self.api_password,
@@ -115,10 +122,14 @@ class BitgetHedgeBotV5:
             },
             'headers': {'PAPTRADING': '1'},
             'enableRateLimit': True
-        })
+        }))
 
         # Parameters
         self.PAIR = pair
+        self.adapter = BitgetAdapter(self.exchange, self.PAIR)
+
+        # Cache ticker/books5 (WebSocket public) → get_price sans REST (None = fetch_ticker)
+        self.price_stream = BitgetPriceStream([to_bitget_symbol(pair)]) if use_ws else None
         self.INITIAL_MARGIN = 5  # $5 per position
         self.LEVERAGE = 50
 
@@ -160,42 +171,23 @@ class BitgetHedgeBotV5:
         emoji = state_emoji.get(self.state, "⚪")
         print(f"[{timestamp}] {emoji} [{self.pair_name}] {message}")
 
-    def send_telegram(self, message):
-        """Send Telegram notification"""
-        if not self.telegram_token or not self.telegram_chat_id:
-            return False
-
-        full_message = f"[{self.pair_name}] {message}"
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        data = {
-            "chat_id": self.telegram_chat_id,
-            "text": full_message,
-            "parse_mode": "HTML"
-        }
-
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+    def send_telegram(self, message, urgent=False):
+        """Send Telegram notification (queued, never blocks trading)"""
+        return self.outbox.send(message, urgent=urgent)
 
     def get_price(self):
-        """Get current market price"""
+        """Prix courant: cache WebSocket public (O(1)), fetch_ticker seulement si périmé"""
+        if self.price_stream is not None:
+            price = self.price_stream.price(to_bitget_symbol(self.PAIR))
+            if price:
+                return price
+
         ticker = self.exchange.fetch_ticker(self.PAIR)
         return float(ticker['last'])
 
     def round_price(self, price):
-        """Round price based on current price level"""
-        if price >= 100:
-            return round(price, 2)  # ETH, SOL
-        elif price >= 1:
-            return round(price, 4)
-        elif price >= 0.0001:
-            return round(price, 5)  # DOGE
-        elif price >= 0.00001:
-            return round(price, 8)  # SHIB
-        else:
-            return round(price, 8)  # PEPE
+        """Round price to the contract tick (pricePlace/priceEndStep from market metadata)"""
+        return float(get_quantizer(self.exchange, self.PAIR).round_price(price))
 
     def calculate_size(self, price):
         """Calculate size based on price level"""
@@ -209,23 +201,8 @@ class BitgetHedgeBotV5:
             return max(size, 0.01)  # Bitget minimum
 
     def get_real_positions(self):
-        """Get actual positions from API"""
-        positions = self.exchange.fetch_positions(symbols=[self.PAIR])
-
-        result = {'long': None, 'short': None}
-
-        for pos in positions:
-            size = float(pos.get('contracts', 0))
-            if size > 0:
-                side = pos.get('side', '').lower()
-                result[side] = {
-                    'size': size,
-                    'entry_price': float(pos.get('entryPrice', 0)),
-                    'pnl': float(pos.get('unrealizedPnl', 0)),
-                    'leverage': float(pos.get('leverage', 0))
-                }
-
-        return result
+        """Get actual positions from API: {'long': PositionRecord | None, 'short': ...}"""
+        return self.adapter.get_positions()
 
     def verify_position_exists(self, side, expected_size=None, max_retries=5):
         """
@@ -279,68 +256,26 @@ class BitgetHedgeBotV5:
         self.log(f"   ❌ Ordre {order_type} {order_id[:12]}... NOT FOUND!")
         return False
 
-    def place_tpsl_order_verified(self, trigger_price, hold_side, size, plan_type='profit_plan'):
+    def place_tpsl_order_verified(self, trigger_price, hold_side, size, plan_type='profit_plan', max_retries=3):
         """
-        Place TP/SL with VERIFICATION
+        Place TP/SL with VERIFICATION (trigger +0.1% par tentative si refusé)
         Returns: order_id or None
         """
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
         bitget_plan_type = 'pos_profit' if plan_type == 'profit_plan' else 'pos_loss'
 
-        max_retries = 5
-
         for attempt in range(max_retries):
-            # Adjust price based on retry
-            if attempt > 0:
-                adjustment = 0.001 * attempt  # 0.1% per retry
-                if hold_side == 'long':
-                    current_price = trigger_price * (1 + adjustment)
-                else:
-                    current_price = trigger_price * (1 - adjustment)
-                self.log(f"      Retry {attempt + 1}: Prix ajusté → ${current_price:.5f}")
-            else:
-                current_price = trigger_price
-
-            trigger_price_rounded = self.round_price(current_price)
+            tp = self.adapter.place_tpsl(trigger_price, hold_side, size, plan_type, adjust=0.001)
+            if tp is None:
+                break
+            self.log(f"   ✅ TP/SL placé: {tp.id}")
 
-            body = {
-                'marginCoin': 'USDT',
-                'productType': 'USDT-FUTURES',
-                'symbol': symbol_bitget,
-                'planType': bitget_plan_type,
-                'triggerPrice': str(trigger_price_rounded),
-                'triggerType': 'mark_price',
-                'executePrice': '0',
-                'holdSide': hold_side,
-                'size': str(int(size))
-            }
-
-            try:
-                result = self.exchange.private_mix_post_v2_mix_order_place_tpsl_order(body)
-
-                if result.get('code') == '00000':
-                    order_id = result['data']['orderId']
-                    self.log(f"   ✅ TP/SL placé: {order_id}")
-
-                    # VERIFICATION: Check via API
-                    time.sleep(1)
-                    if self.verify_tpsl_order_exists(hold_side, bitget_plan_type):
-                        return order_id
-                    else:
-                        self.log(f"   ⚠️  TP/SL placé mais non trouvé, retry...")
-                        continue
-                else:
-                    self.log(f"   ⚠️  Tentative {attempt + 1}: {result.get('msg')}")
-                    time.sleep(0.5)
-                    continue
-
-            except Exception as e:
-                error_msg = str(e)
-                self.log(f"   ⚠️  Tentative {attempt + 1} erreur: {e}")
-                time.sleep(0.5)
-                continue
+            # VERIFICATION: Check via API
+            time.sleep(1)
+            if self.verify_tpsl_order_exists(hold_side, bitget_plan_type):
+                return tp.id
+            self.log(f"   ⚠️  TP/SL placé mais non trouvé, retry {attempt + 2}/{max_retries}...")
 
-        self.log(f"   ❌ ÉCHEC placement TP après {max_retries} tentatives!")
+        self.log(f"   ❌ ÉCHEC placement TP {hold_side.upper()}!")
         return None
 
     def verify_tpsl_order_exists(self, hold_side, plan_type):
@@ -400,133 +335,35 @@ class BitgetHedgeBotV5:
     def flash_close_position(self, side):
         """
         FLASH CLOSE: Force close position using Bitget special endpoint
-        More reliable than regular market orders
+        More reliable than regular market orders (22002 = déjà fermée → True)
         """
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-
-        try:
-            result = self.exchange.private_mix_post_v2_mix_order_close_positions({
-                'symbol': symbol_bitget,
-                'productType': 'USDT-FUTURES',
-                'holdSide': side
-            })
-
-            if result.get('code') == '00000':
-                self.log(f"     ⚡ Flash close {side.upper()} SUCCESS")
-                return True
-            else:
-                error_msg = result.get('msg', 'Unknown error')
-                if '22002' in str(result):
-                    self.log(f"     ⚠️  Position {side} déjà fermée (22002)")
-                    return True  # Already closed = success
-                else:
-                    self.log(f"     ❌ Flash close {side} failed: {error_msg}")
-                    return False
-
-        except Exception as e:
-            error_str = str(e)
-            if '22002' in error_str:
-                self.log(f"     ⚠️  Position {side} déjà fermée (22002)")
-                return True
-            else:
-                self.log(f"     ❌ Exception flash close {side}: {e}")
-                return False
+        if self.adapter.flash_close(side):
+            self.log(f"     ⚡ Flash close {side.upper()} SUCCESS")
+            return True
+        self.log(f"     ❌ Flash close {side} failed")
+        return False
 
     def cleanup_all(self):
-        """Clean all positions and orders - WITH FLASH CLOSE"""
+        """Clean all positions and orders of this pair (bulk cancel + flash close, one verification snapshot)"""
         self.log("🧹 Cleanup avec FLASH CLOSE...")
 
-        max_retries = 3
-
-        for attempt in range(max_retries):
-            if attempt > 0:
-                self.log(f"🔄 Tentative {attempt + 1}/{max_retries}...")
-
-            try:
-                # 1. Cancel all LIMIT orders
-                orders = self.exchange.fetch_open_orders(symbol=self.PAIR)
-                if orders:
-                    self.log(f"  📝 {len(orders)} ordres LIMIT à annuler...")
-                    for order in orders:
-                        self.exchange.cancel_order(order['id'], self.PAIR)
-                        time.sleep(0.2)
-
-                # 2. Cancel all TP/SL orders
-                self.cancel_all_tpsl_orders()
-
-                # 3. FLASH CLOSE all positions (more reliable than market orders)
-                positions = self.exchange.fetch_positions(symbols=[self.PAIR])
-                closed_count = 0
-                for pos in positions:
-                    size = float(pos.get('contracts', 0))
-                    if size > 0:
-                        side = pos.get('side', '').lower()
-                        self.log(f"  🔴 Flash closing {side.upper()}: {size:.0f} contrats")
-
-                        if self.flash_close_position(side):
-                            closed_count += 1
-
-                        time.sleep(1)
-
-                if closed_count > 0:
-                    self.log(f"  ⚡ {closed_count} positions flash closed")
-
-                # 4. VERIFICATION FINALE
-                time.sleep(2)
-                final_orders = self.exchange.fetch_open_orders(symbol=self.PAIR)
-                final_positions = self.exchange.fetch_positions(symbols=[self.PAIR])
-                final_pos_count = sum(1 for p in final_positions if float(p.get('contracts', 0)) > 0)
-
-                if len(final_orders) == 0 and final_pos_count == 0:
-                    self.log("✅ Cleanup VÉRIFIÉ - Compte clean!")
-                    return True
-                else:
-                    self.log(f"⚠️  Il reste: {len(final_orders)} ordres, {final_pos_count} positions")
-                    if attempt < max_retries - 1:
-                        time.sleep(2)
-                        continue
-
-            except Exception as e:
-                self.log(f"❌ Erreur cleanup: {e}")
-                if attempt == max_retries - 1:
-                    return False
-
-        self.log("⚠️ Cleanup incomplet après 3 tentatives")
-        return False
+        report = flatten_account(self.exchange, [self.PAIR])
+        if report['clean']:
+            self.log(f"✅ Cleanup VÉRIFIÉ en {report['elapsed']:.1f}s - Compte clean!")
+        else:
+            self.log(f"⚠️ Cleanup incomplet après {report['rounds']} tentatives")
+        return report['clean']
 
     def cancel_all_tpsl_orders(self):
-        """Cancel ALL TP/SL orders for this pair"""
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-        cancelled_count = 0
-
-        for plan_type in ['pos_profit', 'pos_loss']:
-            try:
-                result = self.exchange.private_mix_get_v2_mix_order_orders_plan_pending({
-                    'symbol': symbol_bitget,
-                    'productType': 'USDT-FUTURES',
-                    'planType': plan_type
-                })
-
-                if result.get('code') == '00000':
-                    orders = result.get('data', {}).get('entrustedList', [])
-                    for order in orders:
-                        try:
-                            self.exchange.private_mix_post_v2_mix_order_cancel_plan_order({
-                                'orderId': order['orderId'],
-                                'symbol': symbol_bitget,
-                                'productType': 'USDT-FUTURES',
-                                'marginCoin': 'USDT'
-                            })
-                            cancelled_count += 1
-                            time.sleep(0.3)
-                        except:
-                            pass
-            except:
-                pass
+        """Cancel ALL TP/SL orders for this pair (1 lecture + 1 annulation groupée)"""
+        try:
+            cancelled_count = self.adapter.cancel_all_tpsl()
+        except Exception as e:
+            self.log(f"  ⚠️  Annulation TP/SL échouée: {e}")
+            return 0
 
         if cancelled_count > 0:
             self.log(f"  🗑️  {cancelled_count} ordres TP/SL annulés")
-
         return cancelled_count
 
     def open_initial_hedge(self):
@@ -897,7 +734,7 @@ class BitgetHedgeBotV5:
 
         if not success:
             self.log("❌ Échec réouverture hedge!")
-            self.send_telegram("❌ <b>ERREUR RÉOUVERTURE</b>")
+            self.send_telegram("❌ <b>ERREUR RÉOUVERTURE</b>", urgent=True)
             self.state = BotState.ERROR
 
         return success
@@ -1010,7 +847,7 @@ class BitgetHedgeBotV5:
 
                 if total_pnl < self.MAX_LOSS:
                     self.log(f"🚨 SAFETY LIMIT HIT! PnL: ${total_pnl:.2f} < ${self.MAX_LOSS}")
-                    self.send_telegram(f"🚨 <b>STOP LOSS AUTO!</b>\nPnL: ${total_pnl:.2f}")
+                    self.send_telegram(f"🚨 <b>STOP LOSS AUTO!</b>\nPnL: ${total_pnl:.2f}", urgent=True)
                     return True
 
             return False
@@ -1021,6 +858,9 @@ class BitgetHedgeBotV5:
     def run(self):
         """Main loop with enhanced monitoring"""
         try:
+            if self.price_stream is not None:
+                self.price_stream.start()
+
             # Initial cleanup
             self.log("🧹 Cleanup initial obligatoire...")
             if not self.cleanup_all():
@@ -1087,11 +927,15 @@ class BitgetHedgeBotV5:
         except KeyboardInterrupt:
             self.log("\n⏹️  Arrêt demandé")
             self.cleanup_all()
+            self.outbox.stop()
         except Exception as e:
             self.log(f"❌ Erreur fatale: {e}")
             import traceback
             traceback.print_exc()
             self.state = BotState.ERROR
+        finally:
+            if self.price_stream is not None:
+                self.price_stream.stop()
 
 
 def main():
@@ -1099,10 +943,12 @@ def main():
     parser.add_argument('--pair', required=True, help='Paire à trader (ex: DOGE/USDT:USDT)')
     parser.add_argument('--api-key-id', type=int, default=1, choices=[1, 2],
                         help='API Key ID (1 ou 2)')
+    parser.add_argument('--no-ws', action='store_true',
+                        help='Désactive le WebSocket public (prix via fetch_ticker)')
 
     args = parser.parse_args()
 
-    bot = BitgetHedgeBotV5(pair=args.pair, api_key_id=args.api_key_id)
+    bot = BitgetHedgeBotV5(pair=args.pair, api_key_id=args.api_key_id, use_ws=not args.no_ws)
     bot.run()
 
 
@@ -9,19 +9,39 @@ Stratégie: Hedge permanent avec TP/Fibo optimisés
 - Notifications Telegram
 - Support multi-instance (une paire par instance)
 
+- Détection des fills en push via WebSocket privé (fallback polling REST)
+
 Usage:
     python bitget_hedge_multi_instance.py --pair DOGE/USDT:USDT
+    python bitget_hedge_multi_instance.py --pair DOGE/USDT:USDT --no-ws
 """
 
 import ccxt
+import math
 import time
 import os
 import logging
-import requests
 import argparse
+import queue
 from datetime import datetime
 from dotenv import load_dotenv
 
+from bitget_ws import BitgetPriceStream, BitgetPrivateStream, to_bitget_symbol
+from market_cache import load_markets_cached
+from quantizer import get_quantizer
+from bitget_adapter import BitgetAdapter
+from order_batch import batch_cancel_orders, batch_place_orders, run_parallel
+from fibo_ladder import filled_rungs, plan_ladder, sync_ladder
+from cleanup_engine import account_state, flatten_account
+from state_journal import StateJournal, journal_path
+from confirm import wait_for
+from rate_limiter import install_rate_limiter, request_priority
+from rest_override import override_rest_url
+from api_metrics import instrument_exchange, start_metrics_server
+from telegram_outbox import TelegramOutbox
+from telegram_listener import TelegramListener
+from http_pool import install_http_pool, warm_up
+
 # Configuration logging
 logging.basicConfig(
     level=logging.INFO,
@@ -59,14 +79,35 @@ class Position:
             'double_short': None  # LIMIT SELL pour doubler SHORT
         }
 
+        # Mode échelle: niveaux Fibo au repos [{'level', 'id', 'price', 'size'}]
+        self.ladder = {'long': [], 'short': []}
+
         # Fibonacci levels (%)
         self.fib_levels = [0.3, 0.6, 1.0, 1.5, 2.0, 3.0, 5.0]  # 0.3%, 0.6%, 1.0%...
 
+    JOURNALED = ('long_open', 'short_open', 'entry_price_long', 'entry_price_short',
+                 'long_fib_level', 'short_fib_level', 'long_size_previous', 'short_size_previous')
+
+    def to_dict(self):
+        """State to journal (order IDs, fib levels, previous sizes, entry prices)"""
+        state = {'pair': self.pair, 'orders': dict(self.orders),
+                 'ladder': {side: list(rungs) for side, rungs in self.ladder.items()}}
+        state.update({name: getattr(self, name) for name in self.JOURNALED})
+        return state
+
+    def restore(self, state):
+        """Reload a journaled state (warm restart)"""
+        for name in self.JOURNALED:
+            setattr(self, name, state[name])
+        self.orders.update(state['orders'])
+        self.ladder = state.get('ladder') or {'long': [], 'short': []}
+
 
 class BitgetHedgeBotV2Fixed:
     """Production bot with Telegram notifications and 0.5% TP"""
 
-    def __init__(self, pair='DOGE/USDT:USDT', api_key_id=1):
+    def __init__(self, pair='DOGE/USDT:USDT', api_key_id=1, use_ws=True, metrics_port=None, cold_start=False,
+                 ladder_depth=1):
         logger.info("="*80)
         logger.info(f"🤖 BITGET HEDGE BOT - MULTI-INSTANCE ({pair.split('/')[0]}) [API Key {api_key_id}]")
         logger.info("="*80)
@@ -84,6 +125,7 @@ class BitgetHedgeBotV2Fixed:
         # Telegram credentials
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id)
 
         if not all([self.api_key, self.api_secret, self.api_password]):
             raise ValueError("Missing API credentials in .env")
@@ -106,34 +148,61 @@ class BitgetHedgeBotV2Fixed:
             'headers': {'PAPTRADING': '1'},
             'enableRateLimit': True
         })
+        # Limite partagée entre tous les process de la même clé API
+        install_rate_limiter(self.exchange, self.api_key)
+        # BITGET_REST_URL → mock local (tests / benchmarks)
+        override_rest_url(self.exchange)
+        # Connexions keep-alive partagées, ouvertes avant le premier ordre
+        install_http_pool(self.exchange)
+        warm_up(self.exchange)
+        # Latence / erreurs par méthode (/latency Telegram, /metrics Prometheus si port donné)
+        self.api_metrics = instrument_exchange(self.exchange)
+        if metrics_port:
+            start_metrics_server(self.api_metrics, metrics_port)
 
         # Parameters
         self.PAIR = pair
         self.LEVERAGE = 50
+        # Appels REST communs (positions, TP/SL, flash close) avec retry réseau
+        self.adapter = BitgetAdapter(self.exchange, self.PAIR)
 
         # TP and Fibo levels
         self.TP_PERCENT = 0.5  # 0.5% TP
         self.FIBO_LEVELS = [0.3, 0.6, 1.0, 1.5, 2.0]  # First level: 0.3%
+        # Niveaux Fibo au repos par côté (1 = un seul LIMIT replacé après chaque fill)
+        self.LADDER_DEPTH = max(1, ladder_depth)
 
         # Calculate minimum margin for this pair
         logger.info(f"\n🔍 Calcul marge minimale pour {self.PAIR.split('/')[0]}...")
         self.INITIAL_MARGIN = self.calculate_min_margin()
         logger.info(f"   ✅ Marge adaptée: ${self.INITIAL_MARGIN}")
 
-        # Position tracking
+        # Position tracking (journalisée pour les redémarrages à chaud)
         self.position = Position(self.PAIR)
+        self.journal = StateJournal(journal_path(self.PAIR, api_key_id))
+        self.cold_start = cold_start
 
-        # Telegram updates tracking
-        self.last_telegram_update_id = 0
-        self.telegram_check_interval = 5  # Check toutes les 5 secondes
-        self.last_telegram_check = 0
+        # Commandes Telegram: long polling dans un thread, exécutées par la boucle
+        self.telegram_listener = TelegramListener(self.telegram_token, self.telegram_chat_id,
+                                                  pair=self.PAIR.split('/')[0])
+
+        # WebSocket privé (fills en push) + resync REST de sécurité
+        self.use_ws = use_ws
+        self.stream = None
+        self.price_stream = None  # cache ticker/books5 (get_price sans REST)
+        self.REST_RESYNC_INTERVAL = 30  # secondes
+        self.STATUS_LOG_INTERVAL = 10   # secondes (indépendant du rythme des pushs)
+        self.last_rest_sync = 0
 
         logger.info(f"\n📊 Configuration:")
         logger.info(f"Paire: {self.PAIR}")
         logger.info(f"TP: {self.TP_PERCENT}%")
         logger.info(f"Fibo levels: {self.FIBO_LEVELS}")
+        if self.LADDER_DEPTH > 1:
+            logger.info(f"Échelle Fibo: {self.LADDER_DEPTH} niveaux au repos par côté")
         logger.info(f"Initial margin: ${self.INITIAL_MARGIN}")
         logger.info(f"Leverage: {self.LEVERAGE}x")
+        logger.info(f"Détection: {'WebSocket privé (push)' if self.use_ws else 'Polling REST'}")
 
     def calculate_min_margin(self):
         """
@@ -141,8 +210,8 @@ class BitgetHedgeBotV2Fixed:
         Returns margin with 2x safety factor
         """
         try:
-            # Load markets
-            markets = self.exchange.load_markets()
+            # Load markets (cache disque partagé, refresh en tâche de fond)
+            markets = load_markets_cached(self.exchange, background=True)
 
             if self.PAIR not in markets:
                 logger.warning(f"   ⚠️ Paire non trouvée dans markets, utilise $5 par défaut")
@@ -187,23 +256,9 @@ class BitgetHedgeBotV2Fixed:
             logger.warning(f"   ⚠️ Utilise $5 par défaut")
             return 5
 
-    def send_telegram(self, message):
-        """Envoie message Telegram"""
-        if not self.telegram_token or not self.telegram_chat_id:
-            return False
-
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        data = {
-            "chat_id": self.telegram_chat_id,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+    def send_telegram(self, message, urgent=False):
+        """Envoie message Telegram (mis en file, ne bloque jamais le trading)"""
+        return self.outbox.send(message, urgent=urgent)
 
     def send_detailed_position_update(self, pair):
         """
@@ -253,230 +308,177 @@ class BitgetHedgeBotV2Fixed:
             logger.error(f"Erreur send_detailed_position_update: {e}")
 
     def cleanup_all(self):
-        """Clean ALL positions and orders on the account (all pairs) with retry loop"""
+        """Clean ALL positions and orders on the account (all pairs): annulations groupées + flash close parallèle"""
         logger.info("\n" + "="*80)
         logger.info("🧹 CLEANUP AGRESSIF - FERMETURE TOUT LE COMPTE (TOUTES PAIRES)")
         logger.info("="*80)
 
-        max_retries = 5
-
-        for attempt in range(max_retries):
-            logger.info(f"\n🔄 Tentative {attempt + 1}/{max_retries}...")
+        # Micro-positions < 1 contrat ignorées (glitches Bitget)
+        with request_priority('high'):
+            report = flatten_account(self.exchange, min_contracts=1, max_rounds=5)
+        if report['clean']:
+            self.journal.clear()
 
-            all_clean = True
+        logger.info("="*80 + "\n")
+        return report['clean']
 
-            try:
-                # 1. Close ALL positions on account (not just self.PAIR)
-                positions = self.exchange.fetch_positions()  # TOUTES les paires
-                for pos in positions:
-                    size = float(pos.get('contracts', 0))
-                    if size > 0:
-                        side = pos.get('side', '').lower()
-                        symbol = pos.get('symbol')
-                        pair_short = symbol.split('/')[0] if '/' in symbol else symbol[:4]
-                        logger.info(f"   🔴 {pair_short} {side.upper()}: {size} contrats")
-
-                        # Ignore micro-positions < 1 (Bitget glitches)
-                        if size < 1:
-                            logger.info(f"      ✅ Micro-position ignorée ({size})")
-                            continue
-
-                        # Try to close
-                        market_side = 'sell' if side == 'long' else 'buy'
-                        closed_ok = False
-                        try:
-                            close_order = self.exchange.create_order(
-                                symbol=symbol,  # Use position's symbol
-                                type='market',
-                                side=market_side,
-                                amount=size,
-                                params={'tradeSide': 'close', 'holdSide': side}
-                            )
-                            logger.info(f"      ✅ Ordre fermeture MARKET: {close_order['id']}")
-                            closed_ok = True
-                            time.sleep(2)
-                        except Exception as e:
-                            # Error 22002 = No position to close (already closed by another process)
-                            if '"code":"22002"' in str(e):
-                                logger.info(f"      ✅ {side.upper()} déjà fermé (22002) - skip")
-                                continue  # Don't verify, API has glitch - consider closed
-                            else:
-                                logger.error(f"      ❌ Erreur fermeture: {e}")
-                                all_clean = False
-                                time.sleep(2)
-                                continue
-
-                        # Verify closed
-                        if closed_ok:
-                            verify = self.exchange.fetch_positions(symbols=[symbol])
-                            still_open = False
-                            for vpos in verify:
-                                if vpos.get('side', '').lower() == side:
-                                    remaining = float(vpos.get('contracts', 0))
-                                    if remaining >= 1:
-                                        logger.warning(f"   ⚠️ {pair_short} {side.upper()}: {remaining} reste")
-                                        all_clean = False
-                                        still_open = True
-                            if not still_open:
-                                logger.info(f"   ✅ {pair_short} {side.upper()} fermé!")
-
-                # 2. Cancel ALL orders on account (all pairs)
-                open_orders = self.exchange.fetch_open_orders()  # TOUS les ordres
-                if open_orders:
-                    all_clean = False
-                    logger.info(f"\n   🗑️  Annulation de {len(open_orders)} ordres (toutes paires)...")
-                    for order in open_orders:
-                        try:
-                            order_symbol = order.get('symbol')
-                            order_pair_short = order_symbol.split('/')[0] if '/' in order_symbol else order_symbol[:4]
-                            logger.info(f"      - {order_pair_short} {order['type']} {order['side']}: {order['id'][:12]}...")
-                            self.exchange.cancel_order(order['id'], order_symbol)
-                            time.sleep(0.3)
-                        except Exception as e:
-                            logger.warning(f"      ⚠️ Erreur annulation: {e}")
-
-                # Check if everything is clean
-                if all_clean:
-                    logger.info("\n✅ CLEANUP COMPLET - Tout est fermé!")
-                    logger.info("="*80 + "\n")
-                    return True
-
-                time.sleep(2)
+    def save_state(self):
+        """Journalise la Position (une ligne, fsync) - un échec d'écriture ne bloque pas le trading"""
+        try:
+            self.journal.append(self.position.to_dict())
+        except Exception as e:
+            logger.error(f"❌ Journal d'état non écrit: {e}")
 
-            except Exception as e:
-                logger.error(f"❌ Erreur cleanup tentative {attempt + 1}: {e}")
+    def resume_from_journal(self):
+        """
+        Reprise à chaud: dernier état journalisé confronté à UN snapshot du compte
 
-        logger.warning("\n⚠️ CLEANUP INCOMPLET après 5 tentatives")
-        logger.info("="*80 + "\n")
-        return False
+        Returns:
+            bool: True si positions et ordres correspondent (ni cleanup ni réouverture)
+        """
+        saved = self.journal.load()
+        if not saved or saved.get('pair') != self.PAIR:
+            return False
 
-    def flash_close_position(self, side):
-        """Close position using flash close API"""
+        started = time.time()
         try:
-            result = self.exchange.private_mix_post_v2_mix_order_close_positions({
-                'symbol': self.PAIR.replace('/USDT:USDT', 'USDT'),
-                'productType': 'USDT-FUTURES',
-                'holdSide': side
-            })
-
-            if result.get('code') == '00000':
-                logger.info(f"   ✅ Flash Close {side} réussi")
-                return True
-            else:
-                logger.error(f"   ❌ Flash Close {side} échec: {result}")
-                return False
-
+            snapshot = account_state(self.exchange, [self.PAIR], min_contracts=1)
         except Exception as e:
-            logger.error(f"   ❌ Erreur Flash Close: {e}")
+            logger.warning(f"⚠️ Snapshot de reprise impossible: {e}")
             return False
 
+        symbol = to_bitget_symbol(self.PAIR)
+        sizes = {side: size for _, side, size in snapshot['positions']}
+        open_ids = set(snapshot['orders'].get(symbol, [])) | set(snapshot['plans'].get(symbol, []))
+        expected_ids = {oid for oid in saved['orders'].values() if oid}
+        expected_ids |= {rung['id'] for rungs in (saved.get('ladder') or {}).values() for rung in rungs}
+
+        mismatches = []
+        for side in ('long', 'short'):
+            expected = saved[f'{side}_size_previous'] if saved[f'{side}_open'] else 0
+            if not math.isclose(sizes.get(side, 0), expected, rel_tol=1e-6):
+                mismatches.append(f"{side} {sizes.get(side, 0):.0f} au lieu de {expected:.0f}")
+        if expected_ids - open_ids:
+            mismatches.append(f"ordres disparus {sorted(expected_ids - open_ids)}")
+        if open_ids - expected_ids:
+            mismatches.append(f"ordres inconnus {sorted(open_ids - expected_ids)}")
+
+        if mismatches:
+            logger.warning(f"⚠️ Journal ≠ compte ({'; '.join(mismatches)}) → cleanup + hedge neuf")
+            return False
+
+        self.position.restore(saved)
+        logger.info(f"♻️ REPRISE À CHAUD en {(time.time() - started) * 1000:.0f}ms: "
+                    f"LONG {self.position.long_size_previous:.0f} @ ${self.position.entry_price_long:.5f} | "
+                    f"SHORT {self.position.short_size_previous:.0f} @ ${self.position.entry_price_short:.5f} | "
+                    f"{len(expected_ids)} ordres")
+        return True
+
+    def flash_close_position(self, side):
+        """Close position using flash close API (22002 = déjà fermée → True)"""
+        return self.adapter.flash_close(side)
+
     def get_price(self):
-        """Get current market price"""
+        """Prix courant: cache WebSocket public (O(1)), fetch_ticker seulement si périmé"""
+        if self.price_stream is not None:
+            price = self.price_stream.price(to_bitget_symbol(self.PAIR))
+            if price:
+                return price
+
         ticker = self.exchange.fetch_ticker(self.PAIR)
         return float(ticker['last'])
 
     def get_real_positions(self):
-        """Get actual positions from API"""
-        positions = self.exchange.fetch_positions(symbols=[self.PAIR])
+        """Get actual positions from API: {'long': PositionRecord | None, 'short': ...}"""
+        return self.adapter.get_positions()
+
+    def wait_for_positions(self, condition, timeout=10):
+        """
+        Attend que les positions vérifient `condition(real_pos)` (cf. confirm.wait_for)
 
-        result = {'long': None, 'short': None}
+        Sonde REST avec backoff adaptatif; entre deux sondes, écoute le push
+        WebSocket `positions` si le stream est actif.
 
-        for pos in positions:
-            size = float(pos.get('contracts', 0))
-            if size > 0:
-                side = pos.get('side', '').lower()
-                result[side] = {
-                    'size': size,
-                    'entry_price': float(pos.get('entryPrice', 0)),
-                    'margin': float(pos.get('initialMargin', 0)),
-                    'pnl': float(pos.get('unrealizedPnl', 0))
-                }
+        Returns:
+            dict: positions au format get_real_positions(), None si deadline dépassée
+        """
+        symbol = to_bitget_symbol(self.PAIR)
+
+        def check():
+            real_pos = self.get_real_positions()
+            return real_pos if condition(real_pos) else None
 
-        return result
+        def push(timeout):
+            deadline = time.time() + timeout
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                try:
+                    event = self.stream.events.get(timeout=remaining)
+                except queue.Empty:
+                    return None
+                if event['type'] == 'positions' and symbol in event['positions']:
+                    real_pos = event['positions'][symbol]
+                    if condition(real_pos):
+                        return real_pos
+
+        stream_live = self.stream is not None and self.stream.is_live()
+        return wait_for(check, timeout=timeout, push=push if stream_live else None)
 
     def place_tpsl_order(self, trigger_price, hold_side, size, plan_type='profit_plan'):
         """
-        Place TP/SL order with retry and price adjustment
+        Place TP/SL order with retry and price adjustment (cf. BitgetAdapter.place_tpsl)
 
         Retries up to 5 times if price is invalid
         Adjusts price by 0.05% each retry to ensure it's valid
         """
-
-        symbol_bitget = self.PAIR.replace('/USDT:USDT', 'USDT')
-        bitget_plan_type = 'pos_profit' if plan_type == 'profit_plan' else 'pos_loss'
-
-        max_retries = 5
-        current_price = trigger_price
-
-        for attempt in range(max_retries):
-            # Adjust price based on retry attempt
-            if attempt > 0:
-                # For LONG TP: increase price (must be > mark price)
-                # For SHORT TP: decrease price (must be < mark price)
-                adjustment = 0.0005 * attempt  # 0.05% per retry
-                if hold_side == 'long':
-                    current_price = trigger_price * (1 + adjustment)
-                else:  # short
-                    current_price = trigger_price * (1 - adjustment)
-
-                logger.info(f"      Retry {attempt + 1}: Ajustement prix → ${current_price:.5f}")
-
-            # Round price based on pair value (checkScale varies by pair)
-            if current_price >= 100:
-                # ETH, BTC, etc: 2 decimals (checkScale=2)
-                trigger_price_rounded = round(current_price, 2)
-            elif current_price >= 1:
-                # Mid-price pairs: 4 decimals (checkScale=4)
-                trigger_price_rounded = round(current_price, 4)
-            else:
-                # DOGE, low-price: 5 decimals (checkScale=5)
-                trigger_price_rounded = round(current_price, 5)
-
-            body = {
-                'marginCoin': 'USDT',
-                'productType': 'USDT-FUTURES',
-                'symbol': symbol_bitget,
-                'planType': bitget_plan_type,
-                'triggerPrice': str(trigger_price_rounded),
-                'triggerType': 'mark_price',
-                'executePrice': '0',
-                'holdSide': hold_side,
-                'size': str(int(size))
-            }
-
-            if attempt == 0:
-                logger.info(f"   📤 Place TP/SL {plan_type}: prix ${trigger_price_rounded:.5f}")
-
+        return self.adapter.place_tpsl(trigger_price, hold_side, size, plan_type)
+
+    def update_ladder(self, side, entry_price, size, start_level):
+        """Mode échelle: aligne les LADDER_DEPTH prochains niveaux Fibo (diff + batch cancel/place)"""
+        quantizer = get_quantizer(self.exchange, self.PAIR)
+        planned = plan_ladder(side, entry_price, size, self.FIBO_LEVELS, start_level, self.LADDER_DEPTH, quantizer)
+        ladder = sync_ladder(self.exchange, self.PAIR, side, self.position.ladder[side], planned, quantizer)
+        self.position.ladder[side] = ladder
+        self.position.orders[f'double_{side}'] = ladder[0]['id'] if ladder else None
+        return ladder
+
+    def cancel_ladder(self, side):
+        """Mode échelle: annule tous les niveaux au repos d'un côté (un appel)"""
+        rungs = self.position.ladder[side]
+        if rungs:
             try:
-                result = self.exchange.private_mix_post_v2_mix_order_place_tpsl_order(body)
-
-                if result.get('code') == '00000':
-                    order_id = result['data']['orderId']
-                    logger.info(f"   ✅ TP/SL placé (tentative {attempt + 1}): {order_id}")
-                    return {'id': order_id}
-                else:
-                    logger.warning(f"      ⚠️ Tentative {attempt + 1} échec: {result.get('msg')}")
-                    time.sleep(0.5)
-                    continue
-
+                batch_cancel_orders(self.exchange, self.PAIR, [rung['id'] for rung in rungs])
+                logger.info(f"   ✅ Échelle {side.upper()} annulée ({len(rungs)} LIMIT)")
             except Exception as e:
-                error_msg = str(e)
-
-                # Check if error is about price validation
-                if '40915' in error_msg or 'price please' in error_msg.lower():
-                    logger.warning(f"      ⚠️ Tentative {attempt + 1}: Prix invalide, ajustement...")
-                    time.sleep(0.5)
-                    continue
-                else:
-                    # Other error, retry anyway
-                    logger.error(f"      ❌ Tentative {attempt + 1} erreur: {e}")
-                    time.sleep(0.5)
-                    continue
-
-        # Failed after all retries
-        logger.error(f"   ❌ ÉCHEC PLACEMENT TP après {max_retries} tentatives!")
-        logger.error(f"   ⚠️ Position {hold_side.upper()} SANS TP - ATTENTION!")
-        return None
+                logger.warning(f"   ⚠️ Annulation échelle {side.upper()}: {e}")
+        self.position.ladder[side] = []
+        self.position.orders[f'double_{side}'] = None
+
+    def abort_initial_hedge(self, sides):
+        """Hedge initial incomplet: ferme les jambes ouvertes (jamais une position sans TP ni contrepartie)"""
+        for side in sides:
+            logger.warning(f"   ⚠️ Hedge incomplet → fermeture {side.upper()}")
+            try:
+                # Le MARKET accepté peut ne pas être encore visible: flash close sur rien = 22002 = True
+                seen = self.wait_for_positions(lambda pos, side=side: pos[side], timeout=5)
+                self.flash_close_position(side)
+                # Succès seulement si le REST confirme le côté à plat (pas de push: partiel par côté)
+                flat = wait_for(lambda side=side: not self.get_real_positions()[side], timeout=5)
+            except Exception as e:
+                logger.error(f"   ❌ Fermeture {side.upper()}: {e}")
+                seen = flat = None
+
+            if flat and seen:
+                logger.info(f"   ✅ {side.upper()} fermé")
+            elif flat:
+                # Jamais vue: peut encore apparaître après le flash close
+                logger.warning(f"   ⚠️ {side.upper()} jamais visible - à vérifier")
+                self.send_telegram(f"🚨 <b>{side.upper()} {self.PAIR.split('/')[0]} non confirmé</b>\n\nHedge initial avorté, vérifier qu'aucune position n'est ouverte", urgent=True)
+            else:
+                logger.error(f"   ❌ {side.upper()} toujours ouvert - fermeture manuelle requise")
+                self.send_telegram(f"🚨 <b>{side.upper()} {self.PAIR.split('/')[0]} ouvert sans hedge ni TP</b>\n\nFermeture manuelle requise", urgent=True)
 
     def open_initial_hedge(self):
         """
@@ -493,6 +495,7 @@ class BitgetHedgeBotV2Fixed:
         logger.info("\n" + "="*80)
         logger.info("🚀 OUVERTURE HEDGE INITIAL (2 TP + 2 LIMIT FIBO)")
         logger.info("="*80)
+        sent = False
 
         try:
             current_price = self.get_price()
@@ -503,46 +506,47 @@ class BitgetHedgeBotV2Fixed:
             size = notional / current_price
             logger.info(f"Size calculée: {size:.1f} contrats (${notional} notional)")
 
-            # 1. Open LONG market
-            logger.info("\n[1/6] Ouverture LONG MARKET...")
-            long_order = self.exchange.create_order(
-                symbol=self.PAIR, type='market', side='buy', amount=size,
-                params={'tradeSide': 'open', 'holdSide': 'long'}
-            )
-            logger.info(f"   ✅ LONG ouvert: {long_order['id']}")
-
-            # 2. Open SHORT market
-            logger.info("\n[2/6] Ouverture SHORT MARKET...")
-            short_order = self.exchange.create_order(
-                symbol=self.PAIR, type='market', side='sell', amount=size,
-                params={'tradeSide': 'open', 'holdSide': 'short'}
-            )
-            logger.info(f"   ✅ SHORT ouvert: {short_order['id']}")
-
-            # Wait and get real positions (with retry)
-            logger.info("\n⏳ Attente positions (retry si nécessaire)...")
-            real_pos = None
-            max_retries = 10
-            for attempt in range(max_retries):
-                time.sleep(3)
-                real_pos = self.get_real_positions()
-
-                if real_pos['long'] and real_pos['short']:
-                    logger.info(f"   ✅ Positions récupérées (tentative {attempt + 1})")
-                    break
+            quantizer = get_quantizer(self.exchange, self.PAIR)
+            started = time.time()
+
+            # 1+2. LONG + SHORT market en UN appel (batch-place-order)
+            logger.info("\n[1-2/6] Ouverture LONG + SHORT MARKET (batch)...")
+            market_size = quantizer.format_size(size)
+            sent = True
+            long_result, short_result = batch_place_orders(self.exchange, self.PAIR, [
+                {'side': 'buy', 'trade_side': 'open', 'order_type': 'market', 'size': market_size},
+                {'side': 'sell', 'trade_side': 'open', 'order_type': 'market', 'size': market_size}
+            ])
+            for label, result in (('LONG', long_result), ('SHORT', short_result)):
+                if result['error']:
+                    logger.error(f"   ❌ {label} refusé: {result['error']}")
                 else:
-                    logger.warning(f"   ⏳ Tentative {attempt + 1}/{max_retries}: Positions pas encore visibles...")
+                    logger.info(f"   ✅ {label} ouvert: {result['id']}")
+            if long_result['error'] or short_result['error']:
+                # Une seule jambe ouverte = position nue sans TP → refermée tout de suite
+                self.abort_initial_hedge([side for side, result in (('long', long_result), ('short', short_result))
+                                          if not result['error']])
+                return False
+
+            # Attente confirmation des 2 positions (push WebSocket si actif, sinon REST rapide)
+            logger.info("\n⏳ Attente confirmation positions...")
+            real_pos = self.wait_for_positions(lambda pos: pos['long'] and pos['short'], timeout=30)
 
-            if not real_pos or not real_pos['long'] or not real_pos['short']:
-                logger.error("❌ Impossible de récupérer positions après 10 tentatives!")
+            if not real_pos:
+                logger.error("❌ Impossible de récupérer positions après 30s!")
+                self.abort_initial_hedge(['long', 'short'])
                 return False
+            if self.stream is not None:
+                # Pushs de l'ouverture (une jambe visible, puis l'autre) périmés: l'état confirmé fait foi.
+                # Aucun TP/LIMIT encore posé → aucun fill ne peut être perdu ici
+                self.stream.drain()
 
             entry_long = real_pos['long']['entry_price']
             entry_short = real_pos['short']['entry_price']
             size_long = real_pos['long']['size']
             size_short = real_pos['short']['size']
 
-            logger.info(f"\n✅ Positions confirmées:")
+            logger.info(f"\n✅ Positions confirmées ({(time.time() - started) * 1000:.0f}ms):")
             logger.info(f"   LONG:  {size_long:.0f} @ ${entry_long:.5f}")
             logger.info(f"   SHORT: {size_short:.0f} @ ${entry_short:.5f}")
 
@@ -557,8 +561,8 @@ class BitgetHedgeBotV2Fixed:
             # Calculate TP and Fibo prices
             tp_long_price = entry_long * (1 + self.TP_PERCENT / 100)
             tp_short_price = entry_short * (1 - self.TP_PERCENT / 100)
-            fibo_long_price = entry_long * (1 - self.FIBO_LEVELS[0] / 100)
-            fibo_short_price = entry_short * (1 + self.FIBO_LEVELS[0] / 100)
+            fibo_long_price = quantizer.limit_price(entry_long * (1 - self.FIBO_LEVELS[0] / 100), 'buy')
+            fibo_short_price = quantizer.limit_price(entry_short * (1 + self.FIBO_LEVELS[0] / 100), 'sell')
 
             logger.info(f"\n📊 Prix calculés:")
             logger.info(f"   TP Long:   ${tp_long_price:.5f} (+{self.TP_PERCENT}%)")
@@ -566,51 +570,45 @@ class BitgetHedgeBotV2Fixed:
             logger.info(f"   Fibo Long: ${fibo_long_price:.5f} (-{self.FIBO_LEVELS[0]}%)")
             logger.info(f"   Fibo Short: ${fibo_short_price:.5f} (+{self.FIBO_LEVELS[0]}%)")
 
-            # 3. Place TP LONG
-            logger.info("\n[3/6] Placement TP LONG...")
-            time.sleep(2)
-            tp_long = self.place_tpsl_order(
-                trigger_price=tp_long_price,
-                hold_side='long',
-                size=size_long,
-                plan_type='profit_plan'
-            )
-            if tp_long and tp_long.get('id'):
-                self.position.orders['tp_long'] = tp_long['id']
-                logger.info(f"   ✅ TP Long: {tp_long['id']}")
-
-            # 4. Place TP SHORT
-            logger.info("\n[4/6] Placement TP SHORT...")
-            time.sleep(2)
-            tp_short = self.place_tpsl_order(
-                trigger_price=tp_short_price,
-                hold_side='short',
-                size=size_short,
-                plan_type='profit_plan'
-            )
-            if tp_short and tp_short.get('id'):
-                self.position.orders['tp_short'] = tp_short['id']
-                logger.info(f"   ✅ TP Short: {tp_short['id']}")
-
-            # 5. Place LIMIT BUY (double la marge LONG quand exécuté)
-            logger.info("\n[5/6] Placement LIMIT BUY (Fibo Long - double marge)...")
-            time.sleep(1)
-            fibo_long = self.exchange.create_order(
-                symbol=self.PAIR, type='limit', side='buy', amount=size_long,
-                price=fibo_long_price, params={'tradeSide': 'open', 'holdSide': 'long'}
-            )
-            self.position.orders['double_long'] = fibo_long['id']
-            logger.info(f"   ✅ LIMIT BUY: {fibo_long['id']} - {size_long:.0f} @ ${fibo_long_price:.5f}")
-
-            # 6. Place LIMIT SELL (double la marge SHORT quand exécuté)
-            logger.info("\n[6/6] Placement LIMIT SELL (Fibo Short - double marge)...")
-            time.sleep(1)
-            fibo_short = self.exchange.create_order(
-                symbol=self.PAIR, type='limit', side='sell', amount=size_short,
-                price=fibo_short_price, params={'tradeSide': 'open', 'holdSide': 'short'}
-            )
-            self.position.orders['double_short'] = fibo_short['id']
-            logger.info(f"   ✅ LIMIT SELL: {fibo_short['id']} - {size_short:.0f} @ ${fibo_short_price:.5f}")
+            # 3-6. TP LONG + TP SHORT + LIMIT Fibo (batch) envoyés en même temps
+            logger.info("\n[3-6/6] Placement 2 TP + 2 LIMIT Fibo (en parallèle)...")
+            calls = {
+                'tp_long': lambda: self.place_tpsl_order(
+                    trigger_price=tp_long_price, hold_side='long', size=size_long, plan_type='profit_plan'),
+                'tp_short': lambda: self.place_tpsl_order(
+                    trigger_price=tp_short_price, hold_side='short', size=size_short, plan_type='profit_plan')
+            }
+            if self.LADDER_DEPTH > 1:
+                # Mode échelle: LADDER_DEPTH niveaux par côté, un batch-place-order par côté
+                calls['ladder_long'] = lambda: self.update_ladder('long', entry_long, size_long, 0)
+                calls['ladder_short'] = lambda: self.update_ladder('short', entry_short, size_short, 0)
+            else:
+                calls['fibo'] = lambda: batch_place_orders(self.exchange, self.PAIR, [
+                    {'side': 'buy', 'trade_side': 'open', 'order_type': 'limit',
+                     'size': quantizer.format_size(size_long), 'price': fibo_long_price},
+                    {'side': 'sell', 'trade_side': 'open', 'order_type': 'limit',
+                     'size': quantizer.format_size(size_short), 'price': fibo_short_price}
+                ])
+            results = run_parallel(calls, exchange=self.exchange)
+
+            for key in ('tp_long', 'tp_short'):
+                tp = results[key]
+                if tp and not isinstance(tp, Exception) and tp.get('id'):
+                    self.position.orders[key] = tp['id']
+                    logger.info(f"   ✅ {key.replace('_', ' ').upper()}: {tp['id']}")
+
+            if isinstance(results.get('fibo'), list):
+                fibo_long, fibo_short = results['fibo']
+                for key, label, result, fibo_size, fibo_price in (
+                        ('double_long', 'LIMIT BUY', fibo_long, size_long, fibo_long_price),
+                        ('double_short', 'LIMIT SELL', fibo_short, size_short, fibo_short_price)):
+                    if result['id']:
+                        self.position.orders[key] = result['id']
+                        logger.info(f"   ✅ {label}: {result['id']} - {fibo_size:.0f} @ ${fibo_price:.5f}")
+                    else:
+                        logger.error(f"   ❌ {label} refusé: {result['error']}")
+
+            logger.info(f"   ⚡ Hedge entièrement protégé en {(time.time() - started) * 1000:.0f}ms")
 
             logger.info("\n" + "="*80)
             logger.info("✅ HEDGE INITIAL COMPLET!")
@@ -618,15 +616,20 @@ class BitgetHedgeBotV2Fixed:
             logger.info(f"📊 Résumé:")
             logger.info(f"   Positions: LONG {size_long:.0f} + SHORT {size_short:.0f}")
             logger.info(f"   Ordres TP: 2")
-            logger.info(f"   Ordres LIMIT Fibo: 2 (doublent la marge)")
-            logger.info(f"   Total: 2 positions + 4 ordres")
+            n_fibo = len(self.position.ladder['long']) + len(self.position.ladder['short']) if self.LADDER_DEPTH > 1 else 2
+            logger.info(f"   Ordres LIMIT Fibo: {n_fibo} (doublent la marge)")
+            logger.info(f"   Total: 2 positions + {2 + n_fibo} ordres")
 
+            self.save_state()
             return True
 
         except Exception as e:
             logger.error(f"❌ Erreur ouverture hedge: {e}")
             import traceback
             logger.error(traceback.format_exc())
+            if sent:
+                # Batch MARKET peut-être accepté (timeout, erreur après coup): jamais de jambe sans TP
+                self.abort_initial_hedge(['long', 'short'])
             return False
 
     def detect_tp_long_executed(self, real_pos):
@@ -645,6 +648,13 @@ class BitgetHedgeBotV2Fixed:
         current_size = real_pos['long']['size']
         previous_size = self.position.long_size_previous
 
+        if self.LADDER_DEPTH > 1:
+            # Échelle: au moins un niveau entièrement rempli (un fill partiel n'est pas un événement)
+            filled, _ = filled_rungs(self.position.ladder['long'], previous_size, current_size)
+            if filled:
+                logger.info(f"🔍 Fibo Long détecté: {previous_size:.0f} → {current_size:.0f}")
+            return bool(filled)
+
         # Size increased significantly = Fibo executed
         if previous_size > 0 and current_size >= previous_size * 1.8:
             logger.info(f"🔍 Fibo Long détecté: {previous_size:.0f} → {current_size:.0f}")
@@ -660,6 +670,13 @@ class BitgetHedgeBotV2Fixed:
         current_size = real_pos['short']['size']
         previous_size = self.position.short_size_previous
 
+        if self.LADDER_DEPTH > 1:
+            # Échelle: au moins un niveau entièrement rempli (un fill partiel n'est pas un événement)
+            filled, _ = filled_rungs(self.position.ladder['short'], previous_size, current_size)
+            if filled:
+                logger.info(f"🔍 Fibo Short détecté: {previous_size:.0f} → {current_size:.0f}")
+            return bool(filled)
+
         # Size increased significantly = Fibo executed
         if previous_size > 0 and current_size >= previous_size * 1.8:
             logger.info(f"🔍 Fibo Short détecté: {previous_size:.0f} → {current_size:.0f}")
@@ -681,7 +698,9 @@ class BitgetHedgeBotV2Fixed:
         try:
             # 1. Cancel LIMIT LONG (ignore errors)
             logger.info("\n[1/4] Annulation LIMIT LONG...")
-            if self.position.orders.get('double_long'):
+            if self.LADDER_DEPTH > 1:
+                self.cancel_ladder('long')
+            elif self.position.orders.get('double_long'):
                 try:
                     self.exchange.cancel_order(self.position.orders['double_long'], self.PAIR)
                     logger.info("   ✅ LIMIT LONG annulé")
@@ -704,11 +723,10 @@ class BitgetHedgeBotV2Fixed:
             )
             logger.info(f"   ✅ LONG réouvert: {long_order['id']}")
 
-            # Get real position
-            time.sleep(2)
-            real_pos = self.get_real_positions()
+            # Wait for the reopened position (confirmation, pas de délai fixe)
+            real_pos = self.wait_for_positions(lambda pos: pos['long'], timeout=10)
 
-            if not real_pos.get('long'):
+            if not real_pos:
                 logger.error("   ❌ Long pas trouvé après réouverture!")
                 return
 
@@ -725,7 +743,6 @@ class BitgetHedgeBotV2Fixed:
 
             # 3. Place NEW TP LONG
             logger.info(f"\n[3/4] Placement NOUVEAU TP LONG ({self.TP_PERCENT}%)...")
-            time.sleep(1)
             tp_long_price = entry_long * (1 + self.TP_PERCENT / 100)
 
             tp_order = self.place_tpsl_order(
@@ -738,16 +755,19 @@ class BitgetHedgeBotV2Fixed:
                 logger.info(f"   ✅ Nouveau TP Long @ ${tp_long_price:.5f}")
 
             # 4. Place NEW LIMIT LONG (Fibo level 0)
-            logger.info(f"\n[4/4] Placement NOUVEAU LIMIT LONG (Fibo {self.FIBO_LEVELS[0]}%)...")
-            time.sleep(1)
-            fibo_long_price = entry_long * (1 - self.FIBO_LEVELS[0] / 100)
+            if self.LADDER_DEPTH > 1:
+                logger.info(f"\n[4/4] Placement échelle LONG ({self.LADDER_DEPTH} niveaux Fibo)...")
+                self.update_ladder('long', entry_long, size_long, 0)
+            else:
+                logger.info(f"\n[4/4] Placement NOUVEAU LIMIT LONG (Fibo {self.FIBO_LEVELS[0]}%)...")
+                fibo_long_price = entry_long * (1 - self.FIBO_LEVELS[0] / 100)
 
-            fibo_order = self.exchange.create_order(
-                symbol=self.PAIR, type='limit', side='buy', amount=size_long * 2,
-                price=fibo_long_price, params={'tradeSide': 'open', 'holdSide': 'long'}
-            )
-            self.position.orders['double_long'] = fibo_order['id']
-            logger.info(f"   ✅ LIMIT BUY @ ${fibo_long_price:.5f}")
+                fibo_order = self.exchange.create_order(
+                    symbol=self.PAIR, type='limit', side='buy', amount=size_long * 2,
+                    price=fibo_long_price, params={'tradeSide': 'open', 'holdSide': 'long'}
+                )
+                self.position.orders['double_long'] = fibo_order['id']
+                logger.info(f"   ✅ LIMIT BUY @ ${fibo_long_price:.5f}")
 
             logger.info("\n✅ TP LONG HANDLER TERMINÉ\n")
 
@@ -773,7 +793,9 @@ class BitgetHedgeBotV2Fixed:
         try:
             # 1. Cancel LIMIT SHORT (ignore errors)
             logger.info("\n[1/4] Annulation LIMIT SHORT...")
-            if self.position.orders.get('double_short'):
+            if self.LADDER_DEPTH > 1:
+                self.cancel_ladder('short')
+            elif self.position.orders.get('double_short'):
                 try:
                     self.exchange.cancel_order(self.position.orders['double_short'], self.PAIR)
                     logger.info("   ✅ LIMIT SHORT annulé")
@@ -796,11 +818,10 @@ class BitgetHedgeBotV2Fixed:
             )
             logger.info(f"   ✅ SHORT réouvert: {short_order['id']}")
 
-            # Get real position
-            time.sleep(2)
-            real_pos = self.get_real_positions()
+            # Wait for the reopened position (confirmation, pas de délai fixe)
+            real_pos = self.wait_for_positions(lambda pos: pos['short'], timeout=10)
 
-            if not real_pos.get('short'):
+            if not real_pos:
                 logger.error("   ❌ Short pas trouvé après réouverture!")
                 return
 
@@ -817,7 +838,6 @@ class BitgetHedgeBotV2Fixed:
 
             # 3. Place NEW TP SHORT
             logger.info(f"\n[3/4] Placement NOUVEAU TP SHORT ({self.TP_PERCENT}%)...")
-            time.sleep(1)
             tp_short_price = entry_short * (1 - self.TP_PERCENT / 100)
 
             tp_order = self.place_tpsl_order(
@@ -830,16 +850,19 @@ class BitgetHedgeBotV2Fixed:
                 logger.info(f"   ✅ Nouveau TP Short @ ${tp_short_price:.5f}")
 
             # 4. Place NEW LIMIT SHORT (Fibo level 0)
-            logger.info(f"\n[4/4] Placement NOUVEAU LIMIT SHORT (Fibo {self.FIBO_LEVELS[0]}%)...")
-            time.sleep(1)
-            fibo_short_price = entry_short * (1 + self.FIBO_LEVELS[0] / 100)
+            if self.LADDER_DEPTH > 1:
+                logger.info(f"\n[4/4] Placement échelle SHORT ({self.LADDER_DEPTH} niveaux Fibo)...")
+                self.update_ladder('short', entry_short, size_short, 0)
+            else:
+                logger.info(f"\n[4/4] Placement NOUVEAU LIMIT SHORT (Fibo {self.FIBO_LEVELS[0]}%)...")
+                fibo_short_price = entry_short * (1 + self.FIBO_LEVELS[0] / 100)
 
-            fibo_order = self.exchange.create_order(
-                symbol=self.PAIR, type='limit', side='sell', amount=size_short * 2,
-                price=fibo_short_price, params={'tradeSide': 'open', 'holdSide': 'short'}
-            )
-            self.position.orders['double_short'] = fibo_order['id']
-            logger.info(f"   ✅ LIMIT SELL @ ${fibo_short_price:.5f}")
+                fibo_order = self.exchange.create_order(
+                    symbol=self.PAIR, type='limit', side='sell', amount=size_short * 2,
+                    price=fibo_short_price, params={'tradeSide': 'open', 'holdSide': 'short'}
+                )
+                self.position.orders['double_short'] = fibo_order['id']
+                logger.info(f"   ✅ LIMIT SELL @ ${fibo_short_price:.5f}")
 
             logger.info("\n✅ TP SHORT HANDLER TERMINÉ\n")
 
@@ -873,7 +896,8 @@ class BitgetHedgeBotV2Fixed:
                     logger.warning(f"   ⚠️ TP Long déjà annulé ou inexistant: {e}")
                 self.position.orders['tp_long'] = None
 
-            if self.position.orders.get('double_long'):
+            # Mode échelle: les niveaux suivants restent au repos
+            if self.LADDER_DEPTH == 1 and self.position.orders.get('double_long'):
                 try:
                     self.exchange.cancel_order(self.position.orders['double_long'], self.PAIR)
                     logger.info("   ✅ LIMIT Long annulé")
@@ -881,11 +905,10 @@ class BitgetHedgeBotV2Fixed:
                     logger.warning(f"   ⚠️ LIMIT Long déjà annulé ou inexistant: {e}")
                 self.position.orders['double_long'] = None
 
-            # Get current position
-            time.sleep(1)
-            real_pos = self.get_real_positions()
+            # Get current position (confirmation, pas de délai fixe)
+            real_pos = self.wait_for_positions(lambda pos: pos['long'], timeout=10)
 
-            if not real_pos.get('long'):
+            if not real_pos:
                 logger.error("   ❌ Long pas trouvé!")
                 return
 
@@ -895,15 +918,25 @@ class BitgetHedgeBotV2Fixed:
             logger.info(f"   Position LONG doublée: {size_long_total:.0f} @ ${entry_long_avg:.5f} (prix moyen)")
 
             # 2. Increase Fib level
-            self.position.long_fib_level += 1
+            if self.LADDER_DEPTH > 1:
+                # Un mouvement rapide peut remplir plusieurs niveaux de l'échelle d'un coup.
+                # Niveau partiellement rempli: reste au repos, ni niveau ni taille de référence avancés
+                filled, remaining = filled_rungs(self.position.ladder['long'],
+                                                 self.position.long_size_previous, size_long_total)
+                self.position.ladder['long'] = remaining
+                if filled:
+                    self.position.long_fib_level = filled[-1]['level'] + 1
+                    logger.info(f"   🪜 {len(filled)} niveau(x) rempli(s): " + ", ".join(f"L{rung['level']}" for rung in filled))
+                self.position.long_size_previous += sum(rung['size'] for rung in filled)
+            else:
+                self.position.long_fib_level += 1
+                self.position.long_size_previous = size_long_total
             self.position.entry_price_long = entry_long_avg
-            self.position.long_size_previous = size_long_total
 
             logger.info(f"   Fib level: {self.position.long_fib_level}")
 
             # 3. Place NEW TP LONG (at average price)
             logger.info(f"\n[2/3] Placement NOUVEAU TP LONG ({self.TP_PERCENT}% du prix moyen)...")
-            time.sleep(1)
             tp_long_price = entry_long_avg * (1 + self.TP_PERCENT / 100)
 
             tp_order = self.place_tpsl_order(
@@ -917,9 +950,15 @@ class BitgetHedgeBotV2Fixed:
 
             # 4. Place NEW LIMIT LONG (next Fibo level)
             next_level = self.position.long_fib_level + 1
-            if next_level < len(self.FIBO_LEVELS):
+            if self.LADDER_DEPTH > 1:
+                # Échelle recalculée sur le prix moyen réel: en général seul le niveau le plus profond est ajouté
+                logger.info(f"\n[3/3] Mise à jour échelle LONG (à partir du niveau {self.position.long_fib_level})...")
+                ladder = self.update_ladder('long', entry_long_avg, self.position.long_size_previous,
+                                           self.position.long_fib_level)
+                if not ladder:
+                    logger.warning("   ⚠️ Niveau Fibo max atteint, pas de nouveau LIMIT")
+            elif next_level < len(self.FIBO_LEVELS):
                 logger.info(f"\n[3/3] Placement NOUVEAU LIMIT LONG (Fibo level {next_level}: {self.FIBO_LEVELS[next_level]}%)...")
-                time.sleep(1)
                 fibo_long_price = entry_long_avg * (1 - self.FIBO_LEVELS[next_level] / 100)
 
                 fibo_order = self.exchange.create_order(
@@ -963,7 +1002,8 @@ class BitgetHedgeBotV2Fixed:
                     logger.warning(f"   ⚠️ TP Short déjà annulé ou inexistant: {e}")
                 self.position.orders['tp_short'] = None
 
-            if self.position.orders.get('double_short'):
+            # Mode échelle: les niveaux suivants restent au repos
+            if self.LADDER_DEPTH == 1 and self.position.orders.get('double_short'):
                 try:
                     self.exchange.cancel_order(self.position.orders['double_short'], self.PAIR)
                     logger.info("   ✅ LIMIT Short annulé")
@@ -971,11 +1011,10 @@ class BitgetHedgeBotV2Fixed:
                     logger.warning(f"   ⚠️ LIMIT Short déjà annulé ou inexistant: {e}")
                 self.position.orders['double_short'] = None
 
-            # Get current position
-            time.sleep(1)
-            real_pos = self.get_real_positions()
+            # Get current position (confirmation, pas de délai fixe)
+            real_pos = self.wait_for_positions(lambda pos: pos['short'], timeout=10)
 
-            if not real_pos.get('short'):
+            if not real_pos:
                 logger.error("   ❌ Short pas trouvé!")
                 return
 
@@ -985,15 +1024,25 @@ class BitgetHedgeBotV2Fixed:
             logger.info(f"   Position SHORT doublée: {size_short_total:.0f} @ ${entry_short_avg:.5f} (prix moyen)")
 
             # 2. Increase Fib level
-            self.position.short_fib_level += 1
+            if self.LADDER_DEPTH > 1:
+                # Un mouvement rapide peut remplir plusieurs niveaux de l'échelle d'un coup.
+                # Niveau partiellement rempli: reste au repos, ni niveau ni taille de référence avancés
+                filled, remaining = filled_rungs(self.position.ladder['short'],
+                                                 self.position.short_size_previous, size_short_total)
+                self.position.ladder['short'] = remaining
+                if filled:
+                    self.position.short_fib_level = filled[-1]['level'] + 1
+                    logger.info(f"   🪜 {len(filled)} niveau(x) rempli(s): " + ", ".join(f"L{rung['level']}" for rung in filled))
+                self.position.short_size_previous += sum(rung['size'] for rung in filled)
+            else:
+                self.position.short_fib_level += 1
+                self.position.short_size_previous = size_short_total
             self.position.entry_price_short = entry_short_avg
-            self.position.short_size_previous = size_short_total
 
             logger.info(f"   Fib level: {self.position.short_fib_level}")
 
             # 3. Place NEW TP SHORT (at average price)
             logger.info(f"\n[2/3] Placement NOUVEAU TP SHORT ({self.TP_PERCENT}% du prix moyen)...")
-            time.sleep(1)
             tp_short_price = entry_short_avg * (1 - self.TP_PERCENT / 100)
 
             tp_order = self.place_tpsl_order(
@@ -1007,9 +1056,15 @@ class BitgetHedgeBotV2Fixed:
 
             # 4. Place NEW LIMIT SHORT (next Fibo level)
             next_level = self.position.short_fib_level + 1
-            if next_level < len(self.FIBO_LEVELS):
+            if self.LADDER_DEPTH > 1:
+                # Échelle recalculée sur le prix moyen réel: en général seul le niveau le plus profond est ajouté
+                logger.info(f"\n[3/3] Mise à jour échelle SHORT (à partir du niveau {self.position.short_fib_level})...")
+                ladder = self.update_ladder('short', entry_short_avg, self.position.short_size_previous,
+                                           self.position.short_fib_level)
+                if not ladder:
+                    logger.warning("   ⚠️ Niveau Fibo max atteint, pas de nouveau LIMIT")
+            elif next_level < len(self.FIBO_LEVELS):
                 logger.info(f"\n[3/3] Placement NOUVEAU LIMIT SHORT (Fibo level {next_level}: {self.FIBO_LEVELS[next_level]}%)...")
-                time.sleep(1)
                 fibo_short_price = entry_short_avg * (1 + self.FIBO_LEVELS[next_level] / 100)
 
                 fibo_order = self.exchange.create_order(
@@ -1031,39 +1086,6 @@ class BitgetHedgeBotV2Fixed:
             import traceback
             logger.error(traceback.format_exc())
 
-    def get_telegram_updates(self):
-        """Récupère les nouveaux messages Telegram (commandes)"""
-        if not self.telegram_token:
-            return []
-
-        url = f"https://api.telegram.org/bot{self.telegram_token}/getUpdates"
-        params = {'offset': self.last_telegram_update_id + 1, 'timeout': 0}
-
-        try:
-            response = requests.get(url, params=params, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('ok') and data.get('result'):
-                    return data['result']
-        except:
-            pass
-
-        return []
-
-    def check_telegram_updates(self):
-        """Check for new Telegram commands"""
-        updates = self.get_telegram_updates()
-
-        for update in updates:
-            self.last_telegram_update_id = update['update_id']
-
-            if 'message' in update and 'text' in update['message']:
-                text = update['message']['text'].strip()
-
-                if text.startswith('/'):
-                    logger.info(f"📱 Commande Telegram reçue: {text}")
-                    self.handle_telegram_command(text)
-
     def handle_telegram_command(self, command):
         """Traite les commandes Telegram"""
         try:
@@ -1084,6 +1106,8 @@ class BitgetHedgeBotV2Fixed:
                 self.cmd_setfibo(args)
             elif cmd == '/stop':
                 self.cmd_stop(args)
+            elif cmd == '/latency':
+                self.send_telegram(self.api_metrics.format_report())
             elif cmd == '/help':
                 self.cmd_help()
             else:
@@ -1360,6 +1384,7 @@ Pour confirmer, tapez:
 📊 <b>Informations:</b>
 /pnl - P&L total et positions
 /status - État du bot et ordres
+/latency - Latence API p50/p95/p99 et erreurs
 
 ⚙️ <b>Configuration:</b>
 /setmargin &lt;montant&gt; - Changer marge initiale
@@ -1373,34 +1398,49 @@ Pour confirmer, tapez:
 
         self.send_telegram(message)
 
-    def check_events(self):
-        """Check for TP/Fibo execution events"""
+    def check_events(self, real_pos=None):
+        """
+        Check for TP/Fibo execution events
+
+        Args:
+            real_pos: Positions déjà connues (push WebSocket). Si None → fetch REST.
+        """
 
         try:
-            real_pos = self.get_real_positions()
+            if real_pos is None:
+                real_pos = self.get_real_positions()
+                self.last_rest_sync = time.time()
 
             # Event 1: TP LONG executed
             if self.detect_tp_long_executed(real_pos):
                 logger.info("🔥 DÉTECTION: TP LONG EXÉCUTÉ!")
-                self.handle_tp_long_executed()
+                with request_priority('high'):
+                    self.handle_tp_long_executed()
+                self.save_state()
                 return True
 
             # Event 2: TP SHORT executed
             if self.detect_tp_short_executed(real_pos):
                 logger.info("🔥 DÉTECTION: TP SHORT EXÉCUTÉ!")
-                self.handle_tp_short_executed()
+                with request_priority('high'):
+                    self.handle_tp_short_executed()
+                self.save_state()
                 return True
 
             # Event 3: Fibo LONG executed
             if self.detect_fibo_long_executed(real_pos):
                 logger.info("🔥 DÉTECTION: FIBO LONG EXÉCUTÉ!")
-                self.handle_fibo_long_executed()
+                with request_priority('high'):
+                    self.handle_fibo_long_executed()
+                self.save_state()
                 return True
 
             # Event 4: Fibo SHORT executed
             if self.detect_fibo_short_executed(real_pos):
                 logger.info("🔥 DÉTECTION: FIBO SHORT EXÉCUTÉ!")
-                self.handle_fibo_short_executed()
+                with request_priority('high'):
+                    self.handle_fibo_short_executed()
+                self.save_state()
                 return True
 
             return False
@@ -1409,6 +1449,82 @@ Pour confirmer, tapez:
             logger.error(f"❌ Erreur check_events: {e}")
             return False
 
+    def start_private_stream(self):
+        """Démarre le WebSocket privé (positions/orders/orders-algo)"""
+        if not self.use_ws:
+            return False
+
+        try:
+            self.stream = BitgetPrivateStream(self.api_key, self.api_secret, self.api_password)
+            self.stream.start()
+
+            if self.stream.wait_until_live(timeout=10):
+                logger.info("✅ WebSocket privé actif - détection en push")
+                return True
+
+            logger.warning("⚠️ WebSocket privé pas encore actif - fallback polling REST")
+            return False
+
+        except Exception as e:
+            logger.error(f"❌ Erreur démarrage WebSocket privé: {e}")
+            self.stream = None
+            return False
+
+    def start_price_stream(self):
+        """Démarre le cache de prix (canaux publics ticker + books5)"""
+        if not self.use_ws:
+            return False
+
+        try:
+            self.price_stream = BitgetPriceStream([to_bitget_symbol(self.PAIR)])
+            self.price_stream.start()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erreur démarrage WebSocket public: {e}")
+            self.price_stream = None
+            return False
+
+    def process_stream_events(self, timeout=0.25):
+        """
+        Attend un événement WebSocket et déclenche les handlers
+
+        - positions: snapshot poussé → détection directe (0 appel REST)
+        - orders / orders-algo: fill d'un de nos ordres → confirmation REST immédiate
+
+        Les pushs des autres paires de la clé API sont ignorés (aucun appel REST):
+        une fermeture totale de la paire arrive aussi par orders-algo (TP déclenché).
+        """
+        try:
+            event = self.stream.events.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+        symbol = to_bitget_symbol(self.PAIR)
+        event_detected = False
+
+        if event['type'] == 'positions':
+            if symbol in event['positions']:
+                event_detected = self.check_events(event['positions'][symbol])
+
+        elif event['symbol'] == symbol:
+            our_orders = [oid for oid in self.position.orders.values() if oid]
+            filled = event['status'] in ('filled', 'executed', 'triggered')
+            if filled and event['order_id'] in our_orders:
+                logger.info(f"📡 Push {event['type']}: ordre {event['order_id']} {event['status']}")
+                event_detected = self.check_events()
+
+        if event_detected:
+            # Les pushs reçus pendant le handler décrivent un état dépassé...
+            dropped = self.stream.drain()
+            if dropped:
+                logger.info(f"   🗑️ {dropped} événements WebSocket périmés ignorés")
+            # ...mais peuvent contenir un fill de l'autre jambe → resync REST immédiat, pas dans 30s
+            if self.check_events():
+                self.stream.drain()
+                self.last_rest_sync = 0  # encore un événement: nouveau resync au prochain tour
+
+        return event_detected
+
     def run(self):
         """Main loop"""
         logger.info("\n🎬 DÉMARRAGE BOT V2 FIXED...\n")
@@ -1425,47 +1541,72 @@ Pour confirmer, tapez:
 ⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"""
         self.send_telegram(startup_msg)
 
-        # CLEANUP AUTOMATIQUE AU DÉMARRAGE (non-bloquant)
-        logger.info("\n🧹 CLEANUP AUTOMATIQUE AU DÉMARRAGE...")
-        cleanup_ok = self.cleanup_all()
-        if not cleanup_ok:
-            logger.warning("⚠️ CLEANUP INCOMPLET - Continue quand même (positions zombies ignorées)")
-            self.send_telegram(f"⚠️ <b>CLEANUP INCOMPLET</b>\n\nBot {self.PAIR.split('/')[0]} démarre quand même\n(Positions zombies < 1 contrat ignorées)")
+        # REPRISE À CHAUD si le journal correspond au compte, sinon cleanup + hedge neuf
+        resumed = not self.cold_start and self.resume_from_journal()
+        if resumed:
+            self.send_telegram(f"♻️ <b>REPRISE À CHAUD - {self.PAIR.split('/')[0]}</b>\n\nHedge existant conservé (pas de cleanup)")
+        else:
+            # CLEANUP AUTOMATIQUE AU DÉMARRAGE (non-bloquant)
+            logger.info("\n🧹 CLEANUP AUTOMATIQUE AU DÉMARRAGE...")
+            cleanup_ok = self.cleanup_all()
+            if not cleanup_ok:
+                logger.warning("⚠️ CLEANUP INCOMPLET - Continue quand même (positions zombies ignorées)")
+                self.send_telegram(f"⚠️ <b>CLEANUP INCOMPLET</b>\n\nBot {self.PAIR.split('/')[0]} démarre quand même\n(Positions zombies < 1 contrat ignorées)")
+
+            time.sleep(3)
 
-        time.sleep(3)
+        # WebSocket privé (fills en push, confirmation des positions du hedge initial)
+        self.start_private_stream()
+        # WebSocket public (prix en cache pour get_price)
+        self.start_price_stream()
+        self.telegram_listener.start()
 
         # Open initial hedge
-        if not self.open_initial_hedge():
-            logger.error("❌ Échec ouverture hedge initial!")
-            return
+        if not resumed:
+            with request_priority('high'):
+                hedge_opened = self.open_initial_hedge()
+            if not hedge_opened:
+                logger.error("❌ Échec ouverture hedge initial!")
+                self.send_telegram(f"❌ <b>ÉCHEC OUVERTURE HEDGE - {self.PAIR.split('/')[0]}</b>\n\nBot arrêté", urgent=True)
+                return
 
         logger.info("\n" + "="*80)
-        logger.info("🔄 BOUCLE DE MONITORING DÉMARRÉE - 4 CHECKS/SECONDE")
-        logger.info("="*80)
-        logger.info("⚡ Checking for events every 0.25 seconds (4x/sec)")
+        if self.stream:
+            logger.info("🔄 BOUCLE DE MONITORING DÉMARRÉE - PUSH WEBSOCKET")
+            logger.info("="*80)
+            logger.info(f"⚡ Événements en push, resync REST toutes les {self.REST_RESYNC_INTERVAL}s")
+        else:
+            logger.info("🔄 BOUCLE DE MONITORING DÉMARRÉE - 4 CHECKS/SECONDE")
+            logger.info("="*80)
+            logger.info("⚡ Checking for events every 0.25 seconds (4x/sec)")
         logger.info("Press Ctrl+C to stop\n")
 
         iteration = 0
+        last_status_log = time.time()
 
         try:
             while True:
                 iteration += 1
 
-                # Check for events
-                event_detected = self.check_events()
+                # Check for events: push WebSocket si actif, sinon polling REST
+                stream_live = self.stream is not None and self.stream.is_live()
+                if stream_live:
+                    event_detected = self.process_stream_events(timeout=0.25)
+                    if not event_detected and time.time() - self.last_rest_sync >= self.REST_RESYNC_INTERVAL:
+                        event_detected = self.check_events()
+                else:
+                    event_detected = self.check_events()
 
                 if event_detected:
                     logger.info("⏸️  Événement traité, pause 3s...")
                     time.sleep(3)
 
-                # Check Telegram commands every 5 seconds
-                current_time = time.time()
-                if current_time - self.last_telegram_check >= self.telegram_check_interval:
-                    self.check_telegram_updates()
-                    self.last_telegram_check = current_time
+                # Commandes Telegram déjà reçues par le listener (aucun appel réseau ici)
+                self.telegram_listener.dispatch(self.handle_telegram_command)
 
-                # Log every 40 iterations (= every 10 seconds)
-                if iteration % 40 == 0:
+                # Log toutes les 10 secondes (en push, les itérations suivent les événements)
+                if time.time() - last_status_log >= self.STATUS_LOG_INTERVAL:
+                    last_status_log = time.time()
                     real_pos = self.get_real_positions()
                     long_size = real_pos['long']['size'] if real_pos.get('long') else 0
                     short_size = real_pos['short']['size'] if real_pos.get('short') else 0
@@ -1473,10 +1614,16 @@ Pour confirmer, tapez:
 
                     logger.info(f"[{iteration}] 💚 LONG: {long_size:.0f} | ❤️ SHORT: {short_size:.0f} | 💰 Prix: ${price:.5f}")
 
-                time.sleep(0.25)  # 4 checks per second
+                if not stream_live:
+                    time.sleep(0.25)  # 4 checks per second
 
         except KeyboardInterrupt:
             logger.info("\n\n⏹️  Arrêt demandé par utilisateur")
+            if self.stream:
+                self.stream.stop()
+            if self.price_stream:
+                self.price_stream.stop()
+            self.telegram_listener.stop()
             logger.info("🧹 CLEANUP AUTOMATIQUE AVANT ARRÊT...")
             self.send_telegram("⏹️ <b>Bot arrêté par utilisateur</b>\n\n🧹 Cleanup en cours...")
             cleanup_ok = self.cleanup_all()
@@ -1485,7 +1632,8 @@ Pour confirmer, tapez:
                 self.send_telegram("✅ <b>Bot arrêté proprement</b>\n\nCompte nettoyé (positions fermées + ordres annulés)")
             else:
                 logger.warning("⚠️ Bot arrêté mais cleanup incomplet - Vérifiez Bitget!")
-                self.send_telegram("⚠️ <b>Bot arrêté mais cleanup incomplet</b>\n\nVérifiez Bitget manuellement!")
+                self.send_telegram("⚠️ <b>Bot arrêté mais cleanup incomplet</b>\n\nVérifiez Bitget manuellement!", urgent=True)
+            self.outbox.stop()
 
 
 if __name__ == "__main__":
@@ -1495,10 +1643,20 @@ if __name__ == "__main__":
                         help='Trading pair (ex: DOGE/USDT:USDT, ETH/USDT:USDT)')
     parser.add_argument('--api-key-id', type=int, default=1, choices=[1, 2],
                         help='API Key ID to use (1 or 2)')
+    parser.add_argument('--no-ws', action='store_true',
+                        help='Désactive le WebSocket privé (polling REST 4x/sec)')
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('METRICS_PORT', 0)),
+                        help='Port HTTP des métriques Prometheus (0 = désactivé, un port par instance)')
+    parser.add_argument('--cold-start', action='store_true',
+                        help='Ignore le journal d\'état: cleanup complet + hedge neuf au démarrage')
+    parser.add_argument('--ladder', type=int, default=1,
+                        help='Niveaux Fibo LIMIT au repos par côté (1 = un seul, replacé après chaque fill)')
     args = parser.parse_args()
 
     try:
-        bot = BitgetHedgeBotV2Fixed(pair=args.pair, api_key_id=args.api_key_id)
+        bot = BitgetHedgeBotV2Fixed(pair=args.pair, api_key_id=args.api_key_id, use_ws=not args.no_ws,
+                                    metrics_port=args.metrics_port, cold_start=args.cold_start,
+                                    ladder_depth=args.ladder)
         bot.run()
     except Exception as e:
         logger.error(f"❌ Erreur fatale: {e}")
@@ -0,0 +1,445 @@
+"""
+📡 Bitget WebSocket - Détection des fills et cache de prix en push
+
+BitgetPrivateStream: souscrit aux canaux privés `positions`, `orders` et
+`orders-algo` et pousse chaque événement dans une queue thread-safe consommée
+par la boucle du bot. Remplace le polling REST fetch_positions 4x/seconde.
+
+BitgetPriceStream: canaux publics `ticker` (last, mark) et `books5` (meilleur
+bid/ask) gardés en mémoire → get_price() en O(1) sans aller-retour réseau,
+fallback REST seulement si le cache est périmé.
+
+Usage:
+    stream = BitgetPrivateStream(api_key, secret, passphrase)
+    stream.start()
+    event = stream.events.get(timeout=0.25)
+
+    prices = BitgetPriceStream(['DOGEUSDT'])
+    prices.start()
+    price = prices.price('DOGEUSDT')  # None si périmé → fetch_ticker
+
+Les URLs sont configurables (argument `url` ou variables BITGET_WS_PRIVATE_URL
+/ BITGET_WS_PUBLIC_URL) pour pouvoir brancher un serveur WebSocket local.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import websocket
+
+logger = logging.getLogger(__name__)
+
+# URLs officielles (v2)
+WS_PRIVATE_URL = 'wss://ws.bitget.com/v2/ws/private'
+WS_PRIVATE_URL_DEMO = 'wss://wspap.bitget.com/v2/ws/private'  # PAPTRADING
+WS_PUBLIC_URL = 'wss://ws.bitget.com/v2/ws/public'
+WS_PUBLIC_URL_DEMO = 'wss://wspap.bitget.com/v2/ws/public'
+
+# Au-delà, un prix du cache est considéré périmé (fallback REST)
+PRICE_MAX_AGE = 5
+
+# Bitget coupe la connexion sans 'ping' texte pendant 2 minutes
+PING_INTERVAL = 25
+
+
+def to_bitget_symbol(pair):
+    """DOGE/USDT:USDT → DOGEUSDT"""
+    return pair.replace('/USDT:USDT', 'USDT')
+
+
+def parse_positions(data):
+    """
+    Convertit un push du canal `positions` au format get_real_positions()
+
+    Returns:
+        dict: {'DOGEUSDT': {'long': {...} | None, 'short': {...} | None}, ...}
+    """
+    result = {}
+
+    for pos in data:
+        inst_id = pos.get('instId')
+        side = pos.get('holdSide', '').lower()
+        if not inst_id or side not in ('long', 'short'):
+            continue
+
+        result.setdefault(inst_id, {'long': None, 'short': None})
+
+        size = float(pos.get('total') or 0)
+        if size > 0:
+            result[inst_id][side] = {
+                'size': size,
+                'entry_price': float(pos.get('openPriceAvg') or 0),
+                'margin': float(pos.get('marginSize') or 0),
+                'pnl': float(pos.get('unrealizedPL') or 0)
+            }
+
+    return result
+
+
+class _BitgetStream:
+    """Connexion WebSocket Bitget: thread dédié, keepalive 'ping', reconnexion auto"""
+
+    label = 'WebSocket'
+
+    def __init__(self, url):
+        self.url = url
+        self.ws = None
+        self.thread = None
+        self.running = False
+        self.last_message_time = 0
+        self.reconnect_delay = 2
+
+    def start(self):
+        """Démarre le thread WebSocket (non-bloquant)"""
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        threading.Thread(target=self._ping_loop, daemon=True).start()
+        logger.info(f"📡 {self.label} démarré: {self.url}")
+
+    def stop(self):
+        """Arrête le WebSocket"""
+        self.running = False
+        if self.ws:
+            self.ws.close()
+
+    def _run_loop(self):
+        """Boucle de connexion avec reconnexion automatique"""
+        while self.running:
+            try:
+                self.ws = websocket.WebSocketApp(
+                    self.url,
+                    on_open=self.on_open,
+                    on_message=self.on_message,
+                    on_error=self.on_error,
+                    on_close=self.on_close
+                )
+                self.ws.run_forever()
+            except Exception as e:
+                logger.error(f"❌ {self.label} erreur: {e}")
+
+            self.on_disconnect()
+
+            if self.running:
+                logger.warning(f"🔌 {self.label} déconnecté, reconnexion dans {self.reconnect_delay}s...")
+                time.sleep(self.reconnect_delay)
+
+    def _ping_loop(self):
+        """Envoie 'ping' texte (keepalive Bitget)"""
+        while self.running:
+            time.sleep(PING_INTERVAL)
+            try:
+                if self.ws and self.ws.sock and self.ws.sock.connected:
+                    self.ws.send('ping')
+            except Exception as e:
+                logger.debug(f"Ping {self.label} échoué: {e}")
+
+    def on_disconnect(self):
+        """État à réinitialiser après une coupure"""
+
+    def on_error(self, ws, error):
+        """Erreur WebSocket"""
+        logger.error(f"❌ Erreur {self.label}: {error}")
+
+    def on_close(self, ws, close_status_code, close_msg):
+        """Fermeture WebSocket (la reconnexion est gérée par _run_loop)"""
+        self.on_disconnect()
+
+
+class BitgetPrivateStream(_BitgetStream):
+    """Client WebSocket privé Bitget (thread dédié + reconnexion auto)"""
+
+    label = 'WebSocket privé'
+
+    def __init__(self, api_key, api_secret, api_password, url=None,
+                 inst_type='USDT-FUTURES', channels=('positions', 'orders', 'orders-algo')):
+        """
+        Args:
+            api_key, api_secret, api_password: Credentials Bitget
+            url: URL WebSocket (défaut: BITGET_WS_PRIVATE_URL ou démo Bitget)
+            inst_type: Type de produit souscrit
+            channels: Canaux privés à souscrire
+        """
+        super().__init__(url or os.getenv('BITGET_WS_PRIVATE_URL', WS_PRIVATE_URL_DEMO))
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.api_password = api_password
+        self.inst_type = inst_type
+        self.channels = list(channels)
+
+        # Événements poussés vers la boucle du bot
+        self.events = queue.Queue()
+
+        self.logged_in = False
+        self.subscribed = set()
+
+    # ========== CONNEXION ==========
+
+    def sign(self, timestamp):
+        """Signature login: base64(hmac_sha256(secret, ts + 'GET' + '/user/verify'))"""
+        message = f"{timestamp}GET/user/verify"
+        digest = hmac.new(self.api_secret.encode(), message.encode(), hashlib.sha256).digest()
+        return base64.b64encode(digest).decode()
+
+    def is_live(self, max_age=60):
+        """True si connecté, authentifié, souscrit et actif récemment"""
+        return (self.logged_in
+                and set(self.channels) <= self.subscribed
+                and time.time() - self.last_message_time < max_age)
+
+    def wait_until_live(self, timeout=10):
+        """Attend que la souscription soit active"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.is_live():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def drain(self):
+        """Vide la queue (événements périmés après un handler)"""
+        dropped = 0
+        while True:
+            try:
+                self.events.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                return dropped
+
+    def on_disconnect(self):
+        self.logged_in = False
+        self.subscribed.clear()
+
+    # ========== CALLBACKS ==========
+
+    def on_open(self, ws):
+        """Connexion ouverte → login"""
+        timestamp = str(int(time.time()))
+        login_msg = {
+            'op': 'login',
+            'args': [{
+                'apiKey': self.api_key,
+                'passphrase': self.api_password,
+                'timestamp': timestamp,
+                'sign': self.sign(timestamp)
+            }]
+        }
+        ws.send(json.dumps(login_msg))
+
+    def subscribe(self, ws):
+        """Souscrit aux canaux privés (instId=default → tous les symboles)"""
+        args = [{'instType': self.inst_type, 'channel': channel, 'instId': 'default'}
+                for channel in self.channels]
+        ws.send(json.dumps({'op': 'subscribe', 'args': args}))
+
+    def on_message(self, ws, message):
+        """Message reçu → login/subscribe ou événement poussé dans la queue"""
+        self.last_message_time = time.time()
+
+        if message == 'pong':
+            return
+
+        try:
+            data = json.loads(message)
+        except ValueError:
+            logger.warning(f"⚠️ Message WebSocket invalide: {message[:100]}")
+            return
+
+        event = data.get('event')
+
+        if event == 'login':
+            if str(data.get('code')) == '0':
+                self.logged_in = True
+                logger.info("✅ WebSocket privé authentifié")
+                self.subscribe(ws)
+            else:
+                logger.error(f"❌ Login WebSocket refusé: {data}")
+            return
+
+        if event == 'subscribe':
+            channel = data.get('arg', {}).get('channel')
+            self.subscribed.add(channel)
+            logger.info(f"✅ Souscrit au canal {channel}")
+            return
+
+        if event == 'error':
+            logger.error(f"❌ WebSocket privé: {data.get('code')} {data.get('msg')}")
+            return
+
+        if 'data' in data:
+            self.dispatch(data.get('arg', {}).get('channel'), data['data'])
+
+    def dispatch(self, channel, data):
+        """Transforme un push en événement(s) pour la boucle du bot"""
+        now = time.time()
+
+        if channel == 'positions':
+            self.events.put({
+                'type': 'positions',
+                'positions': parse_positions(data),
+                'ts': now
+            })
+
+        elif channel == 'orders':
+            for order in data:
+                self.events.put({
+                    'type': 'order',
+                    'symbol': order.get('instId'),
+                    'order_id': order.get('orderId'),
+                    'status': order.get('status'),
+                    'side': order.get('side'),
+                    'trade_side': order.get('tradeSide'),
+                    'hold_side': order.get('posSide'),
+                    'ts': now
+                })
+
+        elif channel == 'orders-algo':
+            for order in data:
+                self.events.put({
+                    'type': 'algo',
+                    'symbol': order.get('instId'),
+                    'order_id': order.get('orderId') or order.get('id'),
+                    'status': order.get('status'),
+                    'plan_type': order.get('planType'),
+                    'hold_side': order.get('posSide') or order.get('holdSide'),
+                    'ts': now
+                })
+
+
+
+class BitgetPriceStream(_BitgetStream):
+    """Cache ticker / mark price / top of book alimenté par le WebSocket public"""
+
+    label = 'WebSocket public'
+
+    def __init__(self, symbols=(), url=None, inst_type='USDT-FUTURES',
+                 channels=('ticker', 'books5'), max_age=PRICE_MAX_AGE):
+        """
+        Args:
+            symbols: Symboles Bitget (DOGEUSDT) à suivre (add_symbol() pour en ajouter)
+            url: URL WebSocket (défaut: BITGET_WS_PUBLIC_URL ou démo Bitget)
+            channels: Canaux publics souscrits par symbole
+            max_age: Âge max (s) d'un prix avant fallback REST
+        """
+        super().__init__(url or os.getenv('BITGET_WS_PUBLIC_URL', WS_PUBLIC_URL_DEMO))
+        self.inst_type = inst_type
+        self.channels = list(channels)
+        self.max_age = max_age
+        self.symbols = set(symbols)
+
+        # {symbol: {'last', 'mark', 'bid', 'ask', 'ticker_ts', 'book_ts'}} (time.time local)
+        self.quotes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add_symbol(self, symbol):
+        """Suit un symbole de plus (souscription immédiate si connecté)"""
+        if symbol in self.symbols:
+            return
+        self.symbols.add(symbol)
+        if self.ws and self.ws.sock and self.ws.sock.connected:
+            self.subscribe(self.ws, [symbol])
+
+    # ========== LECTURE (O(1), aucun appel réseau) ==========
+
+    def quote(self, symbol, max_age=None):
+        """Dernière cotation si fraîche, sinon None"""
+        quote = self.quotes.get(symbol)
+        max_age = self.max_age if max_age is None else max_age
+        if quote is None or time.time() - max(quote['ticker_ts'], quote['book_ts']) > max_age:
+            return None
+        return quote
+
+    def price(self, symbol, max_age=None):
+        """
+        Prix courant: last du ticker s'il est frais, sinon milieu du carnet books5
+
+        Returns:
+            float ou None si le cache est périmé (→ fallback REST)
+        """
+        max_age = self.max_age if max_age is None else max_age
+        quote = self.quotes.get(symbol)
+        now = time.time()
+
+        if quote is not None:
+            if quote['last'] and now - quote['ticker_ts'] <= max_age:
+                self.hits += 1
+                return quote['last']
+            if quote['bid'] and quote['ask'] and now - quote['book_ts'] <= max_age:
+                self.hits += 1
+                return (quote['bid'] + quote['ask']) / 2
+
+        self.misses += 1
+        return None
+
+    def mark_price(self, symbol, max_age=None):
+        quote = self.quote(symbol, max_age)
+        return quote['mark'] if quote else None
+
+    # ========== CALLBACKS ==========
+
+    def on_open(self, ws):
+        """Canaux publics: pas de login, souscription directe"""
+        self.subscribe(ws, sorted(self.symbols))
+
+    def subscribe(self, ws, symbols):
+        args = [{'instType': self.inst_type, 'channel': channel, 'instId': symbol}
+                for symbol in symbols for channel in self.channels]
+        if args:
+            ws.send(json.dumps({'op': 'subscribe', 'args': args}))
+
+    def on_message(self, ws, message):
+        self.last_message_time = time.time()
+
+        if message == 'pong':
+            return
+
+        try:
+            data = json.loads(message)
+        except ValueError:
+            logger.warning(f"⚠️ Message WebSocket public invalide: {message[:100]}")
+            return
+
+        if data.get('event') == 'error':
+            logger.error(f"❌ WebSocket public: {data.get('code')} {data.get('msg')}")
+            return
+
+        if 'data' in data:
+            arg = data.get('arg', {})
+            self.update(arg.get('channel'), arg.get('instId'), data['data'])
+
+    def update(self, channel, symbol, data):
+        """Met à jour le cache (dict remplacé en bloc → lecture cohérente sans verrou)"""
+        if not data:
+            return
+        now = time.time()
+        quote = dict(self.quotes.get(symbol) or
+                     {'last': None, 'mark': None, 'bid': None, 'ask': None, 'ticker_ts': 0, 'book_ts': 0})
+
+        item = data[-1]
+        if channel == 'ticker':
+            quote['last'] = float(item.get('lastPr') or 0) or quote['last']
+            quote['mark'] = float(item.get('markPrice') or 0) or quote['mark']
+            quote['bid'] = float(item.get('bidPr') or 0) or quote['bid']
+            quote['ask'] = float(item.get('askPr') or 0) or quote['ask']
+            quote['ticker_ts'] = now
+        elif channel in ('books5', 'books1', 'books'):
+            if item.get('bids'):
+                quote['bid'] = float(item['bids'][0][0])
+            if item.get('asks'):
+                quote['ask'] = float(item['asks'][0][0])
+            quote['book_ts'] = now
+        else:
+            return
+
+        self.quotes[symbol] = quote
@@ -9,10 +9,12 @@ from dotenv import load_dotenv
 from datetime import datetime
 import json
 
+from http_pool import install_http_pool
+
 load_dotenv()
 
 # Initialize exchange
-exchange = ccxt.bitget({
+exchange = install_http_pool(ccxt.bitget({
     'apiKey': os.getenv('BITGET_API_KEY'),
     'secret': os.getenv('BITGET_SECRET'),
     'password': os.getenv('BITGET_PASSPHRASE'),
@@ -22,7 +24,7 @@ exchange = ccxt.bitget({
         'defaultMarginMode': 'cross'
     },
     'headers': {'PAPTRADING': '1'}  # Paper trading
-})
+}))
 
 print("="*80)
 print(f"📊 ÉTAT ACTUEL DU COMPTE - {datetime.now().strftime('%H:%M:%S')}")
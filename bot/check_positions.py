@@ -4,15 +4,17 @@ import ccxt
 import os
 from dotenv import load_dotenv
 
+from http_pool import install_http_pool
+
 load_dotenv()
 
-exchange = ccxt.bitget({
+exchange = install_http_pool(ccxt.bitget({
     'apiKey': os.getenv('BITGET_API_KEY'),
     'secret': os.getenv('BITGET_SECRET'),
     'password': os.getenv('BITGET_PASSPHRASE'),
     'options': {'defaultType': 'swap'},
     'headers': {'PAPTRADING': '1'},
-})
+}))
 
 print("📊 POSITIONS OUVERTES SUR BITGET")
 print("="*80)
@@ -3,7 +3,8 @@
 🧹 Cleanup Complet - Script Robuste
 
 Nettoie TOUTES les positions et ordres sur toutes les paires.
-Vérifie en boucle jusqu'à ce que TOUT soit fermé.
+Vérifie en boucle jusqu'à ce que TOUT soit fermé (cleanup_engine: annulations
+groupées, flash close parallèle, une vérification agrégée par tour).
 
 Usage:
     python cleanup_complete.py
@@ -12,10 +13,13 @@ Usage:
 
 import ccxt
 import os
-import time
 import argparse
 from dotenv import load_dotenv
 
+from cleanup_engine import flatten_account, to_bitget
+from order_batch import run_parallel
+from http_pool import install_http_pool
+
 load_dotenv()
 
 
@@ -26,142 +30,41 @@ def cleanup_pair(exchange, pair, pair_name, max_attempts=5):
     Returns:
         bool: True si clean, False si échec après max_attempts
     """
-    symbol_bitget = pair.replace('/USDT:USDT', 'USDT')
-
-    for attempt in range(max_attempts):
-        print(f"\n{'='*60}")
-        print(f"🔄 {pair_name} - Tentative {attempt + 1}/{max_attempts}")
-        print(f"{'='*60}")
-
-        try:
-            # 1. Annuler TOUS les ordres LIMIT
-            print(f"[1/3] Annulation ordres LIMIT...")
-            orders = exchange.fetch_open_orders(pair)
-            if orders:
-                print(f"  📝 {len(orders)} ordres LIMIT à annuler")
-                for order in orders:
-                    try:
-                        exchange.cancel_order(order['id'], pair)
-                        print(f"    ✅ Ordre {order['id'][:12]}... annulé")
-                        time.sleep(0.3)
-                    except Exception as e:
-                        if '40721' not in str(e):  # Order already cancelled
-                            print(f"    ⚠️  Erreur: {str(e)[:50]}")
-            else:
-                print(f"  ✅ Aucun ordre LIMIT")
-
-            time.sleep(1)
-
-            # 2. Annuler TOUS les ordres TP/SL (plan orders)
-            print(f"\n[2/3] Annulation ordres TP/SL...")
-            try:
-                for plan_type in ['pos_profit', 'pos_loss']:
-                    tpsl_orders = exchange.private_mix_get_v2_mix_order_orders_plan_pending({
-                        'symbol': symbol_bitget,
-                        'productType': 'USDT-FUTURES',
-                        'planType': plan_type
-                    })
-
-                    if tpsl_orders.get('code') == '00000':
-                        orders_list = tpsl_orders.get('data', {}).get('entrustedList', [])
-                        if orders_list:
-                            print(f"  📝 {len(orders_list)} ordres TP/SL ({plan_type})")
-                            for order in orders_list:
-                                try:
-                                    exchange.private_mix_post_v2_mix_order_cancel_plan_order({
-                                        'orderId': order['orderId'],
-                                        'symbol': symbol_bitget,
-                                        'productType': 'USDT-FUTURES',
-                                        'marginCoin': 'USDT'
-                                    })
-                                    print(f"    ✅ TP/SL {order['orderId'][:12]}... annulé")
-                                    time.sleep(0.3)
-                                except Exception as e:
-                                    print(f"    ⚠️  Erreur: {str(e)[:50]}")
-
-                print(f"  ✅ Ordres TP/SL nettoyés")
-            except Exception as e:
-                print(f"  ⚠️  TP/SL cleanup: {str(e)[:50]}")
-
-            time.sleep(1)
-
-            # 3. Fermer TOUTES les positions (Flash Close)
-            print(f"\n[3/3] Fermeture positions...")
-            positions = exchange.fetch_positions([pair])
-
-            positions_to_close = [p for p in positions if float(p.get('contracts', 0)) > 0]
-
-            if positions_to_close:
-                print(f"  📊 {len(positions_to_close)} positions à fermer")
-                for pos in positions_to_close:
-                    side = pos.get('side', '').lower()
-                    size = float(pos.get('contracts', 0))
-                    print(f"    🔴 Flash Close {side.upper()}: {size:.0f} contrats...")
-
-                    try:
-                        result = exchange.private_mix_post_v2_mix_order_close_positions({
-                            'symbol': symbol_bitget,
-                            'productType': 'USDT-FUTURES',
-                            'holdSide': side
-                        })
-
-                        if result.get('code') == '00000':
-                            print(f"      ✅ Flash Close OK")
-                        else:
-                            print(f"      ⚠️  Résultat: {result.get('msg', '')}")
-
-                        time.sleep(1)
-
-                    except Exception as e:
-                        # Si flash close échoue, essayer MARKET order
-                        if '22002' in str(e):
-                            print(f"      ⚠️  Position déjà fermée (ignorer)")
-                        else:
-                            print(f"      ⚠️  Flash close échec: {str(e)[:40]}")
-                            try:
-                                market_side = 'sell' if side == 'long' else 'buy'
-                                exchange.create_order(pair, 'market', market_side, size,
-                                                     params={'tradeSide': 'close', 'holdSide': side})
-                                print(f"      ✅ Market close OK")
-                                time.sleep(1)
-                            except:
-                                print(f"      ❌ Market close échec aussi")
-            else:
-                print(f"  ✅ Aucune position")
-
-            # 4. VÉRIFICATION FINALE
-            print(f"\n{'='*60}")
-            print(f"🔍 VÉRIFICATION {pair_name}")
-            print(f"{'='*60}")
-
-            time.sleep(3)  # Attendre que tout soit bien propagé
-
-            final_orders = exchange.fetch_open_orders(pair)
-            final_positions = exchange.fetch_positions([pair])
-            final_pos_count = sum(1 for p in final_positions if float(p.get('contracts', 0)) > 0)
-
-            print(f"  Ordres LIMIT: {len(final_orders)}")
-            print(f"  Positions: {final_pos_count}")
-
-            if len(final_orders) == 0 and final_pos_count == 0:
-                print(f"  ✅ {pair_name} 100% CLEAN!")
-                return True
-            else:
-                print(f"  ⚠️  Pas clean: {len(final_orders)} ordres, {final_pos_count} positions")
-                if attempt < max_attempts - 1:
-                    print(f"  🔄 Nouvelle tentative dans 3s...")
-                    time.sleep(3)
-                    continue
-
-        except Exception as e:
-            print(f"❌ Erreur tentative {attempt + 1}: {e}")
-            if attempt < max_attempts - 1:
-                time.sleep(3)
-                continue
-
-    # Échec après toutes les tentatives
-    print(f"\n❌ {pair_name}: CLEANUP INCOMPLET après {max_attempts} tentatives!")
-    return False
+    return cleanup_pairs(exchange, [pair], max_attempts)[pair.split('/')[0]]
+
+
+def cleanup_pairs(exchange, pairs, max_attempts=5):
+    """
+    Cleanup de plusieurs paires d'une même clé API en une passe groupée
+    (annulations en masse + flash close parallèle + vérification agrégée)
+
+    Returns:
+        dict: {pair_name: True si clean}
+    """
+    names = ', '.join(p.split('/')[0] for p in pairs)
+    print(f"\n{'='*60}")
+    print(f"🔄 {names}")
+    print(f"{'='*60}")
+
+    report = flatten_account(exchange, pairs, max_rounds=max_attempts)
+
+    print(f"  📝 {report['cancelled_orders']} ordres LIMIT + {report['cancelled_plans']} TP/SL annulés")
+    print(f"  🔴 {report['closed']} positions fermées")
+    print(f"  ⏱️  {report['elapsed']:.1f}s ({report['rounds']} tour(s))")
+
+    remaining = report['remaining'] or {'positions': [], 'orders': {}, 'plans': {}}
+    results = {}
+    for pair in pairs:
+        symbol = to_bitget(pair)
+        dirty = (any(s == symbol for s, _, _ in remaining['positions'])
+                 or symbol in remaining['orders'] or symbol in remaining['plans'])
+        clean = report['remaining'] is not None and not dirty
+        results[pair.split('/')[0]] = clean
+        if clean:
+            print(f"  ✅ {pair.split('/')[0]} 100% CLEAN!")
+        else:
+            print(f"  ⚠️  {pair.split('/')[0]} pas clean")
+    return results
 
 
 def main():
@@ -186,23 +89,23 @@ def main():
         ]
 
     # Initialiser exchanges
-    exchange1 = ccxt.bitget({
+    exchange1 = install_http_pool(ccxt.bitget({
         'apiKey': os.getenv('BITGET_API_KEY'),
         'secret': os.getenv('BITGET_SECRET'),
         'password': os.getenv('BITGET_PASSPHRASE'),
         'options': {'defaultType': 'swap'},
         'headers': {'PAPTRADING': '1'},
         'enableRateLimit': True
-    })
+    }))
 
-    exchange2 = ccxt.bitget({
+    exchange2 = install_http_pool(ccxt.bitget({
         'apiKey': os.getenv('BITGET_API_KEY_2'),
         'secret': os.getenv('BITGET_SECRET_2'),
         'password': os.getenv('BITGET_PASSPHRASE_2'),
         'options': {'defaultType': 'swap'},
         'headers': {'PAPTRADING': '1'},
         'enableRateLimit': True
-    })
+    }))
 
     print("=" * 80)
     print("🧹 CLEANUP COMPLET ROBUSTE")
@@ -212,16 +115,23 @@ def main():
         print(f"  • {p.split('/')[0]} (API Key {k})")
     print()
 
-    # Cleanup chaque paire
-    results = {}
+    # Cleanup: une passe groupée par clé API, les deux clés en parallèle
+    pairs_by_key = {}
     for pair, api_key_id in pairs:
-        exchange = exchange1 if api_key_id == 1 else exchange2
-        pair_name = pair.split('/')[0]
+        pairs_by_key.setdefault(api_key_id, []).append(pair)
 
-        result = cleanup_pair(exchange, pair, pair_name)
-        results[pair_name] = result
+    outcomes = run_parallel({
+        api_key_id: (lambda api_key_id=api_key_id, key_pairs=key_pairs:
+                     cleanup_pairs(exchange1 if api_key_id == 1 else exchange2, key_pairs))
+        for api_key_id, key_pairs in pairs_by_key.items()
+    })
 
-        time.sleep(2)  # Délai entre paires
+    results = {}
+    for api_key_id, outcome in outcomes.items():
+        if isinstance(outcome, Exception):
+            print(f"❌ API Key {api_key_id}: {outcome}")
+            outcome = {p.split('/')[0]: False for p in pairs_by_key[api_key_id]}
+        results.update(outcome)
 
     # Résumé final
     print("\n" + "=" * 80)
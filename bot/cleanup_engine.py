@@ -0,0 +1,232 @@
+"""
+🧹 Cleanup en masse - compte à plat en quelques secondes
+
+Remplace les boucles ordre par ordre (cancel_order + sleep(0.3)) et les
+flash close en série (sleep(2) entre chaque) de cleanup_all(),
+cleanup_complete.py et nuclear_cleanup.py. Chaque tour:
+1. snapshot du compte en parallèle: all-position + orders-pending +
+   orders-plan-pending (3 appels, toutes paires confondues)
+2. annulations groupées, en parallèle:
+   - LIMIT: cancel-all-orders (tout le compte) ou batch-cancel-orders
+     (≤ 50 ids par appel, par symbole)
+   - TP/SL: cancel-plan-order avec orderIdList (par symbole)
+3. flash close (close-positions) de tous les symboles en même temps,
+   MARKET reduce en secours
+4. vérification sur UN nouveau snapshot agrégé → tour suivant si besoin
+
+Usage:
+    report = flatten_account(exchange)                          # tout le compte
+    report = flatten_account(exchange, ['DOGE/USDT:USDT'])      # une paire
+    report['clean'], report['remaining']
+"""
+
+import logging
+import re
+import time
+
+from order_batch import run_parallel
+
+logger = logging.getLogger(__name__)
+
+PRODUCT = {'productType': 'USDT-FUTURES', 'marginCoin': 'USDT'}
+BATCH_CANCEL_MAX = 50
+ALREADY_GONE = ('22002', '40768', '40721')  # plus de position / ordre inexistant / déjà annulé
+CODE_IN_BODY = re.compile(r'"code"\s*:\s*"(\d+)"')
+CODE_PREFIX = re.compile(r'(\d{5}) ')
+
+
+def to_bitget(symbol):
+    """DOGE/USDT:USDT → DOGEUSDT (les ids Bitget passent tels quels)"""
+    return symbol.replace('/USDT:USDT', 'USDT')
+
+
+def error_code(error):
+    """
+    Code d'erreur Bitget d'une exception ou d'un message (None si absent)
+
+    ccxt met le corps JSON brut dans le message ('bitget {"code":"22002",...}'),
+    _data()/_check() et les résultats batch le code en tête ("22002 message").
+    Jamais de recherche dans tout le texte: un id d'ordre ou un prix peut contenir 22002.
+    """
+    message = str(error)
+    match = CODE_IN_BODY.search(message) or CODE_PREFIX.match(message)
+    return match.group(1) if match else None
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _data(response):
+    if response.get('code') not in (None, '00000'):
+        raise RuntimeError(f"{response.get('code')} {response.get('msg')}")
+    return response.get('data') or {}
+
+
+def account_state(exchange, symbols=None, min_contracts=0):
+    """
+    Snapshot brut du compte (3 appels en parallèle)
+
+    Args:
+        symbols: Paires ccxt ou ids Bitget à garder (None = tout le compte)
+        min_contracts: positions plus petites ignorées (micro-positions Bitget)
+
+    Returns:
+        dict: {'positions': [(symbol, side, size)], 'orders': {symbol: [id]}, 'plans': {symbol: [id]}}
+    """
+    results = run_parallel({
+        'positions': lambda: exchange.private_mix_get_v2_mix_position_all_position(dict(PRODUCT)),
+        'orders': lambda: exchange.private_mix_get_v2_mix_order_orders_pending({'productType': 'USDT-FUTURES'}),
+        'plans': lambda: exchange.private_mix_get_v2_mix_order_orders_plan_pending(
+            {'productType': 'USDT-FUTURES', 'planType': 'profit_loss'})
+    }, exchange=exchange)
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            raise RuntimeError(f"snapshot {name}: {result}")
+
+    symbols = None if symbols is None else {to_bitget(s) for s in symbols}
+
+    def wanted(symbol):
+        return symbols is None or symbol in symbols
+
+    positions = []
+    for pos in _data(results['positions']) or []:
+        size = float(pos.get('total') or 0)
+        if size > 0 and size >= min_contracts and wanted(pos['symbol']):
+            positions.append((pos['symbol'], pos['holdSide'], size))
+
+    def group(data):
+        grouped = {}
+        for order in (data or {}).get('entrustedList') or []:
+            if wanted(order['symbol']):
+                grouped.setdefault(order['symbol'], []).append(order['orderId'])
+        return grouped
+
+    return {
+        'positions': positions,
+        'orders': group(_data(results['orders'])),
+        'plans': group(_data(results['plans']))
+    }
+
+
+def _cancel_calls(exchange, state, whole_account):
+    """Appels d'annulation groupés: {nom: callable}"""
+    calls = {}
+
+    if state['orders']:
+        if whole_account:
+            calls['cancel-all-orders'] = lambda: exchange.private_mix_post_v2_mix_order_cancel_all_orders(dict(PRODUCT))
+        else:
+            for symbol, ids in state['orders'].items():
+                for i, chunk in enumerate(_chunks(ids, BATCH_CANCEL_MAX)):
+                    body = dict(PRODUCT, symbol=symbol, orderIdList=[{'orderId': oid} for oid in chunk])
+                    calls[f"batch-cancel {symbol} #{i}"] = (
+                        lambda body=body: exchange.private_mix_post_v2_mix_order_batch_cancel_orders(body))
+
+    for symbol, ids in state['plans'].items():
+        for i, chunk in enumerate(_chunks(ids, BATCH_CANCEL_MAX)):
+            body = dict(PRODUCT, symbol=symbol, orderIdList=[{'orderId': oid} for oid in chunk])
+            calls[f"cancel-plan {symbol} #{i}"] = (
+                lambda body=body: exchange.private_mix_post_v2_mix_order_cancel_plan_order(body))
+
+    return calls
+
+
+def _close_symbol(exchange, symbol, sides):
+    """Flash close des deux côtés d'un symbole, MARKET reduce si le flash close échoue"""
+    try:
+        _data(exchange.private_mix_post_v2_mix_order_close_positions(dict(PRODUCT, symbol=symbol)))
+        return len(sides)
+    except Exception as e:
+        if error_code(e) in ALREADY_GONE:
+            return 0
+        logger.warning(f"   ⚠️ Flash close {symbol} échoué: {e} → MARKET")
+
+    closed = 0
+    for side, size in sides:
+        try:
+            exchange.private_mix_post_v2_mix_order_place_order(dict(
+                PRODUCT, symbol=symbol, marginMode='crossed', side='buy' if side == 'long' else 'sell',
+                tradeSide='close', orderType='market', size=str(size)))
+            closed += 1
+        except Exception as e:
+            if error_code(e) not in ALREADY_GONE:
+                logger.error(f"   ❌ MARKET close {symbol} {side}: {e}")
+    return closed
+
+
+def flatten_account(exchange, symbols=None, min_contracts=0, max_rounds=3, settle_delay=0.5):
+    """
+    Annule tous les ordres (LIMIT + TP/SL) et ferme toutes les positions
+
+    Args:
+        exchange: Instance ccxt.bitget (synchrone)
+        symbols: Paires ccxt ou ids Bitget à nettoyer (None = tout le compte)
+        min_contracts: Positions plus petites ignorées (ex: 1 pour les micro-positions)
+        max_rounds: Tours annulation → fermeture → vérification au maximum
+        settle_delay: Pause (s) avant chaque vérification
+
+    Returns:
+        dict: {'clean', 'rounds', 'cancelled_orders', 'cancelled_plans', 'closed', 'remaining', 'elapsed'}
+    """
+    started = time.time()
+    wanted = None if symbols is None else {to_bitget(s) for s in symbols}
+    report = {'clean': False, 'rounds': 0, 'cancelled_orders': 0, 'cancelled_plans': 0,
+              'closed': 0, 'remaining': None, 'elapsed': 0.0}
+
+    state = None
+    for round_number in range(1, max_rounds + 1):
+        report['rounds'] = round_number
+        try:
+            if state is None:
+                state = account_state(exchange, wanted, min_contracts)
+
+            n_orders = sum(len(ids) for ids in state['orders'].values())
+            n_plans = sum(len(ids) for ids in state['plans'].values())
+            if not (state['positions'] or n_orders or n_plans):
+                report['clean'] = True
+                break
+
+            logger.info(f"🧹 Tour {round_number}: {len(state['positions'])} positions, "
+                        f"{n_orders} ordres, {n_plans} TP/SL")
+
+            # 1. Annulations d'abord (pas de TP/SL déclenché sur une position en cours de fermeture)
+            calls = _cancel_calls(exchange, state, whole_account=wanted is None)
+            if calls:
+                results = run_parallel(calls, exchange=exchange)
+                failed = [name for name, result in results.items() if isinstance(result, Exception)]
+                if failed:
+                    logger.warning(f"   ⚠️ Annulations en échec: {', '.join(failed)}")
+                report['cancelled_orders'] += n_orders
+                report['cancelled_plans'] += n_plans
+
+            # 2. Fermeture de tous les symboles en même temps
+            by_symbol = {}
+            for symbol, side, size in state['positions']:
+                by_symbol.setdefault(symbol, []).append((side, size))
+            if by_symbol:
+                results = run_parallel({symbol: (lambda symbol=symbol, sides=sides: _close_symbol(exchange, symbol, sides))
+                                        for symbol, sides in by_symbol.items()}, exchange=exchange)
+                report['closed'] += sum(r for r in results.values() if isinstance(r, int))
+
+            # 3. Vérification sur un snapshot agrégé
+            time.sleep(settle_delay)
+            state = account_state(exchange, wanted, min_contracts)
+
+        except Exception as e:
+            logger.error(f"❌ Erreur cleanup tour {round_number}: {e}")
+            state = None
+            time.sleep(settle_delay)
+
+    if not report['clean'] and state is not None:
+        report['clean'] = not (state['positions'] or state['orders'] or state['plans'])
+    if state is not None:
+        report['remaining'] = state
+
+    report['elapsed'] = time.time() - started
+    if report['clean']:
+        logger.info(f"✅ Compte à plat en {report['elapsed']:.1f}s ({report['closed']} positions fermées, "
+                    f"{report['cancelled_orders']} ordres + {report['cancelled_plans']} TP/SL annulés)")
+    else:
+        logger.warning(f"⚠️ Cleanup incomplet après {report['rounds']} tours: {report['remaining']}")
+    return report
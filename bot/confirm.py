@@ -0,0 +1,104 @@
+"""
+⏱️ Attente de confirmation - remplace les time.sleep() fixes des handlers
+
+wait_for() rend la main dès que l'exchange confirme l'état attendu:
+- check(): sonde REST, rappelée avec un backoff adaptatif
+  (50ms, 80ms, 128ms... plafonné à 1s) au lieu d'un sleep fixe de 1-3s
+- push(timeout): optionnel, attend un événement WebSocket confirmant l'état
+  (remplace le sleep entre deux sondes REST)
+- deadline: au-delà, renvoie None (le handler décide quoi faire)
+
+Usage:
+    real_pos = wait_for(lambda: probe_positions(), timeout=10)
+    real_pos = await wait_for_async(probe_positions_async, timeout=10)   # moteur asyncio
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+FIRST_INTERVAL = 0.05
+MAX_INTERVAL = 1.0
+BACKOFF = 1.6
+
+
+def wait_for(check, timeout=10, push=None, first_interval=FIRST_INTERVAL,
+             max_interval=MAX_INTERVAL, backoff=BACKOFF):
+    """
+    Attend qu'une condition soit confirmée
+
+    Args:
+        check: callable() → valeur si confirmé, None/False sinon (sonde REST)
+        timeout: deadline en secondes
+        push: callable(timeout) → valeur si un push confirme avant timeout, sinon None
+        first_interval, max_interval, backoff: backoff entre deux sondes
+
+    Returns:
+        La valeur confirmée, ou None si la deadline est dépassée
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    interval = first_interval
+    probes = 0
+
+    while True:
+        probes += 1
+        value = check()
+        if value:
+            logger.debug(f"Confirmé en {(time.monotonic() - started) * 1000:.0f}ms ({probes} sondes)")
+            return value
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"⏱️ Pas de confirmation après {timeout}s ({probes} sondes)")
+            return None
+
+        wait = min(interval, remaining)
+        if push is not None:
+            value = push(wait)
+            if value:
+                logger.debug(f"Confirmé par push en {(time.monotonic() - started) * 1000:.0f}ms")
+                return value
+        else:
+            time.sleep(wait)
+
+        interval = min(interval * backoff, max_interval)
+
+
+async def wait_for_async(check, timeout=10, push=None, first_interval=FIRST_INTERVAL,
+                         max_interval=MAX_INTERVAL, backoff=BACKOFF):
+    """
+    Variante asyncio de wait_for (moteur async): check() et push(timeout) sont des coroutines
+
+    Returns:
+        La valeur confirmée, ou None si la deadline est dépassée
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    interval = first_interval
+    probes = 0
+
+    while True:
+        probes += 1
+        value = await check()
+        if value:
+            logger.debug(f"Confirmé en {(time.monotonic() - started) * 1000:.0f}ms ({probes} sondes)")
+            return value
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"⏱️ Pas de confirmation après {timeout}s ({probes} sondes)")
+            return None
+
+        wait = min(interval, remaining)
+        if push is not None:
+            value = await push(wait)
+            if value:
+                logger.debug(f"Confirmé par push en {(time.monotonic() - started) * 1000:.0f}ms")
+                return value
+        else:
+            await asyncio.sleep(wait)
+
+        interval = min(interval * backoff, max_interval)
@@ -1,41 +1,76 @@
 """
 ETH/USDT Futures Trading Bot avec Alertes Telegram
 Analyse le prix en temps réel et envoie des alertes sur Telegram
+
+Multi-symboles: une seule connexion WebSocket MEXC pour toute la watchlist,
+état (historique, cooldowns) par symbole, analyse du seul symbole reçu
+→ travail borné par message, 50 symboles tiennent sur un cœur.
+
+Usage:
+    python eth_futures_telegram.py
+    python eth_futures_telegram.py --symbols ETH_USDT,BTC_USDT,SOL_USDT,DOGE_USDT
 """
 
+import argparse
 import websocket
 import json
 import time
-import requests
 import os
 from datetime import datetime
-from collections import deque
 from dotenv import load_dotenv
 from pathlib import Path
 
+from sliding_window import SlidingWindowStats
+from telegram_outbox import TelegramOutbox
+
 # Charger le fichier .env depuis la racine du projet
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
+DEFAULT_SYMBOLS = ['ETH_USDT']
+
+
+def format_price(price):
+    """Décimales selon le niveau de prix ($3,512.40 / $1.2345 / $0.162340)"""
+    if price >= 100:
+        return f"${price:,.2f}"
+    if price >= 1:
+        return f"${price:,.4f}"
+    return f"${price:.6f}"
+
+
+class SymbolState:
+    """État d'analyse d'un symbole (historique par durée + dernier prix)"""
+
+    __slots__ = ('symbol', 'label', 'stats', 'current_price', 'ticks')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.label = symbol.replace('_', '/')
+        # Lookback / min / max en O(1) sur 5s, 30s, 1min, 5min et 15min
+        self.stats = SlidingWindowStats([5, 30, 60, 300, 900], capacity=256)
+        self.current_price = None
+        self.ticks = 0
+
+
 class ETHFuturesBot:
-    def __init__(self):
+    def __init__(self, symbols=None):
         """Initialisation du bot"""
 
         # Configuration Telegram
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id)
 
         # Configuration WebSocket
         self.ws_url = "wss://contract.mexc.com/edge"
         self.ws = None
 
-        # Historique des prix (pour analyse)
-        self.price_history = deque(maxlen=900)  # 15 minutes à 1 prix/seconde
-        self.price_1min = deque(maxlen=60)      # 1 minute
+        # Historique des prix par symbole (MEXC pousse à rythme irrégulier)
+        self.symbols = {symbol: SymbolState(symbol) for symbol in (symbols or DEFAULT_SYMBOLS)}
 
-        # Dernier prix
-        self.current_price = None
-        self.last_alert_time = {}  # Éviter spam alertes
+        # Dernière alerte par (symbole, type) - éviter spam alertes
+        self.last_alert_time = {}
 
         # Configuration alertes
         self.CRASH_THRESHOLD = -2.0  # -2% = crash
@@ -43,7 +78,7 @@ class ETHFuturesBot:
         self.VARIATION_THRESHOLD = 0.5  # 0.5% en 1 minute
         self.ALERT_COOLDOWN = 300     # 5 minutes entre alertes similaires
 
-        # Configuration affichage prix
+        # Configuration affichage prix (un seul message pour toute la watchlist)
         self.PRICE_UPDATE_INTERVAL = 5  # Envoyer prix toutes les 5 secondes
         self.last_price_update = time.time()
 
@@ -51,68 +86,55 @@ class ETHFuturesBot:
         self.start_time = datetime.now()
         self.alerts_sent = 0
         self.price_updates_sent = 0
+        self.ticks_received = 0
 
-    def send_telegram(self, message):
+    def send_telegram(self, message, urgent=False):
         """
-        Envoie un message sur Telegram
+        Met un message en file pour Telegram (envoyé par l'outbox, hors du thread WebSocket)
 
         Args:
             message: Message à envoyer
+            urgent: Jamais supprimé si la file sature
         """
-        if not self.telegram_token or not self.telegram_chat_id:
+        if not self.outbox.send(message, urgent=urgent):
             print("⚠️  Token ou Chat ID manquant")
             return False
 
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-
-        data = {
-            "chat_id": self.telegram_chat_id,
-            "text": message,
-            "parse_mode": "HTML"
-        }
+        self.alerts_sent += 1
+        print(f"✅ Message Telegram en file ({self.alerts_sent} alertes)")
+        return True
 
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            if response.status_code == 200:
-                self.alerts_sent += 1
-                print(f"✅ Message Telegram envoyé ({self.alerts_sent} alertes)")
-                return True
-            else:
-                print(f"❌ Erreur Telegram: {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"❌ Erreur envoi Telegram: {e}")
-            return False
-
-    def can_send_alert(self, alert_type):
+    def can_send_alert(self, alert_type, symbol):
         """
-        Vérifie si on peut envoyer une alerte (cooldown)
+        Vérifie si on peut envoyer une alerte (cooldown par symbole)
 
         Args:
             alert_type: Type d'alerte (crash, variation, opportunity)
+            symbol: Symbole MEXC (ETH_USDT)
 
         Returns:
             bool: True si on peut envoyer
         """
         now = time.time()
-        last_time = self.last_alert_time.get(alert_type, 0)
+        key = (symbol, alert_type)
+        last_time = self.last_alert_time.get(key, 0)
 
         if now - last_time >= self.ALERT_COOLDOWN:
-            self.last_alert_time[alert_type] = now
+            self.last_alert_time[key] = now
             return True
         return False
 
-    def check_crash(self):
+    def check_crash(self, state):
         """
         Détecte un crash (-2% en moins de 15 minutes)
 
         Returns:
             dict or None: Infos du crash si détecté
         """
-        if len(self.price_history) < 2:
+        if len(state.stats) < 2:
             return None
 
-        current = self.current_price
+        current = state.current_price
 
         # Vérifier sur différentes périodes (30s, 1min, 5min, 15min)
         timeframes = [
@@ -123,8 +145,8 @@ class ETHFuturesBot:
         ]
 
         for seconds, label in timeframes:
-            if len(self.price_history) >= seconds:
-                old_price = list(self.price_history)[-seconds]
+            old_price = state.stats.ago(seconds)
+            if old_price is not None:
                 change_pct = ((current - old_price) / old_price) * 100
 
                 if change_pct <= self.CRASH_THRESHOLD:
@@ -138,18 +160,18 @@ class ETHFuturesBot:
 
         return None
 
-    def check_high_variation(self):
+    def check_high_variation(self, state):
         """
         Détecte variation importante sur 1 minute (> 0.5%)
 
         Returns:
             dict or None: Infos de la variation si détectée
         """
-        if len(self.price_1min) < 60:
+        price_1min_ago = state.stats.ago(60)
+        if price_1min_ago is None:
             return None
 
-        current = self.current_price
-        price_1min_ago = self.price_1min[0]
+        current = state.current_price
 
         change_pct = abs(((current - price_1min_ago) / price_1min_ago) * 100)
 
@@ -163,7 +185,7 @@ class ETHFuturesBot:
 
         return None
 
-    def check_trading_opportunity(self):
+    def check_trading_opportunity(self, state):
         """
         Détecte opportunité de trading (selon stratégie)
         Basé sur stratégie crash buying : crash suivi d'un rebond
@@ -171,21 +193,20 @@ class ETHFuturesBot:
         Returns:
             dict or None: Infos de l'opportunité si détectée
         """
-        if len(self.price_history) < 300:  # Au moins 5 minutes d'historique
+        price_5min_ago = state.stats.ago(300)
+        if price_5min_ago is None:  # Au moins 5 minutes d'historique
             return None
 
-        current = self.current_price
-        prices = list(self.price_history)
+        current = state.current_price
 
         # Détecter pattern : chute rapide puis stabilisation/rebond
         # 1. Y a-t-il eu une chute de -1.5% dans les 5 dernières minutes ?
-        price_5min_ago = prices[-300]
         drop_pct = ((current - price_5min_ago) / price_5min_ago) * 100
 
         if drop_pct < -1.5:  # Il y a eu une chute
             # 2. Y a-t-il un rebond dans les dernières 30 secondes ?
-            if len(prices) >= 30:
-                price_30s_ago = prices[-30]
+            price_30s_ago = state.stats.ago(30)
+            if price_30s_ago is not None:
                 recent_change = ((current - price_30s_ago) / price_30s_ago) * 100
 
                 if recent_change > 0.2:  # Rebond de +0.2%
@@ -194,103 +215,106 @@ class ETHFuturesBot:
                         'drop_pct': drop_pct,
                         'rebond_pct': recent_change,
                         'current_price': current,
-                        'low_price': min(prices[-300:])
+                        'low_price': state.stats.min(300)
                     }
 
         return None
 
     def send_price_update(self):
         """
-        Envoie une mise à jour du prix toutes les 5 secondes
+        Envoie une mise à jour des prix toutes les 5 secondes (une ligne par symbole)
         """
-        if not self.current_price:
+        current_time = time.time()
+        if current_time - self.last_price_update < self.PRICE_UPDATE_INTERVAL:
             return
 
-        current_time = time.time()
-        if current_time - self.last_price_update >= self.PRICE_UPDATE_INTERVAL:
+        lines = []
+        for state in self.symbols.values():
+            if not state.current_price:
+                continue
+
             # Calculer variation sur les dernières 5 secondes si possible
-            variation_5s = 0
-            if len(self.price_history) >= 5:
-                price_5s_ago = list(self.price_history)[-5]
-                variation_5s = ((self.current_price - price_5s_ago) / price_5s_ago) * 100
-
-            # Calculer variation 24h si disponible
-            variation_24h = 0
-            if len(self.price_history) > 1:
-                # Approximation avec l'historique disponible
-                first_price = self.price_history[0]
-                variation_24h = ((self.current_price - first_price) / first_price) * 100
+            variation_5s = state.stats.change_pct(5) or 0
+
+            # Variation depuis le début de l'historique (15 dernières minutes)
+            variation_start = 0
+            if len(state.stats) > 1:
+                first_price = state.stats.oldest()
+                variation_start = ((state.current_price - first_price) / first_price) * 100
 
             trend = "📈" if variation_5s >= 0 else "📉"
+            lines.append(f"<b>{state.label}</b> {format_price(state.current_price)} "
+                         f"{trend} 5s: {variation_5s:+.3f}% | 15m: {variation_start:+.2f}%")
 
-            message = f"""
-💰 <b>ETH/USDT Perpetual</b>
+        if not lines:
+            return
 
-Prix: <b>${self.current_price:,.2f}</b>
-{trend} 5s: {variation_5s:+.3f}%
-📊 Depuis démarrage: {variation_24h:+.2f}%
+        message = f"""
+💰 <b>MEXC Perpetual</b>
+
+{chr(10).join(lines)}
 
 ⏰ {datetime.now().strftime('%H:%M:%S')}
 """
-            if self.send_telegram(message):
-                self.price_updates_sent += 1
-            self.last_price_update = current_time
+        if self.send_telegram(message):
+            self.price_updates_sent += 1
+        self.last_price_update = current_time
 
-    def analyze_and_alert(self):
+    def analyze_and_alert(self, state):
         """
-        Analyse le prix et envoie des alertes si nécessaire
+        Analyse le prix d'un symbole et envoie des alertes si nécessaire
         """
-        if not self.current_price:
+        if not state.current_price:
             return
 
         # 1. Vérifier CRASH
-        crash = self.check_crash()
-        if crash and self.can_send_alert('crash'):
+        crash = self.check_crash(state)
+        if crash and self.can_send_alert('crash', state.symbol):
             message = f"""
 🔴 <b>ALERTE CRASH DÉTECTÉ !</b>
 
-📉 ETH/USDT a chuté de <b>{crash['change_pct']:.2f}%</b> en {crash['timeframe']}
+📉 {state.label} a chuté de <b>{crash['change_pct']:.2f}%</b> en {crash['timeframe']}
 
-💰 Prix actuel: <b>${crash['new_price']:,.2f}</b>
-📊 Prix avant: ${crash['old_price']:,.2f}
-📉 Perte: ${crash['change_value']:,.2f}
+💰 Prix actuel: <b>{format_price(crash['new_price'])}</b>
+📊 Prix avant: {format_price(crash['old_price'])}
+📉 Perte: {format_price(abs(crash['change_value']))}
 
 ⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
-            self.send_telegram(message)
+            self.send_telegram(message, urgent=True)
 
         # 2. Vérifier VARIATION IMPORTANTE
-        variation = self.check_high_variation()
-        if variation and self.can_send_alert('variation'):
+        variation = self.check_high_variation(state)
+        if variation and self.can_send_alert('variation', state.symbol):
             trend = "📈" if variation['change_pct'] > 0 else "📉"
             action = "HAUSSE" if variation['change_pct'] > 0 else "BAISSE"
 
             message = f"""
-{trend} <b>VARIATION IMPORTANTE !</b>
+{trend} <b>VARIATION IMPORTANTE - {state.label}</b>
 
 {action} de <b>{abs(variation['change_pct']):.2f}%</b> en 1 minute
 
-💰 Prix actuel: <b>${variation['new_price']:,.2f}</b>
-📊 Prix il y a 1 min: ${variation['old_price']:,.2f}
-{trend} Variation: ${variation['change_value']:+,.2f}
+💰 Prix actuel: <b>{format_price(variation['new_price'])}</b>
+📊 Prix il y a 1 min: {format_price(variation['old_price'])}
+{trend} Variation: {'+' if variation['change_value'] >= 0 else '-'}{format_price(abs(variation['change_value']))}
 
 ⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
             self.send_telegram(message)
 
         # 3. Vérifier OPPORTUNITÉ DE TRADING
-        opportunity = self.check_trading_opportunity()
-        if opportunity and self.can_send_alert('opportunity'):
+        opportunity = self.check_trading_opportunity(state)
+        if opportunity and self.can_send_alert('opportunity', state.symbol):
             message = f"""
-💰 <b>OPPORTUNITÉ DE TRADING !</b>
+💰 <b>OPPORTUNITÉ DE TRADING - {state.label}</b>
 
 🎯 Pattern détecté: <b>{opportunity['type']}</b>
 
 📉 Chute initiale: {opportunity['drop_pct']:.2f}%
 📈 Rebond récent: +{opportunity['rebond_pct']:.2f}%
 
-💵 Prix actuel: <b>${opportunity['current_price']:,.2f}</b>
-🔻 Plus bas récent: ${opportunity['low_price']:,.2f}
+💵 Prix actuel: <b>{format_price(opportunity['current_price'])}</b>
+🔻 Plus bas récent: {format_price(opportunity['low_price'])}
 
 💡 Possibilité d'entrée pour stratégie grid trading
 
@@ -307,27 +331,29 @@ Prix: <b>${self.current_price:,.2f}</b>
             if data.get('channel') == 'pong':
                 return
 
-            # Données ticker
+            # Données ticker (le symbole est dans le push)
             if data.get('channel') == 'push.ticker':
                 ticker_data = data.get('data', {})
+                state = self.symbols.get(ticker_data.get('symbol') or data.get('symbol'))
                 price = ticker_data.get('lastPrice', 0)
 
-                if price > 0:
-                    self.current_price = price
+                if state is not None and price > 0:
+                    state.current_price = price
 
-                    # Ajouter aux historiques
-                    self.price_history.append(price)
-                    self.price_1min.append(price)
+                    # Ajouter à l'historique du symbole (horodaté à la réception)
+                    state.stats.append(price)
+                    state.ticks += 1
+                    self.ticks_received += 1
 
                     # Envoyer mise à jour prix toutes les 5 secondes
                     self.send_price_update()
 
-                    # Analyser et alerter
-                    self.analyze_and_alert()
+                    # Analyser et alerter (seulement le symbole reçu)
+                    self.analyze_and_alert(state)
 
                     # Log console (silencieux)
-                    if len(self.price_history) % 60 == 0:  # Toutes les minutes
-                        print(f"📊 Prix: ${price:,.2f} | Historique: {len(self.price_history)}s | Alertes: {self.alerts_sent} | Updates: {self.price_updates_sent}")
+                    if state.ticks % 60 == 0:  # ~ toutes les minutes par symbole
+                        print(f"📊 {state.label}: {format_price(price)} | Historique: {state.stats.coverage():.0f}s | Alertes: {self.alerts_sent} | Updates: {self.price_updates_sent}")
 
         except Exception as e:
             print(f"❌ Erreur traitement message: {e}")
@@ -345,13 +371,15 @@ Prix: <b>${self.current_price:,.2f}</b>
         """Callback WebSocket - ouverture"""
         print("✅ Connecté au WebSocket MEXC Futures")
 
+        labels = ', '.join(state.label for state in self.symbols.values())
+
         # Envoyer message de démarrage
         startup_msg = f"""
-🤖 <b>BOT ETH FUTURES DÉMARRÉ</b>
+🤖 <b>BOT MEXC FUTURES DÉMARRÉ</b>
 
 📡 Connexion: MEXC Futures
-🎯 Paire: ETH/USDT Perpetual
-⏱️  Analyse: Temps réel (1x/seconde)
+🎯 Paires ({len(self.symbols)}): {labels}
+⏱️  Analyse: Temps réel (à chaque tick)
 
 📊 <b>Mise à jour prix: Toutes les 5 secondes</b>
 
@@ -364,20 +392,22 @@ Prix: <b>${self.current_price:,.2f}</b>
 """
         self.send_telegram(startup_msg)
 
-        # Souscrire au ticker
-        subscribe_msg = {
-            "method": "sub.ticker",
-            "param": {"symbol": "ETH_USDT"}
-        }
-        ws.send(json.dumps(subscribe_msg))
-        print("📡 Souscription à ETH_USDT activée")
+        # Souscrire au ticker de chaque symbole (même connexion)
+        for symbol in self.symbols:
+            subscribe_msg = {
+                "method": "sub.ticker",
+                "param": {"symbol": symbol}
+            }
+            ws.send(json.dumps(subscribe_msg))
+        print(f"📡 Souscription activée: {labels}")
 
     def run(self):
         """Lance le bot"""
         print("=" * 80)
-        print("🚀 ETH FUTURES TRADING BOT")
+        print("🚀 MEXC FUTURES TRADING BOT")
         print("=" * 80)
         print(f"📡 WebSocket: {self.ws_url}")
+        print(f"🎯 Symboles: {len(self.symbols)}")
         print(f"💬 Telegram: {'✅ Configuré' if self.telegram_token else '❌ Non configuré'}")
         print("=" * 80)
 
@@ -405,7 +435,8 @@ Prix: <b>${self.current_price:,.2f}</b>
             except KeyboardInterrupt:
                 print("\n\n✋ Arrêt demandé")
                 if self.telegram_token:
-                    self.send_telegram("🛑 Bot arrêté manuellement")
+                    self.send_telegram("🛑 Bot arrêté manuellement", urgent=True)
+                    self.outbox.stop()
                 break
             except Exception as e:
                 print(f"❌ Erreur: {e}")
@@ -415,7 +446,13 @@ Prix: <b>${self.current_price:,.2f}</b>
 
 def main():
     """Point d'entrée"""
-    bot = ETHFuturesBot()
+    parser = argparse.ArgumentParser(description='Alertes MEXC Futures (multi-symboles)')
+    parser.add_argument('--symbols', default=os.getenv('MEXC_SYMBOLS', ','.join(DEFAULT_SYMBOLS)),
+                        help='Symboles MEXC séparés par des virgules (ex: ETH_USDT,BTC_USDT)')
+    args = parser.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    bot = ETHFuturesBot(symbols)
     bot.run()
 
 
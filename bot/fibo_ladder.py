@@ -0,0 +1,130 @@
+"""
+🪜 Échelle Fibonacci - les K prochains niveaux LIMIT au repos en même temps
+
+Le bot ne garde qu'un LIMIT double_long / double_short: le niveau suivant
+n'est placé qu'APRÈS détection du fill, annulations et confirmation → un
+mouvement rapide traverse plusieurs niveaux FIBO_LEVELS sans qu'ils existent
+encore dans le carnet. Ici les `depth` prochains niveaux sont posés d'avance
+et l'exchange les remplit à sa vitesse:
+- prix de chaque niveau calculé depuis le prix moyen PROJETÉ (niveaux
+  précédents remplis à leur prix LIMIT), comme le ferait le mode réactif
+- size de chaque niveau = position projetée (doublement à chaque niveau)
+- mise à jour incrémentale: diff échelle au repos / échelle cible →
+  batch-cancel-orders puis batch-place-order (2 appels max); après un fill
+  au prix LIMIT la projection est exacte → seul le niveau le plus profond
+  est ajouté
+
+Usage:
+    rungs = plan_ladder('long', entry, size, FIBO_LEVELS, start_level=0, depth=3, quantizer=q)
+    resting = sync_ladder(exchange, pair, 'long', resting, rungs, q)
+    filled, resting = filled_rungs(resting, previous_size, current_size)
+"""
+
+import logging
+
+from cleanup_engine import error_code
+from order_batch import batch_cancel_orders, batch_place_orders
+
+logger = logging.getLogger(__name__)
+
+PRICE_TOLERANCE = 0.0005  # 0.05%: prix moyen exchange arrondi ≠ projection → on garde l'ordre
+SIZE_TOLERANCE = 0.01
+
+
+def plan_ladder(side, entry_price, size, levels, start_level, depth, quantizer):
+    """
+    Échelle cible: niveaux start_level .. start_level + depth - 1 de `levels`
+
+    Returns:
+        list[dict]: [{'level', 'price', 'size'}] du plus proche au plus profond
+    """
+    order_side = 'buy' if side == 'long' else 'sell'
+    direction = -1 if side == 'long' else 1
+    avg, total = entry_price, size
+    rungs = []
+
+    for level in range(start_level, min(start_level + depth, len(levels))):
+        price = float(quantizer.limit_price(avg * (1 + direction * levels[level] / 100), order_side))
+        rung_size = float(quantizer.round_size(total))
+        rungs.append({'level': level, 'price': price, 'size': rung_size})
+
+        # Projection: ce niveau rempli à son prix LIMIT
+        avg = (avg * total + price * rung_size) / (total + rung_size)
+        total += rung_size
+
+    return rungs
+
+
+def diff_ladder(resting, planned, price_tolerance=PRICE_TOLERANCE, size_tolerance=SIZE_TOLERANCE):
+    """
+    Returns:
+        (keep, cancel, place): ordres au repos gardés / à annuler, niveaux à poser
+    """
+    by_level = {rung['level']: rung for rung in resting}
+    keep, place = [], []
+
+    for target in planned:
+        current = by_level.pop(target['level'], None)
+        if (current and abs(current['price'] - target['price']) <= target['price'] * price_tolerance
+                and abs(current['size'] - target['size']) <= target['size'] * size_tolerance):
+            keep.append(current)
+        else:
+            if current:
+                by_level[target['level']] = current  # remis dans les annulations
+            place.append(target)
+
+    return keep, list(by_level.values()), place
+
+
+def sync_ladder(exchange, symbol, side, resting, planned, quantizer):
+    """
+    Aligne les ordres au repos sur l'échelle cible (batch-cancel puis batch-place)
+
+    Returns:
+        list[dict]: échelle au repos [{'level', 'id', 'price', 'size'}] triée par niveau
+    """
+    keep, cancel, place = diff_ladder(resting, planned)
+
+    # Annulations d'abord: jamais deux ordres au même niveau dans le carnet
+    if cancel:
+        results = batch_cancel_orders(exchange, symbol, [rung['id'] for rung in cancel])
+        for rung in cancel:
+            error = results.get(rung['id'])
+            if error and error_code(error) != '40768':
+                logger.warning(f"   ⚠️ Niveau Fibo {rung['level']} non annulé: {error}")
+
+    placed = []
+    if place:
+        order_side = 'buy' if side == 'long' else 'sell'
+        results = batch_place_orders(exchange, symbol, [
+            {'side': order_side, 'trade_side': 'open', 'order_type': 'limit',
+             'size': quantizer.format_size(rung['size']), 'price': quantizer.format_price(rung['price'])}
+            for rung in place
+        ])
+        for rung, result in zip(place, results):
+            if result['id']:
+                placed.append(dict(rung, id=result['id']))
+            else:
+                logger.error(f"   ❌ Niveau Fibo {rung['level']} {order_side.upper()} refusé: {result['error']}")
+
+    ladder = sorted(keep + placed, key=lambda rung: rung['level'])
+    logger.info(f"   🪜 Échelle {side.upper()}: {len(keep)} gardés, {len(cancel)} annulés, {len(placed)} posés → "
+                + ", ".join(f"L{rung['level']} {rung['size']:g} @ {rung['price']:g}" for rung in ladder))
+    return ladder
+
+
+def filled_rungs(resting, previous_size, current_size):
+    """
+    Niveaux remplis d'après la taille de position (plusieurs si mouvement rapide)
+
+    Returns:
+        (filled, remaining): listes de rungs (un niveau partiellement rempli reste au repos)
+    """
+    rungs = sorted(resting, key=lambda rung: rung['level'])
+    filled, total = [], previous_size
+    for rung in rungs:
+        if current_size < (total + rung['size']) * (1 - SIZE_TOLERANCE):
+            break
+        filled.append(rung)
+        total += rung['size']
+    return filled, rungs[len(filled):]
@@ -8,7 +8,6 @@ Adaptation automatique aux minimums de l'exchange
 import ccxt
 import time
 import logging
-import requests
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import os
@@ -16,6 +15,17 @@ from dotenv import load_dotenv
 from dataclasses import dataclass
 from enum import Enum
 
+from account_snapshot import AccountSnapshot
+from market_cache import load_markets_cached, market_spec
+from quantizer import get_quantizer
+from rate_limiter import install_rate_limiter
+from rest_override import override_rest_url
+from api_metrics import instrument_exchange
+from order_batch import run_parallel
+from cleanup_engine import flatten_account
+from telegram_outbox import TelegramOutbox
+from http_pool import install_http_pool, warm_up
+
 # Configuration
 load_dotenv()
 
@@ -165,13 +175,8 @@ class LimitFibonacci:
             # Même taille que la position initiale (pour doubler)
             self.size = self.position.size
 
-            # Arrondir le prix selon la précision
-            if self.price < 0.001:
-                self.price = round(self.price, 8)
-            elif self.price < 1:
-                self.price = round(self.price, 5)
-            else:
-                self.price = round(self.price, 2)
+            # Arrondir au tick du contrat (buy vers le bas, sell vers le haut)
+            self.price = float(get_quantizer(self.exchange, self.symbol).limit_price(self.price, side))
 
             logging.info(f"  📊 LIMIT {self.position.side.value} Fibo {self.fibo_level*100}%: {self.size} @ ${self.price:.8f}")
 
@@ -214,13 +219,9 @@ class OrderTakeProfit:
             else:
                 self.trigger_price = self.position.entry_price * (1 - self.tp_percent)
 
-            # Arrondir selon la précision
-            if self.trigger_price < 0.001:
-                self.trigger_price = round(self.trigger_price, 8)
-            elif self.trigger_price < 1:
-                self.trigger_price = round(self.trigger_price, 5)
-            else:
-                self.trigger_price = round(self.trigger_price, 2)
+            # Arrondir au tick du contrat (LONG vers le haut, SHORT vers le bas)
+            quantizer = get_quantizer(self.exchange, self.symbol)
+            self.trigger_price = float(quantizer.tp_price(self.trigger_price, self.position.side.value))
 
             logging.info(f"  🎯 TP {self.position.side.value}: {self.position.size} @ ${self.trigger_price:.8f}")
 
@@ -230,9 +231,9 @@ class OrderTakeProfit:
                 'marginCoin': 'USDT',
                 'productType': 'USDT-FUTURES',  # AJOUT du productType manquant
                 'planType': 'profit_plan',
-                'triggerPrice': str(self.trigger_price),
+                'triggerPrice': quantizer.format_price(self.trigger_price),
                 'triggerType': 'mark_price',
-                'size': str(int(self.position.size)),
+                'size': quantizer.format_size(self.position.size),
                 'side': 'buy' if self.position.side == PositionSide.SHORT else 'sell',
                 'tradeSide': 'close',
                 'orderType': 'market',
@@ -288,6 +289,7 @@ class FibonacciBot:
         # Telegram credentials
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id)
 
         # Logging
         self.setup_logging()
@@ -339,23 +341,9 @@ class FibonacciBot:
         logging.info(f"🔍 Logs DEBUG: {debug_file}")
         logging.debug("DEBUG MODE ACTIVÉ - Logs détaillés dans le fichier debug")
 
-    def send_telegram(self, message: str):
-        """Envoie message Telegram"""
-        if not self.telegram_token or not self.telegram_chat_id:
-            return False
-
-        url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-        data = {
-            "chat_id": self.telegram_chat_id,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-
-        try:
-            response = requests.post(url, data=data, timeout=10)
-            return response.status_code == 200
-        except:
-            return False
+    def send_telegram(self, message: str, urgent: bool = False) -> bool:
+        """Envoie message Telegram (mis en file, ne bloque jamais le trading)"""
+        return self.outbox.send(message, urgent=urgent)
 
     def connect_exchange(self, api_key_id: int):
         """Connexion à l'exchange avec la clé API spécifiée"""
@@ -382,9 +370,18 @@ class FibonacciBot:
                     'createMarketBuyOrderRequiresPrice': False
                 }
             })
+            # Limite partagée avec les autres process de la même clé API
+            install_rate_limiter(exchange, api_key)
 
             # Mode sandbox pour tests
             exchange.set_sandbox_mode(True)
+            # BITGET_REST_URL → mock local (tests / benchmarks)
+            override_rest_url(exchange)
+            # Connexions keep-alive partagées par les clés API, ouvertes d'avance
+            install_http_pool(exchange)
+            warm_up(exchange)
+            # Latence / erreurs par méthode (exchange.api_metrics)
+            instrument_exchange(exchange)
 
             self.exchanges[api_key_id] = exchange
             logging.info(f"✅ API Key {api_key_id} connectée")
@@ -403,38 +400,22 @@ class FibonacciBot:
             ticker = exchange.fetch_ticker(symbol)
             current_price = ticker['last']
 
-            # Marchés pour TOUTES les limites
-            markets = exchange.load_markets()
+            # Marchés depuis le cache disque partagé (contient déjà minTradeUSDT, maxLever, multiplier)
+            load_markets_cached(exchange, background=True)
             market = exchange.market(symbol)
+            spec = market_spec(market)
 
             # Extraction des limites importantes
-            min_size = market.get('limits', {}).get('amount', {}).get('min', 1)
-            min_notional = market.get('limits', {}).get('cost', {}).get('min', 5.0)
-            max_leverage = market.get('limits', {}).get('leverage', {}).get('max', 50)
+            min_size = spec['min_size']
+            min_notional = spec['min_trade_usdt']
+            max_leverage = spec['max_leverage']
 
             # Précisions
             price_precision = market.get('precision', {}).get('price', 8)
             size_precision = market.get('precision', {}).get('amount', 0)
 
             # Taille du contrat
-            contract_size = market.get('contractSize', 1)
-
-            # Si certaines infos ne sont pas disponibles, essayer l'API directe
-            try:
-                # Endpoint Bitget pour les infos détaillées
-                api_symbol = symbol.replace('/', '').replace(':USDT', '')
-                response = exchange.publicMixGetV2MixMarketContracts({
-                    'productType': 'USDT-FUTURES',
-                    'symbol': api_symbol
-                })
-
-                if response and 'data' in response and len(response['data']) > 0:
-                    contract_data = response['data'][0]
-                    min_notional = float(contract_data.get('minTradeUSDT', min_notional))
-                    max_leverage = int(contract_data.get('maxLever', max_leverage))
-                    contract_size = float(contract_data.get('multiplier', contract_size))
-            except:
-                pass  # Utiliser les valeurs par défaut
+            contract_size = spec['multiplier']
 
             info = MarketInfo(
                 symbol=symbol,
@@ -471,106 +452,29 @@ class FibonacciBot:
             )
 
     def complete_cleanup(self):
-        """Nettoie COMPLÈTEMENT toutes les positions et TOUS les ordres"""
+        """Nettoie COMPLÈTEMENT toutes les positions et TOUS les ordres (toutes clés API en parallèle)"""
         logging.info("="*80)
         logging.info("🧹 CLEANUP COMPLET (Positions + Ordres Limit + TP/SL)")
         logging.info("="*80)
 
+        symbols_by_key: Dict[int, List[str]] = {}
         for pair_config in self.PAIRS:
-            symbol = pair_config['symbol']
-            exchange = self.exchanges[pair_config['api_key_id']]
+            symbols_by_key.setdefault(pair_config['api_key_id'], []).append(pair_config['symbol'])
 
-            logging.info(f"\n📍 Cleanup complet pour {symbol}...")
-
-            try:
-                # Phase 1: Flash close toutes les positions
-                logging.info("  [1/3] Flash close des positions...")
-                positions = exchange.fetch_positions([symbol])
-                positions_closed = 0
-
-                for pos in positions:
-                    if pos['contracts'] and pos['contracts'] > 0:
-                        side = pos['side']
-                        size = pos['contracts']
-                        logging.info(f"    🔴 Flash closing {side.upper()}: {size} contrats")
-
-                        # Flash close avec productType
-                        params = {
-                            'symbol': symbol.replace('/', '').replace(':USDT', ''),
-                            'marginCoin': 'USDT',
-                            'productType': 'USDT-FUTURES',
-                            'holdSide': side
-                        }
-
-                        try:
-                            exchange.privateMixPostV2MixOrderClosePositions(params)
-                            positions_closed += 1
-                            time.sleep(0.5)
-                        except Exception as e:
-                            logging.warning(f"    ⚠️ Erreur flash close: {e}")
-
-                if positions_closed > 0:
-                    logging.info(f"    ✅ {positions_closed} positions fermées")
-                else:
-                    logging.info(f"    ✅ Pas de positions à fermer")
-
-                # Phase 2: Annuler tous les ordres limit normaux
-                logging.info("  [2/3] Annulation des ordres LIMIT...")
-                try:
-                    # Récupérer et annuler les ordres ouverts
-                    open_orders = exchange.fetch_open_orders(symbol)
-                    if open_orders:
-                        for order in open_orders:
-                            exchange.cancel_order(order['id'], symbol)
-                            logging.info(f"    ❌ Annulé ordre {order['id']}")
-                        logging.info(f"    ✅ {len(open_orders)} ordres LIMIT annulés")
-                    else:
-                        logging.info(f"    ✅ Pas d'ordres LIMIT à annuler")
-                except Exception as e:
-                    logging.info(f"    ⚠️ Pas d'ordres LIMIT ou erreur: {e}")
-
-                # Phase 3: Annuler tous les ordres TP/SL (plan orders)
-                logging.info("  [3/3] Annulation des ordres TP/SL...")
-                try:
-                    # Endpoint spécifique pour les plan orders
-                    api_symbol = symbol.replace('/', '').replace(':USDT', '')
-
-                    # Récupérer les plan orders
-                    response = exchange.privateMixGetV2MixOrderOrdersPlanPending({
-                        'symbol': api_symbol,
-                        'productType': 'USDT-FUTURES'
-                    })
-
-                    if response and 'data' in response and response['data'].get('entrustedList'):
-                        plan_orders = response['data']['entrustedList']
-                        for order in plan_orders:
-                            try:
-                                # Annuler le plan order
-                                cancel_params = {
-                                    'symbol': api_symbol,
-                                    'marginCoin': 'USDT',
-                                    'productType': 'USDT-FUTURES',
-                                    'orderId': order['orderId']
-                                }
-                                exchange.privateMixPostV2MixOrderCancelPlanOrder(cancel_params)
-                                logging.info(f"    ❌ Annulé TP/SL {order['orderId']}")
-                            except Exception as e:
-                                logging.warning(f"    ⚠️ Erreur annulation TP/SL: {e}")
-
-                        logging.info(f"    ✅ {len(plan_orders)} ordres TP/SL annulés")
-                    else:
-                        logging.info(f"    ✅ Pas d'ordres TP/SL à annuler")
-
-                except Exception as e:
-                    logging.info(f"    ⚠️ Pas d'ordres TP/SL ou erreur: {e}")
-
-                logging.info(f"  ✅ {symbol} complètement nettoyé!")
+        reports = run_parallel({
+            api_key_id: (lambda api_key_id=api_key_id, symbols=symbols:
+                         flatten_account(self.exchanges[api_key_id], symbols))
+            for api_key_id, symbols in symbols_by_key.items()
+        })
 
-            except Exception as e:
-                logging.error(f"  ❌ Erreur cleanup complet {symbol}: {e}")
+        for api_key_id, report in reports.items():
+            if isinstance(report, Exception) or not report['clean']:
+                logging.warning(f"  ⚠️ Clé API {api_key_id}: cleanup incomplet")
+            else:
+                logging.info(f"  ✅ Clé API {api_key_id}: {', '.join(symbols_by_key[api_key_id])} nettoyés "
+                             f"en {report['elapsed']:.1f}s")
 
         logging.info("\n✅ CLEANUP COMPLET TERMINÉ")
-        time.sleep(2)  # Attendre que tout soit bien appliqué
 
     def calculate_adaptive_margin(self, market_info: MarketInfo) -> float:
         """Calcule la marge adaptée selon les minimums de l'exchange"""
@@ -746,7 +650,7 @@ class FibonacciBot:
         Boucle de monitoring ROBUSTE par vérification de cohérence
 
         Principe:
-        - Interroge API toutes les secondes
+        - Interroge API toutes les secondes (1 snapshot par clé API, pas par paire)
         - Compare avec état attendu (expected_state)
         - Détecte événements par analyse:
           * Position doublée = Fibonacci exécuté
@@ -780,6 +684,9 @@ class FibonacciBot:
                 }
             }
 
+        # Un snapshot par clé API: coût REST constant quel que soit le nombre de paires
+        snapshots = {api_key_id: AccountSnapshot(exchange) for api_key_id, exchange in self.exchanges.items()}
+
         iteration = 0
 
         while True:
@@ -787,12 +694,16 @@ class FibonacciBot:
                 iteration += 1
                 start_time = time.time()
 
-                # ===== INTERROGER L'API =====
+                # ===== INTERROGER L'API (2 appels par clé API) =====
+                for snapshot in snapshots.values():
+                    snapshot.refresh()
+
                 for symbol in self.positions:
                     exchange = self.exchanges[self.pair_to_api[symbol]]
+                    snapshot = snapshots[self.pair_to_api[symbol]]
 
-                    # Fetch positions réelles
-                    real_positions = exchange.fetch_positions([symbol])
+                    # Positions réelles (depuis le snapshot)
+                    real_positions = snapshot.positions(symbol)
 
                     # Créer dict par side
                     current_state = {'long': None, 'short': None}
@@ -804,8 +715,8 @@ class FibonacciBot:
                                 'entry': pos['entryPrice']
                             }
 
-                    # Fetch ordres LIMIT (Fibonacci)
-                    limit_orders = exchange.fetch_open_orders(symbol)
+                    # Ordres LIMIT (Fibonacci) depuis le snapshot
+                    limit_orders = snapshot.orders(symbol)
                     fibo_orders = {'long': None, 'short': None}
                     for order in limit_orders:
                         if order['type'] == 'limit':
@@ -988,6 +899,7 @@ class FibonacciBot:
             import traceback
             traceback.print_exc()
         finally:
+            self.outbox.stop()
             logging.info("👋 Bot arrêté")
 
 # ================================================================================
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+⚡ Hedge Fibonacci - MOTEUR ASYNCIO MULTI-PAIRES
+
+Un seul process, une seule boucle asyncio pour N paires:
+- Une session ccxt.async_support.bitget par clé API (rate limiter partagé)
+- load_markets() une seule fois par clé API (cache disque partagé, cf. market_cache)
+- Un snapshot positions par clé API et par tick, distribué à chaque paire
+- Chaque paire = une machine d'état hedge (TP/Fibo) en coroutines
+
+Remplace launch_multi_pairs.py / launch_v4_local.py (1 process par paire,
+lancements espacés de 10s). Le compte doit être propre au démarrage
+(voir cleanup_complete.py).
+
+Usage:
+    python hedge_async_engine.py
+    python hedge_async_engine.py --pair DOGE/USDT:USDT@1 --pair ETH/USDT:USDT@2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import queue
+import time
+from datetime import datetime
+
+import ccxt.async_support as ccxt_async
+from dotenv import load_dotenv
+
+from market_cache import cached_markets, save_markets
+from bitget_adapter import AsyncBitgetAdapter, is_transient
+from rate_limiter import install_rate_limiter, request_priority
+from rest_override import override_rest_url
+from api_metrics import ApiMetrics, instrument_exchange, start_metrics_server
+from bitget_ws import BitgetPriceStream, BitgetPrivateStream, to_bitget_symbol
+from confirm import wait_for_async
+from telegram_outbox import TelegramOutbox
+from http_pool import install_http_pool, warm_up_async
+
+# Configuration logging
+os.makedirs('logs', exist_ok=True)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s',
+    handlers=[
+        logging.FileHandler(f'logs/engine_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Paires par défaut (même config que launch_multi_pairs.py)
+PAIRS = [
+    {'pair': 'DOGE/USDT:USDT', 'api_key_id': 1},
+    {'pair': 'ETH/USDT:USDT', 'api_key_id': 2},
+]
+
+LEVERAGE = 50
+TP_PERCENT = 0.5
+FIBO_LEVELS = [0.3, 0.6, 1.0, 1.5, 2.0]
+POLL_INTERVAL = 0.25  # 4 snapshots/seconde par clé API
+CONFIRM_TIMEOUT = 30  # confirmation des 2 jambes du hedge initial
+
+
+def load_credentials(api_key_id):
+    """Credentials Bitget selon l'ID de clé (1 → BITGET_API_KEY, 2 → BITGET_API_KEY_2)"""
+    suffix = '' if api_key_id == 1 else f'_{api_key_id}'
+    return (
+        os.getenv(f'BITGET_API_KEY{suffix}'),
+        os.getenv(f'BITGET_SECRET{suffix}'),
+        os.getenv(f'BITGET_PASSPHRASE{suffix}')
+    )
+
+
+class Position:
+    """Track position state for a trading pair"""
+    def __init__(self, pair):
+        self.pair = pair
+        self.long_open = False
+        self.short_open = False
+        self.entry_price_long = 0
+        self.entry_price_short = 0
+        self.long_fib_level = 0
+        self.short_fib_level = 0
+
+        # Track sizes for Fibo detection
+        self.long_size_previous = 0
+        self.short_size_previous = 0
+
+        # Order IDs
+        self.orders = {
+            'tp_long': None,
+            'tp_short': None,
+            'double_long': None,
+            'double_short': None
+        }
+
+
+class Account:
+    """Une clé API = une session ccxt async partagée + un snapshot positions par tick"""
+
+    def __init__(self, api_key_id, api_metrics=None, use_ws=True):
+        self.api_key_id = api_key_id
+        api_key, api_secret, api_password = load_credentials(api_key_id)
+        self.credentials = (api_key, api_secret, api_password)
+
+        if not all([api_key, api_secret, api_password]):
+            raise ValueError(f"Missing API credentials for key {api_key_id} in .env")
+
+        self.exchange = ccxt_async.bitget({
+            'apiKey': api_key,
+            'secret': api_secret,
+            'password': api_password,
+            'options': {
+                'defaultType': 'swap',
+                'defaultMarginMode': 'cross',
+            },
+            'headers': {'PAPTRADING': '1'},
+            'enableRateLimit': True
+        })
+        # Limite partagée avec les autres process de la même clé API
+        install_rate_limiter(self.exchange, api_key)
+        # BITGET_REST_URL → mock local (tests / benchmarks)
+        override_rest_url(self.exchange)
+        # Pool keep-alive réglé (connector aiohttp créé au premier appel dans la boucle)
+        install_http_pool(self.exchange)
+        # Latence / erreurs par méthode (partagées par toutes les clés du moteur)
+        instrument_exchange(self.exchange, api_metrics)
+        self.markets = {}
+        self.pairs = {}  # {symbol: PairHedge}
+
+        # WebSocket privé de la clé: confirmations de positions en push
+        self.use_ws = use_ws
+        self.stream = None
+        self.pump_task = None
+
+    async def connect(self):
+        """load_markets() une seule fois pour toutes les paires de la clé (cache disque si frais)"""
+        markets = cached_markets()
+        if markets:
+            self.markets = self.exchange.set_markets(markets)
+        else:
+            self.markets = await self.exchange.load_markets()
+            save_markets(self.markets)
+        logger.info(f"✅ API Key {self.api_key_id}: {len(self.markets)} marchés chargés")
+        await warm_up_async(self.exchange)
+        await self.start_stream()
+
+    async def start_stream(self):
+        """WebSocket privé (positions) relayé aux paires; REST seul si indisponible"""
+        if not self.use_ws:
+            return False
+
+        self.stream = BitgetPrivateStream(*self.credentials)
+        self.stream.start()
+        self.pump_task = asyncio.ensure_future(self.pump_stream())
+        if await asyncio.to_thread(self.stream.wait_until_live, 10):
+            logger.info(f"✅ API Key {self.api_key_id}: WebSocket privé actif")
+            return True
+        logger.warning(f"⚠️ API Key {self.api_key_id}: WebSocket privé pas encore actif - confirmations REST")
+        return False
+
+    def stream_live(self):
+        return self.stream is not None and self.stream.is_live()
+
+    async def pump_stream(self):
+        """Queue du thread WebSocket → pushes `positions` distribués aux paires de la clé"""
+        by_id = {to_bitget_symbol(symbol): hedge for symbol, hedge in self.pairs.items()}
+        while self.stream is not None:
+            try:
+                event = await asyncio.to_thread(self.stream.events.get, True, 0.5)
+            except queue.Empty:
+                continue
+            if event['type'] != 'positions':
+                continue
+            for symbol_id, real_pos in event['positions'].items():
+                hedge = by_id.get(symbol_id)
+                if hedge:
+                    hedge.on_push(real_pos)
+
+    async def fetch_snapshot(self):
+        """Toutes les positions de la clé en 1 appel REST (all-position)"""
+        positions = await self.exchange.fetch_positions()
+
+        snapshot = {symbol: {'long': None, 'short': None} for symbol in self.pairs}
+        for pos in positions:
+            symbol = pos.get('symbol')
+            size = float(pos.get('contracts') or 0)
+            if symbol in snapshot and size > 0:
+                side = pos.get('side', '').lower()
+                snapshot[symbol][side] = {
+                    'size': size,
+                    'entry_price': float(pos.get('entryPrice') or 0),
+                    'margin': float(pos.get('initialMargin') or 0),
+                    'pnl': float(pos.get('unrealizedPnl') or 0)
+                }
+        return snapshot
+
+    async def monitor(self):
+        """Boucle de monitoring: 1 snapshot → distribué à chaque paire"""
+        iteration = 0
+        while True:
+            iteration += 1
+            try:
+                fetched_at = time.monotonic()
+                snapshot = await self.fetch_snapshot()
+                for symbol, hedge in self.pairs.items():
+                    hedge.on_snapshot(snapshot[symbol], fetched_at)
+
+                if iteration % 40 == 0:
+                    for symbol, hedge in self.pairs.items():
+                        real_pos = snapshot[symbol]
+                        long_size = real_pos['long']['size'] if real_pos['long'] else 0
+                        short_size = real_pos['short']['size'] if real_pos['short'] else 0
+                        logger.info(f"[{iteration}] {hedge.name} 💚 LONG: {long_size:.0f} | ❤️ SHORT: {short_size:.0f}")
+
+            except Exception as e:
+                logger.error(f"❌ Erreur snapshot API Key {self.api_key_id}: {e}")
+
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def close(self):
+        if self.stream is not None:
+            stream, self.stream = self.stream, None
+            stream.stop()
+        if self.pump_task is not None:
+            await asyncio.gather(self.pump_task, return_exceptions=True)
+        await self.exchange.close()
+
+
+class PairHedge:
+    """Machine d'état hedge Fibonacci d'une paire (version async)"""
+
+    def __init__(self, engine, account, pair):
+        self.engine = engine
+        self.account = account
+        self.exchange = account.exchange
+        self.PAIR = pair
+        self.adapter = AsyncBitgetAdapter(self.exchange, pair)
+        self.name = pair.split('/')[0]
+        self.LEVERAGE = LEVERAGE
+        self.TP_PERCENT = TP_PERCENT
+        self.FIBO_LEVELS = list(FIBO_LEVELS)
+        self.INITIAL_MARGIN = 5
+        self.position = Position(pair)
+
+        # Un seul handler à la fois par paire
+        self.busy = False
+        self.ready = False
+        self.settled_at = 0  # fin du dernier handler (time.monotonic)
+        self.tasks = set()   # la boucle ne garde qu'une référence faible aux tâches
+
+        # Dernier push WebSocket `positions` de la paire (cf. wait_positions)
+        self.last_push = None
+        self.pushed = asyncio.Event()
+
+    # ========== HELPERS ==========
+
+    def log(self, message):
+        logger.info(f"[{self.name}] {message}")
+
+    async def get_price(self):
+        """Prix courant: cache WebSocket public (O(1)), fetch_ticker seulement si périmé"""
+        price = self.engine.price_stream.price(to_bitget_symbol(self.PAIR))
+        if price:
+            return price
+
+        ticker = await self.exchange.fetch_ticker(self.PAIR)
+        return float(ticker['last'])
+
+    async def get_real_positions(self):
+        """Get actual positions from API (confirmation après un ordre)"""
+        return await self.adapter.get_positions()
+
+    def on_push(self, real_pos):
+        """Push `positions` de la paire reçu par l'Account (réveille wait_positions)"""
+        self.last_push = real_pos
+        self.pushed.set()
+
+    async def side_flat(self, side):
+        """True si le REST ne montre plus de position `side`"""
+        return not (await self.get_real_positions())[side]
+
+    async def wait_positions(self, condition, timeout=10):
+        """
+        Attend que les positions vérifient `condition(real_pos)` (cf. confirm.wait_for_async)
+
+        Sonde REST avec backoff adaptatif; entre deux sondes, écoute le push
+        WebSocket `positions` si le stream de la clé est actif.
+
+        Returns:
+            dict: positions au format get_real_positions(), None si deadline dépassée
+        """
+        async def check():
+            real_pos = await self.get_real_positions()
+            return real_pos if condition(real_pos) else None
+
+        async def push(timeout):
+            self.pushed.clear()
+            try:
+                await asyncio.wait_for(self.pushed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            return self.last_push if condition(self.last_push) else None
+
+        return await wait_for_async(check, timeout, push=push if self.account.stream_live() else None)
+
+    def calculate_min_margin(self, current_price):
+        """Marge minimale (3x sécurité) depuis les marchés déjà chargés"""
+        market = self.account.markets.get(self.PAIR)
+        if not market:
+            self.log("⚠️ Paire non trouvée dans markets, utilise $5 par défaut")
+            return 5
+
+        min_amount = market['limits']['amount'].get('min') or 0
+        min_cost = market['limits']['cost'].get('min') or 0
+        min_margin = max(min_amount * current_price / self.LEVERAGE, min_cost / self.LEVERAGE, 1)
+        return max(5, round(min_margin * 3))
+
+    async def place_tpsl_order(self, trigger_price, hold_side, size, plan_type='profit_plan'):
+        """Place TP/SL order with retry and price adjustment (cf. BitgetAdapter.place_tpsl)"""
+        return await self.adapter.place_tpsl(trigger_price, hold_side, size, plan_type)
+
+    async def cancel_order(self, key):
+        """Annule un ordre suivi (ignore si déjà parti)"""
+        order_id = self.position.orders.get(key)
+        if not order_id:
+            return
+        try:
+            await self.adapter.cancel_order(order_id)
+        except Exception as e:
+            logger.warning(f"[{self.name}]    ⚠️ {key} non annulé: {e}")
+        self.position.orders[key] = None
+
+    async def open_market(self, side, size):
+        """MARKET d'ouverture d'un côté (size au pas du contrat)"""
+        return await self.exchange.create_order(
+            symbol=self.PAIR, type='market', side='buy' if side == 'long' else 'sell',
+            amount=float(self.adapter.quantizer.round_size(size)),
+            params={'tradeSide': 'open', 'holdSide': side}
+        )
+
+    async def place_fibo(self, side, entry, size, level):
+        """Place le LIMIT Fibo (double la position) au niveau `level`"""
+        quantizer = self.adapter.quantizer
+        if side == 'long':
+            order_side = 'buy'
+            price = float(quantizer.limit_price(entry * (1 - self.FIBO_LEVELS[level] / 100), order_side))
+        else:
+            order_side = 'sell'
+            price = float(quantizer.limit_price(entry * (1 + self.FIBO_LEVELS[level] / 100), order_side))
+
+        order = await self.exchange.create_order(
+            symbol=self.PAIR, type='limit', side=order_side, amount=float(quantizer.round_size(size)),
+            price=price, params={'tradeSide': 'open', 'holdSide': side}
+        )
+        self.position.orders[f'double_{side}'] = order['id']
+        self.log(f"   ✅ LIMIT {order_side.upper()} @ ${price:.5f} (size: {size:.0f})")
+
+    async def place_tp(self, side, entry, size):
+        """Place le TP à TP_PERCENT du prix d'entrée"""
+        if side == 'long':
+            price = entry * (1 + self.TP_PERCENT / 100)
+        else:
+            price = entry * (1 - self.TP_PERCENT / 100)
+        # Trigger au tick, arrondi du côté du TP (cf. SymbolQuantizer.tp_price)
+        price = float(self.adapter.quantizer.tp_price(price, side))
+
+        tp = await self.place_tpsl_order(trigger_price=price, hold_side=side, size=size)
+        if tp and tp.get('id'):
+            self.position.orders[f'tp_{side}'] = tp['id']
+            self.log(f"   ✅ TP {side.upper()} @ ${price:.5f}")
+
+    def set_side_state(self, side, entry, size, fib_level):
+        """Met à jour l'état local d'un côté"""
+        setattr(self.position, f'{side}_open', True)
+        setattr(self.position, f'entry_price_{side}', entry)
+        setattr(self.position, f'{side}_size_previous', size)
+        setattr(self.position, f'{side}_fib_level', fib_level)
+
+    # ========== HEDGE INITIAL ==========
+
+    async def abort_initial_hedge(self, sides):
+        """Hedge initial incomplet: ferme les jambes ouvertes (jamais une position sans TP ni contrepartie)"""
+        for side in sides:
+            self.log(f"   ⚠️ Hedge incomplet → fermeture {side.upper()}")
+            try:
+                # Le MARKET accepté peut ne pas être encore visible: flash close sur rien = 22002
+                seen = await self.wait_positions(lambda pos, side=side: pos[side], timeout=5)
+                await self.adapter.flash_close(side)
+                # Succès seulement si le REST confirme le côté à plat (pas de push: partiel par côté)
+                flat = await wait_for_async(lambda: self.side_flat(side), timeout=5)
+            except Exception as e:
+                logger.error(f"[{self.name}]    ❌ Fermeture {side.upper()}: {e}")
+                seen = flat = None
+
+            if flat and seen:
+                self.log(f"   ✅ {side.upper()} fermé")
+            elif flat:
+                # Jamais vue: peut encore apparaître après le flash close
+                logger.warning(f"[{self.name}]    ⚠️ {side.upper()} jamais visible - à vérifier")
+                await self.engine.send_telegram(f"🚨 <b>{side.upper()} {self.name} non confirmé</b>\n\nHedge initial avorté, vérifier qu'aucune position n'est ouverte", urgent=True)
+            else:
+                logger.error(f"[{self.name}]    ❌ {side.upper()} toujours ouvert - fermeture manuelle requise")
+                await self.engine.send_telegram(f"🚨 <b>{side.upper()} {self.name} ouvert sans hedge ni TP</b>\n\nFermeture manuelle requise", urgent=True)
+
+    async def open_initial_hedge(self):
+        """Open initial hedge: LONG + SHORT + 2 TP + 2 LIMIT Fibo"""
+        self.log("🚀 OUVERTURE HEDGE INITIAL")
+        sent = False
+
+        try:
+            current_price = await self.get_price()
+            self.INITIAL_MARGIN = self.calculate_min_margin(current_price)
+            size = self.INITIAL_MARGIN * self.LEVERAGE / current_price
+            self.log(f"Prix ${current_price:.5f} | Marge ${self.INITIAL_MARGIN} | Size {size:.1f}")
+
+            # Les 2 jambes partent ensemble (même session, rate limiter partagé)
+            sent = True
+            results = await asyncio.gather(self.open_market('long', size), self.open_market('short', size),
+                                           return_exceptions=True)
+            failed = [side for side, result in zip(('long', 'short'), results) if isinstance(result, Exception)]
+            for side, result in zip(('long', 'short'), results):
+                if isinstance(result, Exception):
+                    logger.error(f"[{self.name}]    ❌ {side.upper()} refusé: {result}")
+            if failed:
+                # Une seule jambe ouverte = position nue sans TP → refermée tout de suite.
+                # Erreur réseau: l'ordre a pu passer quand même → côté fermé aussi
+                await self.abort_initial_hedge([side for side, result in zip(('long', 'short'), results)
+                                                if not isinstance(result, Exception) or is_transient(result)])
+                return False
+
+            real_pos = await self.wait_positions(lambda pos: pos['long'] and pos['short'], timeout=CONFIRM_TIMEOUT)
+            if not real_pos:
+                logger.error(f"[{self.name}] ❌ Positions non confirmées après {CONFIRM_TIMEOUT}s!")
+                await self.abort_initial_hedge(['long', 'short'])
+                return False
+
+            for side in ('long', 'short'):
+                self.set_side_state(side, real_pos[side]['entry_price'], real_pos[side]['size'], 0)
+
+            results = await asyncio.gather(*[
+                coro
+                for side in ('long', 'short')
+                for coro in (
+                    self.place_tp(side, real_pos[side]['entry_price'], real_pos[side]['size']),
+                    self.place_fibo(side, real_pos[side]['entry_price'], real_pos[side]['size'], 0)
+                )
+            ], return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"[{self.name}]    ❌ Ordre TP/Fibo refusé: {result}")
+
+            self.log("✅ HEDGE INITIAL COMPLET (2 positions + 4 ordres)")
+            await self.engine.send_telegram(f"🚀 <b>HEDGE OUVERT - {self.name}</b>\n\nMarge: ${self.INITIAL_MARGIN} | Levier: {self.LEVERAGE}x")
+            self.ready = True
+            return True
+
+        except Exception as e:
+            logger.error(f"[{self.name}] ❌ Erreur ouverture hedge: {e}")
+            if sent and not self.ready:
+                # MARKET déjà envoyés: jamais de jambe laissée sans TP
+                await self.abort_initial_hedge(['long', 'short'])
+            return False
+
+    # ========== DÉTECTION ==========
+
+    def on_snapshot(self, real_pos, fetched_at):
+        """Snapshot reçu de l'Account → lance le handler adéquat (tâche séparée)"""
+        # Snapshot demandé avant la fin du dernier handler = état périmé
+        if not self.ready or self.busy or fetched_at < self.settled_at:
+            return
+
+        for side in ('long', 'short'):
+            was_open = getattr(self.position, f'{side}_open')
+            previous_size = getattr(self.position, f'{side}_size_previous')
+
+            if was_open and not real_pos.get(side):
+                self.log(f"🔥 DÉTECTION: TP {side.upper()} EXÉCUTÉ!")
+                self.spawn(self.handle_tp_executed(side))
+                return
+
+            if real_pos.get(side) and previous_size > 0 and real_pos[side]['size'] >= previous_size * 1.8:
+                self.log(f"🔥 DÉTECTION: FIBO {side.upper()} EXÉCUTÉ! {previous_size:.0f} → {real_pos[side]['size']:.0f}")
+                self.spawn(self.handle_fibo_executed(side))
+                return
+
+    def spawn(self, coro):
+        """Lance un handler sans bloquer la boucle des autres paires"""
+        self.busy = True
+
+        async def runner():
+            try:
+                with request_priority('high'):
+                    await coro
+            except Exception as e:
+                logger.error(f"[{self.name}] ❌ Erreur handler: {e}")
+            finally:
+                self.settled_at = time.monotonic()
+                self.busy = False
+
+        task = asyncio.ensure_future(runner())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    # ========== HANDLERS ==========
+
+    async def handle_tp_executed(self, side):
+        """TP exécuté → Réouverture + nouveau TP + nouveau LIMIT Fibo"""
+        await self.engine.send_telegram(f"✅ <b>TP {side.upper()} TOUCHÉ - {self.name}</b>\n\nRéouverture en cours...")
+
+        await self.cancel_order(f'double_{side}')
+
+        current_price = await self.get_price()
+        size = self.INITIAL_MARGIN * self.LEVERAGE / current_price
+        await self.open_market(side, size)
+
+        real_pos = await self.wait_positions(lambda pos: pos.get(side))
+        if not real_pos:
+            logger.error(f"[{self.name}] ❌ {side.upper()} pas trouvé après réouverture!")
+            return
+
+        entry = real_pos[side]['entry_price']
+        size = real_pos[side]['size']
+        self.set_side_state(side, entry, size, 0)
+        self.log(f"   Position {side.upper()} rouverte: {size:.0f} @ ${entry:.5f}")
+
+        await asyncio.gather(
+            self.place_tp(side, entry, size),
+            self.place_fibo(side, entry, size * 2, 0)
+        )
+        self.log(f"✅ TP {side.upper()} HANDLER TERMINÉ")
+
+    async def handle_fibo_executed(self, side):
+        """LIMIT Fibo exécuté → nouveau TP au prix moyen + LIMIT au niveau suivant"""
+        await self.engine.send_telegram(f"⚡ <b>FIBO {side.upper()} TOUCHÉ - {self.name}</b>\n\nDoublement position...")
+
+        await asyncio.gather(self.cancel_order(f'tp_{side}'), self.cancel_order(f'double_{side}'))
+
+        real_pos = await self.get_real_positions()
+        if not real_pos.get(side):
+            logger.error(f"[{self.name}] ❌ {side.upper()} pas trouvé!")
+            return
+
+        entry = real_pos[side]['entry_price']
+        size = real_pos[side]['size']
+        fib_level = getattr(self.position, f'{side}_fib_level') + 1
+        self.set_side_state(side, entry, size, fib_level)
+        self.log(f"   Position {side.upper()} doublée: {size:.0f} @ ${entry:.5f} (Fib level {fib_level})")
+
+        tasks = [self.place_tp(side, entry, size)]
+        next_level = fib_level + 1
+        if next_level < len(self.FIBO_LEVELS):
+            tasks.append(self.place_fibo(side, entry, size, next_level))
+        else:
+            self.log("   ⚠️ Niveau Fibo max atteint, pas de nouveau LIMIT")
+
+        await asyncio.gather(*tasks)
+        self.log(f"✅ FIBO {side.upper()} HANDLER TERMINÉ")
+
+
+class HedgeEngine:
+    """Héberge toutes les paires dans une seule boucle asyncio"""
+
+    def __init__(self, pairs, metrics_port=None, use_ws=True):
+        self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
+        self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        # Une seule outbox: tous les hedges partagent la limite par chat
+        self.outbox = TelegramOutbox(self.telegram_token, self.telegram_chat_id)
+
+        self.api_metrics = ApiMetrics()
+        if metrics_port:
+            start_metrics_server(self.api_metrics, metrics_port)
+
+        self.accounts = {}  # {api_key_id: Account}
+        self.hedges = []
+
+        for p in pairs:
+            api_key_id = p['api_key_id']
+            if api_key_id not in self.accounts:
+                self.accounts[api_key_id] = Account(api_key_id, self.api_metrics, use_ws=use_ws)
+            account = self.accounts[api_key_id]
+
+            hedge = PairHedge(self, account, p['pair'])
+            account.pairs[p['pair']] = hedge
+            self.hedges.append(hedge)
+
+        # Un seul WebSocket public (ticker + books5) pour toutes les paires
+        self.price_stream = BitgetPriceStream([to_bitget_symbol(hedge.PAIR) for hedge in self.hedges])
+
+    async def send_telegram(self, message, urgent=False):
+        """Envoie message Telegram (mis en file: aucune attente réseau dans la boucle)"""
+        return self.outbox.send(message, urgent=urgent)
+
+    async def run(self):
+        """Connexion, ouverture des hedges puis monitoring"""
+        logger.info("=" * 80)
+        logger.info(f"⚡ MOTEUR ASYNC - {len(self.hedges)} PAIRES / {len(self.accounts)} CLÉS API")
+        logger.info("=" * 80)
+
+        start = time.time()
+        self.price_stream.start()
+        await asyncio.gather(*[account.connect() for account in self.accounts.values()])
+
+        # Pas de délai entre paires: le rate limiter ccxt est partagé par clé API
+        with request_priority('high'):
+            results = await asyncio.gather(*[hedge.open_initial_hedge() for hedge in self.hedges])
+        opened = [hedge.name for hedge, ok in zip(self.hedges, results) if ok]
+        logger.info(f"✅ {len(opened)}/{len(self.hedges)} hedges ouverts en {time.time() - start:.1f}s: {', '.join(opened)}")
+
+        await self.send_telegram(f"⚡ <b>MOTEUR ASYNC DÉMARRÉ</b>\n\nPaires: {', '.join(opened)}\n\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+        try:
+            await asyncio.gather(*[account.monitor() for account in self.accounts.values()])
+        finally:
+            self.price_stream.stop()
+            await asyncio.gather(*[account.close() for account in self.accounts.values()])
+            await asyncio.to_thread(self.outbox.stop)
+
+
+def parse_pair_arg(value):
+    """'DOGE/USDT:USDT@2' → {'pair': 'DOGE/USDT:USDT', 'api_key_id': 2}"""
+    pair, _, key_id = value.partition('@')
+    return {'pair': pair, 'api_key_id': int(key_id or 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hedge Fibonacci - Moteur asyncio multi-paires')
+    parser.add_argument('--pair', action='append', type=parse_pair_arg,
+                        help='Paire@cléAPI (ex: DOGE/USDT:USDT@1). Répétable.')
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('METRICS_PORT', 0)),
+                        help='Port HTTP des métriques Prometheus (0 = désactivé)')
+    parser.add_argument('--no-ws', action='store_true',
+                        help='Sans WebSocket privé (confirmations REST uniquement)')
+    args = parser.parse_args()
+
+    engine = HedgeEngine(args.pair or PAIRS, metrics_port=args.metrics_port, use_ws=not args.no_ws)
+
+    try:
+        asyncio.run(engine.run())
+    except KeyboardInterrupt:
+        logger.info("\n⏹️  Arrêt demandé par utilisateur")
@@ -0,0 +1,252 @@
+"""
+🔗 Pool HTTP partagé - connexions keep-alive réutilisées par tous les clients ccxt
+
+ccxt.bitget({...}) crée sa propre requests.Session par instance:
+- pool de 10 connexions par hôte: au-delà (run_parallel, cleanup en masse,
+  plusieurs paires dans le même process) urllib3 jette la connexion
+  ("Connection pool is full, discarding connection") → nouveau handshake
+  TCP + TLS à la requête suivante
+- une instance par clé API / par script → autant de pools froids
+- sockets sans TCP keepalive: une connexion idle coupée par un NAT/LB se
+  découvre au moment d'envoyer l'ordre
+- getaddrinfo à chaque nouvelle connexion vers Bitget
+
+Ici:
+- UNE requests.Session par process, partagée par toutes les instances ccxt
+  synchrones (les clés API sont dans les headers signés, pas dans la connexion)
+- pool dimensionné pour la concurrence attendue (HTTP_POOL_SIZE, défaut 32)
+- TCP_NODELAY + SO_KEEPALIVE (sonde après 30s d'inactivité)
+- cache DNS des hôtes Bitget seulement (TTL 60s), dans les connexions du
+  pool: Telegram, websocket-client et le reste du process résolvent
+  normalement; une adresse en cache qui refuse la connexion est oubliée
+  → nouvelle résolution à la tentative suivante (failover DNS)
+- warm_up(): ouvre les connexions au démarrage, pas au premier TP
+- asyncio: TCPConnector aiohttp réglé (limit, keepalive_timeout 60s,
+  ttl_dns_cache, mêmes options socket), créé au premier appel dans la boucle
+
+HTTP/2: ni requests ni aiohttp ne le parlent (urllib3.http2 est expérimental
+et demande h2) → HTTP/1.1 keep-alive, le handshake par requête est déjà évité.
+
+HTTP_POOL=0 désactive tout (session ccxt par défaut, comparaison benchmark).
+
+Usage:
+    exchange = ccxt.bitget({...})
+    install_http_pool(exchange)                 # avant le premier appel
+    warm_up(exchange)                           # optionnel (bots longue durée)
+
+    exchange = ccxt_async.bitget({...})
+    install_http_pool(exchange, pool_size=64)
+    await warm_up_async(exchange)
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))
+KEEPALIVE_TIMEOUT = 60   # s: connexion aiohttp idle gardée (défaut aiohttp: 15s)
+DNS_TTL = 60             # s
+DNS_CACHED_DOMAINS = ('bitget.com',)
+
+SOCKET_OPTIONS = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+for _name, _value in (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+    if hasattr(socket, _name):
+        SOCKET_OPTIONS.append((socket.IPPROTO_TCP, getattr(socket, _name), _value))
+
+_lock = threading.Lock()
+_session = None
+_dns_cache = {}
+
+
+def enabled():
+    return os.getenv('HTTP_POOL', '1') != '0'
+
+
+# ================================================================================
+# DNS
+# ================================================================================
+
+def dns_cached(host):
+    return any(host == domain or host.endswith('.' + domain) for domain in DNS_CACHED_DOMAINS)
+
+
+def resolve(host, port, ttl=DNS_TTL):
+    """Adresse IP d'un hôte Bitget (cache TTL, échecs de résolution jamais mis en cache)"""
+    hit = _dns_cache.get((host, port))
+    now = time.monotonic()
+    if hit and hit[0] > now:
+        return hit[1]
+    address = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0][4][0]
+    _dns_cache[(host, port)] = (now + ttl, address)
+    return address
+
+
+def forget(host, port):
+    """Adresse injoignable: résolue à nouveau à la prochaine connexion"""
+    _dns_cache.pop((host, port), None)
+
+
+# ================================================================================
+# SYNCHRONE (requests)
+# ================================================================================
+
+class CachedDNSConnection(HTTPConnection):
+    """Connexion urllib3 qui résout les hôtes Bitget via le cache DNS du pool"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        if not dns_cached(host):
+            return super()._new_conn()
+
+        self._dns_host = resolve(host, self.port)  # SNI / vérification TLS restent sur self.host
+        try:
+            return super()._new_conn()
+        except (NewConnectionError, ConnectTimeoutError):
+            forget(host, self.port)
+            raise
+        finally:
+            self._dns_host = host
+
+
+class CachedDNSHTTPSConnection(CachedDNSConnection, HTTPSConnection):
+    pass
+
+
+class CachedDNSPool(HTTPConnectionPool):
+    ConnectionCls = CachedDNSConnection
+
+
+class CachedDNSHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = CachedDNSHTTPSConnection
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter avec pool dimensionné, options socket keepalive et cache DNS Bitget"""
+
+    def __init__(self, pool_size):
+        self.pool_size = pool_size
+        super().__init__(pool_maxsize=pool_size)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': CachedDNSPool, 'https': CachedDNSHTTPSPool}
+
+
+class SharedSession(requests.Session):
+    """Session commune: le close() d'une instance ccxt (appelé par son __del__) ne vide pas le pool"""
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        super().close()
+
+
+def shared_session(pool_size=POOL_SIZE):
+    """Session du process (pool agrandi si une instance en demande plus)"""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = SharedSession()
+        adapter = _session.get_adapter('https://')
+        if getattr(adapter, 'pool_size', 0) < pool_size:
+            for prefix in ('https://', 'http://'):
+                _session.mount(prefix, KeepAliveAdapter(pool_size))
+        return _session
+
+
+def install_http_pool(exchange, pool_size=POOL_SIZE):
+    """
+    Branche l'exchange ccxt (sync ou async) sur le pool keep-alive
+
+    Args:
+        pool_size: Connexions simultanées max par hôte (≥ threads run_parallel × process)
+    """
+    if not enabled():
+        return exchange
+
+    if getattr(exchange, 'synchronous', True):
+        session = shared_session(pool_size)
+        session.trust_env = exchange.requests_trust_env
+        exchange.session = session
+    else:
+        _install_async(exchange, pool_size)
+    return exchange
+
+
+def warm_up(exchange, connections=4):
+    """Ouvre `connections` connexions en parallèle (GET public/time) avant le premier ordre"""
+    if not enabled():
+        return 0
+    from order_batch import run_parallel
+
+    started = time.time()
+    results = run_parallel({i: exchange.public_common_get_v2_public_time for i in range(connections)}, exchange=exchange)
+    ok = sum(1 for result in results.values() if not isinstance(result, Exception))
+    logger.info(f"🔗 Pool HTTP: {ok}/{connections} connexions ouvertes en {(time.time() - started) * 1000:.0f}ms")
+    return ok
+
+
+# ================================================================================
+# ASYNCIO (aiohttp)
+# ================================================================================
+
+def _keepalive_socket(addr_info):
+    family, type_, proto, _, _ = addr_info
+    sock = socket.socket(family=family, type=type_, proto=proto)
+    for level, option, value in SOCKET_OPTIONS:
+        sock.setsockopt(level, option, value)
+    return sock
+
+
+def _install_async(exchange, pool_size):
+    """Remplace le TCPConnector par défaut de ccxt, créé au premier open() dans la boucle"""
+    import aiohttp
+
+    original_open = exchange.open
+
+    def open(lazy=False):
+        if exchange.session is not None or not exchange.own_session:
+            return original_open(lazy)
+
+        # ccxt prépare boucle + contexte SSL sans créer sa session, puis on crée la nôtre
+        exchange.own_session = False
+        try:
+            original_open(lazy)
+        finally:
+            exchange.own_session = True
+
+        options = dict(ssl=exchange.ssl_context, limit=pool_size, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                       ttl_dns_cache=DNS_TTL, enable_cleanup_closed=True, family=socket.AF_UNSPEC,
+                       happy_eyeballs_delay=0)
+        if 'socket_factory' in inspect.signature(aiohttp.TCPConnector).parameters:
+            options['socket_factory'] = _keepalive_socket
+        exchange.tcp_connector = aiohttp.TCPConnector(**options)
+        exchange.session = aiohttp.ClientSession(connector=exchange.tcp_connector,
+                                                 trust_env=exchange.aiohttp_trust_env)
+
+    exchange.open = open
+
+
+async def warm_up_async(exchange, connections=4):
+    """Version asyncio de warm_up()"""
+    if not enabled():
+        return 0
+    results = await asyncio.gather(*(exchange.public_common_get_v2_public_time() for _ in range(connections)),
+                                   return_exceptions=True)
+    ok = sum(1 for result in results if not isinstance(result, Exception))
+    logger.info(f"🔗 Pool HTTP: {ok}/{connections} connexions ouvertes")
+    return ok
@@ -3,6 +3,9 @@
 🚀 Launcher Multi-Paires - Lance 6 instances du bot
 
 Lance 6 instances du bot simultanément, une par paire.
+
+💡 Pour N paires dans un seul process (sessions et rate limit partagés
+par clé API): python bot/hedge_async_engine.py
 """
 
 import subprocess
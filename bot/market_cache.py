@@ -0,0 +1,264 @@
+"""
+🗂️ Cache des marchés Bitget - partagé sur disque entre bots et redémarrages
+
+load_markets() télécharge toute la liste des contrats Bitget (spot + 6 types
+de futures + devises) à chaque démarrage de bot. Ici:
+- Les marchés USDT-FUTURES sont stockés dans un fichier JSON commun
+  (data/markets_bitget.json ou MARKET_CACHE_PATH) avec un TTL
+- Un bot qui démarre lit le fichier et appelle exchange.set_markets()
+  → plus aucun appel REST tant que le cache est frais
+- Un seul process rafraîchit à la fois (fichier .lock), écriture atomique
+- Rafraîchissement optionnel en tâche de fond (thread daemon)
+
+Chaque marché ccxt garde sa réponse brute Bitget ('info'): pricePlace,
+priceEndStep, volumePlace, minTradeNum, minTradeUSDT, maxLever, sizeMultiplier.
+
+Usage:
+    markets = load_markets_cached(exchange)      # remplace exchange.load_markets()
+    spec = market_spec(markets['DOGE/USDT:USDT'])
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+
+from order_batch import share_across_threads
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv('MARKET_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'markets_bitget.json'))
+CACHE_TTL = int(os.getenv('MARKET_CACHE_TTL', 3600))  # secondes
+LOCK_TIMEOUT = 120  # lock plus vieux = process mort pendant un refresh
+
+
+def is_usdt_swap(market):
+    """Seuls les perpétuels USDT sont utilisés par les bots"""
+    return bool(market.get('swap')) and market.get('settle') == 'USDT'
+
+
+def market_spec(market):
+    """
+    Spécifications utiles d'un marché ccxt (valeurs Bitget brutes si dispo)
+
+    Returns:
+        dict: price_place, price_end_step, volume_place, min_size,
+              min_trade_usdt, max_leverage, multiplier
+    """
+    info = market.get('info') or {}
+    limits = market.get('limits') or {}
+
+    def number(key, fallback, cast=float):
+        value = info.get(key)
+        return cast(value) if value not in (None, '') else fallback
+
+    return {
+        'price_place': number('pricePlace', None, int),
+        'price_end_step': number('priceEndStep', 1, int),
+        'volume_place': number('volumePlace', None, int),
+        'min_size': number('minTradeNum', (limits.get('amount') or {}).get('min') or 0),
+        'min_trade_usdt': number('minTradeUSDT', (limits.get('cost') or {}).get('min') or 5.0),
+        'max_leverage': number('maxLever', (limits.get('leverage') or {}).get('max') or 50, int),
+        'multiplier': number('sizeMultiplier', market.get('contractSize') or 1)
+    }
+
+
+def market_fetcher(exchange):
+    """
+    Instance ccxt éphémère pour fetch_markets (swap uniquement)
+
+    Le refresh peut tourner dans le thread daemon: jamais toucher aux options
+    de l'exchange utilisé en même temps par la boucle de trading.
+    """
+    fetcher = type(exchange)({
+        'timeout': exchange.timeout,
+        'headers': dict(exchange.headers or {}),
+        'options': {'defaultType': 'swap', 'fetchMarkets': {'types': ['swap']}}
+    })
+    fetcher.urls = copy.deepcopy(exchange.urls)  # mock local / URLs redirigées
+    return fetcher
+
+
+class MarketCache:
+    """Fichier JSON {timestamp, markets} partagé entre process"""
+
+    def __init__(self, path=None, ttl=CACHE_TTL):
+        self.path = os.path.abspath(path or CACHE_PATH)
+        self.ttl = ttl
+        self.lock_path = self.path + '.lock'
+        self.refresh_thread = None
+
+    # ========== FICHIER ==========
+
+    def read(self):
+        """(timestamp, markets) du fichier, (0, {}) si absent/illisible"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data.get('timestamp', 0), data.get('markets', {})
+        except (OSError, ValueError):
+            return 0, {}
+
+    def age(self):
+        """Âge du cache en secondes (inf si absent)"""
+        timestamp, markets = self.read()
+        return time.time() - timestamp if markets else float('inf')
+
+    def save(self, markets):
+        """Écrit les marchés USDT-FUTURES (écriture atomique)"""
+        markets = {symbol: market for symbol, market in markets.items() if is_usdt_swap(market)}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'timestamp': time.time(), 'markets': markets}, f, default=str)
+        os.replace(tmp_path, self.path)
+
+        logger.info(f"🗂️ Cache marchés écrit: {len(markets)} contrats USDT-FUTURES")
+        return markets
+
+    def acquire_lock(self):
+        """Lock inter-process (O_EXCL), False si un autre process rafraîchit"""
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        try:
+            if time.time() - os.path.getmtime(self.lock_path) > LOCK_TIMEOUT:
+                os.remove(self.lock_path)
+        except OSError:
+            pass
+
+        try:
+            os.close(os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def release_lock(self):
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+
+    # ========== RAFRAÎCHISSEMENT ==========
+
+    def refresh(self, exchange):
+        """
+        Télécharge les marchés swap uniquement (pas de spot ni marge) et met à jour le fichier
+
+        Returns:
+            dict: marchés USDT-FUTURES, None si un autre process rafraîchit déjà
+        """
+        if not self.acquire_lock():
+            return None
+
+        try:
+            fetched = market_fetcher(exchange).fetch_markets()
+            return self.save({market['symbol']: market for market in fetched})
+        finally:
+            self.release_lock()
+
+    def markets(self, exchange=None, max_wait=10):
+        """
+        Marchés depuis le fichier, rafraîchis via exchange si expirés
+
+        Si le refresh échoue, un cache expiré reste utilisé (warning).
+        """
+        timestamp, markets = self.read()
+        if markets and time.time() - timestamp < self.ttl:
+            return markets
+        if exchange is None:
+            return markets
+
+        try:
+            refreshed = self.refresh(exchange)
+            if refreshed is not None:
+                return refreshed
+
+            # Un autre bot rafraîchit → attendre son fichier
+            deadline = time.time() + max_wait
+            while time.time() < deadline:
+                time.sleep(0.2)
+                new_timestamp, new_markets = self.read()
+                if new_timestamp > timestamp and new_markets:
+                    return new_markets
+
+        except Exception as e:
+            if not markets:
+                raise
+            logger.warning(f"⚠️ Refresh marchés échoué ({e}), cache expiré utilisé ({(time.time() - timestamp) / 60:.0f} min)")
+
+        return markets
+
+    def refresh_exchange(self, exchange):
+        """
+        Rafraîchit le fichier puis remplace les marchés d'une instance en service
+
+        set_markets() est appliqué sous le verrou de share_across_threads: jamais
+        pendant un load_markets() ou le throttle d'une requête (boucle de trading,
+        workers run_parallel).
+        """
+        markets = self.refresh(exchange)
+        if markets:
+            share_across_threads(exchange)
+            with exchange.thread_lock:
+                exchange.set_markets(markets)
+        return markets
+
+    def start_background_refresh(self, exchange, interval=None):
+        """Thread daemon: rafraîchit le fichier avant expiration du TTL"""
+        if self.refresh_thread and self.refresh_thread.is_alive():
+            return
+
+        interval = interval or max(60, self.ttl // 4)
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.age() > self.ttl * 0.75:
+                        self.refresh_exchange(exchange)
+                except Exception as e:
+                    logger.warning(f"⚠️ Refresh marchés en tâche de fond échoué: {e}")
+
+        self.refresh_thread = threading.Thread(target=loop, daemon=True)
+        self.refresh_thread.start()
+
+
+_default_cache = MarketCache()
+
+
+def load_markets_cached(exchange, cache=None, background=False):
+    """
+    Remplace exchange.load_markets(): charge les marchés depuis le cache disque
+
+    Args:
+        exchange: Instance ccxt.bitget (synchrone)
+        cache: MarketCache (défaut: cache partagé du module)
+        background: True → rafraîchissement périodique en tâche de fond
+    """
+    cache = cache or _default_cache
+
+    if exchange.markets:
+        return exchange.markets
+
+    markets = cache.markets(exchange)
+    if not markets:
+        return exchange.load_markets()
+
+    exchange.set_markets(markets)
+    if background:
+        cache.start_background_refresh(exchange)
+    return exchange.markets
+
+
+def cached_markets(cache=None):
+    """Marchés frais du cache (sans exchange), {} si expiré → pour les clients async"""
+    cache = cache or _default_cache
+    timestamp, markets = cache.read()
+    return markets if time.time() - timestamp < cache.ttl else {}
+
+
+def save_markets(markets, cache=None):
+    """Écrit des marchés déjà chargés (ex: ccxt async) dans le cache partagé"""
+    return (cache or _default_cache).save(markets)
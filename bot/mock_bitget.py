@@ -0,0 +1,895 @@
+#!/usr/bin/env python3
+"""
+🧪 Mock Bitget - serveur local REST + WebSocket pour tests hors réseau
+
+Remplace Bitget (PAPTRADING) pour benchmarker et tester les bots sans réseau:
+- REST v2 utilisé par les bots: contracts, ticker, all-position, place-order,
+  batch-place-order, place-tpsl-order, orders-pending, orders-plan-pending,
+  cancel-order, batch-cancel-orders, cancel-all-orders, cancel-plan-order,
+  close-positions (flash close), accounts, set-leverage
+- WebSocket privé (/v2/ws/private): login, positions, orders, orders-algo
+- WebSocket public (/v2/ws/public): ticker, books5
+- Moteur de matching: rejoue une série de prix (fichier .npy/.csv ou marche
+  aléatoire), exécute LIMIT et TP/SL (pos_profit / pos_loss), mode hedge
+- Latence configurable (moyenne + jitter) et injection d'erreurs
+  (ex: 40915 prix TP invalide, 43023 position insuffisante)
+- Coût de connexion simulé (--handshake-ms: TCP + TLS vers api.bitget.com)
+  payé par la première requête de chaque connexion; stats['connections']
+
+Usage:
+    python mock_bitget.py --port 8765 --symbol DOGEUSDT --price 0.2 --rate 50 \\
+        --latency-ms 20 --jitter-ms 10 --handshake-ms 30 --error 40915:0.05 --error 43023:0.02
+
+    BITGET_REST_URL=http://127.0.0.1:8765 \\
+    BITGET_WS_PRIVATE_URL=ws://127.0.0.1:8765/v2/ws/private \\
+    python bitget_hedge_multi_instance.py --pair DOGE/USDT:USDT
+
+Contrôle du mock (JSON):
+    POST /mock/price  {"symbol": "DOGEUSDT", "price": 0.2012}
+    POST /mock/config {"latency_ms": 5, "handshake_ms": 30, "errors": {"40915": 0.1}}
+    GET  /mock/stats
+"""
+
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# Contrats simulés (champs de /api/v2/mix/market/contracts)
+CONTRACTS = {
+    'DOGEUSDT': {'baseCoin': 'DOGE', 'pricePlace': '5', 'priceEndStep': '1', 'volumePlace': '0',
+                 'sizeMultiplier': '1', 'minTradeNum': '1', 'minTradeUSDT': '5', 'maxLever': '75'},
+    'ETHUSDT': {'baseCoin': 'ETH', 'pricePlace': '2', 'priceEndStep': '1', 'volumePlace': '2',
+                'sizeMultiplier': '0.01', 'minTradeNum': '0.01', 'minTradeUSDT': '5', 'maxLever': '125'},
+    'SHIBUSDT': {'baseCoin': 'SHIB', 'pricePlace': '8', 'priceEndStep': '1', 'volumePlace': '0',
+                 'sizeMultiplier': '1', 'minTradeNum': '1', 'minTradeUSDT': '5', 'maxLever': '50'},
+    'SOLUSDT': {'baseCoin': 'SOL', 'pricePlace': '3', 'priceEndStep': '1', 'volumePlace': '1',
+                'sizeMultiplier': '0.1', 'minTradeNum': '0.1', 'minTradeUSDT': '5', 'maxLever': '100'}
+}
+
+# Endpoints sur lesquels chaque code d'erreur est injecté par défaut
+ERROR_ENDPOINTS = {
+    '40915': ('place-tpsl-order',),
+    '43023': ('place-tpsl-order', 'close-positions')
+}
+
+ERROR_MESSAGES = {
+    '40915': 'The take profit price of long positions should be greater than the current price',
+    '43023': 'Insufficient position, can not set profit or stop loss',
+    '40768': 'Order does not exist',
+    '40404': 'Request URL NOT FOUND'
+}
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+class MockError(Exception):
+    """Erreur métier renvoyée au format Bitget {'code', 'msg'}"""
+
+    def __init__(self, code, msg=None):
+        super().__init__(msg or ERROR_MESSAGES.get(code, 'error'))
+        self.code = code
+        self.msg = msg or ERROR_MESSAGES.get(code, 'error')
+
+
+# ================================================================================
+# MOTEUR DE MATCHING
+# ================================================================================
+
+class MockExchange:
+    """État du compte simulé (mode hedge, marge croisée, un seul compte)"""
+
+    def __init__(self, prices=None, leverage=50, balance=10000.0):
+        self.lock = threading.RLock()
+        self.ids = itertools.count(int(time.time() * 1000) * 1000)
+
+        self.prices = dict(prices or {'DOGEUSDT': 0.2})
+        self.leverage = leverage
+        self.balance = balance
+
+        self.positions = {}  # {(symbol, 'long'|'short'): {'total', 'avg', 'ctime', 'achieved'}}
+        self.orders = {}     # LIMIT ouverts {order_id: {...}}
+        self.plans = {}      # TP/SL ouverts {order_id: {...}}
+
+        self.latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.handshake_ms = 0.0  # coût d'une nouvelle connexion (TCP + TLS)
+        self.errors = {}     # {code: probabilité}
+
+        self.private_clients = set()
+        self.public_clients = set()
+
+        self.stats = {'requests': 0, 'connections': 0, 'ticks': 0, 'fills': 0, 'triggers': 0,
+                      'injected_errors': 0, 'ws_messages': 0}
+
+    # ========== CONFIG ==========
+
+    def configure(self, latency_ms=None, jitter_ms=None, errors=None, handshake_ms=None):
+        with self.lock:
+            if latency_ms is not None:
+                self.latency_ms = float(latency_ms)
+            if jitter_ms is not None:
+                self.jitter_ms = float(jitter_ms)
+            if handshake_ms is not None:
+                self.handshake_ms = float(handshake_ms)
+            if errors is not None:
+                self.errors = {str(code): float(rate) for code, rate in errors.items()}
+
+    def simulate_handshake(self):
+        """Première requête d'une connexion: handshake TCP + TLS simulé"""
+        with self.lock:
+            self.stats['connections'] += 1
+        if self.handshake_ms:
+            time.sleep(self.handshake_ms / 1000)
+
+    def simulate_latency(self):
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+            time.sleep(max(0.0, delay) / 1000)
+
+    def maybe_inject_error(self, endpoint):
+        for code, rate in self.errors.items():
+            if endpoint in ERROR_ENDPOINTS.get(code, (endpoint,)) and random.random() < rate:
+                self.stats['injected_errors'] += 1
+                raise MockError(code)
+
+    # ========== POSITIONS ==========
+
+    def position(self, symbol, side):
+        return self.positions.get((symbol, side))
+
+    def open_position(self, symbol, side, size, price):
+        pos = self.positions.setdefault((symbol, side), {'total': 0.0, 'avg': 0.0, 'ctime': now_ms(), 'achieved': 0.0})
+        total = pos['total'] + size
+        pos['avg'] = (pos['avg'] * pos['total'] + price * size) / total
+        pos['total'] = total
+        pos['utime'] = now_ms()
+
+    def close_position(self, symbol, side, size, price):
+        """Ferme `size` (plafonné) au prix donné → PnL réalisé"""
+        pos = self.positions.get((symbol, side))
+        if not pos:
+            return 0.0
+
+        size = min(size, pos['total'])
+        direction = 1 if side == 'long' else -1
+        pnl = (price - pos['avg']) * size * direction
+        self.balance += pnl
+        pos['achieved'] += pnl
+        pos['total'] -= size
+        pos['utime'] = now_ms()
+
+        if pos['total'] <= 1e-12:
+            del self.positions[(symbol, side)]
+            # Les TP/SL de position disparaissent avec la position
+            for order_id in [oid for oid, plan in self.plans.items()
+                             if plan['symbol'] == symbol and plan['holdSide'] == side]:
+                del self.plans[order_id]
+        return size
+
+    def position_payload(self, symbol, side, pos, ws=False):
+        price = self.prices[symbol]
+        direction = 1 if side == 'long' else -1
+        margin = pos['avg'] * pos['total'] / self.leverage
+        payload = {
+            'marginCoin': 'USDT',
+            'holdSide': side,
+            'marginSize': f"{margin:.8f}",
+            'available': f"{pos['total']}",
+            'locked': '0',
+            'total': f"{pos['total']}",
+            'leverage': str(self.leverage),
+            'achievedProfits': f"{pos['achieved']:.8f}",
+            'openPriceAvg': f"{pos['avg']:.10f}",
+            'marginMode': 'crossed',
+            'posMode': 'hedge_mode',
+            'unrealizedPL': f"{(price - pos['avg']) * pos['total'] * direction:.8f}",
+            'liquidationPrice': '0',
+            'keepMarginRate': '0.004',
+            'markPrice': f"{price}",
+            'marginRatio': '0',
+            'cTime': str(pos['ctime']),
+            'uTime': str(pos.get('utime', pos['ctime']))
+        }
+        payload['instId' if ws else 'symbol'] = symbol
+        return payload
+
+    def positions_payload(self, ws=False):
+        return [self.position_payload(symbol, side, pos, ws) for (symbol, side), pos in self.positions.items()]
+
+    # ========== ORDRES ==========
+
+    def resolve_side(self, order):
+        """Côté de position (mode hedge v2: open/close + buy/sell, ou holdSide explicite)"""
+        hold_side = order.get('holdSide')
+        if hold_side in ('long', 'short'):
+            return hold_side
+        return 'long' if order.get('side') == 'buy' else 'short'
+
+    def place_order(self, body):
+        symbol = body['symbol']
+        if symbol not in self.prices:
+            raise MockError('40034', f"Parameter {symbol} does not exist")
+
+        size = float(body['size'])
+        order_id = str(next(self.ids))
+        order = {
+            'orderId': order_id,
+            'clientOid': body.get('clientOid') or order_id,
+            'symbol': symbol,
+            'side': body['side'],
+            'tradeSide': body.get('tradeSide', 'open'),
+            'holdSide': self.resolve_side(body),
+            'orderType': body.get('orderType', 'market'),
+            'size': size,
+            'price': float(body.get('price') or 0),
+            'cTime': now_ms()
+        }
+
+        events = []
+        if order['orderType'] == 'market':
+            events.extend(self.fill_order(order, self.prices[symbol]))
+        else:
+            self.orders[order_id] = order
+            events.append(('orders', [self.order_event(order, 'live')]))
+        return order, events
+
+    def fill_order(self, order, price):
+        """Exécute un ordre (market ou LIMIT touché) → événements WS"""
+        if order['tradeSide'] == 'close':
+            self.close_position(order['symbol'], order['holdSide'], order['size'], price)
+        else:
+            self.open_position(order['symbol'], order['holdSide'], order['size'], price)
+
+        self.stats['fills'] += 1
+        order['fillPrice'] = price
+        return [('orders', [self.order_event(order, 'filled')]),
+                ('positions', self.positions_payload(ws=True))]
+
+    def order_event(self, order, status):
+        return {
+            'instId': order['symbol'],
+            'orderId': order['orderId'],
+            'clientOid': order['clientOid'],
+            'price': str(order['price']),
+            'size': str(order['size']),
+            'orderType': order['orderType'],
+            'side': order['side'],
+            'posSide': order['holdSide'],
+            'tradeSide': order['tradeSide'],
+            'status': status,
+            'fillPrice': str(order.get('fillPrice', '')),
+            'priceAvg': str(order.get('fillPrice', '')),
+            'accBaseVolume': str(order['size'] if status == 'filled' else 0),
+            'cTime': str(order['cTime']),
+            'uTime': str(now_ms())
+        }
+
+    def order_payload(self, order):
+        return {
+            'symbol': order['symbol'],
+            'size': str(order['size']),
+            'orderId': order['orderId'],
+            'clientOid': order['clientOid'],
+            'baseVolume': '0',
+            'fee': '0',
+            'price': str(order['price']),
+            'priceAvg': '',
+            'status': 'live',
+            'side': order['side'],
+            'force': 'gtc',
+            'totalProfits': '0',
+            'posSide': order['holdSide'],
+            'marginCoin': 'USDT',
+            'quoteVolume': '0',
+            'leverage': str(self.leverage),
+            'marginMode': 'crossed',
+            'reduceOnly': 'NO',
+            'enterPointSource': 'API',
+            'tradeSide': order['tradeSide'],
+            'posMode': 'hedge_mode',
+            'orderType': order['orderType'],
+            'orderSource': 'normal',
+            'cTime': str(order['cTime']),
+            'uTime': str(order['cTime'])
+        }
+
+    def place_tpsl(self, body):
+        symbol = body['symbol']
+        hold_side = body['holdSide']
+        plan_type = body.get('planType', 'pos_profit')
+        trigger = float(body['triggerPrice'])
+        price = self.prices.get(symbol)
+
+        pos = self.position(symbol, hold_side)
+        if not pos:
+            raise MockError('43023')
+
+        # Même contrôle que Bitget: TP au-delà du mark price, SL en deçà
+        above = (hold_side == 'long') == (plan_type == 'pos_profit')
+        if (above and trigger <= price) or (not above and trigger >= price):
+            raise MockError('40915')
+
+        order_id = str(next(self.ids))
+        self.plans[order_id] = {
+            'orderId': order_id,
+            'clientOid': body.get('clientOid') or order_id,
+            'symbol': symbol,
+            'holdSide': hold_side,
+            'planType': plan_type,
+            'triggerPrice': trigger,
+            'size': float(body.get('size') or pos['total']),
+            'cTime': now_ms()
+        }
+        return order_id, [('orders-algo', [self.plan_event(self.plans[order_id], 'live')])]
+
+    def plan_event(self, plan, status):
+        return {
+            'instId': plan['symbol'],
+            'orderId': plan['orderId'],
+            'clientOid': plan['clientOid'],
+            'triggerPrice': str(plan['triggerPrice']),
+            'triggerType': 'mark_price',
+            'planType': plan['planType'],
+            'size': str(plan['size']),
+            'side': 'sell' if plan['holdSide'] == 'long' else 'buy',
+            'posSide': plan['holdSide'],
+            'tradeSide': 'close',
+            'status': status,
+            'cTime': str(plan['cTime']),
+            'uTime': str(now_ms())
+        }
+
+    def plan_payload(self, plan):
+        return {
+            'planType': plan['planType'],
+            'symbol': plan['symbol'],
+            'size': str(plan['size']),
+            'orderId': plan['orderId'],
+            'clientOid': plan['clientOid'],
+            'price': '0',
+            'executePrice': '0',
+            'triggerPrice': str(plan['triggerPrice']),
+            'triggerType': 'mark_price',
+            'planStatus': 'live',
+            'side': 'sell' if plan['holdSide'] == 'long' else 'buy',
+            'posSide': plan['holdSide'],
+            'marginCoin': 'USDT',
+            'marginMode': 'crossed',
+            'enterPointSource': 'API',
+            'tradeSide': 'close',
+            'posMode': 'hedge_mode',
+            'orderType': 'market',
+            'cTime': str(plan['cTime']),
+            'uTime': str(plan['cTime'])
+        }
+
+    # ========== PRIX ==========
+
+    def set_price(self, symbol, price):
+        """Nouveau tick → exécution des LIMIT et TP/SL franchis → événements WS"""
+        events = []
+        with self.lock:
+            self.prices[symbol] = price
+            self.stats['ticks'] += 1
+
+            for order in [o for o in self.orders.values() if o['symbol'] == symbol]:
+                crossed = price <= order['price'] if order['side'] == 'buy' else price >= order['price']
+                if order['tradeSide'] == 'close':
+                    crossed = price >= order['price'] if order['holdSide'] == 'long' else price <= order['price']
+                if crossed:
+                    del self.orders[order['orderId']]
+                    events.extend(self.fill_order(order, order['price']))
+
+            for plan in [p for p in self.plans.values() if p['symbol'] == symbol]:
+                above = (plan['holdSide'] == 'long') == (plan['planType'] == 'pos_profit')
+                if (above and price >= plan['triggerPrice']) or (not above and price <= plan['triggerPrice']):
+                    if plan['orderId'] not in self.plans:
+                        continue  # déjà retiré avec sa position
+                    del self.plans[plan['orderId']]
+                    self.stats['triggers'] += 1
+                    self.close_position(symbol, plan['holdSide'], plan['size'], price)
+                    events.append(('orders-algo', [self.plan_event(plan, 'executed')]))
+                    events.append(('positions', self.positions_payload(ws=True)))
+
+        self.broadcast_private(events)
+        self.broadcast_ticker(symbol, price)
+
+    # ========== WEBSOCKET ==========
+
+    def broadcast_private(self, events):
+        for channel, data in events:
+            message = json.dumps({
+                'action': 'snapshot',
+                'arg': {'instType': 'USDT-FUTURES', 'channel': channel, 'instId': 'default'},
+                'data': data,
+                'ts': now_ms()
+            })
+            for client in list(self.private_clients):
+                if channel in client.channels:
+                    client.send(message)
+                    self.stats['ws_messages'] += 1
+
+    def broadcast_ticker(self, symbol, price):
+        if not self.public_clients:
+            return
+        tick = self.ticker_payload(symbol)
+        for client in list(self.public_clients):
+            for channel in ('ticker', 'books5'):
+                if (channel, symbol) not in client.channels:
+                    continue
+                data = tick if channel == 'ticker' else {
+                    'asks': [[tick['askPr'], '1000']], 'bids': [[tick['bidPr'], '1000']], 'ts': tick['ts']}
+                client.send(json.dumps({
+                    'action': 'snapshot',
+                    'arg': {'instType': 'USDT-FUTURES', 'channel': channel, 'instId': symbol},
+                    'data': [dict(data, instId=symbol)],
+                    'ts': now_ms()
+                }))
+                self.stats['ws_messages'] += 1
+
+    def ticker_payload(self, symbol):
+        price = self.prices[symbol]
+        step = 10 ** -int(CONTRACTS.get(symbol, {}).get('pricePlace', 5))
+        return {
+            'symbol': symbol,
+            'lastPr': str(price),
+            'askPr': f"{price + step:.10f}",
+            'bidPr': f"{price - step:.10f}",
+            'bidSz': '1000',
+            'askSz': '1000',
+            'high24h': str(price),
+            'low24h': str(price),
+            'ts': str(now_ms()),
+            'change24h': '0',
+            'baseVolume': '0',
+            'quoteVolume': '0',
+            'usdtVolume': '0',
+            'openUtc': str(price),
+            'changeUtc24h': '0',
+            'indexPrice': str(price),
+            'fundingRate': '0.0001',
+            'holdingAmount': '0',
+            'markPrice': str(price)
+        }
+
+
+# ================================================================================
+# API REST
+# ================================================================================
+
+def contract_payload(symbol):
+    spec = CONTRACTS.get(symbol, CONTRACTS['DOGEUSDT'])
+    return {
+        'symbol': symbol,
+        'baseCoin': spec['baseCoin'] if symbol in CONTRACTS else symbol.replace('USDT', ''),
+        'quoteCoin': 'USDT',
+        'buyLimitPriceRatio': '0.05',
+        'sellLimitPriceRatio': '0.05',
+        'feeRateUpRatio': '0.005',
+        'makerFeeRate': '0.0002',
+        'takerFeeRate': '0.0006',
+        'openCostUpRatio': '0.01',
+        'supportMarginCoins': ['USDT'],
+        'minTradeNum': spec['minTradeNum'],
+        'priceEndStep': spec['priceEndStep'],
+        'volumePlace': spec['volumePlace'],
+        'pricePlace': spec['pricePlace'],
+        'sizeMultiplier': spec['sizeMultiplier'],
+        'symbolType': 'perpetual',
+        'minTradeUSDT': spec['minTradeUSDT'],
+        'maxSymbolOrderNum': '200',
+        'maxProductOrderNum': '400',
+        'maxPositionNum': '150',
+        'symbolStatus': 'normal',
+        'offTime': '-1',
+        'limitOpenTime': '-1',
+        'deliveryTime': '',
+        'deliveryStartTime': '',
+        'launchTime': '',
+        'fundInterval': '8',
+        'minLever': '1',
+        'maxLever': spec['maxLever'],
+        'posLimit': '0.05',
+        'maintainTime': ''
+    }
+
+
+def handle_rest(mock, method, path, params):
+    """Route une requête REST → (data, events WS)"""
+    endpoint = path.rsplit('/', 1)[-1]
+    events = []
+
+    with mock.lock:
+        mock.stats['requests'] += 1
+
+        if path == '/api/v2/public/time':
+            return {'serverTime': str(now_ms())}, events
+
+        if path == '/api/v2/mix/market/contracts':
+            if params.get('productType', 'USDT-FUTURES').upper() != 'USDT-FUTURES':
+                return [], events
+            symbols = [params['symbol']] if params.get('symbol') else list(mock.prices)
+            return [contract_payload(s) for s in symbols if s in mock.prices], events
+
+        if path in ('/api/v2/mix/market/ticker', '/api/v2/mix/market/tickers'):
+            symbols = [params['symbol']] if params.get('symbol') else list(mock.prices)
+            return [mock.ticker_payload(s) for s in symbols if s in mock.prices], events
+
+        if path == '/api/v2/mix/position/all-position':
+            return mock.positions_payload(), events
+
+        if path == '/api/v2/mix/position/single-position':
+            return [p for p in mock.positions_payload() if p['symbol'] == params.get('symbol')], events
+
+        if path == '/api/v2/mix/account/accounts':
+            unrealized = sum(float(p['unrealizedPL']) for p in mock.positions_payload())
+            return [{'marginCoin': 'USDT', 'locked': '0', 'available': f"{mock.balance:.4f}",
+                     'crossedMaxAvailable': f"{mock.balance:.4f}", 'accountEquity': f"{mock.balance + unrealized:.4f}",
+                     'usdtEquity': f"{mock.balance + unrealized:.4f}", 'unrealizedPL': f"{unrealized:.4f}",
+                     'crossedRiskRate': '0', 'crossedMarginLeverage': str(mock.leverage)}], events
+
+        if path == '/api/v2/mix/order/orders-pending':
+            orders = [mock.order_payload(o) for o in mock.orders.values()
+                      if not params.get('symbol') or o['symbol'] == params['symbol']]
+            return {'entrustedList': orders or None, 'endId': orders[-1]['orderId'] if orders else None}, events
+
+        if path == '/api/v2/mix/order/orders-plan-pending':
+            plans = [mock.plan_payload(p) for p in mock.plans.values()
+                     if not params.get('symbol') or p['symbol'] == params['symbol']]
+            return {'entrustedList': plans or None, 'endId': plans[-1]['orderId'] if plans else None}, events
+
+        if path.startswith('/api/v3/'):
+            # Compte classique: ccxt sonde v3/account/settings pour détecter un compte UTA
+            raise MockError('40404')
+
+        if method == 'GET':
+            # spot symbols, coins, margin currencies... → liste vide
+            return [], events
+
+        # ---------- POST ----------
+        mock.maybe_inject_error(endpoint)
+
+        if path == '/api/v2/mix/order/place-order':
+            order, events = mock.place_order(params)
+            return {'orderId': order['orderId'], 'clientOid': order['clientOid']}, events
+
+        if path == '/api/v2/mix/order/batch-place-order':
+            success, failure = [], []
+            for item in params.get('orderList', []):
+                try:
+                    order, order_events = mock.place_order(dict(item, symbol=params['symbol']))
+                    events.extend(order_events)
+                    success.append({'orderId': order['orderId'], 'clientOid': order['clientOid']})
+                except MockError as e:
+                    failure.append({'clientOid': item.get('clientOid'), 'errorCode': e.code, 'errorMsg': e.msg})
+            return {'successList': success, 'failureList': failure}, events
+
+        if path in ('/api/v2/mix/order/place-tpsl-order', '/api/v2/mix/order/place-pos-tpsl'):
+            order_id, events = mock.place_tpsl(params)
+            return {'orderId': order_id, 'clientOid': order_id}, events
+
+        if path == '/api/v2/mix/order/cancel-order':
+            order = mock.orders.pop(params.get('orderId'), None)
+            if not order:
+                raise MockError('40768')
+            events.append(('orders', [mock.order_event(order, 'canceled')]))
+            return {'orderId': order['orderId'], 'clientOid': order['clientOid']}, events
+
+        if path in ('/api/v2/mix/order/batch-cancel-orders', '/api/v2/mix/order/cancel-all-orders'):
+            ids = [item['orderId'] for item in params.get('orderIdList') or []]
+            if not ids:
+                ids = [oid for oid, o in mock.orders.items()
+                       if not params.get('symbol') or o['symbol'] == params['symbol']]
+            success, failure = [], []
+            for order_id in ids:
+                order = mock.orders.pop(order_id, None)
+                if order:
+                    success.append({'orderId': order_id, 'clientOid': order['clientOid']})
+                    events.append(('orders', [mock.order_event(order, 'canceled')]))
+                else:
+                    failure.append({'orderId': order_id, 'errorCode': '40768', 'errorMsg': ERROR_MESSAGES['40768']})
+            return {'successList': success, 'failureList': failure}, events
+
+        if path == '/api/v2/mix/order/cancel-plan-order':
+            ids = [item['orderId'] for item in params.get('orderIdList') or []]
+            if not ids:
+                ids = [oid for oid, p in mock.plans.items()
+                       if not params.get('symbol') or p['symbol'] == params['symbol']]
+            success, failure = [], []
+            for order_id in ids:
+                plan = mock.plans.pop(order_id, None)
+                if plan:
+                    success.append({'orderId': order_id, 'clientOid': plan['clientOid']})
+                    events.append(('orders-algo', [mock.plan_event(plan, 'cancelled')]))
+                else:
+                    failure.append({'orderId': order_id, 'errorCode': '40768', 'errorMsg': ERROR_MESSAGES['40768']})
+            return {'successList': success, 'failureList': failure}, events
+
+        if path == '/api/v2/mix/order/close-positions':
+            success = []
+            for symbol, side in list(mock.positions):
+                if params.get('symbol') and symbol != params['symbol']:
+                    continue
+                if params.get('holdSide') and side != params['holdSide']:
+                    continue
+                mock.close_position(symbol, side, mock.positions[(symbol, side)]['total'], mock.prices[symbol])
+                success.append({'orderId': str(next(mock.ids)), 'clientOid': '', 'symbol': symbol})
+            events.append(('positions', mock.positions_payload(ws=True)))
+            return {'successList': success, 'failureList': []}, events
+
+        if path in ('/api/v2/mix/account/set-leverage', '/api/v2/mix/account/set-margin-mode',
+                    '/api/v2/mix/account/set-position-mode'):
+            return {'symbol': params.get('symbol'), 'marginCoin': 'USDT', 'posMode': 'hedge_mode',
+                    'longLeverage': str(mock.leverage), 'shortLeverage': str(mock.leverage),
+                    'marginMode': 'crossed'}, events
+
+        raise MockError('40404')
+
+
+class WebSocketClient:
+    """Connexion WebSocket serveur minimale (RFC 6455, texte uniquement)"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+        self.channels = set()
+        self.alive = True
+
+    def send(self, text):
+        payload = text.encode()
+        header = bytes([0x81])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack('>H', length)
+        else:
+            header += bytes([127]) + struct.pack('>Q', length)
+        try:
+            with self.send_lock:
+                self.sock.sendall(header + payload)
+        except OSError:
+            self.alive = False
+
+    def recv(self):
+        """Message texte suivant (None si fermeture)"""
+        while True:
+            head = self._read(2)
+            if not head:
+                return None
+            opcode = head[0] & 0x0F
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('>H', self._read(2))[0]
+            elif length == 127:
+                length = struct.unpack('>Q', self._read(8))[0]
+            mask = self._read(4) if head[1] & 0x80 else b'\x00' * 4
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(self._read(length)))
+
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                with self.send_lock:
+                    self.sock.sendall(bytes([0x8A, len(data)]) + data)
+                continue
+            if opcode in (0x1, 0x0):
+                return data.decode(errors='replace')
+
+    def _read(self, n):
+        buf = b''
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                return b''
+            buf += chunk
+        return buf
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """REST + upgrade WebSocket sur le même port"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers et body envoyés séparément → sinon +40ms (delayed ACK)
+    mock = None  # MockExchange (injecté par make_server)
+    handshaken = False  # première requête REST de la connexion déjà servie
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            return self.handle_websocket()
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if method == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            if raw:
+                params.update(json.loads(raw))
+
+        if url.path.startswith('/mock/'):
+            return self.send_json(200, self.handle_control(url.path, params))
+
+        if not self.handshaken:
+            self.handshaken = True
+            self.mock.simulate_handshake()
+        self.mock.simulate_latency()
+        try:
+            data, events = handle_rest(self.mock, method, url.path, params)
+        except MockError as e:
+            return self.send_json(400, {'code': e.code, 'msg': e.msg, 'requestTime': now_ms(), 'data': None})
+        except (KeyError, ValueError) as e:
+            return self.send_json(400, {'code': '40017', 'msg': f"Parameter verification failed: {e}",
+                                        'requestTime': now_ms(), 'data': None})
+
+        self.send_json(200, {'code': '00000', 'msg': 'success', 'requestTime': now_ms(), 'data': data})
+        self.mock.broadcast_private(events)
+
+    def handle_control(self, path, params):
+        if path == '/mock/price':
+            self.mock.set_price(params.get('symbol', 'DOGEUSDT'), float(params['price']))
+        elif path == '/mock/config':
+            self.mock.configure(params.get('latency_ms'), params.get('jitter_ms'), params.get('errors'),
+                                params.get('handshake_ms'))
+        with self.mock.lock:
+            return {'stats': dict(self.mock.stats), 'prices': dict(self.mock.prices),
+                    'positions': len(self.mock.positions), 'orders': len(self.mock.orders),
+                    'plans': len(self.mock.plans), 'balance': self.mock.balance}
+
+    def handle_websocket(self):
+        key = self.headers.get('Sec-WebSocket-Key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+
+        private = 'private' in self.path
+        client = WebSocketClient(self.connection)
+        clients = self.mock.private_clients if private else self.mock.public_clients
+        clients.add(client)
+
+        try:
+            while client.alive:
+                message = client.recv()
+                if message is None:
+                    break
+                if message == 'ping':
+                    client.send('pong')
+                    continue
+                self.handle_ws_message(client, json.loads(message), private)
+        except (OSError, ValueError):
+            pass
+        finally:
+            clients.discard(client)
+            self.close_connection = True
+
+    def handle_ws_message(self, client, message, private):
+        op = message.get('op')
+        if op == 'login':
+            client.send(json.dumps({'event': 'login', 'code': 0, 'msg': ''}))
+        elif op == 'subscribe':
+            for arg in message.get('args', []):
+                channel = arg.get('channel')
+                client.channels.add(channel if private else (channel, arg.get('instId')))
+                client.send(json.dumps({'event': 'subscribe', 'arg': arg}))
+                if private and channel == 'positions':
+                    with self.mock.lock:
+                        data = self.mock.positions_payload(ws=True)
+                    client.send(json.dumps({'action': 'snapshot', 'arg': arg, 'data': data, 'ts': now_ms()}))
+
+
+# ================================================================================
+# SERVEUR + REPLAY
+# ================================================================================
+
+def make_server(mock, host='127.0.0.1', port=8765):
+    """Serveur HTTP/WS multi-thread (port=0 → port libre)"""
+    handler = type('BoundMockRequestHandler', (MockRequestHandler,), {'mock': mock})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_mock(mock=None, host='127.0.0.1', port=0):
+    """Démarre le mock en tâche de fond → (mock, server, base_url)"""
+    mock = mock or MockExchange()
+    server = make_server(mock, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return mock, server, f"http://{host}:{server.server_address[1]}"
+
+
+def random_walk(start, volatility=0.0005, seed=None):
+    """Prix infinis en marche aléatoire géométrique"""
+    rng = random.Random(seed)
+    price = start
+    while True:
+        price *= 1 + rng.gauss(0, volatility)
+        yield price
+
+
+def replay_prices(mock, symbol, prices, rate=10.0, stop_event=None):
+    """Rejoue une série de prix (rate ticks/s, 0 = aussi vite que possible)"""
+    interval = 1.0 / rate if rate else 0
+    next_tick = time.perf_counter()
+    for price in prices:
+        if stop_event is not None and stop_event.is_set():
+            return
+        mock.set_price(symbol, float(price))
+        if interval:
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Mock Bitget local (REST + WebSocket)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--symbol', default='DOGEUSDT')
+    parser.add_argument('--price', type=float, default=0.2, help='Prix initial')
+    parser.add_argument('--prices', default=None, help='Fichier de prix à rejouer (.npy ou .csv colonne price)')
+    parser.add_argument('--rate', type=float, default=10, help='Ticks par seconde (0 = max)')
+    parser.add_argument('--volatility', type=float, default=0.0005, help='Marche aléatoire (si pas de --prices)')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--handshake-ms', type=float, default=0, help='Coût simulé d\'une nouvelle connexion')
+    parser.add_argument('--error', action='append', default=[], help='CODE:PROBA (ex: 40915:0.05)')
+    parser.add_argument('--leverage', type=int, default=50)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    mock = MockExchange({args.symbol: args.price}, leverage=args.leverage)
+    mock.configure(args.latency_ms, args.jitter_ms,
+                   {code: rate for code, rate in (item.split(':') for item in args.error)}, args.handshake_ms)
+
+    server = make_server(mock, args.host, args.port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"🧪 Mock Bitget sur http://{args.host}:{args.port} (WS: /v2/ws/private, /v2/ws/public)")
+
+    if args.prices:
+        from backtest_fast import iter_trade_prices
+        prices = (price for chunk in iter_trade_prices(args.prices) for price in chunk)
+    else:
+        prices = random_walk(args.price, args.volatility)
+
+    try:
+        replay_prices(mock, args.symbol, prices, rate=args.rate)
+        logger.info("✅ Série de prix terminée, serveur toujours actif (Ctrl+C pour arrêter)")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
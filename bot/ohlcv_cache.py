@@ -0,0 +1,217 @@
+"""
+💾 Cache OHLCV local - bougies stockées sur disque par symbole/timeframe
+
+Au lieu de retélécharger toutes les bougies à chaque backtest (pages de 1000),
+on garde un fichier .npy par (symbole, timeframe) et on ne télécharge que la
+queue manquante depuis le dernier timestamp stocké:
+- Lecture en memmap (démarrage instantané, utilisable hors ligne)
+- La dernière bougie stockée est retéléchargée (elle pouvait être en cours)
+- Écriture atomique (fichier temporaire + os.replace)
+- Contrôle d'intégrité: doublons et trous de timestamps
+
+Format: tableau float64 (n, 6) = timestamp_ms, open, high, low, close, volume
+
+Usage:
+    cache = OHLCVCache(exchange)
+    df = cache.get('DOGE/USDT:USDT', '15m', since=since_ms)
+    report = cache.check('DOGE/USDT:USDT', '15m')
+"""
+
+import logging
+import os
+import re
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv('OHLCV_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'ohlcv'))
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+FETCH_LIMIT = 1000
+
+
+def timeframe_ms(timeframe):
+    """'15m' → 900000"""
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+
+def normalize(candles):
+    """Trie par timestamp et supprime les doublons (garde la dernière version)"""
+    if candles.shape[0] == 0:
+        return candles
+    # Dernière occurrence de chaque timestamp (les données récentes écrasent les anciennes)
+    reversed_ts = candles[::-1, 0]
+    _, idx = np.unique(reversed_ts, return_index=True)
+    return candles[::-1][idx]
+
+
+def check_integrity(candles, timeframe):
+    """
+    Vérifie un tableau de bougies
+
+    Returns:
+        dict: rows, duplicates, unsorted, gaps [(ts_avant, ts_après, bougies_manquantes)]
+    """
+    step = timeframe_ms(timeframe)
+    ts = candles[:, 0].astype(np.int64)
+    diffs = np.diff(ts)
+
+    gap_idx = np.nonzero(diffs > step)[0]
+    gaps = [(int(ts[i]), int(ts[i + 1]), int(diffs[i] // step) - 1) for i in gap_idx]
+
+    return {
+        'rows': int(ts.shape[0]),
+        'duplicates': int(ts.shape[0] - np.unique(ts).shape[0]),
+        'unsorted': bool((diffs < 0).any()),
+        'gaps': gaps,
+        'missing_candles': sum(g[2] for g in gaps)
+    }
+
+
+class OHLCVCache:
+    """Magasin de bougies local (1 fichier .npy par symbole/timeframe)"""
+
+    def __init__(self, exchange=None, cache_dir=None):
+        """
+        Args:
+            exchange: Instance ccxt (None = mode hors ligne)
+            cache_dir: Dossier des fichiers (défaut: OHLCV_CACHE_DIR ou data/ohlcv)
+        """
+        self.exchange = exchange
+        self.cache_dir = os.path.abspath(cache_dir or CACHE_DIR)
+
+    def path(self, symbol, timeframe):
+        """DOGE/USDT:USDT + 15m → <cache_dir>/DOGE_USDT_USDT_15m.npy"""
+        safe_symbol = re.sub(r'[^A-Za-z0-9]+', '_', symbol).strip('_')
+        return os.path.join(self.cache_dir, f"{safe_symbol}_{timeframe}.npy")
+
+    def load(self, symbol, timeframe):
+        """Bougies stockées (memmap lecture seule), tableau vide si absent"""
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path):
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+        return np.load(path, mmap_mode='r')
+
+    def save(self, symbol, timeframe, candles):
+        """Écriture atomique (normalisée: triée, sans doublons)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(symbol, timeframe)
+        tmp_path = path + '.tmp.npy'
+        np.save(tmp_path, normalize(np.asarray(candles, dtype=np.float64)))
+        os.replace(tmp_path, path)
+
+    def fetch_range(self, symbol, timeframe, since, until=None):
+        """Télécharge [since, until) par pages de FETCH_LIMIT"""
+        if self.exchange is None:
+            raise RuntimeError("Cache OHLCV hors ligne: aucun exchange pour télécharger")
+
+        until = until or self.exchange.milliseconds()
+        rows = []
+
+        while since < until:
+            batch = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=FETCH_LIMIT)
+            if not batch:
+                break
+            rows.extend(c for c in batch if c[0] < until)
+            since = batch[-1][0] + 1
+            logger.info(f"  • {symbol} {timeframe}: {len(rows)} bougies téléchargées...")
+
+        if not rows:
+            return np.empty((0, len(COLUMNS)), dtype=np.float64)
+        return np.array(rows, dtype=np.float64)
+
+    def update(self, symbol, timeframe, since):
+        """
+        Complète le cache: queue manquante (+ tête si since est plus ancien)
+
+        Returns:
+            int: nombre de bougies téléchargées
+        """
+        stored = np.array(self.load(symbol, timeframe))
+        parts = []
+
+        if stored.shape[0] == 0:
+            parts.append(self.fetch_range(symbol, timeframe, since))
+        else:
+            first_ts = int(stored[0, 0])
+            last_ts = int(stored[-1, 0])
+
+            if since < first_ts:
+                parts.append(self.fetch_range(symbol, timeframe, since, until=first_ts))
+
+            # La dernière bougie stockée pouvait être incomplète → on la reprend
+            parts.append(self.fetch_range(symbol, timeframe, last_ts))
+
+        fetched = sum(p.shape[0] for p in parts)
+        if fetched:
+            self.save(symbol, timeframe, np.concatenate([stored, *parts]))
+        return fetched
+
+    def get(self, symbol, timeframe, since, offline=False):
+        """
+        DataFrame OHLCV depuis since (même format que fetch_historical_data)
+
+        Args:
+            offline: True → aucune requête réseau, uniquement le cache
+        """
+        if not offline:
+            fetched = self.update(symbol, timeframe, since)
+            logger.info(f"💾 Cache {symbol} {timeframe}: +{fetched} bougies")
+
+        candles = self.load(symbol, timeframe)
+        candles = np.asarray(candles[candles[:, 0] >= since])
+
+        report = check_integrity(candles, timeframe)
+        if report['gaps']:
+            logger.warning(f"⚠️ {symbol} {timeframe}: {len(report['gaps'])} trous "
+                           f"({report['missing_candles']} bougies manquantes)")
+
+        df = pd.DataFrame(candles, columns=COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+        df.set_index('timestamp', inplace=True)
+        return df
+
+    def check(self, symbol, timeframe):
+        """Rapport d'intégrité du fichier stocké"""
+        return check_integrity(np.asarray(self.load(symbol, timeframe)), timeframe)
+
+    def repair(self, symbol, timeframe):
+        """Retélécharge les trous détectés et réécrit le fichier normalisé"""
+        stored = np.array(self.load(symbol, timeframe))
+        report = check_integrity(stored, timeframe)
+        step = timeframe_ms(timeframe)
+
+        parts = [self.fetch_range(symbol, timeframe, before + step, until=after)
+                 for before, after, _ in report['gaps']]
+        self.save(symbol, timeframe, np.concatenate([stored, *parts]))
+        return self.check(symbol, timeframe)
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description='Cache OHLCV local')
+    parser.add_argument('symbol', help='ex: DOGE/USDT:USDT')
+    parser.add_argument('--timeframe', default='15m')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--check', action='store_true', help='Rapport d\'intégrité uniquement')
+    parser.add_argument('--repair', action='store_true', help='Retélécharger les trous')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_dotenv()
+
+    exchange = ccxt.bitget({'enableRateLimit': True, 'options': {'defaultType': 'swap'}})
+    cache = OHLCVCache(exchange)
+
+    if args.check:
+        print(cache.check(args.symbol, args.timeframe))
+    elif args.repair:
+        print(cache.repair(args.symbol, args.timeframe))
+    else:
+        since = exchange.milliseconds() - args.days * 24 * 60 * 60 * 1000
+        df = cache.get(args.symbol, args.timeframe, since)
+        print(f"✅ {len(df)} bougies ({df.index[0]} → {df.index[-1]}) dans {cache.path(args.symbol, args.timeframe)}")
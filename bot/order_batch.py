@@ -0,0 +1,180 @@
+"""
+📦 Envoi groupé d'ordres Bitget - batch-place-order + envois concurrents
+
+- batch_place_orders(): jusqu'à 50 ordres d'un même symbole en UN appel REST
+  (POST /api/v2/mix/order/batch-place-order), résultat ordre par ordre
+- batch_cancel_orders(): jusqu'à 50 annulations en UN appel
+  (POST /api/v2/mix/order/batch-cancel-orders)
+- run_parallel(): exécute plusieurs appels REST indépendants en même temps
+  (TP/SL, qui n'ont pas d'endpoint batch, + batch des LIMIT)
+
+Une instance ccxt synchrone n'est pas thread-safe: run_parallel(calls,
+exchange=ex) la prépare d'abord (share_across_threads) quand tous les appels
+passent par la même instance.
+
+Usage:
+    results = batch_place_orders(exchange, 'DOGE/USDT:USDT', [
+        {'side': 'buy', 'trade_side': 'open', 'order_type': 'market', 'size': '120'},
+        {'side': 'sell', 'trade_side': 'open', 'order_type': 'market', 'size': '120'},
+    ])
+    results[0]['id'], results[1]['error']
+"""
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_ORDERS = 50
+
+
+def batch_place_orders(exchange, symbol, orders, margin_mode='crossed'):
+    """
+    Place plusieurs ordres du même symbole en un seul appel
+
+    Args:
+        exchange: Instance ccxt.bitget (synchrone)
+        symbol: Paire ccxt (DOGE/USDT:USDT)
+        orders: liste de dicts side, trade_side, order_type ('market'/'limit'),
+                size (str déjà quantifiée), price (str, LIMIT), client_oid (optionnel)
+
+    Returns:
+        list[dict]: même ordre que `orders`: {'id', 'client_oid', 'error'}
+    """
+    if len(orders) > BATCH_MAX_ORDERS:
+        raise ValueError(f"batch-place-order: {len(orders)} ordres > {BATCH_MAX_ORDERS}")
+
+    order_list = []
+    client_oids = []
+    for order in orders:
+        client_oid = order.get('client_oid') or uuid.uuid4().hex
+        client_oids.append(client_oid)
+
+        item = {
+            'side': order['side'],
+            'tradeSide': order['trade_side'],
+            'orderType': order['order_type'],
+            'size': str(order['size']),
+            'clientOid': client_oid
+        }
+        if order['order_type'] == 'limit':
+            item['price'] = str(order['price'])
+            item['force'] = order.get('force', 'gtc')
+        order_list.append(item)
+
+    body = {
+        'symbol': symbol.replace('/USDT:USDT', 'USDT'),
+        'productType': 'USDT-FUTURES',
+        'marginCoin': 'USDT',
+        'marginMode': margin_mode,
+        'orderList': order_list
+    }
+
+    response = exchange.private_mix_post_v2_mix_order_batch_place_order(body)
+    if response.get('code') != '00000':
+        raise RuntimeError(f"batch-place-order refusé: {response.get('code')} {response.get('msg')}")
+
+    data = response.get('data') or {}
+    success = {item.get('clientOid'): item.get('orderId') for item in data.get('successList') or []}
+    failure = {item.get('clientOid'): f"{item.get('errorCode')} {item.get('errorMsg')}"
+               for item in data.get('failureList') or []}
+
+    return [{'id': success.get(oid), 'client_oid': oid, 'error': failure.get(oid)}
+            for oid in client_oids]
+
+
+def batch_cancel_orders(exchange, symbol, order_ids):
+    """
+    Annule plusieurs ordres LIMIT du même symbole en un seul appel
+
+    Returns:
+        dict: {order_id: None si annulé, sinon "code message"} (40768: déjà rempli/annulé)
+    """
+    if len(order_ids) > BATCH_MAX_ORDERS:
+        raise ValueError(f"batch-cancel-orders: {len(order_ids)} ordres > {BATCH_MAX_ORDERS}")
+    if not order_ids:
+        return {}
+
+    response = exchange.private_mix_post_v2_mix_order_batch_cancel_orders({
+        'symbol': symbol.replace('/USDT:USDT', 'USDT'),
+        'productType': 'USDT-FUTURES',
+        'marginCoin': 'USDT',
+        'orderIdList': [{'orderId': order_id} for order_id in order_ids]
+    })
+    if response.get('code') != '00000':
+        raise RuntimeError(f"batch-cancel-orders refusé: {response.get('code')} {response.get('msg')}")
+
+    data = response.get('data') or {}
+    failure = {item.get('orderId'): f"{item.get('errorCode')} {item.get('errorMsg')}"
+               for item in data.get('failureList') or []}
+    return {order_id: failure.get(order_id) for order_id in order_ids}
+
+
+def share_across_threads(exchange):
+    """
+    Prépare une instance ccxt synchrone à des appels concurrents (idempotent)
+
+    État d'instance écrit par ccxt à chaque requête:
+    - throttle interne (enableRateLimit): lastRestRequestTimestamp lu puis
+      écrit sans verrou → sérialisé ici (les bots le désactivent déjà au
+      profit de rate_limiter, thread-safe)
+    - load_markets() appelé à la demande par les méthodes unifiées → un seul
+      chargement, les autres threads attendent le résultat
+    - last_request_* / last_http_response: diagnostics seulement, non fiables
+      pendant run_parallel (jamais lus par le bot)
+    La session HTTP (requests + pool urllib3, cf. http_pool) se partage sans risque.
+    """
+    if getattr(exchange, 'thread_lock', None) is not None:
+        return exchange
+
+    lock = threading.RLock()
+    throttle = exchange.throttle
+    load_markets = exchange.load_markets
+
+    def locked_throttle(cost=None):
+        with lock:
+            throttle(cost)
+            exchange.lastRestRequestTimestamp = exchange.milliseconds()
+
+    def locked_load_markets(*args, **kwargs):
+        with lock:
+            return load_markets(*args, **kwargs)
+
+    exchange.throttle = locked_throttle
+    exchange.load_markets = locked_load_markets
+    exchange.thread_lock = lock
+    return exchange
+
+
+def run_parallel(calls, max_workers=None, exchange=None):
+    """
+    Lance des appels indépendants en parallèle (threads)
+
+    Args:
+        calls: {nom: callable sans argument}
+        exchange: instance ccxt synchrone partagée par les appels (cf. share_across_threads)
+
+    Returns:
+        dict: {nom: résultat} (l'exception est renvoyée comme résultat, jamais levée)
+    """
+    if exchange is not None:
+        share_across_threads(exchange)
+    results = {}
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(calls)) as pool:
+        # Contexte copié par appel (priorité rate limiter, cf. request_priority)
+        futures = {name: pool.submit(contextvars.copy_context().run, call) for name, call in calls.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"   ❌ {name}: {e}")
+                results[name] = e
+
+    logger.debug(f"run_parallel: {len(calls)} appels en {(time.time() - started) * 1000:.0f}ms")
+    return results
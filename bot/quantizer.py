@@ -0,0 +1,146 @@
+"""
+📐 Quantizer prix/size - précision exacte de chaque contrat Bitget
+
+Remplace les seuils codés en dur (≥100 → 2 décimales, <1 → 5 décimales...)
+par les métadonnées du contrat:
+- pricePlace: nombre de décimales du prix
+- priceEndStep: pas du dernier chiffre (tick = priceEndStep × 10^-pricePlace)
+- volumePlace / sizeMultiplier / minTradeNum: décimales, pas et minimum de la size
+
+Les arrondis se font en Decimal (pas d'erreur binaire du type 0.30000000000000004)
+et dans le sens qui garde l'ordre valide:
+- TP LONG → vers le haut, TP SHORT → vers le bas (trigger du bon côté du mark)
+- LIMIT buy → vers le bas, LIMIT sell → vers le haut (jamais plus cher que voulu)
+- size → vers le bas (jamais plus de marge que prévu), au moins minTradeNum
+
+Usage:
+    q = get_quantizer(exchange, 'DOGE/USDT:USDT')
+    body['triggerPrice'] = q.format_price(q.tp_price(price, 'long'))
+    body['size'] = q.format_size(size)
+"""
+
+import logging
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP
+
+from market_cache import load_markets_cached, market_spec
+
+logger = logging.getLogger(__name__)
+
+ROUNDING = {'nearest': ROUND_HALF_UP, 'up': ROUND_CEILING, 'down': ROUND_FLOOR}
+
+# {symbol: SymbolQuantizer} (tables de ticks précalculées une fois par symbole)
+_quantizers = {}
+
+
+def legacy_price_places(price):
+    """Ancienne règle par niveau de prix (si les métadonnées manquent)"""
+    if price >= 100:
+        return 2
+    if price >= 1:
+        return 4
+    if price >= 0.0001:
+        return 5
+    return 8
+
+
+class SymbolQuantizer:
+    """Ticks prix/size d'un contrat"""
+
+    def __init__(self, symbol, price_place, price_end_step=1, volume_place=0,
+                 size_step=None, min_size=0):
+        self.symbol = symbol
+        self.price_place = price_place
+        self.volume_place = volume_place
+
+        self.price_exp = Decimal(1).scaleb(-price_place)
+        self.price_tick = Decimal(price_end_step) * self.price_exp
+        self.size_exp = Decimal(1).scaleb(-volume_place)
+        self.size_tick = Decimal(str(size_step)) if size_step else self.size_exp
+        self.min_size = Decimal(str(min_size or 0))
+
+    @classmethod
+    def from_market(cls, market):
+        """Depuis un marché ccxt (champs Bitget bruts dans market['info'])"""
+        spec = market_spec(market)
+        if spec['price_place'] is None or spec['volume_place'] is None:
+            return None
+        return cls(market['symbol'], spec['price_place'], spec['price_end_step'],
+                   spec['volume_place'], spec['multiplier'], spec['min_size'])
+
+    def _to_tick(self, value, tick, exp, mode):
+        steps = (Decimal(str(value)) / tick).to_integral_value(rounding=ROUNDING[mode])
+        return (steps * tick).quantize(exp)
+
+    # ========== PRIX ==========
+
+    def round_price(self, price, mode='nearest'):
+        """Prix au tick du contrat (mode: 'nearest', 'up', 'down')"""
+        return self._to_tick(price, self.price_tick, self.price_exp, mode)
+
+    def tp_price(self, price, hold_side):
+        """Trigger TP: LONG arrondi vers le haut, SHORT vers le bas"""
+        return self.round_price(price, 'up' if hold_side == 'long' else 'down')
+
+    def limit_price(self, price, side):
+        """LIMIT: buy arrondi vers le bas, sell vers le haut"""
+        return self.round_price(price, 'down' if side == 'buy' else 'up')
+
+    def format_price(self, price):
+        """Chaîne exacte attendue par l'API ('0.16234', '3512.40')"""
+        return format(self.round_price(price), 'f')
+
+    # ========== SIZE ==========
+
+    def round_size(self, size):
+        """Size au pas du contrat (vers le bas), au moins minTradeNum"""
+        rounded = self._to_tick(size, self.size_tick, self.size_exp, 'down')
+        return max(rounded, self.min_size.quantize(self.size_exp))
+
+    def format_size(self, size):
+        return format(self.round_size(size), 'f')
+
+
+class LegacyQuantizer(SymbolQuantizer):
+    """Fallback sans métadonnées: décimales selon le niveau de prix, size entière"""
+
+    def __init__(self, symbol):
+        super().__init__(symbol, price_place=8)
+
+    def round_price(self, price, mode='nearest'):
+        exp = Decimal(1).scaleb(-legacy_price_places(float(price)))
+        return self._to_tick(price, exp, exp, mode)
+
+
+def build_quantizers(markets):
+    """Précalcule les quantizers de tous les marchés USDT-FUTURES"""
+    quantizers = {}
+    for symbol, market in markets.items():
+        quantizer = SymbolQuantizer.from_market(market)
+        if quantizer:
+            quantizers[symbol] = quantizer
+    return quantizers
+
+
+def get_quantizer(exchange, symbol):
+    """Quantizer du symbole (marchés via cache disque, calculé une seule fois)"""
+    quantizer = _quantizers.get(symbol)
+    if quantizer:
+        return quantizer
+
+    try:
+        _quantizers.update(build_quantizers(load_markets_cached(exchange)))
+    except Exception as e:
+        logger.warning(f"⚠️ Métadonnées contrat indisponibles ({e})")
+
+    if symbol not in _quantizers:
+        logger.warning(f"⚠️ Pas de pricePlace/volumePlace pour {symbol}, arrondi par niveau de prix")
+        _quantizers[symbol] = LegacyQuantizer(symbol)
+    return _quantizers[symbol]
+
+
+def quantizer_from_markets(markets, symbol):
+    """Variante sans exchange (marchés déjà chargés, ex: client async)"""
+    if symbol not in _quantizers:
+        market = markets.get(symbol)
+        _quantizers[symbol] = (market and SymbolQuantizer.from_market(market)) or LegacyQuantizer(symbol)
+    return _quantizers[symbol]
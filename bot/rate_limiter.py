@@ -0,0 +1,190 @@
+"""
+🚦 Rate limiter inter-process - token bucket partagé par clé API
+
+Plusieurs process utilisent la même clé API (bot_api_key_1.py lance une
+instance par paire, launchers...). Le enableRateLimit de ccxt ne limite que
+SON process → ensemble, ils dépassent les limites Bitget par UID et finissent
+dans les boucles de retry (place_tpsl_order).
+
+Ici, un bucket par (clé API, groupe d'endpoints), stocké dans un fichier
+partagé (/dev/shm si dispo) et protégé par flock:
+- order:  POST privés (place/cancel/tpsl/batch) → 10 req/s
+- query:  GET privés (positions, ordres en cours) → 10 req/s
+- public: endpoints publics (ticker, marchés) → 20 req/s
+
+Priorités: une partie du bucket est réservée aux requêtes prioritaires.
+'high' (réouverture après TP, hedge initial) peut vider le bucket, 'normal'
+s'arrête à 20%, 'low' (polling de statut) à 50% → une rafale de polling sur
+plusieurs paires ne peut pas affamer la réouverture critique.
+
+Usage:
+    install_rate_limiter(exchange, api_key)     # remplace enableRateLimit de ccxt
+    with request_priority('high'):
+        exchange.create_order(...)
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import fcntl
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# {groupe: (req/s, burst)}
+GROUPS = {
+    'order': (10, 10),
+    'query': (10, 10),
+    'public': (20, 20)
+}
+
+# Fraction du burst réservée aux priorités supérieures
+PRIORITY_RESERVE = {'high': 0.0, 'normal': 0.2, 'low': 0.5}
+
+# Priorité par défaut selon le groupe (si aucun request_priority() actif)
+DEFAULT_PRIORITY = {'order': 'normal', 'query': 'low', 'public': 'normal'}
+
+STATE_DIR = os.getenv('RATE_LIMIT_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+SLOT = struct.Struct('dd')  # tokens, dernier refill (time.time)
+
+_priority = contextvars.ContextVar('request_priority', default=None)
+
+
+@contextlib.contextmanager
+def request_priority(level):
+    """Priorité des requêtes REST émises dans ce bloc ('high', 'normal', 'low')"""
+    if level not in PRIORITY_RESERVE:
+        raise ValueError(f"Priorité inconnue: {level}")
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def classify(api, method):
+    """Groupe d'endpoints d'une requête ccxt (api = ['private', 'mix'] pour Bitget)"""
+    access = api[0] if isinstance(api, (list, tuple)) else api
+    if access != 'private':
+        return 'public'
+    return 'order' if method.upper() == 'POST' else 'query'
+
+
+class SharedRateLimiter:
+    """Token buckets d'une clé API, partagés entre process via un fichier verrouillé"""
+
+    def __init__(self, api_key, groups=None, state_dir=None):
+        self.groups = dict(groups or GROUPS)
+        self.order = sorted(self.groups)
+
+        key_hash = hashlib.sha256((api_key or 'public').encode()).hexdigest()[:16]
+        self.path = os.path.join(state_dir or STATE_DIR, f"bitget_ratelimit_{key_hash}.bin")
+
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.thread_lock = threading.Lock()  # flock n'exclut pas les threads d'un même fd
+
+        self.stats = {group: {'requests': 0, 'waited': 0.0} for group in self.groups}
+
+    def _try_acquire(self, group, cost, priority):
+        """Prend `cost` jetons si possible → 0, sinon temps d'attente estimé (s)"""
+        rate, burst = self.groups[group]
+        floor = burst * PRIORITY_RESERVE[priority]
+        offset = self.order.index(group) * SLOT.size
+
+        with self.thread_lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                raw = os.pread(self.fd, SLOT.size, offset)
+                if len(raw) == SLOT.size:
+                    tokens, last = SLOT.unpack(raw)
+                    tokens = min(burst, tokens + max(0.0, now - last) * rate)
+                else:
+                    tokens = burst  # bucket neuf
+
+                if tokens - cost >= floor:
+                    tokens -= cost
+                    wait = 0.0
+                else:
+                    wait = (floor + cost - tokens) / rate
+
+                os.pwrite(self.fd, SLOT.pack(tokens, now), offset)
+                return wait
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def acquire(self, group, cost=1, priority=None):
+        """Bloque jusqu'à obtention des jetons (threads / ccxt synchrone)"""
+        priority = priority or _priority.get() or DEFAULT_PRIORITY[group]
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(group, cost, priority)
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+
+        self._record(group, waited, priority)
+        return waited
+
+    async def acquire_async(self, group, cost=1, priority=None):
+        """Version asyncio (ccxt.async_support): attend sans bloquer la boucle"""
+        priority = priority or _priority.get() or DEFAULT_PRIORITY[group]
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(group, cost, priority)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+
+        self._record(group, waited, priority)
+        return waited
+
+    def _record(self, group, waited, priority):
+        stats = self.stats[group]
+        stats['requests'] += 1
+        stats['waited'] += waited
+        if waited > 0.5:
+            logger.warning(f"🚦 Rate limit {group}/{priority}: {waited * 1000:.0f}ms d'attente")
+
+
+_limiters = {}
+
+
+def get_rate_limiter(api_key):
+    """Un limiter par clé API et par process (l'état est partagé via le fichier)"""
+    if api_key not in _limiters:
+        _limiters[api_key] = SharedRateLimiter(api_key)
+    return _limiters[api_key]
+
+
+def install_rate_limiter(exchange, api_key=None):
+    """
+    Branche le limiter partagé sur une instance ccxt (sync ou async)
+
+    Remplace exchange.fetch2 par une version qui prend un jeton avant chaque
+    requête et désactive le throttle interne de ccxt (limité au process).
+    """
+    limiter = get_rate_limiter(api_key or exchange.apiKey)
+    fetch2 = exchange.fetch2
+
+    if asyncio.iscoroutinefunction(fetch2):
+        async def limited_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            await limiter.acquire_async(classify(api, method))
+            return await fetch2(path, api, method, params, headers, body, config)
+    else:
+        def limited_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            limiter.acquire(classify(api, method))
+            return fetch2(path, api, method, params, headers, body, config)
+
+    exchange.fetch2 = limited_fetch2
+    exchange.enableRateLimit = False
+    exchange.rate_limiter = limiter
+    return limiter
@@ -0,0 +1,31 @@
+"""
+🔀 Redirection REST Bitget - bots pointés vers un autre serveur (mock local)
+
+BITGET_REST_URL=http://127.0.0.1:8765 → toutes les requêtes REST de
+l'instance ccxt partent vers cette URL (mock_bitget.py pour benchmarks et
+tests). Sans la variable, l'exchange n'est pas modifié.
+
+Usage:
+    exchange = override_rest_url(ccxt.bitget({...}))
+    point_exchange_to(exchange, 'http://127.0.0.1:8765')
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def point_exchange_to(exchange, base_url):
+    """Redirige une instance ccxt.bitget (sync ou async) vers base_url"""
+    exchange.urls['api'] = {key: base_url for key in exchange.urls['api']}
+    return exchange
+
+
+def override_rest_url(exchange):
+    """Si BITGET_REST_URL est défini, redirige l'exchange (mock local)"""
+    base_url = os.getenv('BITGET_REST_URL')
+    if base_url:
+        point_exchange_to(exchange, base_url)
+        logger.warning(f"🧪 REST Bitget redirigé vers {base_url}")
+    return exchange
@@ -0,0 +1,160 @@
+"""
+📏 Statistiques glissantes en temps constant - fenêtres par durée
+
+Remplace les `list(deque)[-n]` et `min(prices[-300:])` recalculés à chaque
+tick: pour chaque horizon (30s, 1min, 15min... ou plusieurs heures)
+- ago(h): prix au dernier tick ≤ maintenant - h (curseur qui n'avance que
+  vers l'avant → O(1) amorti par tick)
+- min(h) / max(h): deques monotones (O(1) amorti par tick, O(1) en lecture)
+
+Les fenêtres sont en SECONDES, pas en nombre de ticks: MEXC pousse à un
+rythme irrégulier, 300 ticks ne font pas toujours 5 minutes.
+
+Stockage: ring buffer (timestamp, prix) en array('d') (16 octets par tick,
+compact pour des dizaines de symboles) indexé par numéro de séquence, qui ne
+garde que l'historique utile au plus grand horizon (agrandi si besoin).
+
+Usage:
+    stats = SlidingWindowStats([30, 60, 300, 900])
+    stats.append(price)                  # ts = time.time() par défaut
+    old = stats.ago(300)                 # None si moins de 5 min d'historique
+    low = stats.min(300)
+"""
+
+import time
+from array import array
+from collections import deque
+
+
+class SlidingWindowStats:
+    """Ring buffer horodaté + lookback / min / max par horizon"""
+
+    def __init__(self, horizons, capacity=1024):
+        """
+        Args:
+            horizons: Durées (s) interrogeables via ago()/min()/max()
+            capacity: Taille initiale du ring buffer (doublée si besoin)
+        """
+        self.horizons = sorted(set(horizons))
+        if not self.horizons or self.horizons[0] <= 0:
+            raise ValueError(f"Horizons invalides: {horizons}")
+        self.span = self.horizons[-1]
+
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.prices = array('d', bytes(8 * capacity))
+        self.head = 0  # prochaine séquence
+        self.tail = 0  # plus ancienne séquence conservée
+
+        # {horizon: séquence du dernier tick ≤ now - horizon}
+        self.cursors = {h: None for h in self.horizons}
+        # {horizon: séquences candidates au min/max de (now - horizon, now]}
+        self.mins = {h: deque() for h in self.horizons}
+        self.maxs = {h: deque() for h in self.horizons}
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def _ts(self, seq):
+        return self.timestamps[seq % self.capacity]
+
+    def _px(self, seq):
+        return self.prices[seq % self.capacity]
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        timestamps = array('d', bytes(8 * capacity))
+        prices = array('d', bytes(8 * capacity))
+        for seq in range(self.tail, self.head):
+            timestamps[seq % capacity] = self._ts(seq)
+            prices[seq % capacity] = self._px(seq)
+        self.capacity, self.timestamps, self.prices = capacity, timestamps, prices
+
+    # ========== ÉCRITURE ==========
+
+    def append(self, price, ts=None):
+        """Ajoute un tick (ts en secondes, jamais antérieur au tick précédent)"""
+        ts = time.time() if ts is None else ts
+        if self.head > self.tail:
+            ts = max(ts, self._ts(self.head - 1))
+
+        if self.head - self.tail == self.capacity:
+            self._grow()
+
+        seq = self.head
+        self.timestamps[seq % self.capacity] = ts
+        self.prices[seq % self.capacity] = price
+        self.head += 1
+
+        for h in self.horizons:
+            cutoff = ts - h
+
+            # Lookback: avance le curseur jusqu'au dernier tick ≤ cutoff
+            cursor = self.cursors[h]
+            nxt = self.tail if cursor is None else cursor + 1
+            while nxt < seq and self._ts(nxt) <= cutoff:
+                cursor = nxt
+                nxt += 1
+            self.cursors[h] = cursor
+
+            # Min/max: deques monotones sur (cutoff, ts]
+            mins, maxs = self.mins[h], self.maxs[h]
+            while mins and self._px(mins[-1]) >= price:
+                mins.pop()
+            mins.append(seq)
+            while maxs and self._px(maxs[-1]) <= price:
+                maxs.pop()
+            maxs.append(seq)
+            while self._ts(mins[0]) <= cutoff:
+                mins.popleft()
+            while self._ts(maxs[0]) <= cutoff:
+                maxs.popleft()
+
+        # Rien d'antérieur au lookback du plus grand horizon n'est encore utile
+        oldest_needed = self.cursors[self.span]
+        if oldest_needed is not None and oldest_needed > self.tail:
+            self.tail = oldest_needed
+
+    # ========== LECTURE (O(1)) ==========
+
+    def _check(self, horizon):
+        if horizon not in self.cursors:
+            raise ValueError(f"Horizon {horizon}s non suivi (horizons: {self.horizons})")
+
+    def latest(self):
+        return self._px(self.head - 1) if self.head > self.tail else None
+
+    def oldest(self):
+        """Plus ancien prix conservé (~ il y a `span` secondes)"""
+        return self._px(self.tail) if self.head > self.tail else None
+
+    def coverage(self):
+        """Durée d'historique disponible (s)"""
+        if self.head == self.tail:
+            return 0.0
+        return self._ts(self.head - 1) - self._ts(self.tail)
+
+    def ago(self, horizon):
+        """Prix il y a `horizon` secondes (None si l'historique est plus court)"""
+        self._check(horizon)
+        cursor = self.cursors[horizon]
+        return None if cursor is None else self._px(cursor)
+
+    def change_pct(self, horizon):
+        """Variation (%) du dernier prix vs il y a `horizon` secondes"""
+        old = self.ago(horizon)
+        if not old:
+            return None
+        return (self.latest() - old) / old * 100
+
+    def min(self, horizon):
+        """Plus bas des `horizon` dernières secondes"""
+        self._check(horizon)
+        window = self.mins[horizon]
+        return self._px(window[0]) if window else None
+
+    def max(self, horizon):
+        """Plus haut des `horizon` dernières secondes"""
+        self._check(horizon)
+        window = self.maxs[horizon]
+        return self._px(window[0]) if window else None
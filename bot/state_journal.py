@@ -0,0 +1,107 @@
+"""
+📓 Journal d'état - redémarrage à chaud sans cleanup ni réouverture du hedge
+
+Chaque changement de Position (hedge ouvert, TP/Fibo traité) est ajouté en
+une ligne JSON compacte à un fichier append-only (flush + fsync): un crash
+au milieu d'une écriture ne laisse qu'une dernière ligne tronquée, ignorée
+à la lecture. Le fichier est compacté (dernier état seul, écriture atomique)
+toutes les `compact_every` lignes.
+
+Au démarrage, le bot relit le dernier état et le confronte à UN snapshot du
+compte (cleanup_engine.account_state): si positions et ordres correspondent,
+il reprend directement la surveillance au lieu de tout fermer et rouvrir
+(frais + spread économisés, redémarrage en ~1s).
+
+Fichier: data/state/<PAIRE>_key<id>.jsonl (ou STATE_DIR)
+
+Usage:
+    journal = StateJournal(journal_path('DOGE/USDT:USDT', 1))
+    journal.append({'pair': ..., 'orders': {...}})
+    state = journal.load()          # dernier état, None si absent ou compte à plat
+    journal.clear()                 # compte nettoyé: plus rien à reprendre
+"""
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = os.getenv('STATE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'state'))
+
+
+def journal_path(pair, api_key_id):
+    """data/state/DOGE_key1.jsonl"""
+    return os.path.join(STATE_DIR, f"{pair.split('/')[0]}_key{api_key_id}.jsonl")
+
+
+class StateJournal:
+    """Fichier append-only d'états successifs (une ligne JSON par état)"""
+
+    def __init__(self, path, compact_every=200):
+        self.path = os.path.abspath(path)
+        self.compact_every = compact_every
+        self.lines = None  # lignes dans le fichier (compté au premier append)
+
+    def append(self, state):
+        """Ajoute un état (None = compte à plat) et le rend durable avant de rendre la main"""
+        record = json.dumps({'ts': round(time.time(), 3), 'state': state}, separators=(',', ':'), default=str)
+
+        if self.lines is None:
+            lines = self._read_lines()
+            self.lines = len(lines)
+            if lines and self._torn_tail():
+                # Crash pendant la dernière écriture: on repart d'un fichier propre
+                self.lines = self.compact_every
+        if self.lines >= self.compact_every:
+            self._rewrite(record)
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(record + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.lines += 1
+
+    def clear(self):
+        """Marque le compte comme à plat (rien à reprendre au prochain démarrage)"""
+        self.append(None)
+
+    def load(self):
+        """Dernier état valide (None si fichier absent, vide ou compte à plat)"""
+        for line in reversed(self._read_lines()):
+            try:
+                return json.loads(line)['state']
+            except (ValueError, KeyError, TypeError):
+                # Dernière ligne tronquée par un crash: on prend la précédente
+                logger.warning(f"📓 Ligne de journal illisible ignorée: {line[:80]}")
+        return None
+
+    def _read_lines(self):
+        try:
+            with open(self.path) as f:
+                return [line for line in f.read().splitlines() if line.strip()]
+        except OSError:
+            return []
+
+    def _torn_tail(self):
+        """True si le fichier ne finit pas par un saut de ligne (écriture interrompue)"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b'\n'
+        except OSError:
+            return False
+
+    def _rewrite(self, record):
+        """Compaction: le fichier ne garde que le dernier état (écriture atomique)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(record + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.lines = 1
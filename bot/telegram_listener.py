@@ -0,0 +1,279 @@
+"""
+📥 Listener Telegram - long polling getUpdates dans un thread dédié
+
+check_telegram_updates() appelait getUpdates (timeout=0, nouvelle connexion
+TLS à chaque fois) depuis la boucle de trading toutes les 5s: commandes
+retardées jusqu'à 5s et boucle bloquée un aller-retour HTTP complet. Ici:
+- un thread daemon fait du long polling (timeout=30) sur une requests.Session
+  persistante: Telegram répond dès qu'une commande arrive (~1 RTT)
+- les commandes passent par une queue.Queue thread-safe
+- la boucle de trading les exécute avec dispatch() (aucun appel réseau):
+  les commandes modifient l'état du bot sur le thread de trading, jamais
+  en concurrence avec un handler de fill
+
+Un seul long polling par token: deux process qui partagent le même bot
+Telegram se volent les updates (Telegram répond 409 à l'un des deux). Avec
+`pair` (launch_multi_pairs.py: un process par paire), les listeners d'un
+même token s'organisent via RATE_LIMIT_DIR (/dev/shm), comme le rate limiter:
+- élection: le process qui tient le flock de leader.lock est le SEUL à
+  appeler getUpdates; les autres retentent le verrou (reprise automatique
+  si le leader meurt, le noyau libère le flock)
+- routage: '/status DOGE' → process DOGE seulement (argument retiré),
+  '/status' → tous les process enregistrés
+- les autres process lisent leur boîte (1 fichier par commande, écriture
+  atomique) → même queue, même dispatch() dans la boucle
+- offset getUpdates partagé: un nouveau leader ne rejoue pas les commandes
+
+Usage:
+    listener = TelegramListener(token, chat_id, pair='DOGE')
+    listener.start()
+    ...
+    listener.dispatch(bot.handle_telegram_command)       # dans la boucle
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+import requests
+
+from rate_limiter import STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 30     # secondes de long polling côté Telegram
+INBOX_INTERVAL = 0.2  # s: lecture de la boîte / nouvel essai du verrou leader (non leader)
+
+
+class TelegramListener:
+    """Réception des commandes Telegram (/xxx) hors de la boucle de trading"""
+
+    def __init__(self, token, chat_id=None, last_update_id=0, poll_timeout=POLL_TIMEOUT,
+                 api_url='https://api.telegram.org', pair=None, state_dir=None):
+        """
+        Args:
+            token: Token du bot Telegram (listener inactif si absent)
+            chat_id: Si fourni, ignore les commandes venant d'un autre chat
+            last_update_id: Dernier update déjà traité (reprise après redémarrage)
+            poll_timeout: Durée du long polling (s)
+            pair: Nom de la paire du process (ex: 'DOGE') → un seul poller par token,
+                  commandes routées par paire; None = ce process poll seul
+            state_dir: Répertoire partagé entre process (défaut: celui du rate limiter)
+        """
+        self.token = token
+        self.chat_id = str(chat_id) if chat_id else None
+        self.last_update_id = last_update_id
+        self.poll_timeout = poll_timeout
+        self.url = f"{api_url}/bot{token}/getUpdates"
+
+        self.commands = queue.Queue()
+        self.session = requests.Session()
+        self.running = False
+        self.thread = None
+
+        # Coordination entre process du même token
+        self.pair = pair
+        token_hash = hashlib.sha256(str(token).encode()).hexdigest()[:16]
+        self.root = os.path.join(state_dir or STATE_DIR, f"telegram_{token_hash}")
+        self.inbox = os.path.join(self.root, 'pairs', pair) if pair else None
+        self.leader_fd = None
+
+        self.received = 0
+        self.errors = 0
+
+    def start(self):
+        """Lance le thread de long polling (commandes exécutées par dispatch() depuis la boucle)"""
+        if not self.token or self.running:
+            return
+        self.running = True
+
+        if self.inbox:
+            os.makedirs(self.inbox, exist_ok=True)
+            for name in os.listdir(self.inbox):  # commandes d'une instance précédente
+                os.unlink(os.path.join(self.inbox, name))
+
+        self.thread = threading.Thread(target=self._poll_loop, daemon=True, name='telegram-listener')
+        self.thread.start()
+        logger.info(f"📥 Listener Telegram démarré (long polling {self.poll_timeout}s)")
+
+    def stop(self):
+        """Arrête le thread (le long polling en cours se termine seul, thread daemon)"""
+        self.running = False
+        if self.leader_fd is not None:
+            # Un autre process reprend le polling sans attendre la fin de celui-ci
+            os.close(self.leader_fd)
+            self.leader_fd = None
+        if self.inbox:
+            try:
+                for name in os.listdir(self.inbox):
+                    os.unlink(os.path.join(self.inbox, name))
+                os.rmdir(self.inbox)
+            except OSError:
+                pass
+
+    def is_leader(self):
+        return self.pair is None or self.leader_fd is not None
+
+    # ========== CONSOMMATEUR ==========
+
+    def dispatch(self, handler):
+        """
+        Exécute les commandes reçues depuis le dernier appel (non bloquant)
+
+        Returns:
+            int: Nombre de commandes traitées
+        """
+        handled = 0
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return handled
+            self._handle(handler, command)
+            handled += 1
+
+    def _handle(self, handler, command):
+        logger.info(f"📱 Commande Telegram reçue: {command}")
+        try:
+            handler(command)
+        except Exception as e:
+            logger.error(f"❌ Erreur traitement commande {command}: {e}")
+
+    # ========== LONG POLLING ==========
+
+    def _poll_loop(self):
+        backoff = 1
+        while self.running:
+            if self.inbox:
+                self._read_inbox()
+            if not self._lead():
+                time.sleep(INBOX_INTERVAL)
+                continue
+
+            try:
+                updates = self._get_updates()
+                backoff = 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ getUpdates échoué: {e} (nouvel essai dans {backoff}s)")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+
+            for update in updates:
+                self.last_update_id = max(self.last_update_id, update['update_id'])
+                command = self._command_from(update)
+                if command:
+                    self.received += 1
+                    self._route(command)
+            if updates and self.pair:
+                self._write(os.path.join(self.root, 'offset'), str(self.last_update_id))
+
+    def _get_updates(self):
+        params = {
+            'offset': self.last_update_id + 1,
+            'timeout': self.poll_timeout,
+            'allowed_updates': '["message"]'
+        }
+        response = self.session.get(self.url, params=params, timeout=self.poll_timeout + 10)
+        if response.status_code == 409:
+            raise RuntimeError("409 Conflict: un autre getUpdates utilise ce token")
+        response.raise_for_status()
+
+        data = response.json()
+        if not data.get('ok'):
+            raise RuntimeError(data.get('description', data))
+        return data.get('result', [])
+
+    def _command_from(self, update):
+        """Texte de la commande (/xxx ...) si l'update en contient une, venant du bon chat"""
+        message = update.get('message') or {}
+        text = (message.get('text') or '').strip()
+        if not text.startswith('/'):
+            return None
+        if self.chat_id and str(message.get('chat', {}).get('id')) != self.chat_id:
+            logger.warning(f"🚫 Commande ignorée (chat {message.get('chat', {}).get('id')} non autorisé): {text}")
+            return None
+        return text
+
+    # ========== PLUSIEURS PROCESS, UN TOKEN ==========
+
+    def _lead(self):
+        """True si ce process doit appeler getUpdates (verrou leader tenu ou process seul)"""
+        if self.is_leader():
+            return True
+
+        fd = os.open(os.path.join(self.root, 'leader.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        self.leader_fd = fd
+        try:
+            with open(os.path.join(self.root, 'offset')) as f:
+                self.last_update_id = max(self.last_update_id, int(f.read() or 0))
+        except (OSError, ValueError):
+            pass
+        logger.info(f"📥 Listener Telegram: {self.pair} reçoit les commandes pour tous les process du bot")
+        return True
+
+    def _pairs(self):
+        try:
+            return sorted(os.listdir(os.path.join(self.root, 'pairs')))
+        except OSError:
+            return []
+
+    def _route(self, command):
+        """'/cmd PAIRE ...' → process de la paire (argument retiré), sinon tous les process"""
+        if not self.pair:
+            self.commands.put(command)
+            return
+
+        pairs = set(self._pairs()) | {self.pair}
+        parts = command.split()
+        targets = {arg.upper() for arg in parts[1:]} & {pair.upper() for pair in pairs}
+        if targets:
+            command = ' '.join(part for part in parts if part.upper() not in targets)
+
+        for pair in sorted(pairs):
+            if targets and pair.upper() not in targets:
+                continue
+            if pair == self.pair:
+                self.commands.put(command)
+            else:
+                inbox = os.path.join(self.root, 'pairs', pair)
+                try:
+                    self._write(os.path.join(inbox, f"{time.time_ns()}_{uuid.uuid4().hex[:8]}.cmd"), command)
+                except OSError as e:
+                    logger.warning(f"⚠️ Commande {command} non transmise à {pair}: {e}")
+
+    def _read_inbox(self):
+        try:
+            names = sorted(name for name in os.listdir(self.inbox) if name.endswith('.cmd'))
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.inbox, name)
+            try:
+                with open(path) as f:
+                    command = f.read()
+                os.unlink(path)
+            except OSError:
+                continue
+            self.received += 1
+            self.commands.put(command)
+
+    @staticmethod
+    def _write(path, text):
+        """Écriture atomique (le lecteur ne voit jamais un fichier à moitié écrit)"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
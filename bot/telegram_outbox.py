@@ -0,0 +1,284 @@
+"""
+📤 Outbox Telegram - envoi en arrière-plan, jamais bloquant pour le trading
+
+send_telegram() faisait un requests.post(timeout=10) synchrone au milieu des
+handlers (handle_tp_long_executed envoie AVANT de réouvrir): un Telegram lent
+retardait la réouverture jusqu'à 10s. Ici:
+- send() empile le message et rend la main immédiatement (O(1))
+- un thread worker vide la file en respectant la limite par chat
+  (~1 message/s), regroupe les rafales en un seul message (≤ 4096 caractères,
+  coupé entre deux messages, jamais au milieu d'une balise HTML) et attend
+  retry_after sur les 429
+- rafale refusée par Telegram (400: HTML invalide...) → renvoyée message par
+  message, seul le message fautif est perdu
+- file bornée: en cas de saturation les messages sont d'abord fusionnés,
+  puis les plus anciens non urgents sont supprimés (compteur signalé dans le
+  message suivant); un message urgent n'est jamais supprimé (la file dépasse
+  sa borne plutôt)
+- arrêt de l'interpréteur (fin de run(), exception fatale): la file est vidée
+  par atexit, le worker daemon ne part pas avec les derniers messages
+
+Usage:
+    outbox = TelegramOutbox(token, chat_id)
+    outbox.send("✅ TP LONG TOUCHÉ")          # non bloquant
+    outbox.send("🛑 Arrêt", urgent=True)      # jamais supprimé, sans délai de regroupement
+    outbox.stop(timeout=5)                    # vide la file avant de quitter
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+MAX_LENGTH = 4096        # limite Telegram par message
+SEPARATOR = "\n\n"
+
+
+def split_message(text, limit=MAX_LENGTH):
+    """
+    Découpe un message trop long entre deux lignes (jamais au milieu d'une balise)
+
+    Une ligne seule plus longue que la limite est coupée net (texte brut en pratique).
+    """
+    if len(text) <= limit:
+        return [text]
+
+    chunks, current = [], ''
+    for line in text.split('\n'):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            candidate = line
+        current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TelegramOutbox:
+    """File d'envoi Telegram bornée, vidée par un thread daemon"""
+
+    def __init__(self, token, chat_id, max_queue=100, coalesce_window=0.5, min_interval=1.0,
+                 prefix='', api_url='https://api.telegram.org'):
+        """
+        Args:
+            token, chat_id: Identifiants Telegram (outbox inactive si absents)
+            max_queue: Messages en attente au maximum (au-delà: fusion puis suppression)
+            coalesce_window: Attente (s) après le premier message pour regrouper la rafale
+            min_interval: Intervalle minimum (s) entre deux envois au même chat
+            prefix: Préfixe ajouté à chaque message (ex: "[DOGE] ")
+        """
+        self.token = token
+        self.chat_id = chat_id
+        self.max_queue = max_queue
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.prefix = prefix
+        self.url = f"{api_url}/bot{token}/sendMessage"
+
+        self.cond = threading.Condition()
+        self.queue = deque()          # [(texte, urgent, heure d'arrivée, nb de messages)]
+        self.in_flight = False
+        self.running = False
+        self.thread = None
+        self.session = requests.Session()
+        self.last_sent = 0.0
+        self.exit_hook = False
+
+        self.stats = {'queued': 0, 'sent': 0, 'batches': 0, 'merged': 0, 'dropped': 0, 'failed': 0}
+        self.dropped_pending = 0      # suppressions pas encore signalées
+
+    @property
+    def enabled(self):
+        return bool(self.token and self.chat_id)
+
+    # ========== PRODUCTEUR (threads de trading) ==========
+
+    def send(self, message, urgent=False):
+        """
+        Met un message en file sans attendre le réseau
+
+        Returns:
+            bool: True si le message est en file (False si Telegram non configuré)
+        """
+        if not self.enabled:
+            return False
+
+        with self.cond:
+            for text in split_message(f"{self.prefix}{message}"):
+                if len(self.queue) >= self.max_queue and not self._relieve(urgent):
+                    continue
+                self.queue.append((text, urgent, time.monotonic(), 1))
+                self.stats['queued'] += 1
+            self._ensure_worker()
+            self.cond.notify()
+        return True
+
+    def _relieve(self, incoming_urgent):
+        """
+        File pleine: fusionne les deux derniers messages, sinon supprime le plus ancien non urgent
+
+        Returns:
+            bool: False si c'est le message entrant (non urgent) qui est supprimé
+        """
+        if len(self.queue) >= 2:
+            (before, urgent_a, ts, n_a), (last, urgent_b, _, n_b) = self.queue[-2], self.queue[-1]
+            if len(before) + len(SEPARATOR) + len(last) <= MAX_LENGTH:
+                self.queue.pop()
+                self.queue[-1] = (before + SEPARATOR + last, urgent_a or urgent_b, ts, n_a + n_b)
+                self.stats['merged'] += 1
+                return True
+
+        for i, (_, urgent, _, n) in enumerate(self.queue):
+            if not urgent:
+                del self.queue[i]
+                self._count_dropped(n)
+                return True
+
+        # Que des urgents en file: aucun n'est supprimé, un urgent de plus dépasse la borne
+        if incoming_urgent:
+            return True
+        self._count_dropped(1)
+        return False
+
+    def _count_dropped(self, n):
+        self.stats['dropped'] += n
+        self.dropped_pending += n
+        logger.warning(f"📤 Outbox Telegram saturée: message supprimé ({self.stats['dropped']} au total)")
+
+    def _ensure_worker(self):
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True, name='telegram-outbox')
+            self.thread.start()
+        if not self.exit_hook:
+            # Sortie sans stop() explicite: atexit passe avant l'arrêt des threads daemon
+            atexit.register(self.stop)
+            self.exit_hook = True
+
+    # ========== WORKER ==========
+
+    def _next_batch(self):
+        """Attend le créneau d'envoi puis dépile une rafale (≤ MAX_LENGTH). Appelé sous self.cond"""
+        while self.running and not self.queue:
+            self.cond.wait()
+        if not self.queue:
+            return None
+
+        # Regroupement: laisser arriver la rafale, et respecter la limite par chat
+        while self.running:
+            _, urgent, arrived, _ = self.queue[0]
+            ready_at = self.last_sent + self.min_interval
+            if not urgent:
+                ready_at = max(ready_at, arrived + self.coalesce_window)
+            delay = ready_at - time.monotonic()
+            if delay <= 0:
+                break
+            self.cond.wait(delay)
+
+        # Messages entiers seulement (chacun ≤ MAX_LENGTH, cf. split_message)
+        parts = []
+        if self.dropped_pending:
+            parts.append((f"⚠️ {self.dropped_pending} message(s) Telegram supprimé(s) (file saturée)", 0))
+            self.dropped_pending = 0
+        size = sum(len(text) + len(SEPARATOR) for text, _ in parts)
+        while self.queue and (not parts or size + len(self.queue[0][0]) <= MAX_LENGTH):
+            text, _, _, n = self.queue.popleft()
+            parts.append((text, n))
+            size += len(text) + len(SEPARATOR)
+
+        self.in_flight = True
+        return parts
+
+    def _run(self):
+        while True:
+            with self.cond:
+                parts = self._next_batch()
+            if parts is None:
+                return
+
+            sent = failed = 0
+            try:
+                status = self._post(SEPARATOR.join(text for text, _ in parts))
+                if status == 200:
+                    sent = sum(n for _, n in parts)
+                elif status is not None and len(parts) > 1:
+                    # Rafale refusée (HTML invalide dans un des messages) → un par un
+                    logger.warning(f"📤 Rafale Telegram refusée, renvoi message par message ({len(parts)})")
+                    for text, n in parts:
+                        time.sleep(self.min_interval)
+                        if self._post(text) == 200:
+                            sent += n
+                        else:
+                            failed += n
+                else:
+                    failed = sum(n for _, n in parts)
+            finally:
+                with self.cond:
+                    self.in_flight = False
+                    self.last_sent = time.monotonic()
+                    self.stats['sent'] += sent
+                    self.stats['failed'] += failed
+                    if sent:
+                        self.stats['batches'] += 1
+                    self.cond.notify_all()
+
+    def _post(self, text, attempts=3):
+        """
+        POST sendMessage (429: attend retry_after; erreur réseau: backoff court)
+
+        Returns:
+            int: statut HTTP (200 = envoyé), None si le réseau a échoué à chaque essai
+        """
+        data = {"chat_id": self.chat_id, "text": text, "parse_mode": "HTML"}
+        for attempt in range(attempts):
+            try:
+                response = self.session.post(self.url, data=data, timeout=10)
+                if response.status_code == 200:
+                    return 200
+                if response.status_code == 429:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+                    logger.warning(f"📤 Telegram 429: attente {retry_after}s")
+                    time.sleep(retry_after)
+                    continue
+                logger.error(f"❌ Erreur Telegram: {response.status_code} {response.text[:200]}")
+                return response.status_code
+            except Exception as e:
+                logger.warning(f"⚠️ Envoi Telegram échoué ({attempt + 1}/{attempts}): {e}")
+                time.sleep(0.5 * (attempt + 1))
+        return None
+
+    # ========== ARRÊT ==========
+
+    def flush(self, timeout=5):
+        """Attend que la file soit vide (True si tout est parti à temps)"""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self.queue or self.in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    return False
+                self.cond.notify_all()
+                self.cond.wait(min(remaining, 0.1))
+        return True
+
+    def stop(self, timeout=5):
+        """Vide la file (au plus `timeout` s) puis arrête le worker"""
+        flushed = self.flush(timeout)
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1)
+        return flushed
@@ -0,0 +1,45 @@
+"""
+Fixtures communes - les modules du bot s'importent entre eux depuis bot/
+"""
+
+import os
+import sys
+
+import pytest
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+
+
+@pytest.fixture(scope='session')
+def mock_env(tmp_path_factory):
+    """
+    Mock Bitget local (REST + WS) et environnement isolé, comme benchmark_latency
+
+    Returns:
+        (mock, base_url)
+    """
+    workdir = tmp_path_factory.mktemp('bot')
+    (workdir / 'logs').mkdir()
+    os.chdir(workdir)  # logs/bot_*.log du module bot
+
+    # Chemins lus à l'import des modules → avant tout import du bot
+    os.environ.update({
+        'BITGET_API_KEY': 'test', 'BITGET_SECRET': 'test', 'BITGET_PASSPHRASE': 'test',
+        'MARKET_CACHE_PATH': str(workdir / 'markets.json'),
+        'RATE_LIMIT_DIR': str(workdir),
+        'STATE_DIR': str(workdir),
+        'TELEGRAM_BOT_TOKEN': ''
+    })
+
+    from mock_bitget import MockExchange, start_mock
+
+    mock, server, base_url = start_mock(MockExchange({'DOGEUSDT': 0.2}))
+    ws_url = base_url.replace('http', 'ws', 1)
+    os.environ.update({
+        'BITGET_REST_URL': base_url,
+        'BITGET_WS_PRIVATE_URL': ws_url + '/v2/ws/private',
+        'BITGET_WS_PUBLIC_URL': ws_url + '/v2/ws/public'
+    })
+    yield mock, base_url
+    server.shutdown()
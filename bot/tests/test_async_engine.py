@@ -0,0 +1,75 @@
+"""
+Moteur asyncio contre le mock - hedge initial complet, jamais une jambe ouverte seule
+"""
+
+import asyncio
+
+import ccxt
+import pytest
+
+PAIR = 'DOGE/USDT:USDT'
+
+
+@pytest.fixture
+def flatten(mock_env):
+    """Compte à plat avant/après chaque test (client synchrone, cf. cleanup_engine)"""
+    from cleanup_engine import flatten_account
+    from rest_override import point_exchange_to
+
+    exchange = ccxt.bitget({'apiKey': 'test', 'secret': 'test', 'password': 'test',
+                            'options': {'defaultType': 'swap'}})
+    point_exchange_to(exchange, mock_env[1])
+
+    def run():
+        assert flatten_account(exchange, settle_delay=0.05)['clean']
+
+    run()
+    yield run
+    run()
+
+
+def run_engine(scenario):
+    """Connecte le moteur (1 paire, WebSocket privé du mock), exécute scenario(hedge)"""
+    import hedge_async_engine
+
+    engine = hedge_async_engine.HedgeEngine([{'pair': PAIR, 'api_key_id': 1}])
+    engine.outbox.token = None
+    hedge = engine.hedges[0]
+
+    async def main():
+        try:
+            await hedge.account.connect()
+            return await scenario(hedge)
+        finally:
+            await hedge.account.close()
+
+    return asyncio.run(main())
+
+
+def test_initial_hedge_opened_and_protected(flatten):
+    async def scenario(hedge):
+        assert hedge.account.stream_live()
+        assert await hedge.open_initial_hedge()
+        return await hedge.get_real_positions(), dict(hedge.position.orders), hedge.adapter.quantizer
+
+    real_pos, orders, quantizer = run_engine(scenario)
+    assert real_pos['long'] and real_pos['short']
+    assert all(orders.values())  # 2 TP + 2 LIMIT Fibo
+
+
+def test_one_rejected_leg_closes_the_other(flatten):
+    async def scenario(hedge):
+        real_create = hedge.exchange.create_order
+
+        async def short_rejected(symbol, type, side, amount, price=None, params={}):
+            if type == 'market' and side == 'sell':
+                raise ccxt.InsufficientFunds('bitget {"code":"40762","msg":"insufficient balance"}')
+            return await real_create(symbol, type, side, amount, price, params)
+
+        hedge.exchange.create_order = short_rejected
+        assert await hedge.open_initial_hedge() is False
+        assert not hedge.ready
+        return await hedge.get_real_positions()
+
+    real_pos = run_engine(scenario)
+    assert not real_pos['long'] and not real_pos['short']
@@ -0,0 +1,62 @@
+"""
+Backtest vectorisé - mêmes trades et même courbe d'equity que la boucle iterrows() de référence
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest_strategy_v4
+from backtest_fast import max_drawdown
+from backtest_strategy_v4 import BacktestEngine
+
+
+def candles(close):
+    index = pd.date_range('2026-01-01', periods=len(close), freq='15min')
+    return pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close}, index=index)
+
+
+@pytest.fixture
+def wide_tp(monkeypatch):
+    """TP (2%) au-delà du premier Fibo (0.8%): sinon le TP se déclenche toujours avant un Fibo au close"""
+    monkeypatch.setattr(backtest_strategy_v4, 'TP_PERCENT', 2)
+
+
+def random_walk(n=3000, seed=7, step=0.004):
+    rng = np.random.default_rng(seed)
+    return 0.2 * np.exp(np.cumsum(rng.normal(0, step, n)))
+
+
+def run(df, vectorized):
+    engine = BacktestEngine(offline=True)
+    engine.fetch_historical_data = lambda: df
+    engine.run_backtest(vectorized=vectorized)
+    return engine
+
+
+def test_vectorized_matches_reference_loop(mock_env, wide_tp):
+    df = candles(random_walk())
+    loop, fast = run(df, vectorized=False), run(df, vectorized=True)
+
+    types = {trade['type'].split('_')[0] for trade in loop.trades}
+    assert {'OPEN', 'TP', 'FIBO'} <= types  # les trois chemins sont couverts
+
+    assert len(fast.trades) == len(loop.trades)
+    for a, b in zip(fast.trades, loop.trades):
+        assert a['type'] == b['type'] and a['timestamp'] == b['timestamp']
+        assert a['price'] == b['price'] and a['commission'] == b['commission']
+    np.testing.assert_array_equal(fast.equity, loop.equity)
+    assert fast.capital == loop.capital
+    peak = pd.Series(loop.equity).cummax()
+    assert max_drawdown(fast.equity) == pytest.approx(((pd.Series(loop.equity) - peak) / peak * 100).min())
+
+
+def test_liquidation_stops_at_same_candle(mock_env, wide_tp, monkeypatch):
+    monkeypatch.setattr(backtest_strategy_v4, 'CAPITAL_INITIAL', 1)
+    close = np.concatenate([np.full(10, 0.2), np.linspace(0.2, 0.1, 200), np.full(50, 0.1)])
+    df = candles(close)
+    loop, fast = run(df, vectorized=False), run(df, vectorized=True)
+
+    assert loop.equity[-1] <= 0 and len(loop.equity) < len(close)
+    np.testing.assert_array_equal(fast.equity, loop.equity)
+    assert [t['type'] for t in fast.trades] == [t['type'] for t in loop.trades]
@@ -0,0 +1,94 @@
+"""
+Cleanup en masse contre le mock - quelques appels groupés au lieu d'un appel par ordre
+"""
+
+import ccxt
+import pytest
+
+from cleanup_engine import account_state, flatten_account
+
+
+@pytest.fixture
+def account(mock_env):
+    """Compte DOGE + ETH sur le mock, vidé avant et après le test"""
+    from rest_override import point_exchange_to
+
+    mock = mock_env[0]
+    exchange = ccxt.bitget({'apiKey': 'test', 'secret': 'test', 'password': 'test',
+                            'options': {'defaultType': 'swap'}})
+    point_exchange_to(exchange, mock_env[1])
+
+    with mock.lock:
+        mock.prices['ETHUSDT'] = 3000.0
+    flatten_account(exchange, settle_delay=0.05)
+    yield mock, exchange
+    flatten_account(exchange, settle_delay=0.05)
+    with mock.lock:
+        mock.prices.pop('ETHUSDT')
+
+
+def fill(mock, symbol, price, limits):
+    """Hedge ouvert + TP/SL + `limits` LIMIT au repos"""
+    with mock.lock:
+        for side in ('long', 'short'):
+            mock.open_position(symbol, side, 100, price)
+            mock.place_tpsl({'symbol': symbol, 'holdSide': side, 'planType': 'pos_profit',
+                             'triggerPrice': price * (1.01 if side == 'long' else 0.99)})
+        for i in range(limits):
+            mock.place_order({'symbol': symbol, 'side': 'buy', 'tradeSide': 'open', 'orderType': 'limit',
+                              'size': '1', 'price': str(price * (0.9 - i * 0.001))})
+
+
+def test_one_pair_flattened_in_grouped_calls(account):
+    mock, exchange = account
+    fill(mock, 'DOGEUSDT', 0.2, limits=120)
+    fill(mock, 'ETHUSDT', 3000.0, limits=2)
+
+    requests_before = mock.stats['requests']
+    report = flatten_account(exchange, ['DOGE/USDT:USDT'], settle_delay=0.05)
+
+    assert report['clean'] and report['rounds'] == 2
+    assert report['cancelled_orders'] == 120 and report['cancelled_plans'] == 2
+    assert report['closed'] == 2
+    # 3 snapshot + 3 batch-cancel (≤ 50 ids) + 1 cancel-plan + 1 close-positions + 3 vérification
+    assert mock.stats['requests'] - requests_before == 11
+
+    # L'autre paire n'est pas touchée
+    state = account_state(exchange)
+    assert sorted(side for symbol, side, size in state['positions']) == ['long', 'short']
+    assert {symbol for symbol, side, size in state['positions']} == {'ETHUSDT'}
+    assert len(state['orders']['ETHUSDT']) == 2 and len(state['plans']['ETHUSDT']) == 2
+
+
+def test_whole_account_market_fallback_when_flash_close_fails(account):
+    mock, exchange = account
+    fill(mock, 'DOGEUSDT', 0.2, limits=3)
+    fill(mock, 'ETHUSDT', 3000.0, limits=3)
+
+    def flash_close_down(params):
+        raise ccxt.ExchangeError('bitget {"code":"45001","msg":"Unknown error"}')
+
+    exchange.private_mix_post_v2_mix_order_close_positions = flash_close_down
+    report = flatten_account(exchange, settle_delay=0.05)
+
+    assert report['clean']
+    assert report['closed'] == 4  # MARKET reduce par côté
+    assert not mock.positions and not mock.orders and not mock.plans
+
+
+def test_position_already_closed_is_not_an_error(account):
+    mock, exchange = account
+    fill(mock, 'DOGEUSDT', 0.2, limits=0)
+
+    def closed_meanwhile(params):
+        with mock.lock:
+            mock.positions.clear()
+        raise ccxt.ExchangeError('bitget {"code":"22002","msg":"No position to close"}')
+
+    placed = []
+    exchange.private_mix_post_v2_mix_order_close_positions = closed_meanwhile
+    exchange.private_mix_post_v2_mix_order_place_order = placed.append
+    report = flatten_account(exchange, ['DOGEUSDT'], settle_delay=0.05)
+
+    assert report['clean'] and report['closed'] == 0
+    assert placed == []  # pas de MARKET de secours sur une position déjà fermée
@@ -0,0 +1,23 @@
+"""
+Codes d'erreur Bitget - lus dans le corps JSON ou en tête du message, jamais ailleurs
+"""
+
+import ccxt
+
+from cleanup_engine import ALREADY_GONE, error_code
+
+
+def test_code_from_ccxt_body():
+    assert error_code(ccxt.ExchangeError('bitget {"code":"22002","msg":"No position to close","data":null}')) == '22002'
+    assert error_code(ccxt.OrderNotFound('bitget {"code": "40768", "msg": "Order does not exist"}')) == '40768'
+
+
+def test_code_from_message_prefix():
+    assert error_code(RuntimeError('40721 order already cancelled')) == '40721'
+    assert error_code('40768 Order does not exist') in ALREADY_GONE
+
+
+def test_code_not_matched_inside_other_fields():
+    error = ccxt.ExchangeError('bitget {"code":"40762","msg":"balance","orderId":"1122002407680"}')
+    assert error_code(error) == '40762'
+    assert error_code(ccxt.NetworkError('timeout after 22002ms')) is None
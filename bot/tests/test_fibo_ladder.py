@@ -0,0 +1,86 @@
+"""
+Échelle Fibonacci - plan, diff avec les ordres au repos, niveaux remplis (sans réseau)
+"""
+
+import pytest
+
+from fibo_ladder import diff_ladder, filled_rungs, plan_ladder
+from quantizer import SymbolQuantizer
+
+LEVELS = [0.1, 0.2, 0.4, 0.7, 1.2]
+
+
+@pytest.fixture
+def doge():
+    return SymbolQuantizer('DOGE/USDT:USDT', price_place=5)
+
+
+def resting(rungs):
+    return [dict(rung, id=f"oid{rung['level']}") for rung in rungs]
+
+
+def test_plan_projects_average_and_doubles_size(doge):
+    rungs = plan_ladder('long', 0.2, 100, LEVELS, start_level=0, depth=3, quantizer=doge)
+
+    assert [rung['level'] for rung in rungs] == [0, 1, 2]
+    assert [rung['size'] for rung in rungs] == [100, 200, 400]
+    assert rungs[0]['price'] == 0.1998  # 0.2 * (1 - 0.1%), arrondi vers le bas (buy)
+    # Niveau suivant calculé depuis le prix moyen projeté (0.2 + 0.1998) / 2
+    assert rungs[1]['price'] == float(doge.limit_price(0.1999 * (1 - 0.2 / 100), 'buy'))
+    assert all(a['price'] > b['price'] for a, b in zip(rungs, rungs[1:]))
+
+
+def test_plan_short_above_and_capped_by_levels(doge):
+    rungs = plan_ladder('short', 0.2, 100, LEVELS, start_level=3, depth=3, quantizer=doge)
+
+    assert [rung['level'] for rung in rungs] == [3, 4]  # pas de niveau au-delà de FIBO_LEVELS
+    assert rungs[0]['price'] == 0.2014
+    assert rungs[1]['price'] > rungs[0]['price']
+
+
+def test_diff_after_full_fill_only_adds_deepest_level(doge):
+    ladder = resting(plan_ladder('long', 0.2, 100, LEVELS, 0, 3, doge))
+    filled, remaining = filled_rungs(ladder, 100, 200)
+    assert [rung['level'] for rung in filled] == [0]
+
+    # Fill au prix LIMIT: la projection est exacte
+    avg = (0.2 * 100 + filled[0]['price'] * 100) / 200
+    keep, cancel, place = diff_ladder(remaining, plan_ladder('long', avg, 200, LEVELS, 1, 3, doge))
+    assert [rung['level'] for rung in keep] == [1, 2]
+    assert cancel == []
+    assert [rung['level'] for rung in place] == [3]
+
+
+def test_diff_replaces_rung_out_of_tolerance(doge):
+    ladder = resting(plan_ladder('long', 0.2, 100, LEVELS, 0, 2, doge))
+    keep, cancel, place = diff_ladder(ladder, plan_ladder('long', 0.21, 100, LEVELS, 0, 2, doge))
+
+    assert keep == []
+    assert sorted(rung['id'] for rung in cancel) == ['oid0', 'oid1']
+    assert [rung['level'] for rung in place] == [0, 1]
+
+
+def test_filled_rungs_fast_move_fills_several_levels(doge):
+    ladder = resting(plan_ladder('long', 0.2, 100, LEVELS, 0, 3, doge))
+
+    filled, remaining = filled_rungs(ladder, 100, 800)
+    assert [rung['level'] for rung in filled] == [0, 1, 2]
+    assert remaining == []
+
+    filled, remaining = filled_rungs(ladder, 100, 400)
+    assert [rung['level'] for rung in filled] == [0, 1]
+    assert [rung['level'] for rung in remaining] == [2]
+
+
+def test_partial_fill_keeps_rung_resting(doge):
+    ladder = resting(plan_ladder('long', 0.2, 100, LEVELS, 0, 3, doge))
+
+    # L0 rempli à moitié: aucun niveau rempli, L0 reste au repos
+    filled, remaining = filled_rungs(ladder, 100, 150)
+    assert filled == []
+    assert [rung['level'] for rung in remaining] == [0, 1, 2]
+
+    # Le plan depuis la taille de référence inchangée garde L0 (le reste du fill suit)
+    keep, cancel, place = diff_ladder(remaining, plan_ladder('long', 0.2, 100, LEVELS, 0, 3, doge))
+    assert [rung['level'] for rung in keep] == [0, 1, 2]
+    assert cancel == [] and place == []
@@ -0,0 +1,63 @@
+"""
+Pool HTTP - cache DNS limité aux hôtes Bitget, oublié quand l'adresse ne répond plus
+"""
+
+import socket
+from urllib.parse import urlparse
+
+import ccxt
+import pytest
+from urllib3.exceptions import NewConnectionError
+
+import http_pool
+from http_pool import CachedDNSConnection, dns_cached, install_http_pool
+
+
+@pytest.fixture
+def fake_dns(monkeypatch):
+    """api.bitget.com → 127.0.0.1, compte les résolutions"""
+    real_getaddrinfo = socket.getaddrinfo
+    lookups = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host == 'api.bitget.com':
+            lookups.append(host)
+            host = '127.0.0.1'
+        return real_getaddrinfo(host, port, *args, **kwargs)
+
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    monkeypatch.setattr(http_pool, '_dns_cache', {})
+    return lookups
+
+
+def test_only_bitget_hosts_cached():
+    assert dns_cached('api.bitget.com') and dns_cached('bitget.com')
+    assert not dns_cached('api.telegram.org')
+    assert not dns_cached('notbitget.com')
+
+
+def test_process_resolver_untouched():
+    real_getaddrinfo = socket.getaddrinfo
+    install_http_pool(ccxt.bitget())
+    assert socket.getaddrinfo is real_getaddrinfo
+
+
+def test_cached_address_reused_then_forgotten_on_failure(mock_env, fake_dns):
+    port = urlparse(mock_env[1]).port
+
+    for _ in range(2):
+        conn = CachedDNSConnection('api.bitget.com', port, timeout=2)
+        conn.connect()
+        conn.close()
+    assert fake_dns == ['api.bitget.com']  # une seule résolution pour deux connexions
+
+    # Adresse en cache qui refuse la connexion (failover DNS côté Bitget)
+    closed = socket.socket()
+    closed.bind(('127.0.0.1', 0))
+    dead_port = closed.getsockname()[1]
+    closed.close()
+
+    http_pool.resolve('api.bitget.com', dead_port)
+    with pytest.raises(NewConnectionError):
+        CachedDNSConnection('api.bitget.com', dead_port, timeout=2).connect()
+    assert ('api.bitget.com', dead_port) not in http_pool._dns_cache
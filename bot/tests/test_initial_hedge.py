@@ -0,0 +1,56 @@
+"""
+Hedge initial contre le mock - jamais une jambe ouverte seule
+"""
+
+import pytest
+
+
+@pytest.fixture
+def bot(mock_env):
+    import bitget_hedge_multi_instance as bot_module
+
+    bot = bot_module.BitgetHedgeBotV2Fixed(pair='DOGE/USDT:USDT', use_ws=False, cold_start=True)
+    bot.outbox.token = None
+    bot.cleanup_all()
+    yield bot
+    bot.cleanup_all()
+
+
+def test_one_rejected_leg_closes_the_other(bot, mock_env, monkeypatch):
+    import bitget_hedge_multi_instance as bot_module
+
+    real_batch = bot_module.batch_place_orders
+
+    def short_rejected(exchange, symbol, orders):
+        long_result = real_batch(exchange, symbol, orders[:1])[0]
+        return [long_result, {'id': None, 'client_oid': None, 'error': '40762 insufficient balance'}]
+
+    monkeypatch.setattr(bot_module, 'batch_place_orders', short_rejected)
+
+    assert bot.open_initial_hedge() is False
+    real_pos = bot.get_real_positions()
+    assert not real_pos['long'] and not real_pos['short']
+
+
+def test_initial_hedge_protected(bot, mock_env):
+    assert bot.open_initial_hedge()
+    assert all(bot.position.orders.values())
+    assert bot.exchange.thread_lock is not None  # run_parallel sur l'instance partagée
+
+
+def test_error_after_accepted_batch_closes_both_legs(bot, mock_env, monkeypatch):
+    import ccxt
+
+    import bitget_hedge_multi_instance as bot_module
+
+    real_batch = bot_module.batch_place_orders
+
+    def accepted_then_timeout(exchange, symbol, orders):
+        real_batch(exchange, symbol, orders)
+        raise ccxt.RequestTimeout('bitget POST batch-place-order timed out')
+
+    monkeypatch.setattr(bot_module, 'batch_place_orders', accepted_then_timeout)
+
+    assert bot.open_initial_hedge() is False
+    real_pos = bot.get_real_positions()
+    assert not real_pos['long'] and not real_pos['short']
@@ -0,0 +1,37 @@
+"""
+Cache des marchés - refresh en tâche de fond sans toucher l'instance de trading hors verrou
+"""
+
+import threading
+
+import ccxt
+
+from market_cache import MarketCache
+from order_batch import share_across_threads
+
+
+def mock_exchange(base_url):
+    from rest_override import point_exchange_to
+
+    exchange = ccxt.bitget({'apiKey': 'test', 'secret': 'test', 'password': 'test',
+                            'options': {'defaultType': 'spot'}})
+    point_exchange_to(exchange, base_url)
+    return exchange
+
+
+def test_refresh_swaps_markets_under_thread_lock(mock_env, tmp_path):
+    exchange = share_across_threads(mock_exchange(mock_env[1]))
+    cache = MarketCache(path=str(tmp_path / 'markets.json'), ttl=60)
+
+    done = threading.Event()
+    with exchange.thread_lock:  # requête en cours sur le thread de trading
+        worker = threading.Thread(target=lambda: (cache.refresh_exchange(exchange), done.set()), daemon=True)
+        worker.start()
+        assert not done.wait(1)
+        assert not exchange.markets
+
+    assert done.wait(10)
+    assert 'DOGE/USDT:USDT' in exchange.markets
+    assert cache.read()[1]
+    # Options de l'instance de trading inchangées (fetch sur une instance éphémère)
+    assert exchange.options['defaultType'] == 'spot'
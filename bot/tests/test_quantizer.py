@@ -0,0 +1,20 @@
+"""
+Quantizer - chaînes envoyées à l'API Bitget
+"""
+
+from quantizer import LegacyQuantizer, SymbolQuantizer
+
+
+def test_format_never_uses_scientific_notation():
+    pepe = SymbolQuantizer('PEPE/USDT:USDT', price_place=10, size_step=10000000)
+    assert pepe.format_price(0.00000012) == '0.0000001200'
+    assert pepe.format_size(30000000) == '30000000'
+    assert LegacyQuantizer('PEPE/USDT:USDT').format_price(0.00000012) == '0.00000012'
+
+
+def test_limit_and_tp_rounding_direction():
+    doge = SymbolQuantizer('DOGE/USDT:USDT', price_place=5)
+    assert doge.format_price(doge.limit_price(0.162345, 'buy')) == '0.16234'
+    assert doge.format_price(doge.limit_price(0.162341, 'sell')) == '0.16235'
+    assert doge.format_price(doge.tp_price(0.162341, 'long')) == '0.16235'
+    assert doge.format_price(doge.tp_price(0.162349, 'short')) == '0.16234'
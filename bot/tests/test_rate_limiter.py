@@ -0,0 +1,90 @@
+"""
+Rate limiter - un bucket par clé API partagé entre process, réserve pour les priorités hautes
+"""
+
+import multiprocessing
+import time
+
+import ccxt
+
+from rate_limiter import SharedRateLimiter, classify, install_rate_limiter, request_priority
+
+GROUPS = {'order': (20, 5), 'query': (20, 5), 'public': (20, 5)}
+
+
+def test_classify_endpoint_groups():
+    assert classify(['private', 'mix'], 'POST') == 'order'
+    assert classify(['private', 'mix'], 'GET') == 'query'
+    assert classify(['public', 'mix'], 'GET') == 'public'
+    assert classify('public', 'GET') == 'public'
+
+
+def test_priority_reserve_kept_for_high(tmp_path):
+    limiter = SharedRateLimiter('key', GROUPS, state_dir=str(tmp_path))
+
+    # 'low' s'arrête à 50% du burst (5 → 2.5 jetons réservés)
+    waits = [limiter._try_acquire('query', 1, 'low') for _ in range(3)]
+    assert waits[:2] == [0.0, 0.0] and waits[2] > 0
+
+    # 'high' prend le reste du bucket
+    assert limiter._try_acquire('query', 1, 'high') == 0.0
+    assert limiter._try_acquire('query', 1, 'high') == 0.0
+    assert limiter._try_acquire('query', 1, 'high') == 0.0
+    assert limiter._try_acquire('query', 1, 'high') > 0
+
+    # Groupes indépendants
+    assert limiter._try_acquire('order', 1, 'normal') == 0.0
+
+
+def test_bucket_shared_by_instances_of_same_key(tmp_path):
+    first = SharedRateLimiter('key', GROUPS, state_dir=str(tmp_path))
+    second = SharedRateLimiter('key', GROUPS, state_dir=str(tmp_path))
+    other_key = SharedRateLimiter('other', GROUPS, state_dir=str(tmp_path))
+
+    for _ in range(5):
+        assert first._try_acquire('order', 1, 'high') == 0.0
+    assert second._try_acquire('order', 1, 'high') > 0
+    assert other_key._try_acquire('order', 1, 'high') == 0.0
+
+
+def burst(state_dir, count):
+    limiter = SharedRateLimiter('key', GROUPS, state_dir=state_dir)
+    for _ in range(count):
+        limiter.acquire('order', priority='high')
+
+
+def test_processes_share_the_rate(tmp_path):
+    ctx = multiprocessing.get_context('fork')
+    workers = [ctx.Process(target=burst, args=(str(tmp_path), 15)) for _ in range(2)]
+
+    start = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(20)
+    elapsed = time.monotonic() - start
+
+    assert all(worker.exitcode == 0 for worker in workers)
+    # 30 requêtes, burst 5, 20 req/s pour la clé → ≥ 1.25s (0.75s si chaque process avait son bucket)
+    assert elapsed >= 1.2
+
+
+def test_installed_on_ccxt_exchange(mock_env, tmp_path, monkeypatch):
+    import rate_limiter
+    from rest_override import point_exchange_to
+
+    monkeypatch.setattr(rate_limiter, '_limiters', {})
+    monkeypatch.setattr(rate_limiter, 'STATE_DIR', str(tmp_path))
+    exchange = ccxt.bitget({'apiKey': 'test', 'secret': 'test', 'password': 'test',
+                            'options': {'defaultType': 'swap'}})
+    point_exchange_to(exchange, mock_env[1])
+    limiter = install_rate_limiter(exchange)
+
+    assert not exchange.enableRateLimit
+    exchange.load_markets()
+    with request_priority('high'):
+        exchange.fetch_positions(['DOGE/USDT:USDT'])
+
+    assert limiter.stats['public']['requests'] >= 1
+    assert limiter.stats['query']['requests'] >= 1
+    assert limiter.stats['order']['requests'] == 0
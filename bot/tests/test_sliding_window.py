@@ -0,0 +1,89 @@
+"""
+Fenêtres glissantes par durée - mêmes réponses qu'un recalcul complet, ticks irréguliers
+"""
+
+import random
+
+import pytest
+
+from sliding_window import SlidingWindowStats
+
+HORIZONS = [5, 30, 60, 300]
+
+
+def brute_force(ticks, now, horizon):
+    """(ago, min, max) recalculés sur tout l'historique"""
+    cutoff = now - horizon
+    before = [price for ts, price in ticks if ts <= cutoff]
+    window = [price for ts, price in ticks if ts > cutoff]
+    return (before[-1] if before else None), min(window), max(window)
+
+
+def test_matches_full_rescan_on_irregular_ticks():
+    rng = random.Random(3)
+    stats = SlidingWindowStats(HORIZONS, capacity=4)  # plusieurs agrandissements du ring buffer
+    ticks = []
+    ts, price = 1000.0, 100.0
+
+    for _ in range(3000):
+        ts += rng.choice([0.0, 0.05, 0.3, 1.0, 4.0, 20.0])  # rafales et trous
+        price *= 1 + rng.gauss(0, 0.002)
+        stats.append(price, ts)
+        ticks.append((ts, price))
+
+        for horizon in HORIZONS:
+            ago, low, high = brute_force(ticks, ts, horizon)
+            assert stats.ago(horizon) == ago
+            assert stats.min(horizon) == low
+            assert stats.max(horizon) == high
+
+    assert stats.latest() == price
+    # Historique borné par le plus grand horizon (+ le tick de lookback)
+    assert stats.coverage() < 300 + 20 + 1e-9
+    assert len(stats) < len(ticks)
+
+
+def test_lookback_needs_enough_history():
+    stats = SlidingWindowStats([60])
+    stats.append(100.0, 0)
+    stats.append(99.0, 30)
+    assert stats.ago(60) is None and stats.change_pct(60) is None
+
+    stats.append(98.0, 61)
+    assert stats.ago(60) == 100.0
+    assert stats.change_pct(60) == pytest.approx(-2.0)
+
+
+def test_timestamps_never_go_backwards():
+    stats = SlidingWindowStats([5])
+    stats.append(1.0, 100)
+    stats.append(2.0, 90)  # horloge recule → traité comme simultané
+    stats.append(3.0, 105)
+    assert stats.ago(5) == 2.0
+
+
+def test_unknown_horizon_rejected():
+    stats = SlidingWindowStats([30])
+    with pytest.raises(ValueError):
+        stats.ago(60)
+    with pytest.raises(ValueError):
+        SlidingWindowStats([])
+
+
+def test_crash_detected_over_wall_clock_window(mock_env):
+    from eth_futures_telegram import ETHFuturesBot
+
+    bot = ETHFuturesBot(['ETH_USDT'])
+    state = bot.symbols['ETH_USDT']
+
+    # Ticks irréguliers: 400 pushes en 10s, puis plus rien pendant 40s
+    for i in range(400):
+        state.stats.append(3000.0, 1000 + i * 0.025)
+    state.stats.append(2930.0, 1050)
+    state.current_price = 2930.0
+
+    crash = bot.check_crash(state)
+    assert crash['timeframe'] == '30 secondes'
+    assert crash['old_price'] == 3000.0
+    assert crash['change_pct'] == pytest.approx(-2.333, abs=1e-3)
+    assert bot.check_high_variation(state) is None  # moins d'une minute d'historique
@@ -0,0 +1,84 @@
+"""
+Journal d'état - dernier état lisible après un crash, reprise à chaud seulement si le compte correspond
+"""
+
+import pytest
+
+from state_journal import StateJournal
+
+
+def test_last_state_survives_torn_write(tmp_path):
+    journal = StateJournal(str(tmp_path / 'state' / 'DOGE_key1.jsonl'))
+    assert journal.load() is None
+
+    journal.append({'step': 1})
+    journal.append({'step': 2})
+    with open(journal.path, 'a') as f:
+        f.write('{"ts":1.0,"state":{"st')  # crash au milieu d'une écriture
+
+    # Nouveau process: la ligne tronquée est ignorée, puis le fichier repart propre
+    journal = StateJournal(journal.path)
+    assert journal.load() == {'step': 2}
+    journal.append({'step': 3})
+    assert journal.load() == {'step': 3}
+    with open(journal.path) as f:
+        assert len(f.read().splitlines()) == 1
+
+    journal.clear()
+    assert journal.load() is None
+
+
+def test_compaction_keeps_only_latest(tmp_path):
+    journal = StateJournal(str(tmp_path / 'DOGE_key1.jsonl'), compact_every=5)
+    for step in range(12):
+        journal.append({'step': step})
+
+    with open(journal.path) as f:
+        assert len(f.read().splitlines()) <= 5
+    assert journal.load() == {'step': 11}
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+@pytest.fixture
+def bot(mock_env):
+    import bitget_hedge_multi_instance as bot_module
+
+    bot = bot_module.BitgetHedgeBotV2Fixed(pair='DOGE/USDT:USDT', use_ws=False, cold_start=True)
+    bot.outbox.token = None
+    bot.cleanup_all()
+    yield bot
+    bot.cleanup_all()
+
+
+def restarted():
+    """Nouveau process sur le même journal (sans cleanup au démarrage)"""
+    import bitget_hedge_multi_instance as bot_module
+
+    bot = bot_module.BitgetHedgeBotV2Fixed(pair='DOGE/USDT:USDT', use_ws=False)
+    bot.outbox.token = None
+    return bot
+
+
+def test_warm_restart_resumes_matching_account(bot):
+    assert bot.open_initial_hedge()
+
+    other = restarted()
+    assert other.resume_from_journal()
+    assert other.position.to_dict() == bot.position.to_dict()
+
+
+def test_cold_start_when_account_differs(bot):
+    assert bot.open_initial_hedge()
+    bot.exchange.private_mix_post_v2_mix_order_cancel_order(
+        {'symbol': 'DOGEUSDT', 'productType': 'USDT-FUTURES', 'orderId': bot.position.orders['double_long']})
+
+    other = restarted()
+    assert not other.resume_from_journal()  # LIMIT disparu pendant l'arrêt
+    assert not other.position.long_open
+
+
+def test_flat_account_leaves_nothing_to_resume(bot):
+    assert bot.open_initial_hedge()
+    assert bot.cleanup_all()
+    assert bot.journal.load() is None
+    assert not restarted().resume_from_journal()
@@ -0,0 +1,53 @@
+"""
+Détection en push (WebSocket privé du mock) - aucun fill perdu après un handler
+"""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def bot(mock_env):
+    import bitget_hedge_multi_instance as bot_module
+
+    bot = bot_module.BitgetHedgeBotV2Fixed(pair='DOGE/USDT:USDT', use_ws=True, cold_start=True)
+    bot.outbox.token = None
+    bot.cleanup_all()
+    assert bot.start_private_stream()
+    assert bot.open_initial_hedge()
+    yield bot
+    bot.stream.stop()
+    bot.cleanup_all()
+
+
+def test_back_to_back_fills_handled_without_resync(bot, mock_env):
+    mock, _ = mock_env
+    handled = []
+    for name in ('handle_tp_long_executed', 'handle_tp_short_executed',
+                 'handle_fibo_long_executed', 'handle_fibo_short_executed'):
+        handler = getattr(bot, name)
+        setattr(bot, name, lambda handler=handler, name=name: (handled.append(name), handler()))
+
+    # Un seul tick franchit le TP LONG (+0.5%) ET le LIMIT SHORT Fibo (+0.3%)
+    mock.set_price('DOGEUSDT', bot.position.entry_price_long * 1.0055)
+
+    # Push seulement: le resync REST périodique (30s en prod) n'est jamais appelé
+    deadline = time.time() + 10
+    while time.time() < deadline and len(handled) < 2:
+        bot.process_stream_events(timeout=0.25)
+
+    assert sorted(handled) == ['handle_fibo_short_executed', 'handle_tp_long_executed']
+    assert bot.position.short_fib_level == 1
+
+
+def test_other_pair_push_costs_no_rest_call(bot, monkeypatch):
+    calls = []
+    monkeypatch.setattr(bot, 'check_events', lambda real_pos=None: calls.append(real_pos) or False)
+    bot.stream.drain()
+
+    # Autre paire de la même clé API: ni détection ni confirmation REST
+    bot.stream.events.put({'type': 'positions', 'ts': time.time(),
+                           'positions': {'ETHUSDT': {'long': None, 'short': None}}})
+    assert bot.process_stream_events(timeout=1) is False
+    assert calls == []
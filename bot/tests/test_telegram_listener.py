@@ -0,0 +1,106 @@
+"""
+Listener Telegram - un seul getUpdates par token, commandes routées par paire
+"""
+
+import time
+
+import pytest
+
+import telegram_listener
+from telegram_listener import TelegramListener
+
+CHAT_ID = 42
+
+
+def update(update_id, text):
+    return {'update_id': update_id, 'message': {'text': text, 'chat': {'id': CHAT_ID}}}
+
+
+class FakeTelegram:
+    """getUpdates partagé par tous les listeners du token: compte les appels par paire"""
+
+    def __init__(self):
+        self.pending = []
+        self.polls = {}
+
+    def attach(self, listener):
+        def get_updates():
+            self.polls[listener.pair] = self.polls.get(listener.pair, 0) + 1
+            updates = [u for u in self.pending if u['update_id'] > listener.last_update_id]
+            if not updates:
+                time.sleep(0.05)  # long polling
+            return updates
+
+        listener._get_updates = get_updates
+        return listener
+
+
+def received(listener, count, timeout=5):
+    commands = []
+    deadline = time.time() + timeout
+    while len(commands) < count and time.time() < deadline:
+        listener.dispatch(commands.append)
+        time.sleep(0.02)
+    return commands
+
+
+@pytest.fixture
+def listeners(tmp_path, monkeypatch):
+    monkeypatch.setattr(telegram_listener, 'INBOX_INTERVAL', 0.02)
+    telegram = FakeTelegram()
+    started = []
+
+    def start(pair):
+        listener = telegram.attach(TelegramListener('123:abc', CHAT_ID, pair=pair, state_dir=str(tmp_path)))
+        listener.start()
+        started.append(listener)
+        return listener
+
+    yield telegram, start
+    for listener in started:
+        listener.stop()
+
+
+def wait_leader(*listeners, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        leaders = [listener for listener in listeners if listener.is_leader()]
+        if leaders:
+            return leaders
+        time.sleep(0.02)
+    return []
+
+
+def test_single_poller_routes_by_pair(listeners):
+    telegram, start = listeners
+    doge = start('DOGE')
+    assert wait_leader(doge) == [doge]
+    eth = start('ETH')
+    time.sleep(0.2)
+
+    assert not eth.is_leader()
+    assert set(telegram.polls) == {'DOGE'}  # ETH ne touche jamais getUpdates (pas de 409)
+
+    telegram.pending += [update(1, '/status'), update(2, '/setmargin eth 5'), update(3, '/help')]
+    assert received(doge, 2) == ['/status', '/help']
+    assert received(eth, 3) == ['/status', '/setmargin 5', '/help']
+    assert set(telegram.polls) == {'DOGE'}
+
+
+def test_next_process_polls_after_leader_stops(listeners):
+    telegram, start = listeners
+    doge = start('DOGE')
+    assert wait_leader(doge) == [doge]
+    eth = start('ETH')
+
+    telegram.pending.append(update(7, '/status'))
+    assert received(doge, 1) == ['/status']
+    assert received(eth, 1) == ['/status']
+
+    doge.stop()
+    assert wait_leader(eth) == [eth]
+
+    # Offset repris depuis le fichier partagé: /status n'est pas rejoué
+    telegram.pending.append(update(8, '/help'))
+    assert received(eth, 2, timeout=1) == ['/help']
+    assert eth.last_update_id == 8
@@ -0,0 +1,77 @@
+"""
+Outbox Telegram - file bornée, découpage, renvoi message par message (sans réseau)
+"""
+
+import pytest
+
+from telegram_outbox import MAX_LENGTH, SEPARATOR, TelegramOutbox, split_message
+
+
+@pytest.fixture
+def outbox():
+    outbox = TelegramOutbox('token', 'chat', max_queue=3, coalesce_window=0, min_interval=0)
+    yield outbox
+    outbox.stop(timeout=1)
+
+
+def hold_worker(outbox):
+    """File remplie sans worker (pas de consommation pendant le test)"""
+    outbox.running = True
+    outbox.exit_hook = True
+
+
+def test_urgent_messages_never_dropped(outbox):
+    hold_worker(outbox)
+    long_text = 'x' * 3000  # deux messages ne tiennent pas ensemble → pas de fusion possible
+
+    for i in range(5):
+        outbox.send(f"U{i} {long_text}", urgent=True)
+    assert [text[:2] for text, *_ in outbox.queue] == ['U0', 'U1', 'U2', 'U3', 'U4']
+    assert outbox.stats['dropped'] == 0
+
+    # Un non urgent sur une file pleine d'urgents: c'est lui qui est supprimé
+    outbox.send(f"N {long_text}")
+    assert len(outbox.queue) == 5
+    assert outbox.stats['dropped'] == 1
+
+
+def test_oldest_non_urgent_dropped_first(outbox):
+    hold_worker(outbox)
+    long_text = 'x' * 3000
+    outbox.send(f"N0 {long_text}")
+    outbox.send(f"U1 {long_text}", urgent=True)
+    outbox.send(f"N2 {long_text}")
+    outbox.send(f"U3 {long_text}", urgent=True)
+    assert [text[:2] for text, *_ in outbox.queue] == ['U1', 'N2', 'U3']
+
+
+def test_long_html_split_between_lines():
+    line = '<b>TP LONG</b> @ <code>0.16234</code>'
+    chunks = split_message('\n'.join([line] * 300))
+    assert len(chunks) > 1
+    assert all(len(chunk) <= MAX_LENGTH for chunk in chunks)
+    assert all(chunk.split('\n') == [line] * len(chunk.split('\n')) for chunk in chunks)
+    assert sum(len(chunk.split('\n')) for chunk in chunks) == 300
+
+
+def test_rejected_batch_resent_one_by_one(outbox, monkeypatch):
+    posted = []
+
+    def fake_post(text, attempts=3):
+        posted.append(text)
+        if SEPARATOR in text or '<b>bad' in text:
+            return 400  # rafale contenant le message au HTML invalide
+        return 200
+
+    monkeypatch.setattr(outbox, '_post', fake_post)
+    hold_worker(outbox)
+    outbox.send('ok 1')
+    outbox.send('<b>bad')
+    outbox.send('ok 2')
+    outbox.running = False
+    outbox._ensure_worker()
+
+    assert outbox.flush(timeout=2)
+    assert posted[0] == SEPARATOR.join(['ok 1', '<b>bad', 'ok 2'])
+    assert posted[1:] == ['ok 1', '<b>bad', 'ok 2']
+    assert outbox.stats['sent'] == 2 and outbox.stats['failed'] == 1